@@ -11,8 +11,19 @@ from dotenv import load_dotenv
 dotenv_path = os.path.join(os.path.dirname(__file__), '..', '.env')
 load_dotenv(dotenv_path)
 
-db = SQLAlchemy()
+from .db_session import AppSession
+from .db_engine import build_engine_options, parse_endpoint_timeouts, init_db_engine
+from .db_replicas import build_replica_binds, init_read_replicas
+from .db_shards import build_shard_binds, init_sharding
+
+# expire_on_commit=False: las respuestas de escritura se construyen con el estado ya cargado tras el
+# commit, sin un SELECT por atributo. La sesión se descarta al final de cada petición.
+# updated_at (onupdate=datetime.utcnow) se calcula en Python y el flush lo deja en la instancia, así que
+# no hace falta UPDATE ... RETURNING ni refresh(); solo un server_default/server_onupdate lo necesitaría.
+db = SQLAlchemy(session_options={"class_": AppSession, "expire_on_commit": False})
 migrate = Migrate()
+# Orígenes del frontend; también los usa el camino ASGI (app.asgi) para sus respuestas
+CORS_ORIGINS = ["http://localhost:5173", "http://127.0.0.1:5173"]
 # cors = CORS() # Podemos inicializarlo dentro de create_app
 
 def create_app(config_class=None):
@@ -33,12 +44,80 @@ def create_app(config_class=None):
 
     app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'static', 'avatars')
 
+    # Caché de respuestas del dashboard: 'null' (desactivada), 'redis' o 'memory' (LRU en proceso).
+    # La invalidación tras una escritura solo llega a los demás procesos con un backend compartido
+    # (redis); 'memory' sirve únicamente con un solo worker y se rechaza si WEB_CONCURRENCY > 1.
+    app.config['DASHBOARD_CACHE_BACKEND'] = os.environ.get('DASHBOARD_CACHE_BACKEND', 'null')
+    app.config['WEB_CONCURRENCY'] = int(os.environ.get('WEB_CONCURRENCY', 1)) # Workers de gunicorn (lo lee como valor por defecto de --workers)
+    app.config['DASHBOARD_CACHE_MAX_ENTRIES'] = int(os.environ.get('DASHBOARD_CACHE_MAX_ENTRIES', 2048))
+    app.config['DASHBOARD_CACHE_TTL_SECONDS'] = int(os.environ.get('DASHBOARD_CACHE_TTL_SECONDS', 300))
+    app.config['DASHBOARD_CACHE_REDIS_URL'] = os.environ.get('DASHBOARD_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    # Hilos para calcular en paralelo los paneles de /api/dashboard/bundle (1 = secuencial)
+    app.config['DASHBOARD_BUNDLE_WORKERS'] = int(os.environ.get('DASHBOARD_BUNDLE_WORKERS', 4))
+    app.config['BATCH_MAX_SUBREQUESTS'] = int(os.environ.get('BATCH_MAX_SUBREQUESTS', 20))
+    app.config['BULK_STATUS_MAX_ITEMS'] = int(os.environ.get('BULK_STATUS_MAX_ITEMS', 500))
+    # Importación masiva de misiones (filas por INSERT multi-fila y máximo por petición)
+    app.config['IMPORT_CHUNK_SIZE'] = int(os.environ.get('IMPORT_CHUNK_SIZE', 500))
+    app.config['IMPORT_MAX_ROWS'] = int(os.environ.get('IMPORT_MAX_ROWS', 10000))
+    # TTL de las referencias memorizadas por usuario (quest por defecto)
+    app.config['LOOKUP_CACHE_TTL_SECONDS'] = int(os.environ.get('LOOKUP_CACHE_TTL_SECONDS', 60))
+    # Instrumentación SQL: consultas por petición y detección de N+1
+    app.config['SQL_INSTRUMENTATION_ENABLED'] = os.environ.get('SQL_INSTRUMENTATION_ENABLED', 'true').lower() == 'true'
+    app.config['SQL_N_PLUS_ONE_THRESHOLD'] = int(os.environ.get('SQL_N_PLUS_ONE_THRESHOLD', 5))
+    app.config['SQL_REQUEST_QUERY_WARN_COUNT'] = int(os.environ.get('SQL_REQUEST_QUERY_WARN_COUNT', 50))
+    # Métricas por endpoint (/metrics en formato Prometheus) y cabecera Server-Timing
+    app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN') # /metrics exige 'Authorization: Bearer <token>'; sin token no se registra
+    app.config['SERVER_TIMING_ENABLED'] = os.environ.get('SERVER_TIMING_ENABLED', 'true').lower() == 'true'
+    # Profiling bajo demanda: solo para los emails listados (separados por comas)
+    app.config['PROFILING_ENABLED'] = os.environ.get('PROFILING_ENABLED', 'false').lower() == 'true'
+    app.config['PROFILING_ADMIN_EMAILS'] = [e.strip() for e in os.environ.get('PROFILING_ADMIN_EMAILS', '').split(',') if e.strip()]
+    app.config['PROFILING_OUTPUT_DIR'] = os.environ.get('PROFILING_OUTPUT_DIR') # Por defecto <instance_path>/profiles
+    app.config['PROFILING_SAMPLE_INTERVAL_MS'] = int(os.environ.get('PROFILING_SAMPLE_INTERVAL_MS', 5))
+    app.config['TAG_BULK_MAX_ENTITIES'] = int(os.environ.get('TAG_BULK_MAX_ENTITIES', 1000))
+    # Filas por lote del cursor de servidor en la exportación de cuentas
+    app.config['EXPORT_BATCH_SIZE'] = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+    # Pool de conexiones (por worker). Con pgbouncer en modo transacción: DB_PGBOUNCER_MODE=true
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 5))
+    app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    app.config['DB_POOL_TIMEOUT'] = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    app.config['DB_POOL_PRE_PING'] = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    app.config['DB_PGBOUNCER_MODE'] = os.environ.get('DB_PGBOUNCER_MODE', 'false').lower() == 'true'
+    app.config['DB_APPLICATION_NAME'] = os.environ.get('DB_APPLICATION_NAME', 'iterpolaris')
+    # statement_timeout por defecto (0 = sin límite) y por endpoint: "export_bp.export_account=300000,..."
+    app.config['DB_STATEMENT_TIMEOUT_MS'] = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+    app.config['DB_STATEMENT_TIMEOUTS'] = parse_endpoint_timeouts(os.environ.get('DB_STATEMENT_TIMEOUTS'))
+    # Réplicas de lectura (URLs separadas por comas) y ventana de lectura en el primario tras escribir
+    app.config['DATABASE_REPLICA_URLS'] = [u.strip() for u in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if u.strip()]
+    app.config['READ_REPLICA_STICKY_SECONDS'] = int(os.environ.get('READ_REPLICA_STICKY_SECONDS', 5))
+    # Sharding por usuario: DATABASE_URL es el shard 0 (y guarda el directorio); estas URLs son los shards 1..N-1
+    app.config['SHARD_DATABASE_URLS'] = [u.strip() for u in os.environ.get('SHARD_DATABASE_URLS', '').split(',') if u.strip()]
+    app.config['SHARD_DIRECTORY_CACHE_SECONDS'] = int(os.environ.get('SHARD_DIRECTORY_CACHE_SECONDS', 10))
+    # Servidor ASGI (asgi.py): lecturas del dashboard con consultas concurrentes sobre engines asyncio
+    app.config['ASYNC_READS_ENABLED'] = os.environ.get('ASYNC_READS_ENABLED', 'true').lower() == 'true'
+    app.config['ASGI_WSGI_WORKERS'] = int(os.environ.get('ASGI_WSGI_WORKERS', 10)) # Hilos para las rutas Flask servidas desde ASGI
+
+    # Configuración explícita (tests, benchmarks): clase/objeto o dict; sobrescribe lo leído del entorno
+    if isinstance(config_class, dict):
+        app.config.from_mapping(config_class)
+    elif config_class is not None:
+        app.config.from_object(config_class)
+
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', build_engine_options(app.config))
+    if app.config['DATABASE_REPLICA_URLS'] or app.config['SHARD_DATABASE_URLS']:
+        app.config.setdefault('SQLALCHEMY_BINDS', {
+            **build_replica_binds(app.config, app.config['DATABASE_REPLICA_URLS']),
+            **build_shard_binds(app.config, app.config['SHARD_DATABASE_URLS'])
+        })
+
     # Inicializar extensiones con la aplicación
     db.init_app(app)
+    init_db_engine(app, db)
     migrate.init_app(app, db) # Flask-Migrate necesita la app y la instancia de db
     CORS(
     app,
-    resources={r"/api/*": {"origins": ["http://localhost:5173", "http://127.0.0.1:5173"]}}, # Especifica el origen de tu frontend
+    resources={r"/api/*": {"origins": CORS_ORIGINS}}, # Especifica el origen de tu frontend
     methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"], # Métodos permitidos
     allow_headers=["Authorization", "Content-Type"], # Cabeceras permitidas
     supports_credentials=True # Si planeas usar cookies o autenticación basada en sesión con credenciales
@@ -49,6 +128,27 @@ def create_app(config_class=None):
     # en el contexto de la aplicación actual.
     with app.app_context():
         from . import models
+        from sqlalchemy import event
+        from .db_types import enable_sqlite_foreign_keys
+        for engine in db.engines.values(): # Base por defecto, réplicas y shards
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', enable_sqlite_foreign_keys)
+
+    from .services.cache_services import dashboard_cache
+    dashboard_cache.init_app(app)
+    init_read_replicas(app, dashboard_cache)
+    init_sharding(app, db, dashboard_cache)
+
+    from .services.tag_index_services import init_tag_index
+    init_tag_index(app, db)
+    from .services.counter_services import init_counters
+    init_counters(app, db) # Después de init_tag_index: cuenta los tag_ids que su hook rellena
+
+    from .observability.sql_metrics import init_sql_instrumentation
+    init_sql_instrumentation(app)
+
+    from .observability.request_metrics import init_request_metrics
+    init_request_metrics(app)
 
     # Registrar Blueprints
     from .api.auth_routes import auth_bp
@@ -80,6 +180,27 @@ def create_app(config_class=None):
 
     from .api.dashboard_routes import dashboard_bp 
     app.register_blueprint(dashboard_bp)   
+
+    from .api.agenda_routes import agenda_bp
+    app.register_blueprint(agenda_bp)
+
+    from .api.stats_routes import stats_bp
+    app.register_blueprint(stats_bp)
+
+    from .api.batch_routes import batch_bp
+    app.register_blueprint(batch_bp)
+
+    from .api.import_routes import import_bp
+    app.register_blueprint(import_bp)
+
+    from .api.export_routes import export_bp
+    app.register_blueprint(export_bp)
+
+    from .api.profiling_routes import profiling_bp
+    app.register_blueprint(profiling_bp)
+
+    from .cli import register_cli_commands
+    register_cli_commands(app)
     
     @app.route('/')
     def hello():
@@ -0,0 +1,57 @@
+# backend/app/api/agenda_routes.py
+from flask import Blueprint, request, jsonify, g, current_app
+from app.auth_utils import token_required
+from app.models import AgendaItem
+import uuid
+from datetime import date
+from app.services.agenda_services import AGENDA_SORTS, AGENDA_MAX_LIMIT, agenda_filter_criteria, list_agenda_items
+from app.services.dashboard_services import parse_tag_filter
+
+agenda_bp = Blueprint('agenda_bp', __name__, url_prefix='/api/agenda')
+
+def parse_date_param(date_str):
+    if not date_str: return None
+    try: return date.fromisoformat(date_str)
+    except ValueError: return None
+
+def _list_param(name):
+    """Repeated and/or comma-separated values, upper-cased."""
+    return [value.strip().upper() for raw in request.args.getlist(name) for value in raw.split(',') if value.strip()]
+
+@agenda_bp.route('/items', methods=['GET'])
+@token_required
+def get_agenda_items():
+    """
+    Scheduled missions, habit occurrences and pool missions in one paginated listing.
+    Filters: type, status (repeatable or comma-separated), quest_id, start_date/end_date (on the
+    start date; pool missions have none), tags, q (title search).
+    sort: start (default), completed, updated, created. Returns {"items", "total"}.
+    """
+    current_user = g.current_user
+    types = _list_param('type')
+    if any(item_type not in AgendaItem.TYPES for item_type in types):
+        return jsonify({"error": f"Invalid type. Must be one of {list(AgendaItem.TYPES)}."}), 400
+    sort = request.args.get('sort', 'start')
+    if sort not in AGENDA_SORTS:
+        return jsonify({"error": f"Invalid sort. Must be one of {list(AGENDA_SORTS)}."}), 400
+    quest_id = None
+    if request.args.get('quest_id'):
+        try: quest_id = uuid.UUID(request.args['quest_id'])
+        except ValueError: return jsonify({"error": "Invalid quest_id format"}), 400
+    limit = min(max(request.args.get('limit', 50, type=int), 1), AGENDA_MAX_LIMIT)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+
+    criteria = agenda_filter_criteria(
+        types=types, statuses=_list_param('status'), quest_id=quest_id,
+        start_date=parse_date_param(request.args.get('start_date')),
+        end_date=parse_date_param(request.args.get('end_date')),
+        search=(request.args.get('q') or '').strip()
+    )
+    try:
+        items, total = list_agenda_items(
+            current_user.id, parse_tag_filter(request.args.getlist('tags')), criteria, sort=sort, limit=limit, offset=offset
+        )
+        return jsonify({"items": items, "total": total, "limit": limit, "offset": offset}), 200
+    except Exception as e:
+        current_app.logger.error(f"Error fetching agenda items for user {current_user.id}: {e}", exc_info=True)
+        return jsonify({"error": "Failed to fetch agenda items"}), 500
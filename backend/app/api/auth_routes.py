@@ -4,6 +4,8 @@ from werkzeug.utils import secure_filename
 from flask import Blueprint, request, jsonify, current_app, g
 from app.models import User, db, Quest, Tag 
 from app.auth_utils import generate_jwt, token_required 
+from app.services.settings_services import get_user_settings, validate_settings_payload, apply_settings_update
+from app.db_shards import email_is_registered, find_user_by_email, prepare_new_user_shard, UserMovingError
 import re
 from datetime import date, timedelta
 import uuid
@@ -11,11 +13,6 @@ import uuid
 auth_bp = Blueprint('auth_bp', __name__, url_prefix='/api/auth')
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-VALID_PANEL_TYPES = [
-    "UPCOMING_MISSIONS", "PROJECT_TASKS", "TODAY_AGENDA", 
-    "MISSION_POOL", "TODAY_HABITS", "RECENT_ACTIVITY", "RESCUE_MISSIONS",
-    "TODAY_LOGBOOK_ENTRIES", "HABIT_STATISTICS", "ENERGY_STATISTICS"
-]
 
 def allowed_file(filename):
     return '.' in filename and \
@@ -35,9 +32,10 @@ def register():
     if not is_valid_email(email): return jsonify({"error": "Invalid email format"}), 400
     if len(password) < 8: return jsonify({"error": "Password must be at least 8 characters long"}), 400
     if len(name.strip()) == 0: return jsonify({"error": "Name cannot be empty"}), 400
-    if User.query.filter_by(email=email).first(): return jsonify({"error": "User with this email already exists"}), 409
+    if email_is_registered(email): return jsonify({"error": "User with this email already exists"}), 409
     try:
         new_user = User(email=email, name=name.strip())
+        prepare_new_user_shard(db.session, new_user) # Con sharding: id, shard y entrada en el directorio
         new_user.set_password(password)
         
         # Ensure settings is initialized correctly, including dashboard_panels
@@ -79,7 +77,8 @@ def login():
     email = data.get('email'); password = data.get('password')
     if not email or not password: return jsonify({"error": "Email and password are required"}), 400
     if not isinstance(email, str) or not isinstance(password, str): return jsonify({"error": "Invalid input type for fields"}), 400
-    user = User.query.filter_by(email=email).first()
+    try: user = find_user_by_email(email)
+    except UserMovingError: return jsonify({"error": "Account temporarily unavailable, please retry shortly"}), 503
     if user and user.check_password(password):
         today = date.today()
         if user.last_login_date:
@@ -95,14 +94,7 @@ def login():
         
         token = generate_jwt(user.id, user.email)
         if token:
-            user_settings = user.settings
-            if user_settings is None or not isinstance(user_settings, dict):
-                user_settings = {"sidebar_pinned_tag_ids": [], "dashboard_panels": []}
-            if 'sidebar_pinned_tag_ids' not in user_settings or not isinstance(user_settings.get('sidebar_pinned_tag_ids'), list):
-                 user_settings['sidebar_pinned_tag_ids'] = []
-            if 'dashboard_panels' not in user_settings or not isinstance(user_settings.get('dashboard_panels'), list):
-                 user_settings['dashboard_panels'] = []
-
+            user_settings = get_user_settings(user)
 
             user_data_response = {
                 "id": str(user.id), "email": user.email, "name": user.name,
@@ -135,13 +127,7 @@ def get_current_user_profile():
     if not user:
         return jsonify({"error": "Current user not found in request context"}), 401
     
-    user_settings = user.settings
-    if user_settings is None or not isinstance(user_settings, dict):
-        user_settings = {"sidebar_pinned_tag_ids": [], "dashboard_panels": []}
-    if 'sidebar_pinned_tag_ids' not in user_settings or not isinstance(user_settings.get('sidebar_pinned_tag_ids'), list):
-            user_settings['sidebar_pinned_tag_ids'] = []
-    if 'dashboard_panels' not in user_settings or not isinstance(user_settings.get('dashboard_panels'), list):
-            user_settings['dashboard_panels'] = []
+    user_settings = get_user_settings(user)
 
     return jsonify({
         "id": str(user.id), "email": user.email, "name": user.name,
@@ -162,7 +148,7 @@ def dev_reset_password():
     if not isinstance(email, str) or not isinstance(new_password, str): return jsonify({"error": "Invalid input type for fields"}), 400
     if not is_valid_email(email): return jsonify({"error": "Invalid email format"}), 400
     if len(new_password) < 8: return jsonify({"error": "New password must be at least 8 characters long"}), 400
-    user = User.query.filter_by(email=email).first()
+    user = find_user_by_email(email)
     if not user: return jsonify({"error": "User with this email not found"}), 404
     try:
         user.set_password(new_password); db.session.commit()
@@ -179,84 +165,15 @@ def update_user_settings():
     if not data:
         return jsonify({"error": "No data provided"}), 400
 
-    current_settings = current_user.settings if isinstance(current_user.settings, dict) else {}
-    
     new_settings_payload = data.get('settings')
     if not isinstance(new_settings_payload, dict):
         return jsonify({"error": "'settings' object is required in payload."}), 400
 
-    # Handle sidebar_pinned_tag_ids
-    pinned_tags_ids_str = new_settings_payload.get('sidebar_pinned_tag_ids')
-    if pinned_tags_ids_str is not None:
-        if not isinstance(pinned_tags_ids_str, list):
-            return jsonify({"errors": {"sidebar_pinned_tag_ids": "sidebar_pinned_tag_ids must be a list."}}), 400
-        valid_pinned_tag_uuids = []
-        for tag_id_str in pinned_tags_ids_str:
-            try:
-                tag_uuid = uuid.UUID(str(tag_id_str))
-                tag_exists = Tag.query.filter_by(id=tag_uuid, user_id=current_user.id).first()
-                if not tag_exists:
-                    return jsonify({"errors": {"sidebar_pinned_tag_ids": f"Invalid or non-existent tag_id: {tag_id_str}"}}), 400
-                valid_pinned_tag_uuids.append(str(tag_uuid))
-            except ValueError:
-                return jsonify({"errors": {"sidebar_pinned_tag_ids": f"Invalid UUID format for tag_id: {tag_id_str}"}}), 400
-        current_settings['sidebar_pinned_tag_ids'] = valid_pinned_tag_uuids
-
-    # Handle dashboard_panels
-    dashboard_panels_payload = new_settings_payload.get('dashboard_panels')
-    if dashboard_panels_payload is not None:
-        if not isinstance(dashboard_panels_payload, list):
-            return jsonify({"errors": {"dashboard_panels": "dashboard_panels must be a list."}}), 400
-        
-        validated_panels = []
-        panel_ids_seen = set()
-        for panel_data in dashboard_panels_payload:
-            if not isinstance(panel_data, dict):
-                return jsonify({"errors": {"dashboard_panels": "Each panel item must be an object."}}), 400
-            
-            panel_id = panel_data.get('id')
-            panel_type = panel_data.get('panel_type')
-            panel_name = panel_data.get('name', '')
-            panel_order = panel_data.get('order')
-            panel_is_active = panel_data.get('is_active') # Should always be true if in this list from frontend logic
-            panel_quest_id_str = panel_data.get('quest_id')
-
-            if not panel_id: return jsonify({"errors": {"dashboard_panels": "Panel 'id' is required."}}), 400
-            try: panel_uuid = uuid.UUID(str(panel_id))
-            except ValueError: return jsonify({"errors": {"dashboard_panels": f"Panel 'id' ({panel_id}) is not a valid UUID."}}), 400
-            if panel_uuid in panel_ids_seen: return jsonify({"errors": {"dashboard_panels": f"Duplicate panel id found: {panel_id}"}}), 400
-            panel_ids_seen.add(panel_uuid)
-
-            if not panel_type or panel_type not in VALID_PANEL_TYPES:
-                return jsonify({"errors": {"dashboard_panels": f"Panel {panel_id} has invalid or missing 'panel_type'."}}), 400
-            if not isinstance(panel_name, str): return jsonify({"errors": {"dashboard_panels": f"Panel {panel_id} 'name' must be a string."}}), 400
-            if panel_order is None or not isinstance(panel_order, int): return jsonify({"errors": {"dashboard_panels": f"Panel {panel_id} 'order' must be an integer."}}), 400
-            if panel_is_active is None or not isinstance(panel_is_active, bool): return jsonify({"errors": {"dashboard_panels": f"Panel {panel_id} 'is_active' must be a boolean."}}), 400
-            
-            # Panel is active by definition if it's in the saved list from the frontend's activePanels
-            if not panel_is_active:
-                 return jsonify({"errors": {"dashboard_panels": f"Panel {panel_id} sent for saving should be active."}}), 400
-
-
-            validated_panel = {
-                "id": str(panel_uuid), "panel_type": panel_type, "name": panel_name.strip(),
-                "order": panel_order, "is_active": panel_is_active
-            }
+    # Valida todas las referencias (tags y quests) con una consulta IN por tipo
+    settings_updates, settings_errors = validate_settings_payload(current_user.id, new_settings_payload)
+    if settings_errors:
+        return jsonify({"errors": settings_errors}), 400
 
-            if panel_type == "PROJECT_TASKS":
-                if not panel_quest_id_str: return jsonify({"errors": {"dashboard_panels": f"Panel {panel_id} of type PROJECT_TASKS requires a 'quest_id'."}}), 400
-                try:
-                    panel_quest_uuid = uuid.UUID(str(panel_quest_id_str))
-                    quest_exists = Quest.query.filter_by(id=panel_quest_uuid, user_id=current_user.id).first()
-                    if not quest_exists: return jsonify({"errors": {"dashboard_panels": f"Panel {panel_id}: Quest ID '{panel_quest_id_str}' not found."}}), 400
-                    validated_panel["quest_id"] = str(panel_quest_uuid)
-                except ValueError: return jsonify({"errors": {"dashboard_panels": f"Panel {panel_id}: Invalid UUID for quest_id: {panel_quest_id_str}"}}), 400
-            elif panel_quest_id_str is not None : # quest_id should ONLY be present for PROJECT_TASKS
-                 return jsonify({"errors": {"dashboard_panels": f"Panel {panel_id} ('{panel_type}'): 'quest_id' should only be provided for PROJECT_TASKS."}}), 400
-            
-            validated_panels.append(validated_panel)
-        current_settings['dashboard_panels'] = validated_panels
-            
     new_avatar_url = data.get('avatar_url')
     if new_avatar_url is not None: 
         if not isinstance(new_avatar_url, str):
@@ -265,14 +182,13 @@ def update_user_settings():
         # No need to set settings_changed = True here, avatar is separate
 
     try:
-        from sqlalchemy.orm.attributes import flag_modified
-        current_user.settings = current_settings
-        flag_modified(current_user, "settings")
+        # Solo se reescriben las claves modificadas (jsonb_set), no el documento completo
+        updated_settings = apply_settings_update(current_user, settings_updates)
         db.session.commit()
         
         return jsonify({
             "message": "User settings updated successfully.",
-            "settings": current_user.settings, # Return the updated settings
+            "settings": updated_settings, # Return the updated settings
             "avatar_url": current_user.avatar_url 
         }), 200
     except Exception as e:
@@ -0,0 +1,122 @@
+# backend/app/api/batch_routes.py
+from flask import Blueprint, request, jsonify, g, current_app
+from werkzeug.test import EnvironBuilder
+from app.models import db
+from app.auth_utils import token_required, BATCH_USER_ENVIRON_KEY
+
+batch_bp = Blueprint('batch_bp', __name__, url_prefix='/api/batch')
+
+ALLOWED_BATCH_METHODS = ['GET', 'PATCH']
+
+def validate_batch_payload(data, max_sub_requests):
+    if not isinstance(data, dict):
+        return "Invalid input: No data provided"
+    sub_requests = data.get('requests')
+    if not isinstance(sub_requests, list) or not sub_requests:
+        return "'requests' must be a non-empty list."
+    if len(sub_requests) > max_sub_requests:
+        return f"Too many sub-requests (max {max_sub_requests})."
+    if 'atomic' in data and not isinstance(data.get('atomic'), bool):
+        return "'atomic' must be a boolean."
+    for index, sub in enumerate(sub_requests):
+        if not isinstance(sub, dict):
+            return f"Sub-request {index} must be an object."
+        method = sub.get('method', 'GET')
+        path = sub.get('path')
+        if not isinstance(method, str) or method.upper() not in ALLOWED_BATCH_METHODS:
+            return f"Sub-request {index}: method must be one of {ALLOWED_BATCH_METHODS}."
+        if not isinstance(path, str) or not path.startswith('/api/'):
+            return f"Sub-request {index}: 'path' must be an /api/ path."
+        if path.split('?')[0].rstrip('/') == batch_bp.url_prefix:
+            return f"Sub-request {index}: nested batches are not allowed."
+        if sub.get('query') is not None:
+            if not isinstance(sub.get('query'), dict):
+                return f"Sub-request {index}: 'query' must be an object."
+            if '?' in path:
+                return f"Sub-request {index}: use either 'query' or a query string in 'path', not both."
+    return None
+
+# Claves del environ externo que heredan las sub-peticiones (mismo cliente y mismo servidor)
+INHERITED_ENVIRON_KEYS = ('REMOTE_ADDR', 'REMOTE_PORT', 'SERVER_PROTOCOL', 'HTTP_USER_AGENT', 'HTTP_X_FORWARDED_FOR')
+
+def _dispatch_sub_request(app, sub, current_user, parent_environ, root_url):
+    """
+    Runs one sub-request through the normal Flask dispatch (before/after request hooks,
+    error handlers) inside the batch's app context, so g and db.session are shared and
+    token_required reuses the already authenticated user.
+    The environ is built from the batch request's root URL and client keys.
+    """
+    method = sub.get('method', 'GET').upper()
+    environ_overrides = {key: parent_environ[key] for key in INHERITED_ENVIRON_KEYS if key in parent_environ}
+    environ_overrides[BATCH_USER_ENVIRON_KEY] = current_user
+    builder = EnvironBuilder(
+        path=sub['path'], base_url=root_url, method=method,
+        query_string=sub.get('query'),
+        json=sub.get('body') if method != 'GET' else None,
+        environ_overrides=environ_overrides
+    )
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+
+    with app.request_context(environ):
+        return app.full_dispatch_request()
+
+def _response_body(response):
+    if response.is_json:
+        return response.get_json(silent=True)
+    body = response.get_data(as_text=True)
+    return body if body else None
+
+@batch_bp.route('', methods=['POST'])
+@token_required
+def execute_batch():
+    """
+    Executes a list of GET/PATCH sub-requests against the existing blueprints in one round trip.
+    Payload: {"requests": [{"id", "method", "path", "query", "body"}], "atomic": false}
+    With atomic=true every mutation shares one transaction; the first sub-request answering
+    with status >= 400 stops the batch and rolls everything back.
+    """
+    data = request.get_json(silent=True)
+    current_user = g.current_user
+
+    validation_error = validate_batch_payload(data, current_app.config.get('BATCH_MAX_SUBREQUESTS', 20))
+    if validation_error:
+        return jsonify({"error": validation_error}), 400
+
+    atomic = data.get('atomic', False)
+    app = current_app._get_current_object()
+    parent_environ, root_url = request.environ, request.root_url
+    responses = []
+    failed_index = None
+
+    if atomic:
+        db.session.info['defer_commit'] = True
+    try:
+        for index, sub in enumerate(data['requests']):
+            try:
+                response = _dispatch_sub_request(app, sub, current_user, parent_environ, root_url)
+                responses.append({"id": sub.get('id', index), "status": response.status_code, "body": _response_body(response)})
+            except Exception as e:
+                current_app.logger.error(f"Batch sub-request {index} ({sub.get('method', 'GET')} {sub.get('path')}) failed for user {current_user.id}: {e}", exc_info=True)
+                responses.append({"id": sub.get('id', index), "status": 500, "body": {"error": "Sub-request failed due to an internal error"}})
+            if atomic and responses[-1]["status"] >= 400:
+                failed_index = index
+                break
+
+        if not atomic:
+            return jsonify({"responses": responses}), 200
+
+        db.session.info.pop('defer_commit', None)
+        if failed_index is not None:
+            db.session.rollback()
+            return jsonify({"responses": responses, "committed": False, "failed_index": failed_index}), 200
+        db.session.commit()
+        return jsonify({"responses": responses, "committed": True}), 200
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error executing batch for user {current_user.id}: {e}", exc_info=True)
+        return jsonify({"error": "Failed to execute batch due to an internal error"}), 500
+    finally:
+        db.session.info.pop('defer_commit', None)
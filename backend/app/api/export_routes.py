@@ -0,0 +1,47 @@
+# backend/app/api/export_routes.py
+from datetime import datetime
+from flask import Blueprint, request, jsonify, g, current_app, Response, stream_with_context
+from app.auth_utils import token_required
+from app.db_engine import statement_timeout
+from app.services.export_services import EXPORT_FORMATS, iter_account_export
+
+export_bp = Blueprint('export_bp', __name__, url_prefix='/api/export')
+
+@export_bp.route('', methods=['GET'])
+@token_required
+@statement_timeout(0) # Lecturas largas en streaming: sin límite
+def export_account():
+    """
+    Streams the whole account (profile, quests, tags, missions, habits, occurrences, energy logs).
+    ?format=ndjson (default) or ?format=zip (one CSV per entity plus manifest.json).
+    The manifest carries the row count of every entity so clients can show progress.
+    """
+    current_user = g.current_user
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"Invalid format. Must be one of {EXPORT_FORMATS}."}), 400
+
+    user_id = current_user.id
+    batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 1000)
+    progress_every = batch_size * 10
+    logger = current_app.logger
+
+    def log_progress(entity_name, rows_done):
+        if rows_done and rows_done % progress_every == 0:
+            logger.info(f"Export for user {user_id}: {entity_name} {rows_done} rows streamed")
+
+    try:
+        chunks = iter_account_export(user_id, export_format, batch_size=batch_size, progress=log_progress)
+    except Exception as e:
+        current_app.logger.error(f"Error starting export for user {user_id}: {e}", exc_info=True)
+        return jsonify({"error": "Failed to export account data"}), 500
+
+    timestamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    if export_format == 'zip':
+        mimetype, filename = 'application/zip', f'iterpolaris-export-{timestamp}.zip'
+    else:
+        mimetype, filename = 'application/x-ndjson', f'iterpolaris-export-{timestamp}.ndjson'
+    return Response(
+        stream_with_context(chunks), mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"}
+    )
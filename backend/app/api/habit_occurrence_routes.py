@@ -5,6 +5,8 @@ from app.auth_utils import token_required
 import uuid
 from datetime import datetime, timezone, date
 from app.services.gamification_services import update_user_stats_after_mission
+from app.services.bulk_status_services import BULK_STATUS_TARGETS, parse_bulk_status_payload, apply_bulk_status_update
+from app.services.tag_index_services import tags_contain_all
 
 habit_occurrence_bp = Blueprint('habit_occurrence_bp', __name__, url_prefix='/api/habit-occurrences')
 
@@ -25,8 +27,7 @@ def get_habit_occurrences():
 
     try:
         query = HabitOccurrence.query.options(
-            db.joinedload(HabitOccurrence.quest),
-            db.joinedload(HabitOccurrence.template).selectinload(HabitTemplate.tags)
+            db.joinedload(HabitOccurrence.quest) # Duración y tags van copiados en la propia ocurrencia
         ).filter_by(user_id=current_user.id)
 
         if template_id_str:
@@ -50,16 +51,14 @@ def get_habit_occurrences():
                 try: valid_tag_uuids.append(uuid.UUID(tid_str))
                 except ValueError: current_app.logger.warning(f"Invalid tag_id format: {tid_str}")
             if valid_tag_uuids:
-                query = query.join(HabitTemplate, HabitOccurrence.habit_template_id == HabitTemplate.id)
-                for tag_uuid_item in valid_tag_uuids:
-                    query = query.filter(HabitTemplate.tags.any(Tag.id == tag_uuid_item))
+                query = query.filter(tags_contain_all(HabitOccurrence, valid_tag_uuids))
             
         occurrences = query.order_by(HabitOccurrence.scheduled_start_datetime.asc()).all()
         
         occurrences_data = []
         for occ in occurrences:
-            duration_minutes = occ.template.rec_duration_minutes if occ.template else None
-            template_tags_data = [{"id": str(t.id), "name": t.name} for t in occ.template.tags] if occ.template else []
+            duration_minutes = occ.rec_duration_minutes
+            template_tags_data = list(occ.tag_snapshot)
             occurrences_data.append({
                 "id": str(occ.id), "habit_template_id": str(occ.habit_template_id),
                 "user_id": str(occ.user_id), "quest_id": str(occ.quest_id) if occ.quest_id else None,
@@ -73,7 +72,7 @@ def get_habit_occurrences():
                 "actual_completion_datetime": occ.actual_completion_datetime.isoformat() if occ.actual_completion_datetime else None,
                 "tags": template_tags_data, "created_at": occ.created_at.isoformat(),
                 "updated_at": occ.updated_at.isoformat(),
-                "template": { "id": str(occ.template.id) if occ.template else None, "tags": template_tags_data } if occ.template else None
+                "template": { "id": str(occ.habit_template_id), "tags": template_tags_data }
             })
         return jsonify(occurrences_data), 200
     except Exception as e:
@@ -88,8 +87,7 @@ def update_habit_occurrence_status(occurrence_id):
         return jsonify({"error": "Invalid status."}), 400
     try:
         occurrence = HabitOccurrence.query.options(
-            db.joinedload(HabitOccurrence.quest),
-            db.joinedload(HabitOccurrence.template).selectinload(HabitTemplate.tags)
+            db.joinedload(HabitOccurrence.quest) # Duración y tags van copiados en la propia ocurrencia
         ).filter_by(id=occurrence_id, user_id=current_user.id).first()
         if not occurrence: return jsonify({"error": "Habit Occurrence not found"}), 404
         
@@ -121,8 +119,8 @@ def update_habit_occurrence_status(occurrence_id):
         db.session.commit()
 
         quest_name_val = occurrence.quest.name if occurrence.quest else None
-        duration_minutes = occurrence.template.rec_duration_minutes if occurrence.template else None
-        template_tags_data = [{"id": str(t.id), "name": t.name} for t in occurrence.template.tags] if occurrence.template else []
+        duration_minutes = occurrence.rec_duration_minutes
+        template_tags_data = list(occurrence.tag_snapshot)
         
         return jsonify({
             "id": str(occurrence.id), "habit_template_id": str(occurrence.habit_template_id),
@@ -143,6 +141,24 @@ def update_habit_occurrence_status(occurrence_id):
         db.session.rollback(); current_app.logger.error(f"Error HO status update {occurrence_id}: {e}", exc_info=True)
         return jsonify({"error": "Failed to update status"}), 500
 
+@habit_occurrence_bp.route('/status', methods=['PATCH'])
+@token_required
+def bulk_update_habit_occurrences_status():
+    data = request.get_json(silent=True); current_user = g.current_user
+    target = BULK_STATUS_TARGETS['HABIT_OCCURRENCE']
+    items, payload_error = parse_bulk_status_payload(data, target["statuses"], current_app.config.get('BULK_STATUS_MAX_ITEMS', 500))
+    if payload_error: return jsonify({"error": payload_error}), 400
+    try:
+        results, updated_count = apply_bulk_status_update(current_user, 'HABIT_OCCURRENCE', items)
+        db.session.commit()
+        return jsonify({
+            "results": results, "updated_count": updated_count,
+            "user_total_points": current_user.total_points, "user_level": current_user.level
+        }), 200
+    except Exception as e:
+        db.session.rollback(); current_app.logger.error(f"Error in bulk HABIT_OCCURRENCE status update for user {current_user.id}: {e}", exc_info=True)
+        return jsonify({"error": "Failed to update statuses"}), 500
+
 @habit_occurrence_bp.route('/<uuid:occurrence_id>/undo-completion', methods=['PATCH'])
 @token_required
 def undo_habit_occurrence_completion(occurrence_id):
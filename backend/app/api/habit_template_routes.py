@@ -4,7 +4,9 @@ from app.models import db, User, Quest, Tag, HabitTemplate, HabitOccurrence
 from app.auth_utils import token_required
 import uuid
 from datetime import date, time, datetime, timezone 
-from app.services.habit_services import generate_occurrences_for_template 
+from app.services.habit_services import generate_occurrences_for_template, sync_occurrence_duration
+from app.services.lookup_services import get_default_quest_ref, get_owned_tags
+from app.services.tag_index_services import tags_contain_all
 
 habit_template_bp = Blueprint('habit_template_bp', __name__, url_prefix='/api/habit-templates')
 
@@ -107,7 +109,7 @@ def create_habit_template():
             final_quest_id = found_quest.id; assigned_quest_object_name = found_quest.name
         except ValueError: return jsonify({"error": "Invalid Quest ID format."}), 400
     else:
-        default_quest = Quest.query.filter_by(user_id=current_user.id, is_default_quest=True).first()
+        default_quest = get_default_quest_ref(current_user.id)
         if not default_quest: return jsonify({"error": "Default quest not found."}), 500
         final_quest_id = default_quest.id; assigned_quest_object_name = default_quest.name
     
@@ -143,7 +145,7 @@ def create_habit_template():
         db.session.add(new_template); db.session.flush()
         tag_ids_str_list = data.get('tag_ids', [])
         if tag_ids_str_list:
-            valid_tags = Tag.query.filter(Tag.id.in_([uuid.UUID(tid) for tid in tag_ids_str_list if tid]), Tag.user_id == current_user.id).all()
+            valid_tags = get_owned_tags(current_user.id, [uuid.UUID(tid) for tid in tag_ids_str_list if tid])
             new_template.tags = valid_tags
         db.session.commit()
         if new_template.is_active: generate_occurrences_for_template(new_template)
@@ -175,8 +177,7 @@ def get_habit_templates():
         if tag_ids_param:
             valid_tag_uuids = [uuid.UUID(tid) for tid_str in tag_ids_param for tid in tid_str.split(',') if tid.strip()]
             if valid_tag_uuids:
-                for tag_uuid_item in valid_tag_uuids:
-                    query = query.filter(HabitTemplate.tags.any(Tag.id == tag_uuid_item))
+                query = query.filter(tags_contain_all(HabitTemplate, valid_tag_uuids))
         
         templates = query.order_by(HabitTemplate.is_active.desc(), HabitTemplate.title).all()
         templates_data = [{
@@ -223,7 +224,8 @@ def get_habit_template(template_id):
 def update_habit_template(template_id):
     data = request.get_json()
     current_user = g.current_user
-    template = HabitTemplate.query.filter_by(id=template_id, user_id=current_user.id).first()
+    template = HabitTemplate.query.options(db.joinedload(HabitTemplate.quest), db.selectinload(HabitTemplate.tags))\
+        .filter_by(id=template_id, user_id=current_user.id).first()
     if not template: return jsonify({"error": "Habit Template not found"}), 404
 
     errors, start_date_obj, end_date_obj, start_time_obj = validate_habit_template_data(data, is_update=True)
@@ -278,6 +280,7 @@ def update_habit_template(template_id):
         if 'default_points_value' in data: template.default_points_value = data['default_points_value']
         if 'rec_by_day' in data: template.rec_by_day = data.get('rec_by_day') or []
         if 'rec_start_time' in data: template.rec_start_time = start_time_obj
+        old_duration = template.rec_duration_minutes
         if 'rec_duration_minutes' in data : template.rec_duration_minutes = duration_for_update # Ya procesado
         if start_date_obj: template.rec_pattern_start_date = start_date_obj
         if 'rec_ends_on_date' in data: template.rec_ends_on_date = end_date_obj
@@ -292,21 +295,22 @@ def update_habit_template(template_id):
                 if not found_quest: return jsonify({"error": "Specified Quest not found."}), 404
                 new_quest_id = found_quest.id; assigned_quest_object_name = found_quest.name
             else:
-                default_quest = Quest.query.filter_by(user_id=current_user.id, is_default_quest=True).first()
+                default_quest = get_default_quest_ref(current_user.id)
                 if not default_quest: return jsonify({"error": "Default quest not found."}), 500
                 new_quest_id = default_quest.id; assigned_quest_object_name = default_quest.name
             if template.quest_id != new_quest_id: core_values_changed = True; template.quest_id = new_quest_id
         
         if 'tag_ids' in data:
             tag_ids_str_list = data.get('tag_ids', [])
-            valid_tags = Tag.query.filter(Tag.id.in_([uuid.UUID(tid) for tid in tag_ids_str_list if tid]), Tag.user_id == current_user.id).all()
+            valid_tags = get_owned_tags(current_user.id, [uuid.UUID(tid) for tid in tag_ids_str_list if tid])
             if set(t.id for t in template.tags) != set(t.id for t in valid_tags): template.tags = valid_tags
+        if template.rec_duration_minutes != old_duration: sync_occurrence_duration(template) # Los tags los copia tag_index_services
         
+        if not template.is_active and old_is_active:
+            generate_occurrences_for_template(template) # Borra las pendientes futuras sin commit: van en el de la plantilla
         db.session.commit() 
         if template.is_active and (recurrence_fields_changed or core_values_changed or (not old_is_active and template.is_active)):
             generate_occurrences_for_template(template, force_regenerate_future=True)
-        elif not template.is_active and old_is_active:
-            generate_occurrences_for_template(template) 
 
         return jsonify({
             "id": str(template.id), "title": template.title, "description": template.description,
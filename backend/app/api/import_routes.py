@@ -0,0 +1,65 @@
+# backend/app/api/import_routes.py
+from flask import Blueprint, request, jsonify, g, current_app
+from app.models import db
+from app.auth_utils import token_required
+from app.db_engine import statement_timeout
+from app.services.import_services import IMPORT_KINDS, IMPORT_FORMATS, detect_import_format, import_missions
+
+import_bp = Blueprint('import_bp', __name__, url_prefix='/api/import')
+
+@import_bp.route('/<string:kind>', methods=['POST'])
+@token_required
+@statement_timeout(120000) # Ficheros grandes: más margen que el límite por defecto
+def import_user_missions(kind):
+    """
+    Bulk import of pool-missions or scheduled-missions.
+    Body: NDJSON, CSV or a JSON array (raw body or multipart 'file').
+    Query: ?format=ndjson|csv|json, ?create_missing_tags=true, ?dry_run=true, ?partial=true
+    Rows use the same fields as the create endpoints plus 'tags' (tag names) and 'quest_name'.
+    Any invalid row rejects the whole file (400 with per-row errors) unless partial=true,
+    which imports the valid rows and reports the rest.
+    """
+    current_user = g.current_user
+    if kind not in IMPORT_KINDS:
+        return jsonify({"error": f"Unknown import type. Must be one of {list(IMPORT_KINDS.keys())}."}), 404
+
+    uploaded_file = request.files.get('file')
+    if uploaded_file:
+        raw_data = uploaded_file.read()
+        import_format = detect_import_format(request.args.get('format'), uploaded_file.mimetype, uploaded_file.filename)
+    else:
+        raw_data = request.get_data()
+        import_format = detect_import_format(request.args.get('format'), request.mimetype)
+    if not raw_data:
+        return jsonify({"error": "No data provided"}), 400
+    if not import_format:
+        return jsonify({"error": f"Could not detect the import format. Use ?format= one of {IMPORT_FORMATS}."}), 400
+    try:
+        text = raw_data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return jsonify({"error": "Import data must be UTF-8 encoded."}), 400
+
+    create_missing_tags = request.args.get('create_missing_tags', 'false').lower() == 'true'
+    dry_run = request.args.get('dry_run', 'false').lower() == 'true'
+    partial = request.args.get('partial', 'false').lower() == 'true'
+    try:
+        result = import_missions(
+            current_user.id, kind, text, import_format,
+            create_missing_tags=create_missing_tags, dry_run=dry_run, partial=partial,
+            chunk_size=current_app.config.get('IMPORT_CHUNK_SIZE', 500),
+            max_rows=current_app.config.get('IMPORT_MAX_ROWS', 10000)
+        )
+        if "error" in result:
+            db.session.rollback()
+            return jsonify(result), 400
+        if dry_run or (result["errors"] and not partial):
+            db.session.rollback()
+        else:
+            db.session.commit()
+        if result["errors"] and not partial:
+            return jsonify(result), 400 # Nada importado: todo el fichero se rechaza
+        return jsonify(result), 200 if dry_run or result["imported"] == 0 else 201
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error importing {kind} for user {current_user.id}: {e}", exc_info=True)
+        return jsonify({"error": f"Failed to import {kind} due to an internal error"}), 500
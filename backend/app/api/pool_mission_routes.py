@@ -4,6 +4,9 @@ from app.models import db, User, Quest, Tag, PoolMission, EnergyLog # EnergyLog
 from app.auth_utils import token_required
 import uuid
 from app.services.gamification_services import update_user_stats_after_mission # Import service
+from app.services.bulk_status_services import BULK_STATUS_TARGETS, parse_bulk_status_payload, apply_bulk_status_update
+from app.services.lookup_services import get_default_quest_ref, get_owned_tags
+from app.services.tag_index_services import tags_contain_all
 
 pool_mission_bp = Blueprint('pool_mission_bp', __name__, url_prefix='/api/pool-missions')
 
@@ -95,7 +98,7 @@ def create_pool_mission():
         except ValueError:
              return jsonify({"error": "Invalid Quest ID format provided."}), 400
     else:
-        default_quest = Quest.query.filter_by(user_id=current_user.id, is_default_quest=True).first()
+        default_quest = get_default_quest_ref(current_user.id)
         if not default_quest:
             current_app.logger.error(f"CRITICAL: User {current_user.id} does not have a default Quest for PoolMission assignment.")
             return jsonify({"error": "Default quest not found. Cannot create mission."}), 500
@@ -126,7 +129,7 @@ def create_pool_mission():
                     pass 
 
             if valid_tag_uuids:
-                tags_to_associate = Tag.query.filter(Tag.id.in_(valid_tag_uuids), Tag.user_id == current_user.id).all()
+                tags_to_associate = get_owned_tags(current_user.id, valid_tag_uuids)
                 new_mission.tags = tags_to_associate
             else:
                 new_mission.tags = []
@@ -166,7 +169,8 @@ def get_pool_missions():
     status_filter = request.args.get('status') # Acepta 'PENDING', 'COMPLETED', o 'ALL_STATUSES' desde el frontend
     
     try:
-        query = PoolMission.query.filter_by(user_id=current_user.id)
+        query = PoolMission.query.options(db.joinedload(PoolMission.quest), db.selectinload(PoolMission.tags))\
+            .filter_by(user_id=current_user.id)
 
         if quest_id_filter_str:
             try:
@@ -180,8 +184,7 @@ def get_pool_missions():
             if tag_ids_list_str:
                 try:
                     tag_uuids = [uuid.UUID(tid) for tid in tag_ids_list_str]
-                    for tag_uuid_item in tag_uuids:
-                         query = query.filter(PoolMission.tags.any(Tag.id == tag_uuid_item))
+                    if tag_uuids: query = query.filter(tags_contain_all(PoolMission, tag_uuids))
                 except ValueError:
                     pass 
 
@@ -271,7 +274,8 @@ def update_pool_mission(mission_id):
     data = request.get_json()
     current_user = g.current_user # type: User
 
-    mission_to_update = PoolMission.query.filter_by(id=mission_id, user_id=current_user.id).first()
+    mission_to_update = PoolMission.query.options(db.joinedload(PoolMission.quest), db.selectinload(PoolMission.tags))\
+        .filter_by(id=mission_id, user_id=current_user.id).first()
     if not mission_to_update:
         return jsonify({"error": "Pool Mission not found or access denied"}), 404
 
@@ -308,7 +312,7 @@ def update_pool_mission(mission_id):
                 except ValueError:
                      return jsonify({"error": "Invalid Quest ID format for update."}), 400
             else: 
-                default_quest = Quest.query.filter_by(user_id=current_user.id, is_default_quest=True).first()
+                default_quest = get_default_quest_ref(current_user.id)
                 if not default_quest: 
                     current_app.logger.error(f"CRITICAL: User {current_user.id} missing default Quest during mission update.")
                     return jsonify({"error": "Default quest not found. Cannot update mission."}), 500
@@ -323,7 +327,7 @@ def update_pool_mission(mission_id):
                 except ValueError: pass 
 
             if valid_tag_uuids:
-                tags_to_associate = Tag.query.filter(Tag.id.in_(valid_tag_uuids), Tag.user_id == current_user.id).all()
+                tags_to_associate = get_owned_tags(current_user.id, valid_tag_uuids)
                 mission_to_update.tags = tags_to_associate
             else: 
                 mission_to_update.tags = []
@@ -432,7 +436,8 @@ def toggle_pool_mission_focus(mission_id):
         return jsonify({"error": "Invalid or missing focus_status. Must be 'ACTIVE' or 'DEFERRED'."}), 400
 
     try:
-        mission = PoolMission.query.filter_by(id=mission_id, user_id=current_user.id).first()
+        mission = PoolMission.query.options(db.joinedload(PoolMission.quest), db.selectinload(PoolMission.tags))\
+            .filter_by(id=mission_id, user_id=current_user.id).first()
         if not mission:
             return jsonify({"error": "Pool Mission not found or access denied"}), 404
 
@@ -462,6 +467,24 @@ def toggle_pool_mission_focus(mission_id):
         return jsonify({"error": "Failed to toggle focus status due to an internal error"}), 500
     
 
+@pool_mission_bp.route('/status', methods=['PATCH'])
+@token_required
+def bulk_update_pool_missions_status():
+    data = request.get_json(silent=True); current_user = g.current_user
+    target = BULK_STATUS_TARGETS['POOL_MISSION']
+    items, payload_error = parse_bulk_status_payload(data, target["statuses"], current_app.config.get('BULK_STATUS_MAX_ITEMS', 500))
+    if payload_error: return jsonify({"error": payload_error}), 400
+    try:
+        results, updated_count = apply_bulk_status_update(current_user, 'POOL_MISSION', items)
+        db.session.commit()
+        return jsonify({
+            "results": results, "updated_count": updated_count,
+            "user_total_points": current_user.total_points, "user_level": current_user.level
+        }), 200
+    except Exception as e:
+        db.session.rollback(); current_app.logger.error(f"Error in bulk POOL_MISSION status update for user {current_user.id}: {e}", exc_info=True)
+        return jsonify({"error": "Failed to update statuses"}), 500
+
 @pool_mission_bp.route('/<uuid:mission_id>/undo-completion', methods=['PATCH'])
 @token_required
 def undo_pool_mission_completion(mission_id):
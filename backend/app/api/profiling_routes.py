@@ -0,0 +1,36 @@
+# backend/app/api/profiling_routes.py
+from flask import Blueprint, jsonify, g, send_file
+from app.auth_utils import token_required
+from app.observability.profiling import is_profiling_admin, list_profiles, load_profile_metadata, profile_artifact_path
+
+profiling_bp = Blueprint('profiling_bp', __name__, url_prefix='/api/admin/profiles')
+
+ARTIFACT_MIMETYPES = {"pstats": "application/octet-stream", "collapsed": "text/plain", "json": "application/json"}
+
+@profiling_bp.route('', methods=['GET'])
+@token_required
+def get_profiles():
+    if not is_profiling_admin(g.current_user):
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(list_profiles()), 200
+
+@profiling_bp.route('/<string:profile_id>', methods=['GET'])
+@token_required
+def get_profile(profile_id):
+    if not is_profiling_admin(g.current_user):
+        return jsonify({"error": "Forbidden"}), 403
+    meta = load_profile_metadata(profile_id)
+    if not meta:
+        return jsonify({"error": "Profile not found"}), 404
+    return jsonify(meta), 200
+
+@profiling_bp.route('/<string:profile_id>/<string:artifact>', methods=['GET'])
+@token_required
+def download_profile_artifact(profile_id, artifact):
+    """artifact: pstats (load with pstats/snakeviz), collapsed (flamegraph.pl / speedscope) or json."""
+    if not is_profiling_admin(g.current_user):
+        return jsonify({"error": "Forbidden"}), 403
+    path = profile_artifact_path(profile_id, artifact)
+    if not path:
+        return jsonify({"error": "Profile artifact not found"}), 404
+    return send_file(path, mimetype=ARTIFACT_MIMETYPES[artifact], as_attachment=True, download_name=f"{profile_id}.{artifact}")
@@ -2,6 +2,9 @@
 from flask import Blueprint, request, jsonify, g, current_app
 from app.models import db, User, Quest, PoolMission, ScheduledMission, HabitTemplate, HabitOccurrence, Tag
 from app.auth_utils import token_required
+from app.services.dashboard_services import parse_tag_filter, get_quest_dashboard_items_data
+from app.services.lookup_services import get_default_quest_ref, invalidate_user_lookups
+from app.services.counter_services import move_quest_counters
 import uuid
 from datetime import date, time, datetime, timezone 
 from sqlalchemy import and_ 
@@ -108,6 +111,7 @@ def update_quest(quest_id):
         if description is not None: quest_to_update.description = description.strip() if description.strip() else None
         if color is not None: quest_to_update.color = color
         db.session.commit()
+        if quest_to_update.is_default_quest: invalidate_user_lookups(current_user.id) # QuestRef cacheado con nombre/color
         return jsonify({
             "id": str(quest_to_update.id), "name": quest_to_update.name, "description": quest_to_update.description,
             "color": quest_to_update.color, "is_default_quest": quest_to_update.is_default_quest,
@@ -125,7 +129,7 @@ def delete_quest(quest_id):
         quest_to_delete = Quest.query.filter_by(id=quest_id, user_id=current_user.id).first()
         if not quest_to_delete: return jsonify({"error": "Quest not found or access denied"}), 404
         if quest_to_delete.is_default_quest: return jsonify({"error": "The default Quest cannot be deleted."}), 403
-        generic_quest = Quest.query.filter_by(user_id=current_user.id, is_default_quest=True).first()
+        generic_quest = get_default_quest_ref(current_user.id)
         if not generic_quest:
             current_app.logger.error(f"User {current_user.id} does not have a default Quest for task reassignment.")
             return jsonify({"error": "Default Quest not found. Cannot delete Quest."}), 500
@@ -137,6 +141,7 @@ def delete_quest(quest_id):
         ScheduledMission.query.filter_by(quest_id=quest_to_delete.id, user_id=current_user.id).update({"quest_id": generic_quest.id})
         HabitTemplate.query.filter_by(quest_id=quest_to_delete.id, user_id=current_user.id).update({"quest_id": generic_quest.id})
         HabitOccurrence.query.filter_by(quest_id=quest_to_delete.id, user_id=current_user.id).update({"quest_id": generic_quest.id})
+        move_quest_counters(db.session, current_user.id, quest_to_delete.id, generic_quest.id) # Updates masivos: sin hooks
         
         quest_name_deleted = quest_to_delete.name
         db.session.delete(quest_to_delete); db.session.commit()
@@ -155,90 +160,9 @@ def get_quest_dashboard_items(quest_id):
     if not quest:
         return jsonify({"error": "Quest not found or access denied"}), 404
 
+    valid_tag_uuids_for_filter = parse_tag_filter(tag_ids_param)
     try:
-        today_start_utc = datetime.combine(date.today(), time.min, tzinfo=timezone.utc)
-        today_end_utc = datetime.combine(date.today(), time.max, tzinfo=timezone.utc)
-
-        valid_tag_uuids_for_filter = []
-        if tag_ids_param:
-            for tid_str in tag_ids_param:
-                for tid in tid_str.split(','):
-                    if tid.strip():
-                        try: valid_tag_uuids_for_filter.append(uuid.UUID(tid.strip()))
-                        except ValueError: current_app.logger.warning(f"Invalid UUID format for tag filter: {tid}")
-        
-        # 1. Today's Habit Occurrences
-        ho_query = HabitOccurrence.query.options(
-            db.joinedload(HabitOccurrence.template).selectinload(HabitTemplate.tags)
-        ).filter(
-            HabitOccurrence.user_id == current_user.id,
-            HabitOccurrence.quest_id == quest_id,
-            HabitOccurrence.status == 'PENDING',
-            HabitOccurrence.scheduled_start_datetime >= today_start_utc,
-            HabitOccurrence.scheduled_start_datetime <= today_end_utc
-        )
-        if valid_tag_uuids_for_filter:
-            ho_query = ho_query.join(HabitTemplate, HabitOccurrence.habit_template_id == HabitTemplate.id)
-            for tag_uuid_item in valid_tag_uuids_for_filter:
-                ho_query = ho_query.filter(HabitTemplate.tags.any(Tag.id == tag_uuid_item))
-        
-        todays_habits_results = ho_query.order_by(HabitOccurrence.scheduled_start_datetime.asc()).all()
-        todays_habit_occurrences = [{
-            "id": str(ho.id), "title": ho.title, "status": ho.status,
-            "scheduled_start_datetime": ho.scheduled_start_datetime.isoformat(),
-            "scheduled_end_datetime": ho.scheduled_end_datetime.isoformat(),
-            "energy_value": ho.energy_value, "points_value": ho.points_value,
-            "quest_id": str(ho.quest_id), "quest_name": quest.name,
-            "type": "HABIT_OCCURRENCE",
-            "rec_duration_minutes": ho.template.rec_duration_minutes if ho.template else None,
-            "tags": [{"id": str(t.id), "name": t.name} for t in ho.template.tags] if ho.template else []
-        } for ho in todays_habits_results]
-
-        # 2. Pending Scheduled Missions (today and future)
-        sm_query = ScheduledMission.query.options(db.selectinload(ScheduledMission.tags)).filter(
-            ScheduledMission.user_id == current_user.id,
-            ScheduledMission.quest_id == quest_id,
-            ScheduledMission.status == 'PENDING',
-            ScheduledMission.start_datetime >= today_start_utc
-        )
-        if valid_tag_uuids_for_filter:
-            for tag_uuid_item in valid_tag_uuids_for_filter:
-                sm_query = sm_query.filter(ScheduledMission.tags.any(Tag.id == tag_uuid_item))
-        
-        scheduled_missions_results = sm_query.order_by(ScheduledMission.start_datetime.asc()).limit(10).all()
-        pending_scheduled_missions = [{
-            "id": str(sm.id), "title": sm.title, "status": sm.status,
-            "start_datetime": sm.start_datetime.isoformat(), "end_datetime": sm.end_datetime.isoformat(),
-            "is_all_day": sm.is_all_day, "energy_value": sm.energy_value, "points_value": sm.points_value,
-            "quest_id": str(sm.quest_id), "quest_name": quest.name, "type": "SCHEDULED_MISSION",
-            "tags": [{"id": str(t.id), "name": t.name} for t in sm.tags]
-        } for sm in scheduled_missions_results]
-
-        # 3. Pending Pool Missions
-        pm_query = PoolMission.query.options(db.selectinload(PoolMission.tags)).filter(
-            PoolMission.user_id == current_user.id, PoolMission.quest_id == quest_id, PoolMission.status == 'PENDING'
-        )
-        if valid_tag_uuids_for_filter:
-            for tag_uuid_item in valid_tag_uuids_for_filter:
-                pm_query = pm_query.filter(PoolMission.tags.any(Tag.id == tag_uuid_item))
-        
-        pool_missions_results = pm_query.order_by(
-            db.case((PoolMission.focus_status == 'ACTIVE', 0), else_=1), PoolMission.created_at.desc()
-        ).limit(10).all()
-        pending_pool_missions = [{
-            "id": str(pm.id), "title": pm.title, "status": pm.status, "focus_status": pm.focus_status,
-            "energy_value": pm.energy_value, "points_value": pm.points_value,
-            "quest_id": str(pm.quest_id), "quest_name": quest.name, "type": "POOL_MISSION",
-            "tags": [{"id": str(t.id), "name": t.name} for t in pm.tags]
-        } for pm in pool_missions_results]
-
-        return jsonify({
-            "quest_info": {"id": str(quest.id), "name": quest.name, "color": quest.color},
-            "todays_habit_occurrences": todays_habit_occurrences,
-            "pending_scheduled_missions": pending_scheduled_missions,
-            "pending_pool_missions": pending_pool_missions
-        }), 200
-
+        return jsonify(get_quest_dashboard_items_data(current_user.id, quest, valid_tag_uuids_for_filter)), 200
     except Exception as e:
         current_app.logger.error(f"Error fetching dashboard items for quest {quest_id}: {e}", exc_info=True)
         return jsonify({"error": "Failed to fetch quest dashboard items"}), 500
\ No newline at end of file
@@ -5,6 +5,9 @@ from app.auth_utils import token_required
 import uuid
 from datetime import datetime, timezone, date, time, timedelta # timedelta imported
 from app.services.gamification_services import update_user_stats_after_mission
+from app.services.bulk_status_services import BULK_STATUS_TARGETS, parse_bulk_status_payload, apply_bulk_status_update
+from app.services.lookup_services import get_default_quest_ref, get_owned_tags
+from app.services.tag_index_services import tags_contain_all
 
 scheduled_mission_bp = Blueprint('scheduled_mission_bp', __name__, url_prefix='/api/scheduled-missions')
 
@@ -154,7 +157,7 @@ def create_scheduled_mission():
             final_quest_id_for_db = found_quest.id; assigned_quest_object = found_quest
         except ValueError: return jsonify({"error": "Invalid Quest ID format provided."}), 400
     else: 
-        default_quest = Quest.query.filter_by(user_id=current_user.id, is_default_quest=True).first()
+        default_quest = get_default_quest_ref(current_user.id)
         if not default_quest:
             current_app.logger.error(f"CRITICAL: User {current_user.id} does not have a default Quest for SM assignment.")
             return jsonify({"error": "Default quest not found. Cannot create mission."}), 500
@@ -172,7 +175,7 @@ def create_scheduled_mission():
 
         if tag_ids_str_list:
             valid_tag_uuids = [uuid.UUID(tid) for tid in tag_ids_str_list if tid]
-            tags_to_associate = Tag.query.filter(Tag.id.in_(valid_tag_uuids), Tag.user_id == current_user.id).all()
+            tags_to_associate = get_owned_tags(current_user.id, valid_tag_uuids)
             new_mission.tags = tags_to_associate
         
         db.session.commit()
@@ -219,7 +222,7 @@ def get_scheduled_missions():
         if tag_ids_param:
             valid_tag_uuids = [uuid.UUID(tid) for tid_str in tag_ids_param for tid in tid_str.split(',') if tid] 
             if valid_tag_uuids:
-                for tag_uuid_item in valid_tag_uuids: query = query.filter(ScheduledMission.tags.any(Tag.id == tag_uuid_item))
+                query = query.filter(tags_contain_all(ScheduledMission, valid_tag_uuids))
 
         if status_filter and status_filter.upper() in ['PENDING', 'COMPLETED', 'SKIPPED']:
             query = query.filter(ScheduledMission.status == status_filter.upper())
@@ -284,7 +287,8 @@ def update_scheduled_mission(mission_id):
     data = request.get_json()
     current_user = g.current_user
 
-    mission_to_update = ScheduledMission.query.filter_by(id=mission_id, user_id=current_user.id).first()
+    mission_to_update = ScheduledMission.query.options(db.joinedload(ScheduledMission.quest), db.selectinload(ScheduledMission.tags))\
+        .filter_by(id=mission_id, user_id=current_user.id).first()
     if not mission_to_update: return jsonify({"error": "Scheduled Mission not found or access denied"}), 404
 
     errors, start_datetime_obj_validated, end_datetime_obj_validated = validate_scheduled_mission_data(data, is_update=True)
@@ -331,12 +335,12 @@ def update_scheduled_mission(mission_id):
                 if not found_quest: return jsonify({"error": "Specified Quest not found."}), 404
                 mission_to_update.quest_id = found_quest.id; final_assigned_quest_object = found_quest
             else: 
-                default_quest = Quest.query.filter_by(user_id=current_user.id, is_default_quest=True).first()
+                default_quest = get_default_quest_ref(current_user.id)
                 if not default_quest: return jsonify({"error": "Default quest not found."}), 500
                 mission_to_update.quest_id = default_quest.id; final_assigned_quest_object = default_quest
         
         if 'tag_ids' in data:
-            valid_tags = Tag.query.filter(Tag.id.in_([uuid.UUID(tid) for tid in data.get('tag_ids', []) if tid]), Tag.user_id == current_user.id).all()
+            valid_tags = get_owned_tags(current_user.id, [uuid.UUID(tid) for tid in data.get('tag_ids', []) if tid])
             mission_to_update.tags = valid_tags
 
         if 'status' in data:
@@ -420,6 +424,24 @@ def update_scheduled_mission_status(mission_id):
         db.session.rollback(); current_app.logger.error(f"Error updating SM status {mission_id}: {e}", exc_info=True)
         return jsonify({"error": "Failed to update mission status"}), 500
 
+@scheduled_mission_bp.route('/status', methods=['PATCH'])
+@token_required
+def bulk_update_scheduled_missions_status():
+    data = request.get_json(silent=True); current_user = g.current_user
+    target = BULK_STATUS_TARGETS['SCHEDULED_MISSION']
+    items, payload_error = parse_bulk_status_payload(data, target["statuses"], current_app.config.get('BULK_STATUS_MAX_ITEMS', 500))
+    if payload_error: return jsonify({"error": payload_error}), 400
+    try:
+        results, updated_count = apply_bulk_status_update(current_user, 'SCHEDULED_MISSION', items)
+        db.session.commit()
+        return jsonify({
+            "results": results, "updated_count": updated_count,
+            "user_total_points": current_user.total_points, "user_level": current_user.level
+        }), 200
+    except Exception as e:
+        db.session.rollback(); current_app.logger.error(f"Error in bulk SCHEDULED_MISSION status update for user {current_user.id}: {e}", exc_info=True)
+        return jsonify({"error": "Failed to update statuses"}), 500
+
 @scheduled_mission_bp.route('/<uuid:mission_id>', methods=['DELETE'])
 @token_required
 def delete_scheduled_mission(mission_id):
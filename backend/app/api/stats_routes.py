@@ -0,0 +1,20 @@
+# backend/app/api/stats_routes.py
+from flask import Blueprint, jsonify, g, current_app
+from app.auth_utils import token_required
+from app.services.counter_services import user_counters
+
+stats_bp = Blueprint('stats_bp', __name__, url_prefix='/api/stats')
+
+@stats_bp.route('/counters', methods=['GET'])
+@token_required
+def get_counters():
+    """
+    Sidebar badges: {"quests": {quest_id: {status: {"count", "points_sum"}}}, "tags": {tag_id: ...}}.
+    Statuses with no items are omitted.
+    """
+    current_user = g.current_user
+    try:
+        return jsonify(user_counters(current_user.id)), 200
+    except Exception as e:
+        current_app.logger.error(f"Error fetching counters for user {current_user.id}: {e}", exc_info=True)
+        return jsonify({"error": "Failed to fetch counters"}), 500
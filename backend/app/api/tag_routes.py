@@ -4,6 +4,7 @@ from app.models import db, User, Tag
 from app.models import pool_mission_tags_association, scheduled_mission_tags_association, habit_template_tags_association
 from app.models import PoolMission, ScheduledMission, HabitTemplate # Para desasociar al borrar tag
 from app.auth_utils import token_required
+from app.services.tag_services import TAGGABLE_ENTITIES, parse_uuid_list, bulk_update_entity_tags
 import re
 
 
@@ -258,3 +259,46 @@ def remove_tag_from_entity(entity_type, entity_id, tag_id_to_remove):
         current_app.logger.error(f"Error removing tag {tag_id_to_remove} from {entity_type} {entity_id} for user {current_user.id}: {e}")
         return jsonify({"error": "Failed to remove tag from entity due to an internal error"}), 500
 
+
+# --- Endpoint para asignar/quitar muchos Tags a muchas entidades en una sola petición ---
+@tag_bp.route('/bulk', methods=['POST'])
+@token_required
+def bulk_update_entity_tags_route():
+    """
+    Payload: {"entity_type": "pool-missions"|"scheduled-missions"|"habit-templates",
+              "entity_ids": [...], "add_tag_ids": [...], "remove_tag_ids": [...]}
+    """
+    data = request.get_json(silent=True)
+    current_user = g.current_user
+    if not isinstance(data, dict):
+        return jsonify({"error": "Invalid input: No data provided"}), 400
+
+    entity_type = str(data.get('entity_type', '')).lower()
+    if entity_type not in TAGGABLE_ENTITIES:
+        return jsonify({"error": f"Invalid entity type. Must be one of {list(TAGGABLE_ENTITIES.keys())}."}), 400
+
+    entity_ids, error = parse_uuid_list(data.get('entity_ids'), 'entity_ids')
+    if error: return jsonify({"error": error}), 400
+    add_tag_ids, error = parse_uuid_list(data.get('add_tag_ids'), 'add_tag_ids')
+    if error: return jsonify({"error": error}), 400
+    remove_tag_ids, error = parse_uuid_list(data.get('remove_tag_ids'), 'remove_tag_ids')
+    if error: return jsonify({"error": error}), 400
+
+    if not entity_ids:
+        return jsonify({"error": "entity_ids must be a non-empty list."}), 400
+    max_entities = current_app.config.get('TAG_BULK_MAX_ENTITIES', 1000)
+    if len(entity_ids) > max_entities:
+        return jsonify({"error": f"Too many entities (max {max_entities})."}), 400
+    if not add_tag_ids and not remove_tag_ids:
+        return jsonify({"error": "add_tag_ids or remove_tag_ids is required."}), 400
+    if set(add_tag_ids) & set(remove_tag_ids):
+        return jsonify({"error": "A tag cannot be added and removed in the same request."}), 400
+
+    try:
+        result = bulk_update_entity_tags(current_user.id, entity_type, entity_ids, add_tag_ids, remove_tag_ids)
+        db.session.commit()
+        return jsonify(result), 200
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error in bulk tag update on {entity_type} for user {current_user.id}: {e}", exc_info=True)
+        return jsonify({"error": "Failed to update tags due to an internal error"}), 500
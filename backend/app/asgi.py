@@ -0,0 +1,232 @@
+# backend/app/asgi.py
+"""
+ASGI entry point: the three hottest dashboard reads run natively on asyncio, everything else
+goes to the Flask app unchanged (through a2wsgi's thread pool).
+
+    uvicorn asgi:application --workers 4      # backend/asgi.py
+
+Natively served (GET only, same URLs, status codes and JSON bodies as the Flask views):
+    /api/dashboard/today-agenda
+    /api/dashboard/recent-activity
+    /api/quests/<uuid>/dashboard-items
+
+Each one builds the same selects as dashboard_services and runs them concurrently on separate
+connections (app.db_async), together with the user (and quest) check that token_required does.
+Responses go through the shared dashboard cache with the same keys as the WSGI views.
+
+Can also be deployed next to the WSGI server: route just those three paths to uvicorn and the rest
+to gunicorn. With the in-process memory cache, invalidations only reach the process that wrote,
+so split deployments need DASHBOARD_CACHE_BACKEND=redis (or null).
+Requests the async path does not handle (profiling, async engines unavailable) fall back to Flask.
+Per-endpoint request metrics and Server-Timing are only recorded on the Flask side.
+"""
+import asyncio
+import re
+import uuid
+from datetime import date
+from urllib.parse import parse_qsl
+from sqlalchemy import select
+from werkzeug.datastructures import MultiDict
+from app import create_app, CORS_ORIGINS
+from app.auth_utils import decode_jwt
+from app.db_async import async_read_engines, resolve_read_bind
+from app.db_shards import UserMovingError
+from app.observability.profiling import PROFILE_HEADER, PROFILE_QUERY_ARG
+from app.services.cache_services import dashboard_cache
+from app.services.dashboard_services import (
+    parse_tag_filter, today_agenda_statements, assemble_today_agenda, recent_activity_statements,
+    assemble_recent_activity, quest_dashboard_items_statements, assemble_quest_dashboard_items
+)
+
+ASYNC_ROUTES = (
+    (re.compile(r'^/api/dashboard/today-agenda$'), 'today_agenda'),
+    (re.compile(r'^/api/dashboard/recent-activity$'), 'recent_activity'),
+    (re.compile(r'^/api/quests/(?P<quest_id>[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})/dashboard-items$'), 'quest_dashboard_items'),
+)
+
+
+class QuestNotFound(Exception):
+    pass
+
+
+class AsyncReadsApp:
+    def __init__(self, flask_app, wsgi_app):
+        self.flask_app = flask_app
+        self.wsgi_app = wsgi_app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] == 'http' and scope['method'] == 'GET' and async_read_engines.available:
+            for pattern, handler_name in ASYNC_ROUTES:
+                match = pattern.match(scope['path'])
+                if match:
+                    headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+                    args = MultiDict(parse_qsl(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True))
+                    if PROFILE_HEADER.lower() in headers or PROFILE_QUERY_ARG in args:
+                        break # El profiling bajo demanda solo existe en el lado Flask
+                    if handler_name == 'quest_dashboard_items':
+                        match_args = {"quest_id": uuid.UUID(match.group('quest_id'))}
+                    else:
+                        match_args = {}
+                    status, payload = await getattr(self, handler_name)(headers, args, **match_args)
+                    return await self._send_json(send, status, payload, headers.get('origin'))
+        await self.wsgi_app(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_read_engines.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _send_json(self, send, status, payload, origin):
+        with self.flask_app.app_context():
+            response = self.flask_app.json.response(payload) # Mismo serializador (y bytes) que jsonify
+        headers = [(b'content-type', response.content_type.encode('latin-1'))]
+        if origin in CORS_ORIGINS:
+            headers += [
+                (b'access-control-allow-origin', origin.encode('latin-1')),
+                (b'access-control-allow-credentials', b'true'),
+                (b'vary', b'Origin'),
+            ]
+        body = response.get_data()
+        headers.append((b'content-length', str(len(body)).encode('latin-1')))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    # --- Auth (same checks and messages as token_required) ---
+    def _authenticate(self, headers):
+        """(user_id, None) or (None, (status, payload))."""
+        token = None
+        if 'authorization' in headers:
+            try:
+                token_type, token = headers['authorization'].split()
+                if token_type.lower() != 'bearer':
+                    token = None
+            except ValueError:
+                token = None
+        if not token:
+            return None, (401, {'error': 'Token is missing or invalid format'})
+
+        with self.flask_app.app_context():
+            decoded_token = decode_jwt(token)
+        if not decoded_token or 'error' in decoded_token:
+            error_message = decoded_token.get('error', 'Invalid token') if isinstance(decoded_token, dict) else 'Invalid token'
+            status_code = decoded_token.get('status_code', 401) if isinstance(decoded_token, dict) else 401
+            return None, (status_code, {'error': error_message})
+        try:
+            return uuid.UUID(str(decoded_token['sub'])), None
+        except (KeyError, ValueError):
+            return None, (401, {'error': 'User not found for token subject'})
+
+    async def _user_exists(self, bind_key, user_id):
+        from app.models import User
+        return await async_read_engines.first(bind_key, select(User.id).where(User.id == user_id)) is not None
+
+    async def _serve(self, headers, payload_coro_fn, error_message, extra_checks=None):
+        """
+        Authenticates, routes to the user's shard/replica and runs the user check, extra_checks
+        and the (cached) payload concurrently. extra_checks(bind_key, user_id) returns an awaitable
+        whose result is (status, payload) to short-circuit with, or None.
+        """
+        user_id, auth_error = self._authenticate(headers)
+        if auth_error:
+            return auth_error
+        try:
+            bind_key = await resolve_read_bind(self.flask_app, user_id)
+        except UserMovingError:
+            return 503, {'error': 'Account temporarily unavailable, please retry shortly'}
+
+        checks = extra_checks(bind_key, user_id) if extra_checks else asyncio.sleep(0)
+        user_exists, check_result, payload = await asyncio.gather(
+            self._user_exists(bind_key, user_id), checks, payload_coro_fn(bind_key, user_id), return_exceptions=True
+        )
+        for outcome in (user_exists, check_result, payload):
+            if isinstance(outcome, BaseException) and not isinstance(outcome, Exception):
+                raise outcome # CancelledError y similares
+        if user_exists is False:
+            return 401, {'error': 'User not found for token subject'}
+        failure = next((o for o in (user_exists, check_result, payload) if isinstance(o, Exception) and not isinstance(o, QuestNotFound)), None)
+        if failure is not None:
+            self.flask_app.logger.error(f"{error_message} (async) for user {user_id}: {failure}", exc_info=failure)
+            return 500, {'error': error_message}
+        if check_result is not None:
+            return check_result
+        return 200, payload
+
+    def _tag_filter(self, args):
+        with self.flask_app.app_context():
+            return parse_tag_filter(args.getlist('tags'))
+
+    # --- Endpoints ---
+    async def today_agenda(self, headers, args):
+        tag_uuids = self._tag_filter(args)
+        today = date.today()
+
+        async def payload(bind_key, user_id):
+            async def compute():
+                rows = await async_read_engines.scalars_concurrently(bind_key, today_agenda_statements(user_id, tag_uuids, today))
+                return assemble_today_agenda(rows)
+            return await dashboard_cache.get_or_compute_async(user_id, 'today_agenda', compute, tag_uuids=tag_uuids, day=today)
+
+        return await self._serve(headers, payload, "Failed to fetch today's agenda")
+
+    async def recent_activity(self, headers, args):
+        tag_uuids = self._tag_filter(args)
+        limit = args.get('limit', 10, type=int)
+
+        async def payload(bind_key, user_id):
+            async def compute():
+                rows = await async_read_engines.scalars_concurrently(bind_key, recent_activity_statements(user_id, tag_uuids, limit))
+                return assemble_recent_activity(rows, limit)
+            return await dashboard_cache.get_or_compute_async(
+                user_id, 'recent_activity', compute, tag_uuids=tag_uuids, extra={"limit": limit}
+            )
+
+        return await self._serve(headers, payload, "Failed to fetch recent activity")
+
+    async def quest_dashboard_items(self, headers, args, quest_id):
+        from app.models import Quest
+        tag_uuids = self._tag_filter(args)
+        today = date.today()
+        quest_task = None
+
+        def load_quest(bind_key, user_id):
+            nonlocal quest_task
+            if quest_task is None:
+                quest_task = asyncio.ensure_future(
+                    async_read_engines.first(bind_key, select(Quest).where(Quest.id == quest_id, Quest.user_id == user_id))
+                )
+            return quest_task
+
+        async def quest_check(bind_key, user_id):
+            if await load_quest(bind_key, user_id) is None:
+                return 404, {"error": "Quest not found or access denied"}
+            return None
+
+        async def payload(bind_key, user_id):
+            async def compute():
+                quest, rows = await asyncio.gather(
+                    load_quest(bind_key, user_id),
+                    async_read_engines.scalars_concurrently(bind_key, quest_dashboard_items_statements(user_id, quest_id, tag_uuids, today))
+                )
+                if quest is None:
+                    raise QuestNotFound(quest_id) # No se cachea; quest_check devuelve el 404
+                return assemble_quest_dashboard_items(quest, rows)
+            return await dashboard_cache.get_or_compute_async(
+                user_id, 'quest_dashboard_items', compute, tag_uuids=tag_uuids, day=today, extra={"quest_id": quest_id}
+            )
+
+        return await self._serve(headers, payload, "Failed to fetch quest dashboard items", extra_checks=quest_check)
+
+
+def create_asgi_app(config_class=None, flask_app=None):
+    from a2wsgi import WSGIMiddleware
+    flask_app = flask_app or create_app(config_class)
+    async_read_engines.init_app(flask_app)
+    wsgi_app = WSGIMiddleware(flask_app, workers=flask_app.config.get('ASGI_WSGI_WORKERS', 10))
+    return AsyncReadsApp(flask_app, wsgi_app)
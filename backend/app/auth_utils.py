@@ -3,6 +3,12 @@ from datetime import datetime, timedelta, timezone
 from flask import current_app, jsonify # Añadido jsonify para respuestas de error consistentes
 from functools import wraps
 from flask import request, g # g es un objeto de contexto de aplicación de Flask
+from app.observability.request_metrics import phase_timer
+from app.observability.profiling import profile_view_if_requested
+
+# Clave del environ WSGI con la que /api/batch pasa el usuario ya autenticado a sus sub-peticiones.
+# Solo se rellena en proceso (nunca desde cabeceras HTTP), así que no puede ser falsificada por el cliente.
+BATCH_USER_ENVIRON_KEY = 'iterpolaris.batch_user'
 
 def generate_jwt(user_id, user_email):
     """
@@ -50,6 +56,12 @@ def decode_jwt(token):
 def token_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
+        # Sub-peticiones de /api/batch: el token ya se validó una vez en la petición externa
+        batch_user = request.environ.get(BATCH_USER_ENVIRON_KEY)
+        if batch_user is not None:
+            g.current_user = batch_user
+            return f(*args, **kwargs)
+
         token = None
         # Buscar token en el header 'Authorization' (formato: Bearer <token>)
         if 'Authorization' in request.headers:
@@ -65,7 +77,8 @@ def token_required(f):
         if not token:
             return jsonify({'error': 'Token is missing or invalid format'}), 401
 
-        decoded_token = decode_jwt(token)
+        with phase_timer('auth'):
+            decoded_token = decode_jwt(token)
 
         if not decoded_token or 'error' in decoded_token:
             error_message = decoded_token.get('error', 'Invalid token') if isinstance(decoded_token, dict) else 'Invalid token'
@@ -74,12 +87,26 @@ def token_required(f):
 
         # Cargar el usuario actual en el contexto de la aplicación (g) para fácil acceso en la ruta
         # Esto asume que 'sub' en tu token JWT es el user_id
-        from app.models import User 
-        current_user = User.query.get(decoded_token['sub'])
+        from app.models import db
+        from app.db_shards import route_user_shard
+        from app.services.lookup_services import get_user
+        if route_user_shard(db.session, decoded_token['sub']) == 'MOVING':
+            return jsonify({'error': 'Account temporarily unavailable, please retry shortly'}), 503
+        if request.method == 'GET':
+            # Lecturas a una réplica salvo que el usuario haya escrito hace poco (read-your-writes)
+            from app.db_replicas import route_reads_for_user
+            route_reads_for_user(db.session, decoded_token['sub'])
+        with phase_timer('user_load'):
+            current_user = get_user(decoded_token['sub'])
         if not current_user:
             return jsonify({'error': 'User not found for token subject'}), 401
 
         g.current_user = current_user # Hacer current_user accesible en la ruta
 
+        # Modo profiling bajo demanda (cabecera X-Profile o ?__profile=), solo para administradores
+        profiled_response = profile_view_if_requested(f, args, kwargs)
+        if profiled_response is not None:
+            return profiled_response
+
         return f(*args, **kwargs)
     return decorated_function
\ No newline at end of file
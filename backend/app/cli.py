@@ -0,0 +1,172 @@
+# backend/app/cli.py
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from app.models import db
+from app.db_shards import find_user_by_email
+
+
+def _get_user_by_email(email):
+    user = find_user_by_email(email) # Deja la sesión apuntando al shard del usuario
+    if not user:
+        raise click.ClickException(f"User with email '{email}' not found.")
+    return user
+
+
+@click.command('import-missions')
+@click.option('--email', required=True, help='Email of the user that will own the missions.')
+@click.option('--kind', type=click.Choice(['pool-missions', 'scheduled-missions']), required=True)
+@click.option('--file', 'file_path', type=click.Path(exists=True, dir_okay=False), required=True)
+@click.option('--format', 'import_format', type=click.Choice(['ndjson', 'csv', 'json']), default=None, help='Detected from the file extension if omitted.')
+@click.option('--create-missing-tags', is_flag=True, default=False)
+@click.option('--dry-run', is_flag=True, default=False)
+@click.option('--partial', is_flag=True, default=False, help='Import the valid rows even if others fail.')
+@with_appcontext
+def import_missions_command(email, kind, file_path, import_format, create_missing_tags, dry_run, partial):
+    """Bulk import missions from an NDJSON/CSV/JSON file (same rules as POST /api/import/<kind>)."""
+    from app.services.import_services import detect_import_format, import_missions
+
+    user = _get_user_by_email(email)
+    import_format = detect_import_format(import_format, filename=file_path)
+    if not import_format:
+        raise click.ClickException("Could not detect the file format; use --format.")
+    with open(file_path, encoding='utf-8-sig') as import_file:
+        text = import_file.read()
+
+    result = import_missions(
+        user.id, kind, text, import_format,
+        create_missing_tags=create_missing_tags, dry_run=dry_run, partial=partial,
+        chunk_size=current_app.config.get('IMPORT_CHUNK_SIZE', 500),
+        max_rows=10**9 # Sin límite práctico de filas desde la CLI
+    )
+    if "error" in result or dry_run or (result["errors"] and not partial):
+        db.session.rollback()
+    else:
+        db.session.commit()
+    if "error" in result:
+        raise click.ClickException(result["error"])
+
+    for row_error in result["errors"]:
+        click.echo(f"Row {row_error['row']}: {row_error['errors']}", err=True)
+    if result["errors"] and not partial:
+        raise click.ClickException(f"{result['failed']} rows failed; nothing was imported (use --partial to import the valid rows).")
+    click.echo(f"{'[dry-run] ' if dry_run else ''}Imported {result['imported']} {kind}, {result['failed']} rows failed.")
+
+
+@click.command('export-account')
+@click.option('--email', required=True, help='Email of the user to export.')
+@click.option('--format', 'export_format', type=click.Choice(['ndjson', 'zip']), default='ndjson')
+@click.option('--output', 'output_path', type=click.Path(dir_okay=False, writable=True), required=True)
+@with_appcontext
+def export_account_command(email, export_format, output_path):
+    """Streams a full account export to a file (same content as GET /api/export)."""
+    from app.services.export_services import count_export_rows, iter_ndjson_export, iter_zip_csv_export
+
+    user = _get_user_by_email(email)
+    counts = count_export_rows(user.id)
+    batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 1000)
+    with click.progressbar(length=sum(counts.values()), label=f'Exporting {email}') as bar:
+        last_seen = {}
+
+        def advance(entity_name, rows_done):
+            bar.update(rows_done - last_seen.get(entity_name, 0))
+            last_seen[entity_name] = rows_done
+
+        iter_export = iter_zip_csv_export if export_format == 'zip' else iter_ndjson_export
+        with open(output_path, 'wb') as output_file:
+            for chunk in iter_export(user.id, counts, batch_size, advance):
+                output_file.write(chunk if isinstance(chunk, bytes) else chunk.encode('utf-8'))
+    click.echo(f"Exported {sum(counts.values())} rows to {output_path}")
+
+
+@click.command('shard-init')
+@with_appcontext
+def shard_init_command():
+    """Creates the per-user tables on every extra shard (SHARD_DATABASE_URLS) and stamps them at the latest migration."""
+    from app.db_shards import create_all_shards, stamp_shards_head, shard_count
+    create_all_shards(db)
+    stamp_shards_head(db)
+    click.echo(f"Schema created on shards 1..{shard_count() - 1}.")
+
+
+@click.command('shard-directory-backfill')
+@with_appcontext
+def shard_directory_backfill_command():
+    """Records users created before sharding was enabled as living on shard 0."""
+    from app.db_shards import backfill_directory
+    click.echo(f"Added {backfill_directory(db)} directory entries.")
+
+
+@click.command('shard-move')
+@click.option('--email', required=True, help='Email of the user to move.')
+@click.option('--to-shard', 'target_shard', type=int, required=True)
+@click.option('--grace-seconds', type=float, default=None, help='Wait after blocking the account (default: SHARD_DIRECTORY_CACHE_SECONDS).')
+@click.option('--chunk-size', type=int, default=1000)
+@with_appcontext
+def shard_move_command(email, target_shard, grace_seconds, chunk_size):
+    """Moves one user and all their rows to another shard. The account answers 503 while it runs."""
+    from app.db_shards import move_user_to_shard, ShardMoveError
+
+    def progress(table_name, rows_done):
+        if rows_done % (chunk_size * 10) == 0:
+            click.echo(f"  {table_name}: {rows_done} rows")
+
+    try:
+        copied = move_user_to_shard(db, email, target_shard, chunk_size=chunk_size, grace_seconds=grace_seconds, progress=progress)
+    except ShardMoveError as e:
+        raise click.ClickException(str(e))
+    if not copied:
+        click.echo(f"{email} is already on shard {target_shard}.")
+        return
+    for table_name, rows in copied.items():
+        click.echo(f"  {table_name}: {rows}")
+    click.echo(f"Moved {email} to shard {target_shard} ({sum(copied.values())} rows).")
+
+
+@click.command('tag-ids-backfill')
+@click.option('--chunk-size', type=int, default=1000)
+@with_appcontext
+def tag_ids_backfill_command(chunk_size):
+    """Rebuilds the denormalized tag/occurrence columns from the source tables (run `flask db upgrade` first)."""
+    from app.services.tag_index_services import backfill_tag_ids
+
+    def progress(table_name, rows_done):
+        if rows_done % (chunk_size * 10) == 0:
+            click.echo(f"  {table_name}: {rows_done} rows")
+
+    counts = backfill_tag_ids(db, chunk_size=chunk_size, progress=progress)
+    for table_name, rows in counts.items():
+        click.echo(f"  {table_name}: {rows}")
+    click.echo(f"Rebuilt tag_ids for {sum(counts.values())} rows (habit occurrences follow their templates).")
+
+
+@click.command('counters-rebuild')
+@click.option('--email', default=None, help='Only this user (default: every user on every shard).')
+@click.option('--chunk-size', type=int, default=500, help='Users per transaction when rebuilding everyone.')
+@with_appcontext
+def counters_rebuild_command(email, chunk_size):
+    """Recomputes the per-quest/per-tag sidebar counters from the source tables (drift repair)."""
+    from app.services.counter_services import rebuild_counters, rebuild_all_counters
+
+    if email:
+        user = _get_user_by_email(email)
+        rebuild_counters(db.session, [user.id])
+        db.session.commit()
+        click.echo(f"Rebuilt counters for {email}.")
+        return
+
+    def progress(shard, users_done):
+        if users_done % (chunk_size * 10) == 0:
+            click.echo(f"  shard {shard}: {users_done} users")
+
+    click.echo(f"Rebuilt counters for {rebuild_all_counters(db, chunk_size=chunk_size, progress=progress)} users.")
+
+
+def register_cli_commands(app):
+    app.cli.add_command(import_missions_command)
+    app.cli.add_command(export_account_command)
+    app.cli.add_command(shard_init_command)
+    app.cli.add_command(shard_directory_backfill_command)
+    app.cli.add_command(shard_move_command)
+    app.cli.add_command(tag_ids_backfill_command)
+    app.cli.add_command(counters_rebuild_command)
@@ -0,0 +1,152 @@
+# backend/app/db_async.py
+"""
+asyncio engines for the ASGI read path (app.asgi).
+
+One AsyncEngine per configured database: the default one (None), replica_<n> and shard_<n>,
+on the async driver of the same database (postgresql+asyncpg, sqlite+aiosqlite). Each query
+runs in its own short AsyncSession, so independent queries of one request go out on separate
+connections at the same time; the pool (DB_POOL_SIZE + DB_MAX_OVERFLOW) is per process, like the
+sync one.
+
+If any database has no async equivalent (in-memory SQLite, driver not installed) the async
+path is disabled as a whole and every request is served by the Flask app.
+"""
+import asyncio
+import random
+from sqlalchemy import select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+from app.services.cache_services import call_cache_backend
+
+ASYNC_DRIVERS = {'postgresql': 'postgresql+asyncpg', 'postgres': 'postgresql+asyncpg', 'sqlite': 'sqlite+aiosqlite'}
+
+
+def async_database_url(database_uri):
+    """Async-driver URL for a sync database URI, or None if there is none."""
+    url = make_url(database_uri)
+    backend = url.get_backend_name()
+    if backend == 'sqlite' and url.database in (None, '', ':memory:'):
+        return None # Cada engine vería su propia base en memoria
+    driver = ASYNC_DRIVERS.get(backend)
+    return url.set(drivername=driver) if driver else None
+
+
+def build_async_engine_options(config, url):
+    """create_async_engine options mirroring build_engine_options (asyncpg spells them differently)."""
+    if url.get_backend_name() != 'postgresql':
+        return url, {}
+    server_settings = {}
+    if config.get('DB_APPLICATION_NAME'):
+        server_settings['application_name'] = config['DB_APPLICATION_NAME']
+    connect_args = {}
+    if config.get('DB_PGBOUNCER_MODE'):
+        options = {"poolclass": NullPool}
+        # asyncpg prepara las sentencias en el servidor: con pgbouncer en modo transacción hay que desactivarlo
+        connect_args['statement_cache_size'] = 0
+        url = url.update_query_dict({"prepared_statement_cache_size": "0"})
+    else:
+        options = {
+            "pool_size": config.get('DB_POOL_SIZE', 5),
+            "max_overflow": config.get('DB_MAX_OVERFLOW', 10),
+            "pool_timeout": config.get('DB_POOL_TIMEOUT', 30),
+            "pool_recycle": config.get('DB_POOL_RECYCLE', 1800),
+            "pool_pre_ping": config.get('DB_POOL_PRE_PING', True),
+            "pool_use_lifo": True,
+        }
+        if config.get('DB_STATEMENT_TIMEOUT_MS'):
+            server_settings['statement_timeout'] = str(int(config['DB_STATEMENT_TIMEOUT_MS']))
+    if server_settings:
+        connect_args['server_settings'] = server_settings
+    if connect_args:
+        options['connect_args'] = connect_args
+    return url, options
+
+
+class AsyncReadEngines:
+    def __init__(self):
+        self.engines = {}
+        self.set_local_timeout_ms = None
+
+    @property
+    def available(self):
+        return None in self.engines
+
+    def init_app(self, app):
+        from sqlalchemy.ext.asyncio import create_async_engine
+        self.engines = {}
+        if not app.config.get('ASYNC_READS_ENABLED', True):
+            return
+        binds = app.config.get('SQLALCHEMY_BINDS') or {}
+        database_uris = {None: app.config['SQLALCHEMY_DATABASE_URI']}
+        for bind_key, bind in binds.items():
+            database_uris[bind_key] = bind['url'] if isinstance(bind, dict) else bind
+
+        engines = {}
+        for bind_key, database_uri in database_uris.items():
+            url = async_database_url(database_uri)
+            if url is None:
+                app.logger.warning(f"Async reads disabled: no async driver for bind {bind_key or 'default'}.")
+                return
+            url, options = build_async_engine_options(app.config, url)
+            try:
+                engines[bind_key] = create_async_engine(url, **options)
+            except ImportError as e:
+                app.logger.warning(f"Async reads disabled: {e}.")
+                return
+        self.engines = engines
+        # Con pgbouncer el timeout no llega como opción de arranque: SET LOCAL en cada transacción
+        if app.config.get('DB_PGBOUNCER_MODE') and app.config.get('DB_STATEMENT_TIMEOUT_MS'):
+            self.set_local_timeout_ms = int(app.config['DB_STATEMENT_TIMEOUT_MS'])
+
+    async def dispose(self):
+        await asyncio.gather(*(engine.dispose() for engine in self.engines.values()))
+
+    async def scalars(self, bind_key, statement):
+        """All entities of one select on its own session/connection (eager loads included)."""
+        from sqlalchemy.ext.asyncio import AsyncSession
+        engine = self.engines[bind_key]
+        async with AsyncSession(engine) as session:
+            if self.set_local_timeout_ms is not None and engine.dialect.name == 'postgresql':
+                await session.execute(text(f"SET LOCAL statement_timeout = {self.set_local_timeout_ms}"))
+            return (await session.scalars(statement)).all()
+
+    async def first(self, bind_key, statement):
+        rows = await self.scalars(bind_key, statement.limit(1))
+        return rows[0] if rows else None
+
+    async def scalars_concurrently(self, bind_key, statements):
+        """{name: select} -> {name: [entities]}, all queries in flight at once."""
+        results = await asyncio.gather(*(self.scalars(bind_key, statement) for statement in statements.values()))
+        return dict(zip(statements, results))
+
+
+async_read_engines = AsyncReadEngines()
+
+
+async def resolve_read_bind(app, user_id):
+    """
+    Bind key for a user's reads, same rules as token_required: their shard if sharding is on,
+    else a random replica unless they wrote within the stickiness window. Raises
+    UserMovingError while the account is being moved.
+    """
+    from app.models import UserDirectory
+    from app.db_shards import directory_cache, sharding_enabled, shard_bind_key, UserMovingError
+    from app.db_replicas import read_stickiness, replica_bind_keys
+
+    if sharding_enabled(app):
+        cached = await call_cache_backend(directory_cache.backend, directory_cache.get, str(user_id))
+        if cached:
+            shard, status = cached
+        else:
+            entry = await async_read_engines.first(None, select(UserDirectory).where(UserDirectory.user_id == user_id))
+            shard, status = (entry.shard, entry.status) if entry else (0, 'ACTIVE')
+            await call_cache_backend(directory_cache.backend, directory_cache.set, str(user_id), shard, status)
+        if status == 'MOVING':
+            raise UserMovingError(str(user_id))
+        if shard:
+            return shard_bind_key(shard)
+
+    bind_keys = replica_bind_keys(app)
+    if bind_keys and not await call_cache_backend(read_stickiness.backend, read_stickiness.is_sticky, str(user_id)):
+        return random.choice(bind_keys)
+    return None
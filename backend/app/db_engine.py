@@ -0,0 +1,106 @@
+# backend/app/db_engine.py
+"""
+Engine profile (pool sizing, pre-ping, recycle, statement timeout) built from DB_* settings,
+and the per-endpoint statement timeout applied with SET LOCAL at the start of each transaction.
+
+Two modes:
+- direct (default): InstrumentedQueuePool per worker; the default statement_timeout is sent
+  once per connection as a startup option.
+- pgbouncer (DB_PGBOUNCER_MODE=true, transaction pooling): NullPool, because pgbouncer already
+  pools and a second pool per worker would pin server connections; startup options are not
+  forwarded by pgbouncer, so the timeout is issued with SET LOCAL on every transaction.
+  psycopg2 never uses server-side prepared statements, so nothing else has to be disabled.
+"""
+from flask import g, request, current_app, has_request_context
+from sqlalchemy import event
+from sqlalchemy.pool import NullPool
+from app.observability.pool_metrics import InstrumentedQueuePool, pool_stats
+
+STATEMENT_TIMEOUT_ATTR = '_statement_timeout_ms'
+
+
+def build_engine_options(config, database_uri=None, poolclass=InstrumentedQueuePool):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database (empty for SQLite)."""
+    database_uri = database_uri or config.get('SQLALCHEMY_DATABASE_URI') or ''
+    if not database_uri.startswith('postgres'):
+        return {}
+
+    connect_args = {}
+    if config.get('DB_APPLICATION_NAME'):
+        connect_args['application_name'] = config['DB_APPLICATION_NAME']
+
+    if config.get('DB_PGBOUNCER_MODE'):
+        options = {"poolclass": NullPool}
+    else:
+        options = {
+            "poolclass": poolclass,
+            "pool_size": config.get('DB_POOL_SIZE', 5),
+            "max_overflow": config.get('DB_MAX_OVERFLOW', 10),
+            "pool_timeout": config.get('DB_POOL_TIMEOUT', 30),
+            "pool_recycle": config.get('DB_POOL_RECYCLE', 1800),
+            "pool_pre_ping": config.get('DB_POOL_PRE_PING', True),
+            "pool_use_lifo": True, # Las conexiones ociosas sobrantes caducan por recycle en lugar de rotar todas
+        }
+        if config.get('DB_STATEMENT_TIMEOUT_MS'):
+            connect_args['options'] = f"-c statement_timeout={int(config['DB_STATEMENT_TIMEOUT_MS'])}"
+    if connect_args:
+        options['connect_args'] = connect_args
+    return options
+
+
+def parse_endpoint_timeouts(value):
+    """'export_bp.export_account=300000,dashboard_bp.get_dashboard_bundle=5000' -> dict."""
+    timeouts = {}
+    for part in (value or '').split(','):
+        endpoint, _, ms = part.partition('=')
+        if endpoint.strip() and ms.strip().isdigit():
+            timeouts[endpoint.strip()] = int(ms)
+    return timeouts
+
+
+def statement_timeout(ms):
+    """Per-view statement timeout in ms (0 = no limit); DB_STATEMENT_TIMEOUTS overrides it by endpoint."""
+    def decorator(view_func):
+        setattr(view_func, STATEMENT_TIMEOUT_ATTR, ms)
+        return view_func
+    return decorator
+
+
+def _select_statement_timeout():
+    config = current_app.config
+    default_ms = config.get('DB_STATEMENT_TIMEOUT_MS') or 0
+    timeout_ms = config.get('DB_STATEMENT_TIMEOUTS', {}).get(request.endpoint)
+    if timeout_ms is None:
+        view_func = current_app.view_functions.get(request.endpoint)
+        timeout_ms = getattr(view_func, STATEMENT_TIMEOUT_ATTR, None)
+    if timeout_ms is None:
+        # En modo directo el valor por defecto ya viene en la conexión: no hace falta SET LOCAL
+        timeout_ms = default_ms if config.get('DB_PGBOUNCER_MODE') and default_ms else None
+    g.statement_timeout_ms = timeout_ms
+
+
+def _apply_statement_timeout(session, transaction, connection):
+    if not has_request_context() or connection.dialect.name != 'postgresql':
+        return
+    timeout_ms = g.get('statement_timeout_ms')
+    if timeout_ms is not None:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+def init_db_engine(app, db):
+    """
+    Registers pool metrics (Postgres, or any engine built with InstrumentedQueuePool) and the
+    statement timeout hooks (Postgres only). Call after db.init_app.
+    """
+    with app.app_context():
+        engine = db.engine
+    is_postgres = engine.dialect.name == 'postgresql'
+    if is_postgres or isinstance(engine.pool, InstrumentedQueuePool):
+        pool_stats.track(engine)
+        from app.observability.request_metrics import metrics_registry
+        metrics_registry.add_collector(pool_stats.render_prometheus)
+    if not is_postgres:
+        return
+    app.before_request(_select_statement_timeout)
+    if not event.contains(db.session, 'after_begin', _apply_statement_timeout):
+        event.listen(db.session, 'after_begin', _apply_statement_timeout)
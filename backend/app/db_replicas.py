@@ -0,0 +1,100 @@
+# backend/app/db_replicas.py
+"""
+Read-replica routing.
+
+Replicas are Flask-SQLAlchemy binds named replica_<n> (from DATABASE_REPLICA_URLS). For GET
+requests, token_required calls route_reads_for_user(), which sets session.info[READ_REPLICA_INFO_KEY];
+AppSession.get_bind then sends plain SELECTs to that replica while flushes, DML and
+SELECT ... FOR UPDATE stay on the primary. The first write in the request switches the rest of it
+back to the primary.
+
+Read-your-writes: every commit that touched a user's rows marks that user sticky for
+READ_REPLICA_STICKY_SECONDS (stored in the dashboard cache backend when it is Redis, so it holds
+across workers; in process with a single worker). Sticky users read from the primary until the
+window expires. With several workers and no Redis, replica routing is disabled.
+"""
+import random
+from flask import current_app
+from sqlalchemy.pool import QueuePool
+from app.db_engine import build_engine_options
+from app.db_session import READ_REPLICA_INFO_KEY, SHARD_INFO_KEY
+
+REPLICA_BIND_PREFIX = 'replica_'
+
+
+def build_replica_binds(config, replica_urls):
+    """SQLALCHEMY_BINDS entries for the replica URLs, with the same engine profile as the primary."""
+    binds = {}
+    for index, url in enumerate(replica_urls):
+        # QueuePool sin instrumentar: las métricas de pool describen solo al primario
+        binds[f"{REPLICA_BIND_PREFIX}{index}"] = {"url": url, **build_engine_options(config, url, poolclass=QueuePool)}
+    return binds
+
+
+class ReadStickiness:
+    """Per-user 'recently wrote' flags with a TTL."""
+    def __init__(self):
+        self.backend = None
+        self.key_prefix = 'iterpolaris'
+        self.window_seconds = 5
+
+    def init_app(self, app, cache):
+        """False when the flags cannot be shared by every worker (routing must stay off)."""
+        from app.services.cache_services import MemoryCacheBackend
+        self.window_seconds = app.config.get('READ_REPLICA_STICKY_SECONDS', 5)
+        self.key_prefix = cache.key_prefix
+        if cache.backend.name == 'redis':
+            self.backend = cache.backend
+            return True
+        if (app.config.get('WEB_CONCURRENCY') or 1) > 1:
+            # La escritura marcaría solo a su worker: los demás leerían de la réplica sin los cambios
+            self.backend = None
+            return False
+        # Un solo worker: la marca se guarda en proceso (aunque la caché esté desactivada)
+        self.backend = MemoryCacheBackend(max_entries=100000)
+        return True
+
+    def _key(self, user_id):
+        return f"{self.key_prefix}:sticky-primary:{user_id}"
+
+    def mark_users(self, user_ids):
+        if self.backend is None or not self.window_seconds:
+            return
+        for user_id in user_ids:
+            self.backend.set(self._key(user_id), True, ttl=self.window_seconds)
+
+    def is_sticky(self, user_id):
+        if self.backend is None or not self.window_seconds:
+            return False
+        return self.backend.get(self._key(user_id)) is True
+
+
+read_stickiness = ReadStickiness()
+
+
+def replica_bind_keys(app=None):
+    app = app or current_app
+    return app.extensions.get('read_replicas', [])
+
+
+def route_reads_for_user(session, user_id):
+    """Sends this request's SELECTs to a replica unless the user wrote within the stickiness window."""
+    bind_keys = replica_bind_keys()
+    if not bind_keys or SHARD_INFO_KEY in session.info or read_stickiness.is_sticky(str(user_id)):
+        return None
+    bind_key = random.choice(bind_keys)
+    session.info[READ_REPLICA_INFO_KEY] = bind_key
+    return bind_key
+
+
+def init_read_replicas(app, cache):
+    bind_keys = sorted(key for key in (app.config.get('SQLALCHEMY_BINDS') or {}) if key and key.startswith(REPLICA_BIND_PREFIX))
+    app.extensions['read_replicas'] = []
+    if not bind_keys:
+        return
+    if not read_stickiness.init_app(app, cache):
+        app.logger.error("Read replicas: read-your-writes needs a backend shared by all workers (WEB_CONCURRENCY > 1); "
+                         "replica routing disabled. Use DASHBOARD_CACHE_BACKEND=redis.")
+        return
+    app.extensions['read_replicas'] = bind_keys
+    cache.add_commit_listener(read_stickiness.mark_users)
@@ -0,0 +1,65 @@
+# backend/app/db_session.py
+from flask_sqlalchemy.session import Session as FlaskSQLAlchemySession
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.dml import UpdateBase
+
+READ_REPLICA_INFO_KEY = 'read_replica_bind'
+SHARD_INFO_KEY = 'shard_bind'
+ROUTING_INFO_KEYS = (SHARD_INFO_KEY, READ_REPLICA_INFO_KEY)
+DIRECTORY_TABLE_NAME = 'user_directory' # Tabla global: siempre en la base por defecto
+
+
+def _targets_directory(mapper, clause):
+    if mapper is not None:
+        return mapper.local_table.name == DIRECTORY_TABLE_NAME
+    table = getattr(clause, 'table', None) # INSERT/UPDATE/DELETE
+    if table is not None:
+        return getattr(table, 'name', None) == DIRECTORY_TABLE_NAME
+    if isinstance(clause, Select):
+        return any(getattr(from_, 'name', None) == DIRECTORY_TABLE_NAME for from_ in clause.get_final_froms())
+    return False
+
+
+def copy_session_routing(source, target):
+    """Carries shard/replica routing over to another session (worker threads of the bundle)."""
+    for key in ROUTING_INFO_KEYS:
+        if key in source.info:
+            target.info[key] = source.info[key]
+
+
+class AppSession(FlaskSQLAlchemySession):
+    """
+    Session class behind db.session.
+
+    While session.info['defer_commit'] is set, commit() only flushes so the routes called
+    inside an atomic /api/batch keep sharing one transaction; the batch commits (or rolls
+    back) once at the end.
+
+    While session.info[SHARD_INFO_KEY] names a shard bind (see app.db_shards), everything except
+    the global user directory goes to that shard.
+
+    While session.info[READ_REPLICA_INFO_KEY] names a replica bind (see app.db_replicas),
+    plain SELECTs go to that replica. Anything else (flush, DML, FOR UPDATE) goes to the
+    primary and clears the key, so the rest of the request reads its own writes.
+    """
+
+    def commit(self):
+        if self.info.get('defer_commit'):
+            self.flush()
+            return
+        super().commit()
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            shard_key = self.info.get(SHARD_INFO_KEY)
+            if shard_key and not _targets_directory(mapper, clause):
+                return self._db.engines[shard_key]
+
+            replica_key = self.info.get(READ_REPLICA_INFO_KEY)
+            if replica_key:
+                is_select = isinstance(clause, Select)
+                if not self._flushing and is_select and clause._for_update_arg is None:
+                    return self._db.engines[replica_key]
+                if self._flushing or isinstance(clause, UpdateBase) or is_select:
+                    self.info.pop(READ_REPLICA_INFO_KEY, None) # Escritura o FOR UPDATE: el resto, al primario
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,290 @@
+# backend/app/db_shards.py
+"""
+Horizontal sharding of user data by user_id.
+
+Shard 0 is the default database (SQLALCHEMY_DATABASE_URI); SHARD_DATABASE_URLS adds shards 1..N-1
+as Flask-SQLAlchemy binds named shard_<n>. The global user_directory table (email -> user_id,
+shard, status) lives in the default database only and is what login/register consult before
+touching a shard. Users without a directory entry (created before sharding was enabled) live on
+shard 0; `flask shard-directory-backfill` records them.
+
+Per request, route_user_shard() stores the shard bind in session.info[SHARD_INFO_KEY] and
+AppSession.get_bind sends every statement except directory ones to that shard.
+Registering writes the user to its shard and the directory entry to the default database in the
+same session; the two commits are not atomic, so a failure in between leaves a user row without a
+directory entry (harmless: the email is still free and the orphan can be removed).
+"""
+import time
+from flask import current_app
+from sqlalchemy import select, insert, delete, update
+from sqlalchemy.pool import QueuePool
+from app.db_engine import build_engine_options
+from app.db_session import SHARD_INFO_KEY, READ_REPLICA_INFO_KEY, DIRECTORY_TABLE_NAME
+
+SHARD_BIND_PREFIX = 'shard_'
+
+
+class ShardMoveError(Exception):
+    pass
+
+
+class UserMovingError(Exception):
+    """The account is being moved between shards; retry shortly (503)."""
+    pass
+
+
+def build_shard_binds(config, shard_urls):
+    """SQLALCHEMY_BINDS entries for shards 1..N-1 (shard 0 is the default database)."""
+    return {
+        f"{SHARD_BIND_PREFIX}{index}": {"url": url, **build_engine_options(config, url, poolclass=QueuePool)}
+        for index, url in enumerate(shard_urls, start=1)
+    }
+
+
+def shard_count(app=None):
+    return (app or current_app).extensions.get('shard_count', 1)
+
+
+def sharding_enabled(app=None):
+    return shard_count(app) > 1
+
+
+def shard_bind_key(shard):
+    return None if not shard else f"{SHARD_BIND_PREFIX}{shard}"
+
+
+def shard_engine(db, shard):
+    return db.engines[shard_bind_key(shard)]
+
+
+def shard_for_new_user(user_id):
+    """Placement for new accounts; moves later only change the directory entry."""
+    return user_id.int % shard_count()
+
+
+# --- Directory cache (the dashboard cache's Redis backend, shared across workers; in process with one worker) ---
+class DirectoryCache:
+    def __init__(self):
+        self.backend = None
+        self.key_prefix = 'iterpolaris'
+        self.ttl = 10
+
+    def init_app(self, app, cache):
+        from app.services.cache_services import MemoryCacheBackend
+        self.ttl = app.config.get('SHARD_DIRECTORY_CACHE_SECONDS', 10)
+        self.key_prefix = cache.key_prefix
+        if cache.backend.name == 'redis':
+            self.backend = cache.backend
+        elif (app.config.get('WEB_CONCURRENCY') or 1) > 1:
+            # discard() solo llegaría a este worker: los demás seguirían escribiendo en el shard de origen
+            app.logger.error("Sharding: the directory cache needs a backend shared by all workers (WEB_CONCURRENCY > 1); "
+                             "caching disabled, every request reads the directory. Use DASHBOARD_CACHE_BACKEND=redis.")
+            self.backend, self.ttl = None, 0
+        else:
+            self.backend = MemoryCacheBackend(max_entries=100000) # Un solo worker: en proceso
+
+    def _key(self, user_id):
+        return f"{self.key_prefix}:shard-dir:{user_id}"
+
+    def get(self, user_id):
+        if self.backend is None or not self.ttl:
+            return None
+        value = self.backend.get(self._key(user_id))
+        return value if isinstance(value, list) else None
+
+    def set(self, user_id, shard, status):
+        if self.backend is None or not self.ttl or status != 'ACTIVE':
+            return # MOVING nunca se cachea: hay que volver a consultar hasta que acabe
+        self.backend.set(self._key(user_id), [shard, status], ttl=self.ttl)
+
+    def discard(self, user_id):
+        if self.backend is not None:
+            self.backend.set(self._key(user_id), None, ttl=1)
+
+
+directory_cache = DirectoryCache()
+
+
+def lookup_user_shard(user_id):
+    """(shard, status) for a user id; users missing from the directory are on shard 0."""
+    from app.models import db, UserDirectory
+    cached = directory_cache.get(str(user_id))
+    if cached:
+        return cached[0], cached[1]
+    row = db.session.execute(
+        select(UserDirectory.shard, UserDirectory.status).where(UserDirectory.user_id == user_id)
+    ).first()
+    shard, status = (row.shard, row.status) if row else (0, 'ACTIVE')
+    directory_cache.set(str(user_id), shard, status)
+    return shard, status
+
+
+def use_shard(session, shard):
+    bind_key = shard_bind_key(shard)
+    if bind_key:
+        session.info[SHARD_INFO_KEY] = bind_key
+        session.info.pop(READ_REPLICA_INFO_KEY, None) # Las réplicas son del shard 0
+    else:
+        session.info.pop(SHARD_INFO_KEY, None)
+
+
+def route_user_shard(session, user_id):
+    """Points the session at the user's shard. Returns the directory status ('ACTIVE'/'MOVING')."""
+    if not sharding_enabled():
+        return 'ACTIVE'
+    shard, status = lookup_user_shard(user_id)
+    use_shard(session, shard)
+    return status
+
+
+def email_is_registered(email):
+    from app.models import db, User, UserDirectory
+    if sharding_enabled():
+        return db.session.get(UserDirectory, email) is not None or \
+            db.session.execute(select(User.id).where(User.email == email)).first() is not None # Usuarios previos al sharding (shard 0)
+    return User.query.filter_by(email=email).first() is not None
+
+
+def find_user_by_email(email):
+    """Loads the user from its shard (login, dev password reset, CLI) and leaves the session routed there."""
+    from app.models import db, User, UserDirectory
+    if sharding_enabled():
+        entry = db.session.get(UserDirectory, email)
+        if entry is not None and entry.status == 'MOVING':
+            raise UserMovingError(email)
+        use_shard(db.session, entry.shard if entry else 0)
+    return User.query.filter_by(email=email).first()
+
+
+def prepare_new_user_shard(session, user):
+    """Assigns the id and shard of an account being registered and adds its directory entry."""
+    import uuid
+    from app.models import UserDirectory
+    if not sharding_enabled():
+        return
+    if user.id is None:
+        user.id = uuid.uuid4()
+    shard = shard_for_new_user(user.id)
+    use_shard(session, shard)
+    session.add(UserDirectory(email=user.email, user_id=user.id, shard=shard, status='ACTIVE'))
+
+
+# --- Schema and maintenance ---
+def create_all_shards(db):
+    """Creates the per-user tables on every extra shard (the directory stays on the default database)."""
+    tables = [table for table in db.metadata.sorted_tables if table.name != DIRECTORY_TABLE_NAME]
+    for shard in range(1, shard_count()):
+        db.metadata.create_all(shard_engine(db, shard), tables=tables)
+
+
+def stamp_shards_head(db):
+    """
+    Marks every extra shard as up to date with the migrations: create_all_shards builds the
+    current schema, so `flask db upgrade` must not replay the revisions there.
+    """
+    from alembic.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+    script = ScriptDirectory.from_config(current_app.extensions['migrate'].migrate.get_config())
+    for shard in range(1, shard_count()):
+        with shard_engine(db, shard).begin() as connection:
+            MigrationContext.configure(connection).stamp(script, 'head')
+
+
+def backfill_directory(db):
+    """Adds directory entries for shard-0 users that have none. Returns how many were added."""
+    from app.models import User, UserDirectory
+    missing = db.session.execute(
+        select(User.email, User.id).where(~select(UserDirectory.email).where(UserDirectory.user_id == User.id).exists())
+    ).all()
+    if missing:
+        db.session.execute(insert(UserDirectory.__table__), [
+            {"email": email, "user_id": user_id, "shard": 0, "status": 'ACTIVE'} for email, user_id in missing
+        ])
+        db.session.commit()
+    return len(missing)
+
+
+def _user_table_queries(user_id):
+    """(table, select, delete condition) for every row owned by the user, parents before children."""
+    from app.models import (
+        User, Quest, Tag, PoolMission, ScheduledMission, HabitTemplate, HabitOccurrence, EnergyLog, StatCounter,
+        pool_mission_tags_association, scheduled_mission_tags_association, habit_template_tags_association
+    )
+    users = User.__table__
+    queries = [(users, select(users).where(users.c.id == user_id), users.c.id == user_id)]
+    for model in (Quest, Tag, PoolMission, ScheduledMission, HabitTemplate, HabitOccurrence, StatCounter):
+        table = model.__table__
+        queries.append((table, select(table).where(table.c.user_id == user_id), table.c.user_id == user_id))
+    for association, parent, fk_column in (
+        (pool_mission_tags_association, PoolMission, 'pool_mission_id'),
+        (scheduled_mission_tags_association, ScheduledMission, 'scheduled_mission_id'),
+        (habit_template_tags_association, HabitTemplate, 'habit_template_id'),
+    ):
+        owned = association.c[fk_column].in_(select(parent.id).where(parent.user_id == user_id))
+        queries.append((association, select(association).where(owned), owned))
+    energy_log = EnergyLog.__table__
+    # Sin id: cada shard tiene su propia secuencia
+    queries.append((
+        energy_log, select(*[c for c in energy_log.c if c.name != 'id']).where(energy_log.c.user_id == user_id),
+        energy_log.c.user_id == user_id
+    ))
+    return queries
+
+
+def move_user_to_shard(db, email, target_shard, chunk_size=1000, grace_seconds=None, progress=None):
+    """
+    Copies every row of the user to target_shard, switches the directory entry and deletes the
+    source copy. While it runs the directory entry is MOVING and token_required answers 503, so
+    nothing writes to either copy. Waits grace_seconds (default: the directory cache TTL) after
+    marking MOVING so workers holding a cached ACTIVE entry stop writing to the source first.
+    Returns {table: rows copied}.
+    """
+    from app.models import UserDirectory
+    if not 0 <= target_shard < shard_count():
+        raise ShardMoveError(f"Shard {target_shard} does not exist (shards: 0..{shard_count() - 1}).")
+    entry = db.session.get(UserDirectory, email)
+    if entry is None:
+        raise ShardMoveError(f"No directory entry for '{email}' (run shard-directory-backfill first).")
+    if entry.status != 'ACTIVE':
+        raise ShardMoveError(f"User '{email}' is already being moved.")
+    if entry.shard == target_shard:
+        return {}
+
+    user_id, source_shard = entry.user_id, entry.shard
+    entry.status = 'MOVING'
+    db.session.commit()
+    directory_cache.discard(str(user_id))
+    time.sleep(directory_cache.ttl if grace_seconds is None else grace_seconds)
+
+    copied = {}
+    queries = _user_table_queries(user_id)
+    try:
+        with shard_engine(db, source_shard).connect() as source, shard_engine(db, target_shard).begin() as target:
+            for table, query, _ in queries:
+                result = source.execution_options(yield_per=chunk_size).execute(query)
+                copied[table.name] = 0
+                for rows in result.partitions():
+                    target.execute(insert(table), [dict(row._mapping) for row in rows])
+                    copied[table.name] += len(rows)
+                    if progress: progress(table.name, copied[table.name])
+    except Exception:
+        db.session.execute(update(UserDirectory).where(UserDirectory.email == email).values(status='ACTIVE'))
+        db.session.commit()
+        raise
+
+    db.session.execute(update(UserDirectory).where(UserDirectory.email == email).values(shard=target_shard, status='ACTIVE'))
+    db.session.commit()
+    directory_cache.discard(str(user_id))
+
+    # Borrado de la copia de origen, hijos primero (no depende de ON DELETE CASCADE)
+    with shard_engine(db, source_shard).begin() as source:
+        for table, _, condition in reversed(queries):
+            source.execute(delete(table).where(condition))
+    return copied
+
+
+def init_sharding(app, db, cache):
+    shard_keys = [key for key in (app.config.get('SQLALCHEMY_BINDS') or {}) if key and key.startswith(SHARD_BIND_PREFIX)]
+    app.extensions['shard_count'] = 1 + len(shard_keys)
+    if shard_keys:
+        directory_cache.init_app(app, cache)
@@ -0,0 +1,144 @@
+# backend/app/db_types.py
+"""
+Column types that compile to the native Postgres types in production and to plain SQLite
+types elsewhere (tests, benchmarks). Same names and call signatures as the postgresql
+dialect types they replace in models.py.
+"""
+import json
+import uuid
+from datetime import timezone
+from sqlalchemy import types, insert
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+class UUID(types.TypeDecorator):
+    """postgresql.UUID on Postgres; CHAR(32) hex elsewhere."""
+    impl = types.CHAR(32)
+    cache_ok = True
+
+    def __init__(self, as_uuid=True):
+        super().__init__()
+        self.as_uuid = as_uuid
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=self.as_uuid))
+        return dialect.type_descriptor(types.CHAR(32))
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name == 'postgresql':
+            return value
+        return (value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))).hex
+
+    def process_result_value(self, value, dialect):
+        if value is None or dialect.name == 'postgresql':
+            return value
+        value_uuid = value if isinstance(value, uuid.UUID) else uuid.UUID(value)
+        return value_uuid if self.as_uuid else str(value_uuid)
+
+
+class JSONB(types.TypeDecorator):
+    """postgresql.JSONB on Postgres; generic JSON (TEXT on SQLite) elsewhere."""
+    impl = types.JSON
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(postgresql.JSONB())
+        return dialect.type_descriptor(types.JSON())
+
+
+class ARRAY(types.TypeDecorator):
+    """
+    postgresql.ARRAY on Postgres; a JSON list elsewhere. Only for plain value lists (weekday
+    codes, tag ids); items of a TypeDecorator type (UUID) go through its own conversion.
+    """
+    impl = types.TEXT
+    cache_ok = True
+
+    def __init__(self, item_type):
+        super().__init__()
+        self.item_type = item_type
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(postgresql.ARRAY(self.item_type))
+        return dialect.type_descriptor(types.TEXT())
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name == 'postgresql':
+            return value
+        if isinstance(self.item_type, types.TypeDecorator):
+            value = [self.item_type.process_bind_param(item, dialect) for item in value]
+        return json.dumps(list(value))
+
+    def process_result_value(self, value, dialect):
+        if value is None or dialect.name == 'postgresql':
+            return value
+        items = json.loads(value)
+        if isinstance(self.item_type, types.TypeDecorator):
+            items = [self.item_type.process_result_value(item, dialect) for item in items]
+        return items
+
+
+class TIMESTAMP(types.TypeDecorator):
+    """
+    TIMESTAMP WITH TIME ZONE on Postgres. SQLite has no time zones, so values are stored as
+    naive UTC and come back as aware UTC datetimes, like psycopg2 returns them.
+    """
+    impl = types.DateTime
+    cache_ok = True
+
+    def __init__(self, timezone=False):
+        super().__init__(timezone=timezone)
+        self.timezone = timezone
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(postgresql.TIMESTAMP(timezone=self.timezone))
+        return dialect.type_descriptor(types.DateTime())
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name == 'postgresql' or not self.timezone:
+            return value
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value # Los naive (datetime.utcnow) ya son UTC
+
+    def process_result_value(self, value, dialect):
+        if value is None or dialect.name == 'postgresql' or not self.timezone:
+            return value
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def insert_ignore(table, dialect_name):
+    """INSERT ... ON CONFLICT DO NOTHING for Postgres and SQLite; plain INSERT for anything else."""
+    if dialect_name == 'postgresql':
+        return postgresql.insert(table).on_conflict_do_nothing()
+    if dialect_name == 'sqlite':
+        return sqlite.insert(table).on_conflict_do_nothing()
+    return insert(table)
+
+
+def insert_increment(table, dialect_name, index_elements, increment_columns):
+    """
+    INSERT ... ON CONFLICT (index_elements) DO UPDATE SET col = col + excluded.col for Postgres
+    and SQLite: inserted values are added to an existing row instead of failing.
+    """
+    if dialect_name == 'postgresql':
+        stmt = postgresql.insert(table)
+    elif dialect_name == 'sqlite':
+        stmt = sqlite.insert(table)
+    else:
+        raise NotImplementedError(f"insert_increment is not available for {dialect_name}")
+    return stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={column: table.c[column] + stmt.excluded[column] for column in increment_columns}
+    )
+
+
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """'connect' listener: SQLite ignores FOREIGN KEY / ON DELETE CASCADE unless asked per connection."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
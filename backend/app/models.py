@@ -1,7 +1,8 @@
 # backend/app/models.py
 from . import db # Importa la instancia db de __init__.py
-from sqlalchemy.dialects.postgresql import UUID, TEXT, BOOLEAN, INTEGER, TIMESTAMP, DATE, TIME, ARRAY, JSONB
-from sqlalchemy import UniqueConstraint, CheckConstraint
+from sqlalchemy.dialects.postgresql import TEXT, BOOLEAN, INTEGER, DATE, TIME
+from .db_types import UUID, TIMESTAMP, ARRAY, JSONB # Nativos en Postgres, portables en SQLite (tests/benchmarks)
+from sqlalchemy import UniqueConstraint, CheckConstraint, Index, case, func, literal_column, null, select, type_coerce, union_all
 from datetime import datetime, timezone 
 import uuid
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -11,6 +12,10 @@ from werkzeug.security import generate_password_hash, check_password_hash
 def generate_uuid():
     return str(uuid.uuid4())
 
+def tag_ids_gin_index(table_name):
+    """GIN index for `tag_ids @> ARRAY[...]` filters. Postgres only."""
+    return Index(f'ix_{table_name}_tag_ids', 'tag_ids', postgresql_using='gin').ddl_if(dialect='postgresql')
+
 class User(db.Model):
     __tablename__ = 'users'
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -115,6 +120,8 @@ class PoolMission(db.Model):
     points_value = db.Column(INTEGER, nullable=False)
     status = db.Column(TEXT, nullable=False, default='PENDING') # PENDING, COMPLETED
     focus_status = db.Column(TEXT, nullable=False, default='ACTIVE') # ACTIVE, DEFERRED
+    # Copia desnormalizada de los tags (la tabla de asociación manda); ver app.services.tag_index_services
+    tag_ids = db.Column(ARRAY(UUID(as_uuid=True)), nullable=False, default=list)
     created_at = db.Column(TIMESTAMP(timezone=True), default=datetime.utcnow, nullable=False)
     updated_at = db.Column(TIMESTAMP(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
@@ -123,6 +130,8 @@ class PoolMission(db.Model):
     __table_args__ = (
         CheckConstraint(status.in_(['PENDING', 'COMPLETED']), name='ck_pool_mission_status'),
         CheckConstraint(focus_status.in_(['ACTIVE', 'DEFERRED']), name='ck_pool_mission_focus_status'),
+        tag_ids_gin_index('pool_missions'),
+        Index('ix_pool_missions_user_status_updated', 'user_id', 'status', 'updated_at'),
     )
     def __repr__(self):
         return f'<PoolMission {self.title}>'
@@ -140,6 +149,8 @@ class ScheduledMission(db.Model):
     end_datetime = db.Column(TIMESTAMP(timezone=True), nullable=False)
     is_all_day = db.Column(BOOLEAN, default=False, nullable=False) # New field
     status = db.Column(TEXT, nullable=False, default='PENDING') # PENDING, COMPLETED, SKIPPED
+    # Copia desnormalizada de los tags (la tabla de asociación manda); ver app.services.tag_index_services
+    tag_ids = db.Column(ARRAY(UUID(as_uuid=True)), nullable=False, default=list)
     created_at = db.Column(TIMESTAMP(timezone=True), default=datetime.utcnow, nullable=False)
     updated_at = db.Column(TIMESTAMP(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
@@ -147,6 +158,8 @@ class ScheduledMission(db.Model):
 
     __table_args__ = (
         CheckConstraint(status.in_(['PENDING', 'COMPLETED', 'SKIPPED']), name='ck_scheduled_mission_status'),
+        tag_ids_gin_index('scheduled_missions'),
+        Index('ix_scheduled_missions_user_status_start', 'user_id', 'status', 'start_datetime'),
     )
     def __repr__(self):
         return f'<ScheduledMission {self.title}>'
@@ -167,10 +180,13 @@ class HabitTemplate(db.Model):
     rec_pattern_start_date = db.Column(DATE, nullable=False)
     rec_ends_on_date = db.Column(DATE, nullable=True)
     is_active = db.Column(BOOLEAN, default=True, nullable=False)
+    # Copia desnormalizada de los tags (la tabla de asociación manda); ver app.services.tag_index_services
+    tag_ids = db.Column(ARRAY(UUID(as_uuid=True)), nullable=False, default=list)
     created_at = db.Column(TIMESTAMP(timezone=True), default=datetime.utcnow, nullable=False)
     updated_at = db.Column(TIMESTAMP(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     tags = db.relationship('Tag', secondary=habit_template_tags_association, backref=db.backref('habit_templates', lazy='dynamic'))
     occurrences = db.relationship('HabitOccurrence', backref='template', lazy=True, cascade="all, delete-orphan")
+    __table_args__ = ( tag_ids_gin_index('habit_templates'), )
     def __repr__(self): return f'<HabitTemplate {self.title}>'
 
 class HabitOccurrence(db.Model):
@@ -188,15 +204,76 @@ class HabitOccurrence(db.Model):
     is_all_day = db.Column(BOOLEAN, default=False, nullable=False) # <-- NUEVO CAMPO
     status = db.Column(TEXT, nullable=False, default='PENDING')
     actual_completion_datetime = db.Column(TIMESTAMP(timezone=True), nullable=True)
+    # Tags de la plantilla, copiados para filtrar sin pasar por habit_templates -> habit_template_tags
+    tag_ids = db.Column(ARRAY(UUID(as_uuid=True)), nullable=False, default=list)
+    # Datos de la plantilla que se muestran con cada ocurrencia, para leerlas sin cargar la plantilla:
+    # [{"id", "name"}] de sus tags (tag_index_services) y su duración (habit_services)
+    tag_snapshot = db.Column(JSONB, nullable=False, default=list)
+    rec_duration_minutes = db.Column(INTEGER, nullable=True)
     created_at = db.Column(TIMESTAMP(timezone=True), default=datetime.utcnow, nullable=False)
     updated_at = db.Column(TIMESTAMP(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
-    __table_args__ = ( CheckConstraint(status.in_(['PENDING', 'COMPLETED', 'SKIPPED']), name='ck_habit_occurrence_status'), )
+    __table_args__ = (
+        CheckConstraint(status.in_(['PENDING', 'COMPLETED', 'SKIPPED']), name='ck_habit_occurrence_status'),
+        tag_ids_gin_index('habit_occurrences'),
+        Index('ix_habit_occurrences_user_status_start', 'user_id', 'status', 'scheduled_start_datetime'),
+    )
     def __repr__(self): return f'<HabitOccurrence {self.title} on {self.scheduled_start_datetime}>'
 
 
+def _agenda_items_select():
+    """
+    UNION ALL of the three schedulable entities with one shared column list. Postgres pushes the
+    WHERE of a query on AgendaItem down into each branch (and drops the branches whose item_type
+    cannot match), so every branch still uses its own table's indexes.
+    """
+    def typed_null(type_): return type_coerce(null(), type_)
+    sm, ho, pm = ScheduledMission.__table__, HabitOccurrence.__table__, PoolMission.__table__
+    return union_all(
+        select(
+            literal_column("'SCHEDULED_MISSION'", TEXT).label('item_type'), sm.c.id, sm.c.user_id, sm.c.quest_id,
+            sm.c.title, sm.c.description, sm.c.start_datetime, sm.c.end_datetime, sm.c.is_all_day,
+            sm.c.status, typed_null(TEXT).label('focus_status'),
+            case((sm.c.status == 'COMPLETED', sm.c.updated_at)).label('completed_at'), # updated_at como fecha de completado
+            sm.c.energy_value, sm.c.points_value, sm.c.tag_ids, typed_null(INTEGER).label('rec_duration_minutes'),
+            sm.c.created_at, sm.c.updated_at
+        ),
+        select(
+            literal_column("'HABIT_OCCURRENCE'", TEXT), ho.c.id, ho.c.user_id, ho.c.quest_id,
+            ho.c.title, ho.c.description, ho.c.scheduled_start_datetime, ho.c.scheduled_end_datetime, ho.c.is_all_day,
+            ho.c.status, typed_null(TEXT),
+            case((ho.c.status == 'COMPLETED', func.coalesce(ho.c.actual_completion_datetime, ho.c.updated_at))),
+            ho.c.energy_value, ho.c.points_value, ho.c.tag_ids, ho.c.rec_duration_minutes,
+            ho.c.created_at, ho.c.updated_at
+        ),
+        select(
+            literal_column("'POOL_MISSION'", TEXT), pm.c.id, pm.c.user_id, pm.c.quest_id,
+            pm.c.title, pm.c.description, typed_null(TIMESTAMP(timezone=True)), typed_null(TIMESTAMP(timezone=True)), typed_null(BOOLEAN),
+            pm.c.status, pm.c.focus_status,
+            case((pm.c.status == 'COMPLETED', pm.c.updated_at)),
+            pm.c.energy_value, pm.c.points_value, pm.c.tag_ids, typed_null(INTEGER),
+            pm.c.created_at, pm.c.updated_at
+        ),
+    ).subquery('agenda_items')
+
+class AgendaItem(db.Model):
+    """
+    Read-only view of ScheduledMission, HabitOccurrence and PoolMission as one entity, for
+    cross-type listings, merges and counts in a single query. Nothing is stored: it maps a
+    UNION ALL subquery (no table, no DDL), so it is always consistent with the source rows.
+    Writes keep going through the concrete models. Pool missions have no start/end/is_all_day.
+    """
+    __table__ = _agenda_items_select()
+    __mapper_args__ = {"primary_key": [__table__.c.item_type, __table__.c.id]}
+
+    quest = db.relationship('Quest', primaryjoin='foreign(AgendaItem.quest_id) == Quest.id', viewonly=True)
+
+    TYPES = ('SCHEDULED_MISSION', 'HABIT_OCCURRENCE', 'POOL_MISSION')
+    def __repr__(self): return f'<AgendaItem {self.item_type} {self.title}>'
+
+
 class EnergyLog(db.Model):
     __tablename__ = 'energy_log'
-    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    id = db.Column(db.BigInteger().with_variant(INTEGER, 'sqlite'), primary_key=True, autoincrement=True) # SQLite solo autoincrementa INTEGER
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     source_entity_type = db.Column(TEXT, nullable=True) 
     source_entity_id = db.Column(UUID(as_uuid=True), nullable=True) 
@@ -209,4 +286,42 @@ class EnergyLog(db.Model):
         CheckConstraint(source_entity_type.in_(['POOL_MISSION', 'SCHEDULED_MISSION', 'HABIT_OCCURRENCE', None]), name='ck_energy_log_source_type'),
     )
     def __repr__(self):
-        return f'<EnergyLog User {self.user_id}: {self.energy_value}, Active: {self.is_active}>'
\ No newline at end of file
+        return f'<EnergyLog User {self.user_id}: {self.energy_value}, Active: {self.is_active}>'
+
+
+class StatCounter(db.Model):
+    """
+    Count and points of a user's pool missions, scheduled missions and habit occurrences per
+    quest or tag and status (sidebar badges). Derived data, kept up to date incrementally by
+    app.services.counter_services; `flask counters-rebuild` recomputes it.
+    """
+    __tablename__ = 'stat_counters'
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    scope = db.Column(TEXT, primary_key=True) # QUEST, TAG
+    scope_id = db.Column(UUID(as_uuid=True), primary_key=True) # quest_id o tag_id (sin FK: depende de scope)
+    status = db.Column(TEXT, primary_key=True) # PENDING, COMPLETED, SKIPPED
+    count = db.Column(INTEGER, nullable=False, default=0)
+    points_sum = db.Column(INTEGER, nullable=False, default=0)
+
+    __table_args__ = (
+        CheckConstraint(scope.in_(['QUEST', 'TAG']), name='ck_stat_counter_scope'),
+    )
+    def __repr__(self):
+        return f'<StatCounter {self.scope} {self.scope_id} {self.status}: {self.count}>'
+
+
+class UserDirectory(db.Model):
+    """Global email -> user/shard map. Lives in the default database only (see app.db_shards)."""
+    __tablename__ = 'user_directory'
+    email = db.Column(TEXT, primary_key=True)
+    user_id = db.Column(UUID(as_uuid=True), unique=True, nullable=False)
+    shard = db.Column(INTEGER, default=0, nullable=False)
+    status = db.Column(TEXT, default='ACTIVE', nullable=False) # MOVING mientras se rebalancea
+    created_at = db.Column(TIMESTAMP(timezone=True), default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(TIMESTAMP(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        CheckConstraint(status.in_(['ACTIVE', 'MOVING']), name='ck_user_directory_status'),
+    )
+    def __repr__(self):
+        return f'<UserDirectory {self.email} shard {self.shard}>'
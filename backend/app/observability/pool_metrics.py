@@ -0,0 +1,103 @@
+# backend/app/observability/pool_metrics.py
+import threading
+import time
+from sqlalchemy import event, exc as sa_exc
+from sqlalchemy.pool import QueuePool
+from app.observability.request_metrics import Histogram
+
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+
+
+class PoolStats:
+    """Checkout wait histogram and connection counters for the engine pool (one per process)."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkout_wait = Histogram(POOL_WAIT_BUCKETS)
+        self.checkout_timeouts = 0
+        self.connections_created = 0
+        self.invalidations = 0
+        self.pool = None
+
+    def record_checkout(self, seconds):
+        with self._lock:
+            self.checkout_wait.observe(seconds)
+
+    def record_timeout(self, seconds):
+        with self._lock:
+            self.checkout_wait.observe(seconds)
+            self.checkout_timeouts += 1
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connections_created += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1 # pre_ping fallido, conexión cortada por el servidor, etc.
+
+    def track(self, engine):
+        self.pool = engine.pool
+        if not event.contains(engine, 'connect', self._on_connect):
+            event.listen(engine, 'connect', self._on_connect)
+            event.listen(engine, 'invalidate', self._on_invalidate)
+
+    def gauges(self):
+        """checked_out, size, overflow and saturation (checked_out / max connections); {} for non-queue pools."""
+        pool = self.pool
+        if not isinstance(pool, QueuePool):
+            return {}
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        checked_out = pool.checkedout()
+        return {
+            "checked_out": checked_out, "size": pool.size(), "overflow": max(pool.overflow(), 0),
+            "saturation": round(checked_out / capacity, 4) if capacity else 0.0
+        }
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkout_wait.count, "checkout_wait_seconds_total": round(self.checkout_wait.total, 6),
+                "checkout_timeouts": self.checkout_timeouts, "connections_created": self.connections_created,
+                "invalidations": self.invalidations, **self.gauges()
+            }
+
+    def render_prometheus(self):
+        lines = []
+        with self._lock:
+            name = 'iterpolaris_db_pool_checkout_wait_seconds'
+            lines.append(f"# HELP {name} Time spent waiting for a pooled connection.")
+            lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(self.checkout_wait.buckets, self.checkout_wait.counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{le="+Inf"}} {self.checkout_wait.count}')
+            lines.append(f"{name}_sum {self.checkout_wait.total}")
+            lines.append(f"{name}_count {self.checkout_wait.count}")
+            counters = {
+                'iterpolaris_db_pool_checkout_timeouts_total': (self.checkout_timeouts, 'Checkouts that hit pool_timeout.'),
+                'iterpolaris_db_pool_connections_created_total': (self.connections_created, 'New DBAPI connections opened.'),
+                'iterpolaris_db_pool_invalidations_total': (self.invalidations, 'Connections discarded as stale or broken.'),
+            }
+            for counter_name, (value, help_text) in counters.items():
+                lines += [f"# HELP {counter_name} {help_text}", f"# TYPE {counter_name} counter", f"{counter_name} {value}"]
+        for gauge_name, value in self.gauges().items():
+            metric = f"iterpolaris_db_pool_{gauge_name}"
+            lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+        return lines
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times every checkout (including waits when the pool is exhausted)."""
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sa_exc.TimeoutError:
+            pool_stats.record_timeout(time.perf_counter() - start)
+            raise
+        pool_stats.record_checkout(time.perf_counter() - start)
+        return connection
@@ -0,0 +1,196 @@
+# backend/app/observability/profiling.py
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from flask import request, current_app, g, jsonify
+from app.observability.sql_metrics import count_queries
+
+PROFILE_HEADER = 'X-Profile'          # cprofile | sample
+PROFILE_QUERY_ARG = '__profile'
+PROFILE_AS_USER_HEADER = 'X-Profile-As-User' # Solo GET: reproduce la petición con los datos de otro usuario
+PROFILE_MODES = ('cprofile', 'sample')
+_PROFILE_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+def is_admin_user(user):
+    """Operators listed in PROFILING_ADMIN_EMAILS (profiles, process-wide cache stats)."""
+    admin_emails = current_app.config.get('PROFILING_ADMIN_EMAILS') or []
+    return user is not None and user.email in admin_emails
+
+
+def is_profiling_admin(user):
+    return bool(current_app.config.get('PROFILING_ENABLED')) and is_admin_user(user)
+
+
+def requested_profile_mode():
+    mode = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_QUERY_ARG)
+    if not mode:
+        return None
+    mode = mode.lower()
+    return mode if mode in PROFILE_MODES else 'cprofile'
+
+
+def profile_output_dir():
+    output_dir = current_app.config.get('PROFILING_OUTPUT_DIR') or os.path.join(current_app.instance_path, 'profiles')
+    os.makedirs(output_dir, exist_ok=True)
+    return output_dir
+
+
+class StackSampler:
+    """Samples one thread's Python stack every `interval` seconds from a helper thread."""
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='iterpolaris-profiler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self):
+        """Brendan Gregg's collapsed-stack format (one 'frame;frame;frame count' per line)."""
+        return '\n'.join(f"{stack} {count}" for stack, count in self.samples.most_common()) + '\n'
+
+
+def run_profiled(view_func, args, kwargs, mode, profiled_user):
+    """
+    Runs the view under the chosen profiler and stores, under PROFILING_OUTPUT_DIR/<profile_id>.*:
+    .pstats (cprofile mode), .collapsed (always, from the stack sampler) and .json (metadata,
+    pstats summary and every SQL statement with its timing). Adds X-Profile-Id to the response.
+    """
+    profile_id = uuid.uuid4().hex
+    sampler = StackSampler(threading.get_ident(), current_app.config.get('PROFILING_SAMPLE_INTERVAL_MS', 5) / 1000)
+    profiler = cProfile.Profile() if mode == 'cprofile' else None
+
+    started_at = datetime.now(timezone.utc)
+    wall_start = time.perf_counter()
+    with count_queries(f"profile {request.method} {request.path}", keep_statements=True) as collector:
+        sampler.start()
+        if profiler: profiler.enable()
+        try:
+            result = view_func(*args, **kwargs)
+        finally:
+            if profiler: profiler.disable()
+            sampler.stop()
+    wall_time = time.perf_counter() - wall_start
+
+    output_dir = profile_output_dir()
+    base_path = os.path.join(output_dir, profile_id)
+    pstats_summary = None
+    if profiler:
+        profiler.dump_stats(base_path + '.pstats')
+        summary_stream = io.StringIO()
+        pstats.Stats(profiler, stream=summary_stream).sort_stats('cumulative').print_stats(40)
+        pstats_summary = summary_stream.getvalue()
+    with open(base_path + '.collapsed', 'w', encoding='utf-8') as collapsed_file:
+        collapsed_file.write(sampler.collapsed())
+    with open(base_path + '.json', 'w', encoding='utf-8') as meta_file:
+        json.dump({
+            "id": profile_id, "mode": mode, "started_at": started_at.isoformat(),
+            "method": request.method, "path": request.full_path, "endpoint": request.endpoint,
+            "requested_by": str(g.profiling_admin.id) if getattr(g, 'profiling_admin', None) else None,
+            "profiled_user_id": str(profiled_user.id),
+            "wall_time_ms": round(wall_time * 1000, 2),
+            "samples": sum(sampler.samples.values()),
+            "sql": {
+                "query_count": collector.count, "db_time_ms": round(collector.total_time * 1000, 2),
+                "statements": [
+                    {"sql": statement, "parameters": repr(parameters)[:500], "duration_ms": round(duration * 1000, 3)}
+                    for statement, parameters, duration in collector.statements
+                ]
+            },
+            "pstats_summary": pstats_summary
+        }, meta_file, indent=2)
+
+    current_app.logger.info(f"Profiled {request.method} {request.path} as {profile_id} ({mode}, {wall_time * 1000:.1f} ms, {collector.count} queries)")
+    response = current_app.make_response(result)
+    response.headers['X-Profile-Id'] = profile_id
+    return response
+
+
+def profile_view_if_requested(view_func, args, kwargs):
+    """
+    Called by token_required once g.current_user is set. Returns the profiled response when the
+    request asked for profiling and the caller is a profiling admin, otherwise None (normal path).
+    Non-admin profile requests are ignored silently.
+    """
+    mode = requested_profile_mode()
+    admin_user = g.current_user
+    if not mode or not is_profiling_admin(admin_user):
+        return None
+
+    g.profiling_admin = admin_user
+    target_user_id = request.headers.get(PROFILE_AS_USER_HEADER)
+    if target_user_id:
+        from app.models import db, User
+        if request.method != 'GET':
+            return jsonify({"error": f"{PROFILE_AS_USER_HEADER} is only allowed on GET requests."}), 400
+        try:
+            target_uuid = uuid.UUID(target_user_id)
+            from app.db_shards import route_user_shard
+            route_user_shard(db.session, target_uuid)
+            target_user = db.session.get(User, target_uuid)
+        except ValueError:
+            target_user = None
+        if not target_user:
+            return jsonify({"error": "Profiled user not found."}), 404
+        g.current_user = target_user
+    return run_profiled(view_func, args, kwargs, mode, g.current_user)
+
+
+def load_profile_metadata(profile_id):
+    if not _PROFILE_ID_RE.match(profile_id or ''):
+        return None
+    meta_path = os.path.join(profile_output_dir(), profile_id + '.json')
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, encoding='utf-8') as meta_file:
+        return json.load(meta_file)
+
+
+def list_profiles(limit=50):
+    output_dir = profile_output_dir()
+    meta_files = sorted(
+        (name for name in os.listdir(output_dir) if name.endswith('.json')),
+        key=lambda name: os.path.getmtime(os.path.join(output_dir, name)), reverse=True
+    )[:limit]
+    profiles = []
+    for name in meta_files:
+        meta = load_profile_metadata(name[:-5])
+        if meta:
+            profiles.append({key: meta[key] for key in ('id', 'mode', 'started_at', 'method', 'path', 'profiled_user_id', 'wall_time_ms')} | {"query_count": meta["sql"]["query_count"]})
+    return profiles
+
+
+def profile_artifact_path(profile_id, artifact):
+    extension = {"pstats": ".pstats", "collapsed": ".collapsed", "json": ".json"}.get(artifact)
+    if not extension or not _PROFILE_ID_RE.match(profile_id or ''):
+        return None
+    path = os.path.join(profile_output_dir(), profile_id + extension)
+    return path if os.path.exists(path) else None
@@ -0,0 +1,183 @@
+# backend/app/observability/request_metrics.py
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, request, current_app, Response, jsonify, has_app_context
+from flask.json.provider import DefaultJSONProvider
+from app.observability.sql_metrics import current_request_collector
+
+# Buckets en segundos para latencias y en bytes para tamaños de respuesta
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+PHASES = ('auth', 'user_load', 'db', 'serialize')
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.total += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+
+class MetricsRegistry:
+    """In-process histograms keyed by label tuples. One lock; observe() is a few dict lookups."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.request_latency = {}   # (endpoint, method, status) -> Histogram
+        self.phase_latency = {}     # (endpoint, phase) -> Histogram
+        self.response_size = {}     # (endpoint,) -> Histogram
+        self._collectors = []       # callables -> list of exposition lines (pool metrics...)
+
+    def _observe(self, family, labels, buckets, value):
+        with self._lock:
+            histogram = family.get(labels)
+            if histogram is None:
+                histogram = family[labels] = Histogram(buckets)
+            histogram.observe(value)
+
+    def observe_request(self, endpoint, method, status, seconds, phases, size):
+        self._observe(self.request_latency, (endpoint, method, str(status)), LATENCY_BUCKETS, seconds)
+        for phase, phase_seconds in phases.items():
+            self._observe(self.phase_latency, (endpoint, phase), LATENCY_BUCKETS, phase_seconds)
+        if size is not None:
+            self._observe(self.response_size, (endpoint,), SIZE_BUCKETS, size)
+
+    def add_collector(self, collector):
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def reset(self):
+        with self._lock:
+            self.request_latency.clear(); self.phase_latency.clear(); self.response_size.clear()
+
+    @staticmethod
+    def _escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    def _render_family(self, lines, name, help_text, family, label_names):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, histogram in sorted(family.items()):
+            label_str = ','.join(f'{key}="{self._escape(value)}"' for key, value in zip(label_names, labels))
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{{label_str},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{label_str},le="+Inf"}} {histogram.count}')
+            lines.append(f'{name}_sum{{{label_str}}} {histogram.total}')
+            lines.append(f'{name}_count{{{label_str}}} {histogram.count}')
+
+    def render_prometheus(self):
+        lines = []
+        with self._lock:
+            self._render_family(lines, 'iterpolaris_request_duration_seconds', 'Request latency per endpoint.',
+                                self.request_latency, ('endpoint', 'method', 'status'))
+            self._render_family(lines, 'iterpolaris_request_phase_seconds', 'Time spent per request phase (auth, user_load, db, serialize).',
+                                self.phase_latency, ('endpoint', 'phase'))
+            self._render_family(lines, 'iterpolaris_response_size_bytes', 'Response body size per endpoint.',
+                                self.response_size, ('endpoint',))
+        for collector in self._collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+
+metrics_registry = MetricsRegistry()
+
+
+# --- Phase timing API (used by token_required and the JSON provider) ---
+def _current_timing():
+    if not has_app_context(): # app.json.dumps fuera de una petición (test client, CLI, hilos)
+        return None
+    stack = getattr(g, '_request_timing_stack', None)
+    return stack[-1] if stack else None
+
+
+def record_phase(phase, seconds):
+    timing = _current_timing()
+    if timing is not None:
+        timing["phases"][phase] = timing["phases"].get(phase, 0.0) + seconds
+
+
+@contextmanager
+def phase_timer(phase):
+    if not has_app_context():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, time.perf_counter() - start)
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Default provider that charges JSON encoding time to the 'serialize' phase."""
+    def dumps(self, obj, **kwargs):
+        with phase_timer('serialize'):
+            return super().dumps(obj, **kwargs)
+
+
+# --- Request hooks ---
+def _start_request_timing():
+    stack = getattr(g, '_request_timing_stack', None)
+    if stack is None:
+        stack = g._request_timing_stack = []
+    stack.append({"start": time.perf_counter(), "phases": {}})
+
+
+def _finish_request_timing(response):
+    stack = getattr(g, '_request_timing_stack', None)
+    if not stack:
+        return response
+    timing = stack.pop()
+    elapsed = time.perf_counter() - timing["start"]
+    phases = timing["phases"]
+
+    collector = current_request_collector()
+    if collector is not None:
+        phases["db"] = collector.total_time
+
+    endpoint = request.endpoint or 'unmatched'
+    size = None if response.is_streamed else response.calculate_content_length()
+    if endpoint != 'metrics':
+        metrics_registry.observe_request(endpoint, request.method, response.status_code, elapsed, phases, size)
+
+    if current_app.config.get('SERVER_TIMING_ENABLED', True):
+        entries = [f"{phase};dur={phases[phase] * 1000:.2f}" for phase in PHASES if phase in phases]
+        entries.append(f"app;dur={elapsed * 1000:.2f}")
+        response.headers['Server-Timing'] = ', '.join(entries)
+    return response
+
+
+def _metrics_view():
+    expected_token = current_app.config.get('METRICS_TOKEN')
+    if expected_token:
+        auth_header = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(auth_header.encode(), f"Bearer {expected_token}".encode()):
+            return jsonify({"error": "Unauthorized"}), 401
+    return Response(metrics_registry.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+def init_request_metrics(app):
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    app.json = TimedJSONProvider(app)
+    app.before_request(_start_request_timing)
+    app.after_request(_finish_request_timing)
+    # Rutas, latencias y estadísticas del pool: /metrics solo existe con METRICS_TOKEN (o en tests)
+    if not app.config.get('METRICS_TOKEN') and not app.testing:
+        app.logger.warning("METRICS_TOKEN is not set: /metrics is not registered (timings and Server-Timing stay on).")
+        return
+    app.add_url_rule('/metrics', endpoint='metrics', view_func=_metrics_view, methods=['GET'])
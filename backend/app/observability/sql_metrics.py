@@ -0,0 +1,212 @@
+# backend/app/observability/sql_metrics.py
+import re
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, request, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Collectors that receive every statement executed in the current context
+# (the request collector, plus any query_budget()/count_queries() opened around it).
+_active_collectors = ContextVar('iterpolaris_sql_collectors', default=())
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PARAM_RE = re.compile(r'%\(\w+\)s|\?|(?<![:\w]):\w+|\$\d+|%s')
+_IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+
+
+def fingerprint_statement(statement):
+    """Statement shape with literals and bound parameters collapsed (IN lists of any size match)."""
+    normalized = _WHITESPACE_RE.sub(' ', statement).strip()
+    normalized = _STRING_LITERAL_RE.sub('?', normalized)
+    normalized = _PARAM_RE.sub('?', normalized)
+    normalized = _NUMBER_RE.sub('?', normalized)
+    return _IN_LIST_RE.sub('(?+)', normalized)
+
+
+class QueryCollector:
+    """Statement count, total DB time and per-fingerprint counts/time for one scope."""
+    def __init__(self, label=None, keep_statements=False):
+        self.label = label
+        self.statements = [] if keep_statements else None # (statement, parameters, seconds) para el profiler
+        self.count = 0
+        self.total_time = 0.0
+        self.fingerprints = Counter()
+        self.fingerprint_time = defaultdict(float)
+
+    def record(self, statement, duration, parameters=None):
+        if self.statements is not None:
+            self.statements.append((statement, parameters, duration))
+        fingerprint = fingerprint_statement(statement)
+        self.count += 1
+        self.total_time += duration
+        self.fingerprints[fingerprint] += 1
+        self.fingerprint_time[fingerprint] += duration
+
+    def repeated(self, threshold):
+        """Likely N+1 patterns: the same SELECT shape executed at least `threshold` times."""
+        return [
+            (fingerprint, count, self.fingerprint_time[fingerprint])
+            for fingerprint, count in self.fingerprints.most_common()
+            if count >= threshold and fingerprint.upper().startswith(('SELECT', 'WITH'))
+        ]
+
+    def summary(self, threshold=5):
+        return {
+            "label": self.label,
+            "query_count": self.count,
+            "db_time_ms": round(self.total_time * 1000, 2),
+            "repeated_statements": [
+                {"fingerprint": fingerprint, "count": count, "db_time_ms": round(duration * 1000, 2)}
+                for fingerprint, count, duration in self.repeated(threshold)
+            ]
+        }
+
+
+@contextmanager
+def _collecting(collector):
+    token = _active_collectors.set(_active_collectors.get() + (collector,))
+    try:
+        yield collector
+    finally:
+        _active_collectors.reset(token)
+
+
+@contextmanager
+def count_queries(label=None, keep_statements=False):
+    """Collects every statement run inside the block: `with count_queries() as q: ...; q.count`."""
+    with _collecting(QueryCollector(label, keep_statements=keep_statements)) as collector:
+        yield collector
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries, label=None, n_plus_one_threshold=None):
+    """
+    Test helper: fails when the block issues more than max_queries statements, or when
+    n_plus_one_threshold is given and some SELECT shape repeats that many times.
+
+        with query_budget(6, label='GET /api/dashboard/today-agenda'):
+            client.get('/api/dashboard/today-agenda', headers=auth)
+    """
+    with count_queries(label) as collector:
+        yield collector
+    problems = []
+    if collector.count > max_queries:
+        problems.append(f"{collector.count} queries issued, budget is {max_queries}")
+    if n_plus_one_threshold:
+        for fingerprint, count, _ in collector.repeated(n_plus_one_threshold):
+            problems.append(f"repeated {count}x: {fingerprint}")
+    if problems:
+        shapes = '\n'.join(f"  {count}x {fingerprint}" for fingerprint, count in collector.fingerprints.most_common(10))
+        raise QueryBudgetExceeded(f"Query budget exceeded{' for ' + label if label else ''}: {'; '.join(problems)}\n{shapes}")
+
+
+def check_query_budgets(client, budgets, **request_kwargs):
+    """
+    Runs each "METHOD /path" in budgets through a Flask test client and raises
+    QueryBudgetExceeded listing every endpoint over its budget.
+
+        check_query_budgets(app.test_client(), {"GET /api/dashboard/today-agenda": 6}, headers=auth)
+    """
+    failures = []
+    for endpoint, max_queries in budgets.items():
+        method, path = endpoint.split(' ', 1)
+        with count_queries(endpoint) as collector:
+            client.open(path, method=method, **request_kwargs)
+        if collector.count > max_queries:
+            failures.append(f"{endpoint}: {collector.count} queries (budget {max_queries})")
+    if failures:
+        raise QueryBudgetExceeded("Query budgets exceeded:\n  " + "\n  ".join(failures))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_collectors.get():
+        conn.info.setdefault('iterpolaris_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = _active_collectors.get()
+    if not collectors:
+        return
+    starts = conn.info.get('iterpolaris_query_start')
+    duration = time.perf_counter() - starts.pop() if starts else 0.0
+    for collector in collectors:
+        collector.record(statement, duration, parameters)
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute is not called for failed statements: drop the pending start time
+    connection = exception_context.connection
+    starts = connection.info.get('iterpolaris_query_start') if connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def _start_request_collector():
+    collector = QueryCollector(label=f"{request.method} {request.path}")
+    token = _active_collectors.set(_active_collectors.get() + (collector,))
+    g._sql_collector_stack = getattr(g, '_sql_collector_stack', []) + [(collector, token)]
+
+
+def _finish_request_collector(response):
+    stack = getattr(g, '_sql_collector_stack', None)
+    if not stack:
+        return response
+    collector = stack[-1][0]
+    response.headers['X-DB-Query-Count'] = str(collector.count)
+    response.headers['X-DB-Time-Ms'] = f"{collector.total_time * 1000:.2f}"
+
+    threshold = current_app.config.get('SQL_N_PLUS_ONE_THRESHOLD', 5)
+    for fingerprint, count, duration in collector.repeated(threshold):
+        current_app.logger.warning(
+            f"Possible N+1 in {collector.label}: {count} executions ({duration * 1000:.1f} ms) of {fingerprint[:300]}"
+        )
+    max_queries = current_app.config.get('SQL_REQUEST_QUERY_WARN_COUNT', 50)
+    if collector.count > max_queries:
+        current_app.logger.warning(f"{collector.label} issued {collector.count} queries ({collector.total_time * 1000:.1f} ms DB time)")
+    return response
+
+
+def _pop_request_collector(exc=None):
+    stack = getattr(g, '_sql_collector_stack', None)
+    if not stack:
+        return
+    _, token = stack.pop()
+    try:
+        _active_collectors.reset(token)
+    except ValueError:
+        pass # Token created in another context (should not happen); leave the var as is
+
+
+def current_request_collector():
+    """Innermost request collector, or None outside a request (or with instrumentation disabled)."""
+    stack = getattr(g, '_sql_collector_stack', None)
+    return stack[-1][0] if stack else None
+
+
+def current_request_query_stats():
+    """Summary of the innermost request collector, or None outside a request."""
+    collector = current_request_collector()
+    if collector is None:
+        return None
+    return collector.summary(current_app.config.get('SQL_N_PLUS_ONE_THRESHOLD', 5))
+
+
+def init_sql_instrumentation(app):
+    if not app.config.get('SQL_INSTRUMENTATION_ENABLED', True):
+        return
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+    app.before_request(_start_request_collector)
+    app.after_request(_finish_request_collector)
+    app.teardown_request(_pop_request_collector)
@@ -0,0 +1,75 @@
+# backend/app/services/agenda_services.py
+"""
+Queries on AgendaItem, the UNION ALL read model over ScheduledMission, HabitOccurrence and
+PoolMission (see app.models). Used by the dashboard builders and by GET /api/agenda/items.
+"""
+from datetime import datetime, time, timezone
+from sqlalchemy import desc, func, select
+from app.models import db, Tag, AgendaItem
+from app.services.tag_index_services import tags_contain_all
+
+# NULLS LAST explícito: Postgres y SQLite ordenan los NULL al revés (pool missions sin fecha, items sin completar)
+AGENDA_SORTS = {
+    "start": (AgendaItem.start_datetime.asc().nulls_last(), AgendaItem.title.asc()),
+    "completed": (AgendaItem.completed_at.desc().nulls_last(),),
+    "updated": (desc(AgendaItem.updated_at),),
+    "created": (desc(AgendaItem.created_at),),
+}
+AGENDA_MAX_LIMIT = 200
+
+
+def user_tags_statement(user_id):
+    # Pocas filas por usuario: más barato que cargar los tags de cada tipo de item por separado
+    return select(Tag).where(Tag.user_id == user_id)
+
+def agenda_items_statement(user_id, tag_uuids, *criteria, with_quest=True):
+    query = select(AgendaItem)
+    if with_quest:
+        query = query.options(db.joinedload(AgendaItem.quest))
+    query = query.where(AgendaItem.user_id == user_id, *criteria)
+    if tag_uuids:
+        query = query.where(tags_contain_all(AgendaItem, tag_uuids))
+    return query
+
+def item_tags(item, tags_by_id):
+    """[{"id", "name"}] for the item's tag_ids, names from the user's tags."""
+    return [{"id": str(tag_id), "name": tags_by_id[tag_id].name} for tag_id in item.tag_ids if tag_id in tags_by_id]
+
+def agenda_item_data(item, tags_by_id):
+    return {
+        "type": item.item_type, "id": str(item.id), "title": item.title, "description": item.description,
+        "quest_id": str(item.quest_id) if item.quest_id else None,
+        "quest_name": item.quest.name if item.quest else None, "quest_color": item.quest.color if item.quest else '#FFFFFF',
+        "start_datetime": item.start_datetime.isoformat() if item.start_datetime else None,
+        "end_datetime": item.end_datetime.isoformat() if item.end_datetime else None,
+        "is_all_day": item.is_all_day, "status": item.status, "focus_status": item.focus_status,
+        "completed_at": item.completed_at.isoformat() if item.completed_at else None,
+        "energy_value": item.energy_value, "points_value": item.points_value,
+        "rec_duration_minutes": item.rec_duration_minutes,
+        "tags": item_tags(item, tags_by_id),
+        "created_at": item.created_at.isoformat(), "updated_at": item.updated_at.isoformat()
+    }
+
+def agenda_filter_criteria(types=None, statuses=None, quest_id=None, start_date=None, end_date=None, search=None):
+    """WHERE criteria for the agenda listing. Date bounds apply to start_datetime, so they exclude pool missions."""
+    criteria = []
+    if types: criteria.append(AgendaItem.item_type.in_(types))
+    if statuses: criteria.append(AgendaItem.status.in_(statuses))
+    if quest_id: criteria.append(AgendaItem.quest_id == quest_id)
+    if start_date: criteria.append(AgendaItem.start_datetime >= datetime.combine(start_date, time.min, tzinfo=timezone.utc))
+    if end_date: criteria.append(AgendaItem.start_datetime <= datetime.combine(end_date, time.max, tzinfo=timezone.utc))
+    if search:
+        pattern = '%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        criteria.append(AgendaItem.title.ilike(pattern, escape='\\'))
+    return criteria
+
+def list_agenda_items(user_id, tag_uuids, criteria, sort='start', limit=50, offset=0):
+    """One page of agenda items plus the total count for the same filters. Returns (items_data, total)."""
+    filtered = agenda_items_statement(user_id, tag_uuids, *criteria, with_quest=False)
+    total = db.session.scalar(select(func.count()).select_from(filtered.subquery()))
+    items = db.session.scalars(
+        filtered.options(db.joinedload(AgendaItem.quest))
+        .order_by(*AGENDA_SORTS[sort], AgendaItem.id).limit(limit).offset(offset)
+    ).all()
+    tags_by_id = {tag.id: tag for tag in db.session.scalars(user_tags_statement(user_id))} if items else {}
+    return [agenda_item_data(item, tags_by_id) for item in items], total
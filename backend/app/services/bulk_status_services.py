@@ -0,0 +1,157 @@
+# backend/app/services/bulk_status_services.py
+from datetime import datetime, timezone
+import uuid
+from sqlalchemy import insert, update
+from app.models import db, User, EnergyLog, HabitOccurrence, ScheduledMission, PoolMission
+from app.services.gamification_services import calculate_user_level
+from app.services.cache_services import dashboard_cache
+from app.services.counter_services import CounterDeltas
+
+# source_entity_type -> how each entity behaves on status transitions (mirrors the single-item routes)
+BULK_STATUS_TARGETS = {
+    'HABIT_OCCURRENCE': {
+        "model": HabitOccurrence, "statuses": ['PENDING', 'COMPLETED', 'SKIPPED'],
+        "completed_reason": "Completed Habit: {title}",
+        "tracks_completion_datetime": True
+    },
+    'SCHEDULED_MISSION': {
+        "model": ScheduledMission, "statuses": ['PENDING', 'COMPLETED', 'SKIPPED'],
+        "completed_reason": "Completed SM: {title}",
+        "tracks_completion_datetime": False
+    },
+    'POOL_MISSION': {
+        "model": PoolMission, "statuses": ['PENDING', 'COMPLETED'],
+        "completed_reason": "Completed Pool Mission: {title}",
+        "tracks_completion_datetime": False
+    },
+}
+
+def parse_bulk_status_payload(data, allowed_statuses, max_items):
+    """
+    Accepts {"items": [{"id", "status"}, ...]} or {"ids": [...], "status": "..."}.
+    Returns (items, error) where items is a list of dicts with id, raw_id, status and error.
+    """
+    if not isinstance(data, dict):
+        return None, "Invalid input: No data provided"
+    if 'items' in data:
+        raw_items = data.get('items')
+        if not isinstance(raw_items, list):
+            return None, "'items' must be a list."
+    elif 'ids' in data:
+        if not isinstance(data.get('ids'), list):
+            return None, "'ids' must be a list."
+        raw_items = [{"id": raw_id, "status": data.get('status')} for raw_id in data['ids']]
+    else:
+        return None, "Either 'items' or 'ids' + 'status' is required."
+    if not raw_items:
+        return None, "No items provided."
+    if len(raw_items) > max_items:
+        return None, f"Too many items (max {max_items})."
+
+    items, seen_ids = [], set()
+    for raw_item in raw_items:
+        raw_id = raw_item.get('id') if isinstance(raw_item, dict) else None
+        raw_status = raw_item.get('status') if isinstance(raw_item, dict) else None
+        item = {"raw_id": raw_id, "id": None, "status": None, "error": None}
+        try:
+            item["id"] = uuid.UUID(str(raw_id))
+        except ValueError:
+            item["error"] = "Invalid id format."
+        if not item["error"]:
+            if not isinstance(raw_status, str) or raw_status.upper() not in allowed_statuses:
+                item["error"] = f"Invalid status. Must be one of {allowed_statuses}."
+            elif item["id"] in seen_ids:
+                item["error"] = "Duplicate id in request."
+            else:
+                item["status"] = raw_status.upper()
+                seen_ids.add(item["id"])
+        items.append(item)
+    return items, None
+
+def apply_bulk_status_update(user: User, source_entity_type: str, items):
+    """
+    Applies many status transitions in one transaction:
+    one locked SELECT, one UPDATE per target status, one EnergyLog multi-row INSERT,
+    one EnergyLog deactivation UPDATE, one counters upsert and a single points/level update on the user.
+    The caller commits. Returns (results, updated_count).
+    """
+    target = BULK_STATUS_TARGETS[source_entity_type]
+    model = target["model"]
+    valid_ids = [item["id"] for item in items if not item["error"]]
+
+    current_rows = {}
+    if valid_ids:
+        rows = db.session.query(
+            model.id, model.status, model.title, model.energy_value, model.points_value,
+            model.user_id, model.quest_id, model.tag_ids
+        ).filter(model.user_id == user.id, model.id.in_(valid_ids)).with_for_update().all()
+        current_rows = {row.id: row for row in rows}
+
+    now_utc = datetime.now(timezone.utc)
+    ids_by_new_status = {}
+    completion_logs = []
+    reverted_ids = []
+    points_delta = 0
+    counter_deltas = CounterDeltas()
+    results = []
+
+    for item in items:
+        if item["error"]:
+            results.append({"id": str(item["raw_id"]), "outcome": "invalid", "error": item["error"]})
+            continue
+        row = current_rows.get(item["id"])
+        if row is None:
+            results.append({"id": str(item["id"]), "outcome": "not_found", "error": "Not found or access denied"})
+            continue
+        if row.status == item["status"]:
+            results.append({"id": str(row.id), "outcome": "unchanged", "status": row.status})
+            continue
+
+        ids_by_new_status.setdefault(item["status"], []).append(row.id)
+        counter_deltas.add_row(row, -1)
+        counter_deltas.add(row.user_id, row.quest_id, item["status"], row.tag_ids, 1, row.points_value or 0)
+        if item["status"] == 'COMPLETED':
+            points_delta += row.points_value
+            if row.energy_value is not None:
+                completion_logs.append({
+                    "user_id": user.id, "source_entity_type": source_entity_type, "source_entity_id": row.id,
+                    "energy_value": row.energy_value, "is_active": True,
+                    "reason_text": target["completed_reason"].format(title=row.title)
+                })
+        elif row.status == 'COMPLETED':
+            points_delta -= row.points_value
+            reverted_ids.append(row.id)
+        results.append({"id": str(row.id), "outcome": "updated", "old_status": row.status, "status": item["status"]})
+
+    for new_status, entity_ids in ids_by_new_status.items():
+        values = {"status": new_status}
+        if target["tracks_completion_datetime"]:
+            values["actual_completion_datetime"] = now_utc if new_status == 'COMPLETED' else None
+        db.session.execute(
+            update(model).where(model.user_id == user.id, model.id.in_(entity_ids)).values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+    counter_deltas.apply(db.session)
+
+    if completion_logs:
+        db.session.execute(insert(EnergyLog), completion_logs)
+    if reverted_ids:
+        # The single-item path deactivates the latest active log; an entity only ever has one active log
+        db.session.execute(
+            update(EnergyLog).where(
+                EnergyLog.user_id == user.id,
+                EnergyLog.source_entity_type == source_entity_type,
+                EnergyLog.source_entity_id.in_(reverted_ids),
+                EnergyLog.is_active == True
+            ).values(is_active=False).execution_options(synchronize_session=False)
+        )
+
+    if points_delta != 0:
+        user.total_points = max((user.total_points or 0) + points_delta, 0)
+        calculate_user_level(user)
+
+    updated_count = sum(len(ids) for ids in ids_by_new_status.values())
+    if updated_count:
+        dashboard_cache.mark_user_dirty(user.id) # Core statements are invisible to the flush hooks
+    return results, updated_count
@@ -0,0 +1,346 @@
+# backend/app/services/cache_services.py
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from app.services.coalescing_services import read_coalescer
+
+_MISSING = object()
+
+
+class MemoryCacheBackend:
+    """
+    In-process LRU backend. Entries are bounded by max_entries and expire after their TTL.
+    Namespace versions live outside the LRU so evicting entries never resurrects stale data.
+    Versions are bumped only in the process that committed the write, so this backend is only
+    correct with a single worker process; use Redis when several workers serve the app.
+    """
+    name = 'memory'
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # key -> (expires_at, value)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return _MISSING
+            expires_at, value = item
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_version(self, key):
+        with self._lock:
+            return self._versions.get(key, 0)
+
+    def incr_version(self, key):
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            return self._versions[key]
+
+    def size(self):
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+class RedisCacheBackend:
+    """
+    Out-of-process backend shared by all workers. Any client exposing get/set(ex=)/incr
+    (redis-py, fakeredis or a local stand-in) can be passed in.
+    Values are stored as JSON, so only JSON-serializable payloads can be cached.
+    """
+    name = 'redis'
+
+    def __init__(self, client, max_entries=None):
+        self.client = client
+        self.max_entries = max_entries # Redis bounds memory itself (maxmemory + allkeys-lru)
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("DASHBOARD_CACHE_BACKEND=redis needs the 'redis' package (pip install -r requirements.txt)") from e
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key):
+        raw = self.client.get(key)
+        if raw is None:
+            return _MISSING
+        return json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, json.dumps(value), ex=ttl or None)
+
+    def get_version(self, key):
+        raw = self.client.get(key)
+        return int(raw) if raw is not None else 0
+
+    def incr_version(self, key):
+        return int(self.client.incr(key))
+
+    def size(self):
+        return None
+
+    def clear(self):
+        pass
+
+
+async def call_cache_backend(backend, fn, *args, **kwargs):
+    """Calls fn from async code (ASGI read path); Redis round trips go to a worker thread so they don't block the loop."""
+    if isinstance(backend, RedisCacheBackend):
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return fn(*args, **kwargs)
+
+
+class NullCacheBackend:
+    """Backend used when caching is disabled: every lookup is a miss."""
+    name = 'null'
+    max_entries = 0
+
+    def get(self, key): return _MISSING
+    def set(self, key, value, ttl=None): pass
+    def get_version(self, key): return 0
+    def incr_version(self, key): return 0
+    def size(self): return 0
+    def clear(self): pass
+
+
+class DashboardCache:
+    """
+    Response cache for read-heavy dashboard builders.
+
+    Keys are (user, endpoint, normalized tag filter, day, extra args) inside a per-user
+    namespace. Invalidating a namespace bumps its version, which orphans every key built
+    with the previous version; orphaned entries age out through the LRU/TTL.
+    """
+    SESSION_INFO_KEY = 'dashboard_cache_dirty_users'
+
+    def __init__(self, app=None):
+        self.backend = NullCacheBackend()
+        self.ttl = 300
+        self.key_prefix = 'iterpolaris'
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._commit_listeners = []
+        self._async_inflight = {}
+        self._write_sequences = OrderedDict() # user_id -> last write seen by this process (LRU, max_tracked_writers)
+        self._write_counter = 0
+        self._write_sequence_floor = 0 # Secuencia más alta descartada por el LRU
+        self.max_tracked_writers = 10000
+        self._stats_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend_name = (app.config.get('DASHBOARD_CACHE_BACKEND') or 'null').lower()
+        max_entries = app.config.get('DASHBOARD_CACHE_MAX_ENTRIES', 2048)
+        self.ttl = app.config.get('DASHBOARD_CACHE_TTL_SECONDS', 300)
+        self.key_prefix = app.config.get('DASHBOARD_CACHE_KEY_PREFIX', 'iterpolaris')
+
+        if backend_name == 'redis':
+            redis_url = app.config.get('DASHBOARD_CACHE_REDIS_URL')
+            try:
+                self.backend = RedisCacheBackend.from_url(redis_url, max_entries=max_entries)
+            except Exception as e:
+                # Sin LRU en proceso de reserva: con varios workers serviría datos anteriores a las escrituras
+                app.logger.error(f"Dashboard cache: Redis backend unavailable ({e}). Caching disabled.")
+                self.backend = NullCacheBackend()
+        elif backend_name == 'memory':
+            if (app.config.get('WEB_CONCURRENCY') or 1) > 1:
+                # Otros workers seguirían sirviendo lo cacheado antes de la escritura hasta que caduque
+                app.logger.error("Dashboard cache: the 'memory' backend cannot invalidate across worker processes "
+                                 "(WEB_CONCURRENCY > 1); caching disabled. Use DASHBOARD_CACHE_BACKEND=redis.")
+                self.backend = NullCacheBackend()
+            else:
+                self.backend = MemoryCacheBackend(max_entries=max_entries)
+        else:
+            self.backend = NullCacheBackend()
+
+        from app import db
+        if not event.contains(db.session, 'before_flush', self._collect_dirty_users):
+            event.listen(db.session, 'before_flush', self._collect_dirty_users)
+            event.listen(db.session, 'after_commit', self._invalidate_dirty_users)
+            event.listen(db.session, 'after_rollback', self._discard_dirty_users)
+
+        app.extensions['dashboard_cache'] = self
+
+    # --- Keys ---
+    @staticmethod
+    def normalize_tags(tag_uuids):
+        if not tag_uuids:
+            return 'all'
+        return ','.join(sorted({str(t) for t in tag_uuids}))
+
+    def _version_key(self, namespace, user_id):
+        return f"{self.key_prefix}:nsver:{namespace}:{user_id}"
+
+    def build_key(self, user_id, endpoint, tag_uuids=None, day=None, extra=None, namespace='dashboard'):
+        version = self.backend.get_version(self._version_key(namespace, user_id))
+        day_part = day.isoformat() if day else '-'
+        extra_part = ':'.join(f"{k}={extra[k]}" for k in sorted(extra)) if extra else '-'
+        return f"{self.key_prefix}:{namespace}:{user_id}:v{version}:{endpoint}:{self.normalize_tags(tag_uuids)}:{day_part}:{extra_part}"
+
+    def coalescing_key(self, cache_key, user_id):
+        """
+        Key for sharing in-flight computations: the cache key plus the user's write sequence in
+        this process. The namespace version is always 0 without a real backend, so it cannot tell
+        a computation started before a commit from one started after it.
+        Sequences come from one process-wide counter and only the most recent max_tracked_writers
+        users are kept; a forgotten user falls back to the highest evicted sequence, which is never
+        lower than their own last one, so an older computation is never joined.
+        """
+        with self._stats_lock:
+            sequence = self._write_sequences.get(str(user_id), self._write_sequence_floor)
+        return f"{cache_key}:w{sequence}"
+
+    def _bump_write_sequences(self, user_ids):
+        with self._stats_lock:
+            for user_id in user_ids:
+                self._write_counter += 1
+                self._write_sequences[user_id] = self._write_counter
+                self._write_sequences.move_to_end(user_id)
+            while len(self._write_sequences) > self.max_tracked_writers:
+                _, evicted = self._write_sequences.popitem(last=False)
+                self._write_sequence_floor = max(self._write_sequence_floor, evicted)
+
+    # --- Read path ---
+    def get_or_compute(self, user_id, endpoint, compute, tag_uuids=None, day=None, extra=None, namespace='dashboard'):
+        """
+        Returns the cached payload for the key or calls compute() and stores its result.
+        Concurrent misses on the same key share a single compute() through read_coalescer,
+        unless the user wrote in between (coalescing_key).
+        Payloads must be treated as read-only by callers, the memory backend shares them.
+        """
+        key = self.build_key(user_id, endpoint, tag_uuids=tag_uuids, day=day, extra=extra, namespace=namespace)
+        value = self.backend.get(key)
+        if value is not _MISSING:
+            with self._stats_lock: self._hits += 1
+            return value
+        with self._stats_lock: self._misses += 1
+
+        def compute_and_store():
+            computed = compute()
+            self.backend.set(key, computed, ttl=self.ttl)
+            return computed
+
+        return read_coalescer.do(self.coalescing_key(key, user_id), compute_and_store)
+
+    async def get_or_compute_async(self, user_id, endpoint, compute, tag_uuids=None, day=None, extra=None, namespace='dashboard'):
+        """
+        get_or_compute for the ASGI read path: compute is a coroutine function. Same keys as the
+        sync path, so both share entries. Concurrent misses on the same key within the event loop
+        await a single compute(); an exception from compute() is raised to every waiter and
+        nothing is stored.
+        """
+        key = await call_cache_backend(self.backend, self.build_key, user_id, endpoint, tag_uuids=tag_uuids, day=day, extra=extra, namespace=namespace)
+        value = await call_cache_backend(self.backend, self.backend.get, key)
+        if value is not _MISSING:
+            with self._stats_lock: self._hits += 1
+            return value
+        with self._stats_lock: self._misses += 1
+
+        inflight_key = self.coalescing_key(key, user_id)
+        inflight = self._async_inflight.get(inflight_key)
+        if inflight is None:
+            async def compute_and_store():
+                try:
+                    computed = await compute()
+                    await call_cache_backend(self.backend, self.backend.set, key, computed, ttl=self.ttl)
+                    return computed
+                finally:
+                    self._async_inflight.pop(inflight_key, None)
+            inflight = self._async_inflight[inflight_key] = asyncio.ensure_future(compute_and_store())
+        # shield: si un cliente se desconecta no se cancela el cálculo que esperan los demás
+        return await asyncio.shield(inflight)
+
+    # --- Invalidation ---
+    def invalidate_user(self, user_id, namespace='dashboard'):
+        self.backend.incr_version(self._version_key(namespace, user_id))
+        with self._stats_lock: self._invalidations += 1
+
+    def mark_user_dirty(self, user_id, session=None):
+        """
+        Defers invalidation of the user's namespace until the current transaction commits.
+        Needed by Core/bulk statements that the ORM flush hooks cannot see.
+        """
+        if session is None:
+            from app import db
+            session = db.session
+        session.info.setdefault(self.SESSION_INFO_KEY, set()).add(str(user_id))
+        self._bump_write_sequences([str(user_id)])
+
+    def _collect_dirty_users(self, session, flush_context, instances):
+        from app.models import User
+        dirty_users = session.info.setdefault(self.SESSION_INFO_KEY, set())
+        flushed_users = set()
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(obj, User):
+                owner_id = obj.id
+            else:
+                owner_id = getattr(obj, 'user_id', None)
+            if owner_id is not None:
+                flushed_users.add(str(owner_id))
+        dirty_users.update(flushed_users)
+        # Commit en curso: las lecturas que lleguen desde ahora no se unen a cálculos ya empezados
+        self._bump_write_sequences(flushed_users)
+
+    def add_commit_listener(self, listener):
+        """listener(user_ids) runs after every commit that wrote rows owned by those users."""
+        if listener not in self._commit_listeners:
+            self._commit_listeners.append(listener)
+
+    def _invalidate_dirty_users(self, session):
+        dirty_users = session.info.pop(self.SESSION_INFO_KEY, set())
+        self._bump_write_sequences(dirty_users) # Y otra vez tras el commit: lo empezado durante él tampoco vale
+        for user_id in dirty_users:
+            self.invalidate_user(user_id)
+        if dirty_users:
+            for listener in self._commit_listeners:
+                listener(dirty_users)
+
+    def _discard_dirty_users(self, session):
+        session.info.pop(self.SESSION_INFO_KEY, None)
+
+    # --- Stats ---
+    def stats(self):
+        with self._stats_lock:
+            hits, misses, invalidations = self._hits, self._misses, self._invalidations
+        lookups = hits + misses
+        return {
+            "backend": self.backend.name,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "invalidations": invalidations,
+            "size": self.backend.size(),
+            "max_entries": self.backend.max_entries,
+            "ttl_seconds": self.ttl,
+            "coalescing": read_coalescer.stats()
+        }
+
+
+dashboard_cache = DashboardCache()
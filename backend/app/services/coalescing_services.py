@@ -0,0 +1,71 @@
+# backend/app/services/coalescing_services.py
+import threading
+
+
+class _InFlightCall:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls inside one worker process.
+
+    The first caller for a key (the leader) runs the function; callers arriving while it is
+    in flight wait and receive the same result or exception. Nothing is kept once the call
+    finishes, so this only removes duplicate work during bursts; caching is a separate layer.
+    Only useful with threaded workers (gthread, Flask's threaded dev server).
+    Results are shared between threads, so functions must return plain data, never ORM instances.
+    """
+
+    def __init__(self, wait_timeout=30):
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._executions = 0
+        self._coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+                self._executions += 1
+            else:
+                self._coalesced += 1
+
+        if not is_leader:
+            if call.event.wait(self.wait_timeout):
+                if call.error is not None:
+                    raise call.error
+                return call.result
+            # Leader is taking too long: compute independently instead of blocking the request
+            return fn()
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "executions": self._executions,
+                "coalesced": self._coalesced,
+                "in_flight": len(self._calls)
+            }
+
+
+read_coalescer = SingleFlight()
@@ -0,0 +1,279 @@
+# backend/app/services/counter_services.py
+"""
+Per-quest and per-tag counters behind the sidebar badges (StatCounter, table stat_counters).
+
+Every pool mission, scheduled mission and habit occurrence adds 1 and its points_value to
+(QUEST, quest_id, status) and to (TAG, tag_id, status) for each id in its tag_ids. Writers
+apply the difference between the old and the new row as an upsert that adds to the current
+totals, in the same transaction as the write itself; rows that drop to zero are removed.
+
+Kept in sync by:
+- session hooks (init_counters): ORM creates, deletes and changes of status, quest, points or tags.
+  Registered after init_tag_index, whose hook fills tag_ids of new entities;
+- the Core paths, explicitly: tag_ids syncs (tag_index_services), bulk status updates, import,
+  the bulk delete of future occurrences and the quest reassignment when a quest is deleted;
+- `flask counters-rebuild`: recomputes everything from the source tables (drift repair).
+"""
+from collections import defaultdict
+from sqlalchemy import delete, event, func, inspect, literal, select, union_all
+from app.db_types import insert_increment
+from app.models import (
+    db, User, StatCounter, PoolMission, ScheduledMission, HabitOccurrence,
+    pool_mission_tags_association, scheduled_mission_tags_association, habit_template_tags_association
+)
+
+COUNTED_MODELS = (PoolMission, ScheduledMission, HabitOccurrence)
+COUNTED_ATTRIBUTES = ('user_id', 'quest_id', 'status', 'points_value', 'tag_ids')
+COUNTER_KEY = ['user_id', 'scope', 'scope_id', 'status']
+SESSION_INFO_KEY = 'counter_deltas'
+
+
+class CounterDeltas:
+    """Accumulates {(user_id, scope, scope_id, status): [count, points_sum]} changes until apply()."""
+
+    def __init__(self):
+        self.totals = defaultdict(lambda: [0, 0])
+
+    def _add_key(self, user_id, scope, scope_id, status, count, points):
+        total = self.totals[(user_id, scope, scope_id, status)]
+        total[0] += count
+        total[1] += points
+
+    def add(self, user_id, quest_id, status, tag_ids, count=1, points=0):
+        """count rows of one quest/status/tag_ids group carrying `points` in total (negative to remove them)."""
+        if quest_id is not None:
+            self._add_key(user_id, 'QUEST', quest_id, status, count, points)
+        for tag_id in set(tag_ids or []):
+            self._add_key(user_id, 'TAG', tag_id, status, count, points)
+
+    def add_tag_change(self, user_id, status, old_tag_ids, new_tag_ids, count=1, points=0):
+        """Rows whose tag_ids go from old to new: only the TAG counters of the difference move."""
+        old_tag_ids, new_tag_ids = set(old_tag_ids or []), set(new_tag_ids or [])
+        for tag_id in new_tag_ids - old_tag_ids:
+            self._add_key(user_id, 'TAG', tag_id, status, count, points)
+        for tag_id in old_tag_ids - new_tag_ids:
+            self._add_key(user_id, 'TAG', tag_id, status, -count, -points)
+
+    def add_row(self, row, sign=1):
+        """One entity row (anything with the COUNTED_ATTRIBUTES)."""
+        self.add(row.user_id, row.quest_id, row.status, row.tag_ids, sign, sign * (row.points_value or 0))
+
+    def discard_users(self, user_ids):
+        for key in [key for key in self.totals if key[0] in user_ids]:
+            del self.totals[key]
+
+    def rows(self):
+        # Orden fijo: dos transacciones que tocan los mismos contadores los bloquean en el mismo orden
+        return sorted((
+            {"user_id": user_id, "scope": scope, "scope_id": scope_id, "status": status, "count": count, "points_sum": points}
+            for (user_id, scope, scope_id, status), (count, points) in self.totals.items() if count or points
+        ), key=lambda row: (str(row["user_id"]), row["scope"], str(row["scope_id"]), row["status"]))
+
+    def apply(self, executor):
+        """Upserts the accumulated deltas through a Session or Connection and drops emptied counters."""
+        rows = self.rows()
+        self.totals.clear()
+        if not rows:
+            return
+        table = StatCounter.__table__
+        dialect_name = (executor.get_bind() if hasattr(executor, 'get_bind') else executor).dialect.name
+        executor.execute(insert_increment(table, dialect_name, COUNTER_KEY, ['count', 'points_sum']), rows)
+        executor.execute(delete(table).where(
+            table.c.user_id.in_({row["user_id"] for row in rows}), table.c['count'] <= 0
+        ))
+
+
+def _grouped_rows(executor, model, *criteria):
+    """(user_id, quest_id, status, tag_ids, count, points) per distinct group of the matching rows."""
+    table = model.__table__
+    return executor.execute(
+        select(table.c.user_id, table.c.quest_id, table.c.status, table.c.tag_ids,
+               func.count(), func.coalesce(func.sum(table.c.points_value), 0))
+        .where(*criteria).group_by(table.c.user_id, table.c.quest_id, table.c.status, table.c.tag_ids)
+    ).all()
+
+
+def remove_counted_rows(executor, model, *criteria):
+    """For Core/bulk deletes: subtracts the rows matching criteria. Call before the DELETE."""
+    deltas = CounterDeltas()
+    for user_id, quest_id, status, tag_ids, count, points in _grouped_rows(executor, model, *criteria):
+        deltas.add(user_id, quest_id, status, tag_ids, -count, -points)
+    deltas.apply(executor)
+
+
+def add_counted_rows(executor, rows):
+    """For Core inserts: rows are the inserted values (dicts with user_id, quest_id, status, tag_ids, points_value)."""
+    deltas = CounterDeltas()
+    for row in rows:
+        deltas.add(row["user_id"], row.get("quest_id"), row.get("status") or 'PENDING',
+                   row.get("tag_ids"), 1, row.get("points_value") or 0)
+    deltas.apply(executor)
+
+
+def tag_ids_change_deltas(connection, model, tag_ids_by_id):
+    """
+    TAG deltas for a Core rewrite of tag_ids ({entity_id: new tag_ids}); read before the UPDATE.
+    For templates it is their occurrences that are counted.
+    """
+    deltas = CounterDeltas()
+    if model in (PoolMission, ScheduledMission):
+        table = model.__table__
+        rows = connection.execute(
+            select(table.c.id, table.c.user_id, table.c.status, table.c.points_value, table.c.tag_ids)
+            .where(table.c.id.in_(list(tag_ids_by_id)))
+        )
+        for row in rows:
+            deltas.add_tag_change(row.user_id, row.status, row.tag_ids, tag_ids_by_id[row.id], 1, row.points_value or 0)
+    else: # HabitTemplate
+        occurrences = HabitOccurrence.__table__
+        groups = connection.execute(
+            select(occurrences.c.habit_template_id, occurrences.c.user_id, occurrences.c.status, occurrences.c.tag_ids,
+                   func.count(), func.coalesce(func.sum(occurrences.c.points_value), 0))
+            .where(occurrences.c.habit_template_id.in_(list(tag_ids_by_id)))
+            .group_by(occurrences.c.habit_template_id, occurrences.c.user_id, occurrences.c.status, occurrences.c.tag_ids)
+        )
+        for template_id, user_id, status, old_tag_ids, count, points in groups:
+            deltas.add_tag_change(user_id, status, old_tag_ids, tag_ids_by_id[template_id], count, points)
+    return deltas
+
+
+def move_quest_counters(executor, user_id, from_quest_id, to_quest_id):
+    """Bulk reassignment of everything in one quest to another (quest delete)."""
+    table = StatCounter.__table__
+    deltas = CounterDeltas()
+    rows = executor.execute(
+        select(table.c.status, table.c['count'], table.c.points_sum)
+        .where(table.c.user_id == user_id, table.c.scope == 'QUEST', table.c.scope_id == from_quest_id)
+    )
+    for status, count, points in rows:
+        deltas._add_key(user_id, 'QUEST', to_quest_id, status, count, points)
+        deltas._add_key(user_id, 'QUEST', from_quest_id, status, -count, -points)
+    deltas.apply(executor)
+
+
+# --- Session hooks ---
+def _value_before_flush(state, key):
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(state.obj(), key) # Sin cargar: el valor de la BD
+
+
+class _OldRow:
+    def __init__(self, state):
+        for key in COUNTED_ATTRIBUTES:
+            setattr(self, key, _value_before_flush(state, key))
+
+
+def _before_flush(session, flush_context, instances):
+    deltas = session.info.setdefault(SESSION_INFO_KEY, CounterDeltas())
+    for obj in session.new:
+        if isinstance(obj, COUNTED_MODELS):
+            # Los defaults de columna aún no se han aplicado
+            deltas.add(obj.user_id, obj.quest_id, obj.status or 'PENDING', obj.tag_ids, 1, obj.points_value or 0)
+    for obj in session.deleted:
+        if isinstance(obj, COUNTED_MODELS):
+            deltas.add_row(_OldRow(inspect(obj)), -1)
+    for obj in session.dirty:
+        if not isinstance(obj, COUNTED_MODELS) or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[key].history.has_changes() for key in COUNTED_ATTRIBUTES):
+            continue
+        deltas.add_row(_OldRow(state), -1)
+        deltas.add_row(obj)
+
+
+def _after_flush(session, flush_context):
+    deltas = session.info.pop(SESSION_INFO_KEY, None)
+    if deltas is not None:
+        # Usuarios borrados en este flush: sus contadores se van por el ON DELETE CASCADE
+        deltas.discard_users({obj.id for obj in session.deleted if isinstance(obj, User)})
+        deltas.apply(session.connection())
+
+
+def _discard_pending(session, *args):
+    session.info.pop(SESSION_INFO_KEY, None)
+
+
+def init_counters(app, db):
+    if not event.contains(db.session, 'before_flush', _before_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
+        event.listen(db.session, 'after_flush', _after_flush)
+        event.listen(db.session, 'after_rollback', _discard_pending)
+
+
+# --- Reads ---
+def user_counters(user_id):
+    """{"quests": {quest_id: {status: {"count", "points_sum"}}}, "tags": {...}} in one indexed read."""
+    data = {"quests": {}, "tags": {}}
+    rows = db.session.execute(
+        select(StatCounter.scope, StatCounter.scope_id, StatCounter.status, StatCounter.count, StatCounter.points_sum)
+        .where(StatCounter.user_id == user_id)
+    )
+    for scope, scope_id, status, count, points_sum in rows:
+        group = data["quests" if scope == 'QUEST' else "tags"].setdefault(str(scope_id), {})
+        group[status] = {"count": count, "points_sum": points_sum}
+    return data
+
+
+# --- Rebuild (flask counters-rebuild) ---
+def _source_aggregates():
+    """SELECTs of (user_id, scope, scope_id, status, count, points_sum) straight from the source tables."""
+    selects = []
+    for model in COUNTED_MODELS:
+        table = model.__table__
+        selects.append(
+            select(table.c.user_id, literal('QUEST').label('scope'), table.c.quest_id.label('scope_id'), table.c.status,
+                   func.count().label('count'), func.coalesce(func.sum(table.c.points_value), 0).label('points_sum'))
+            .where(table.c.quest_id.isnot(None)).group_by(table.c.user_id, table.c.quest_id, table.c.status)
+        )
+    # TAG: desde las tablas de asociación (la fuente de verdad de tag_ids), portable entre dialectos
+    for model, association, join_column, fk_column_name in (
+        (PoolMission, pool_mission_tags_association, 'id', 'pool_mission_id'),
+        (ScheduledMission, scheduled_mission_tags_association, 'id', 'scheduled_mission_id'),
+        (HabitOccurrence, habit_template_tags_association, 'habit_template_id', 'habit_template_id'),
+    ):
+        table = model.__table__
+        selects.append(
+            select(table.c.user_id, literal('TAG').label('scope'), association.c.tag_id.label('scope_id'), table.c.status,
+                   func.count().label('count'), func.coalesce(func.sum(table.c.points_value), 0).label('points_sum'))
+            .join(association, association.c[fk_column_name] == table.c[join_column])
+            .group_by(table.c.user_id, association.c.tag_id, table.c.status)
+        )
+    return selects
+
+
+def rebuild_counters(session, user_ids=None):
+    """Deletes and recomputes the counters of user_ids (None: every user) on the session's current shard."""
+    table = StatCounter.__table__
+    sources = union_all(*_source_aggregates()).subquery()
+    totals = select(
+        sources.c.user_id, sources.c.scope, sources.c.scope_id, sources.c.status,
+        func.sum(sources.c['count']), func.sum(sources.c.points_sum)
+    ).group_by(sources.c.user_id, sources.c.scope, sources.c.scope_id, sources.c.status)
+    cleanup = delete(table)
+    if user_ids is not None:
+        totals = totals.where(sources.c.user_id.in_(user_ids))
+        cleanup = cleanup.where(table.c.user_id.in_(user_ids))
+    session.execute(cleanup)
+    session.execute(table.insert().from_select(COUNTER_KEY + ['count', 'points_sum'], totals))
+
+
+def rebuild_all_counters(db, chunk_size=500, progress=None):
+    """Rebuilds every user's counters, per shard in chunks of users (the table comes from `flask db upgrade`)."""
+    from app.db_shards import shard_count, use_shard
+    rebuilt = 0
+    for shard in range(shard_count()):
+        use_shard(db.session, shard)
+        user_ids = db.session.execute(select(User.id).order_by(User.id)).scalars().all()
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            rebuild_counters(db.session, chunk)
+            db.session.commit()
+            rebuilt += len(chunk)
+            if progress: progress(shard, rebuilt)
+    use_shard(db.session, 0)
+    return rebuilt
@@ -0,0 +1,362 @@
+# backend/app/services/dashboard_services.py
+from flask import current_app
+from app.models import db, AgendaItem
+from app.services.cache_services import dashboard_cache
+from app.services.agenda_services import agenda_items_statement, user_tags_statement, item_tags
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from datetime import date, time, datetime, timezone
+from sqlalchemy import and_, desc, or_
+
+
+def parse_tag_filter(tag_ids_param, log_prefix=""):
+    """Parses repeated and/or comma-separated tag ids from query params into unique UUIDs."""
+    valid_tag_uuids = []
+    for tid_str in tag_ids_param or []:
+        for tid in tid_str.split(','): # Handle comma-separated and multiple params
+            if tid.strip():
+                try:
+                    tag_uuid = uuid.UUID(tid.strip())
+                    if tag_uuid not in valid_tag_uuids: valid_tag_uuids.append(tag_uuid)
+                except ValueError: current_app.logger.warning(f"{log_prefix}Invalid UUID format for tag filter: {tid}")
+    return valid_tag_uuids
+
+def today_bounds_utc(day: date = None):
+    day = day or date.today()
+    return datetime.combine(day, time.min, tzinfo=timezone.utc), datetime.combine(day, time.max, tzinfo=timezone.utc)
+
+
+# --- Builders: plain dict/list payloads, safe to cache ---
+# Cada panel es una consulta sobre AgendaItem (UNION ALL de misiones programadas, ocurrencias y
+# misiones del pool) más la de los tags del usuario; sentencias y ensamblado van por separado para
+# que el camino ASGI (app.asgi) las ejecute en paralelo y devuelva el mismo payload.
+
+def run_read_statements(statements):
+    """Runs {name: select} one after another on db.session -> {name: [entities]}."""
+    return {name: db.session.scalars(statement).all() for name, statement in statements.items()}
+
+def today_agenda_statements(user_id, tag_uuids, day: date = None):
+    today_start_utc, today_end_utc = today_bounds_utc(day)
+    # All-day Scheduled Missions overlapping today
+    all_day_mission = and_(
+        AgendaItem.item_type == 'SCHEDULED_MISSION', AgendaItem.is_all_day == True,
+        AgendaItem.start_datetime <= today_end_utc, AgendaItem.end_datetime >= today_start_utc
+    )
+    # Habit Occurrences and timed Scheduled Missions starting today
+    starts_today = and_(
+        AgendaItem.start_datetime >= today_start_utc, AgendaItem.start_datetime <= today_end_utc,
+        or_(AgendaItem.item_type == 'HABIT_OCCURRENCE', AgendaItem.is_all_day == False)
+    )
+    items = agenda_items_statement(
+        user_id, tag_uuids,
+        AgendaItem.item_type.in_(['SCHEDULED_MISSION', 'HABIT_OCCURRENCE']), AgendaItem.status == 'PENDING',
+        or_(all_day_mission, starts_today)
+    )
+    return {
+        "items": items.order_by(AgendaItem.start_datetime.asc(), AgendaItem.title.asc()),
+        "tags": user_tags_statement(user_id)
+    }
+
+def assemble_today_agenda(rows):
+    tags_by_id = {tag.id: tag for tag in rows["tags"]}
+    all_day_missions, todays_habits, timed_missions = [], [], []
+    for item in rows["items"]:
+        if item.item_type == 'HABIT_OCCURRENCE':
+            todays_habits.append({
+                "id": str(item.id), "title": item.title, "status": item.status,
+                "scheduled_start_datetime": item.start_datetime.isoformat(),
+                "scheduled_end_datetime": item.end_datetime.isoformat(),
+                "energy_value": item.energy_value, "points_value": item.points_value,
+                "quest_id": str(item.quest_id) if item.quest_id else None,
+                "quest_name": item.quest.name if item.quest else None,
+                "type": "HABIT_OCCURRENCE",
+                "rec_duration_minutes": item.rec_duration_minutes,
+                "tags": item_tags(item, tags_by_id)
+            })
+            continue
+        (all_day_missions if item.is_all_day else timed_missions).append({
+            "id": str(item.id), "title": item.title, "status": item.status, "is_all_day": item.is_all_day,
+            "start_datetime": item.start_datetime.isoformat(), "end_datetime": item.end_datetime.isoformat(),
+            "energy_value": item.energy_value, "points_value": item.points_value,
+            "quest_id": str(item.quest_id) if item.quest_id else None,
+            "quest_name": item.quest.name if item.quest else None,
+            "type": "SCHEDULED_MISSION_ALL_DAY" if item.is_all_day else "SCHEDULED_MISSION_TIMED", # Distinguish type for frontend
+            "tags": item_tags(item, tags_by_id)
+        })
+    all_day_missions.sort(key=lambda mission: mission["title"]) # Sin hora de inicio: por título
+
+    return {
+        "all_day_missions": all_day_missions,
+        "todays_habits": todays_habits,
+        "timed_missions": timed_missions
+    }
+
+def build_today_agenda(user_id, tag_uuids, day: date = None):
+    return assemble_today_agenda(run_read_statements(today_agenda_statements(user_id, tag_uuids, day)))
+
+def recent_activity_statements(user_id, tag_uuids, limit=10):
+    items = agenda_items_statement(user_id, tag_uuids, AgendaItem.status == 'COMPLETED')
+    return {
+        "items": items.order_by(desc(AgendaItem.completed_at)).limit(limit),
+        "tags": user_tags_statement(user_id)
+    }
+
+def assemble_recent_activity(rows, limit=10):
+    tags_by_id = {tag.id: tag for tag in rows["tags"]}
+    # completed_at: updated_at for missions, actual_completion_datetime (or updated_at) for habits
+    return [{
+        "id": str(item.id), "title": item.title, "type": item.item_type,
+        "completed_at": item.completed_at.isoformat(),
+        "quest_name": item.quest.name if item.quest else None, "quest_color": item.quest.color if item.quest else '#FFFFFF',
+        "tags": item_tags(item, tags_by_id),
+        "energy_value": item.energy_value, "points_value": item.points_value
+    } for item in rows["items"][:limit]]
+
+def build_recent_activity(user_id, tag_uuids, limit=10):
+    return assemble_recent_activity(run_read_statements(recent_activity_statements(user_id, tag_uuids, limit)), limit)
+
+def rescue_missions_statements(user_id, tag_uuids, limit=10):
+    skipped_mission = and_(AgendaItem.item_type == 'SCHEDULED_MISSION', AgendaItem.status == 'SKIPPED')
+    # Crucially, must be PENDING to be "rescuable" to ACTIVE
+    deferred_pool_mission = and_(
+        AgendaItem.item_type == 'POOL_MISSION', AgendaItem.status == 'PENDING', AgendaItem.focus_status == 'DEFERRED'
+    )
+    items = agenda_items_statement(user_id, tag_uuids, or_(skipped_mission, deferred_pool_mission))
+    # Skipped missions first (most recent start first), then deferred pool missions by last update
+    return {
+        "items": items.order_by(
+            db.case((AgendaItem.item_type == 'SCHEDULED_MISSION', 0), else_=1),
+            desc(AgendaItem.start_datetime), desc(AgendaItem.updated_at)
+        ).limit(limit),
+        "tags": user_tags_statement(user_id)
+    }
+
+def assemble_rescue_missions(rows):
+    tags_by_id = {tag.id: tag for tag in rows["tags"]}
+    rescue_items = []
+    for item in rows["items"]:
+        rescue_item = {
+            "id": str(item.id), "title": item.title, "type": item.item_type,
+            "quest_name": item.quest.name if item.quest else None,
+            "quest_id": str(item.quest_id) if item.quest_id else None,
+            "quest_color": item.quest.color if item.quest else '#FFFFFF',
+            "tags": item_tags(item, tags_by_id),
+            "energy_value": item.energy_value, "points_value": item.points_value,
+            "description": item.description
+        }
+        if item.item_type == 'SCHEDULED_MISSION':
+            rescue_item.update({"status": "SKIPPED", "original_start_datetime": item.start_datetime.isoformat()})
+        else:
+            rescue_item.update({"status": "DEFERRED", "focus_status": item.focus_status}) # Frontend uses status to show 'Deferred Task'
+        rescue_items.append(rescue_item)
+    return rescue_items
+
+def build_rescue_missions(user_id, tag_uuids, limit=10):
+    return assemble_rescue_missions(run_read_statements(rescue_missions_statements(user_id, tag_uuids, limit)))
+
+def quest_dashboard_items_statements(user_id, quest_id, tag_uuids, day: date = None):
+    today_start_utc, today_end_utc = today_bounds_utc(day)
+
+    def quest_items(item_type, *criteria):
+        return agenda_items_statement(
+            user_id, tag_uuids, AgendaItem.item_type == item_type, AgendaItem.quest_id == quest_id,
+            AgendaItem.status == 'PENDING', *criteria, with_quest=False # El quest ya lo tiene quien llama
+        )
+
+    return {
+        # 1. Today's Habit Occurrences
+        "todays_habit_occurrences": quest_items(
+            'HABIT_OCCURRENCE', AgendaItem.start_datetime >= today_start_utc, AgendaItem.start_datetime <= today_end_utc
+        ).order_by(AgendaItem.start_datetime.asc()),
+        # 2. Pending Scheduled Missions (today and future)
+        "pending_scheduled_missions": quest_items(
+            'SCHEDULED_MISSION', AgendaItem.start_datetime >= today_start_utc
+        ).order_by(AgendaItem.start_datetime.asc()).limit(10),
+        # 3. Pending Pool Missions
+        "pending_pool_missions": quest_items('POOL_MISSION').order_by(
+            db.case((AgendaItem.focus_status == 'ACTIVE', 0), else_=1), AgendaItem.created_at.desc()
+        ).limit(10),
+        "tags": user_tags_statement(user_id)
+    }
+
+def assemble_quest_dashboard_items(quest, rows):
+    tags_by_id = {tag.id: tag for tag in rows["tags"]}
+    todays_habit_occurrences = [{
+        "id": str(ho.id), "title": ho.title, "status": ho.status,
+        "scheduled_start_datetime": ho.start_datetime.isoformat(),
+        "scheduled_end_datetime": ho.end_datetime.isoformat(),
+        "energy_value": ho.energy_value, "points_value": ho.points_value,
+        "quest_id": str(ho.quest_id), "quest_name": quest.name,
+        "type": "HABIT_OCCURRENCE",
+        "rec_duration_minutes": ho.rec_duration_minutes,
+        "tags": item_tags(ho, tags_by_id)
+    } for ho in rows["todays_habit_occurrences"]]
+
+    pending_scheduled_missions = [{
+        "id": str(sm.id), "title": sm.title, "status": sm.status,
+        "start_datetime": sm.start_datetime.isoformat(), "end_datetime": sm.end_datetime.isoformat(),
+        "is_all_day": sm.is_all_day, "energy_value": sm.energy_value, "points_value": sm.points_value,
+        "quest_id": str(sm.quest_id), "quest_name": quest.name, "type": "SCHEDULED_MISSION",
+        "tags": item_tags(sm, tags_by_id)
+    } for sm in rows["pending_scheduled_missions"]]
+
+    pending_pool_missions = [{
+        "id": str(pm.id), "title": pm.title, "status": pm.status, "focus_status": pm.focus_status,
+        "energy_value": pm.energy_value, "points_value": pm.points_value,
+        "quest_id": str(pm.quest_id), "quest_name": quest.name, "type": "POOL_MISSION",
+        "tags": item_tags(pm, tags_by_id)
+    } for pm in rows["pending_pool_missions"]]
+
+    return {
+        "quest_info": {"id": str(quest.id), "name": quest.name, "color": quest.color},
+        "todays_habit_occurrences": todays_habit_occurrences,
+        "pending_scheduled_missions": pending_scheduled_missions,
+        "pending_pool_missions": pending_pool_missions
+    }
+
+def build_quest_dashboard_items(user_id, quest, tag_uuids, day: date = None):
+    statements = quest_dashboard_items_statements(user_id, quest.id, tag_uuids, day)
+    return assemble_quest_dashboard_items(quest, run_read_statements(statements))
+
+
+# --- Cached entry points used by the routes ---
+
+def get_today_agenda_data(user_id, tag_uuids):
+    today = date.today()
+    return dashboard_cache.get_or_compute(
+        user_id, 'today_agenda', lambda: build_today_agenda(user_id, tag_uuids, today),
+        tag_uuids=tag_uuids, day=today
+    )
+
+def get_recent_activity_data(user_id, tag_uuids, limit=10):
+    return dashboard_cache.get_or_compute(
+        user_id, 'recent_activity', lambda: build_recent_activity(user_id, tag_uuids, limit),
+        tag_uuids=tag_uuids, extra={"limit": limit}
+    )
+
+def get_rescue_missions_data(user_id, tag_uuids, limit=10):
+    return dashboard_cache.get_or_compute(
+        user_id, 'rescue_missions', lambda: build_rescue_missions(user_id, tag_uuids, limit),
+        tag_uuids=tag_uuids, extra={"limit": limit}
+    )
+
+def get_quest_dashboard_items_data(user_id, quest, tag_uuids):
+    today = date.today()
+    return dashboard_cache.get_or_compute(
+        user_id, 'quest_dashboard_items', lambda: build_quest_dashboard_items(user_id, quest, tag_uuids, today),
+        tag_uuids=tag_uuids, day=today, extra={"quest_id": quest.id}
+    )
+
+
+# --- Dashboard bundle ---
+
+# Panel types whose data comes from a dashboard builder; the rest are fed by the generic list endpoints
+BUNDLE_PANEL_TYPES = {"TODAY_AGENDA", "RECENT_ACTIVITY", "RESCUE_MISSIONS", "PROJECT_TASKS", "ENERGY_STATISTICS"}
+
+_bundle_executor = None
+_bundle_executor_lock = threading.Lock()
+
+def _get_bundle_executor(max_workers):
+    global _bundle_executor
+    with _bundle_executor_lock:
+        if _bundle_executor is None:
+            _bundle_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='dashboard-bundle')
+        return _bundle_executor
+
+def _run_in_app_context(app, fn, routing_session=None):
+    # Each worker thread gets its own app context, hence its own scoped session and connection
+    with app.app_context():
+        if routing_session is not None:
+            from app.db_session import copy_session_routing
+            copy_session_routing(routing_session, db.session) # Mismo shard/réplica que la petición
+        return fn()
+
+def build_dashboard_bundle(user_id, panels, tag_uuids, limit=10, include_energy_balance=True):
+    """
+    Computes every configured dashboard panel in one call.
+    Identical panels are computed once and independent panels run concurrently on a small
+    thread pool, each with its own session. Returns (panels_payload, energy_balance).
+    """
+    from app.models import Quest
+    from app.services.gamification_services import calculate_energy_balance
+
+    app = current_app._get_current_object()
+    panels = sorted((p for p in panels if isinstance(p, dict)), key=lambda p: p.get('order') or 0)
+
+    # Shared work: one quest lookup for every PROJECT_TASKS panel
+    quest_ids = set()
+    for panel in panels:
+        if panel.get('panel_type') == 'PROJECT_TASKS' and panel.get('quest_id'):
+            try: quest_ids.add(uuid.UUID(str(panel['quest_id'])))
+            except ValueError: pass
+    quests_by_id = {}
+    if quest_ids:
+        for quest in Quest.query.filter(Quest.id.in_(quest_ids), Quest.user_id == user_id).all():
+            quests_by_id[str(quest.id)] = SimpleNamespace(id=quest.id, name=quest.name, color=quest.color)
+
+    jobs = {} # computation key -> callable, deduplicates identical panels
+    panel_jobs = []
+    for panel in panels:
+        panel_type = panel.get('panel_type')
+        job_key = None
+        if panel_type == 'TODAY_AGENDA':
+            job_key = ('today_agenda',)
+            jobs.setdefault(job_key, lambda: get_today_agenda_data(user_id, tag_uuids))
+        elif panel_type == 'RECENT_ACTIVITY':
+            job_key = ('recent_activity',)
+            jobs.setdefault(job_key, lambda: get_recent_activity_data(user_id, tag_uuids, limit))
+        elif panel_type == 'RESCUE_MISSIONS':
+            job_key = ('rescue_missions',)
+            jobs.setdefault(job_key, lambda: get_rescue_missions_data(user_id, tag_uuids, limit))
+        elif panel_type == 'ENERGY_STATISTICS':
+            job_key = ('energy_balance',)
+            jobs.setdefault(job_key, lambda: calculate_energy_balance(user_id))
+        elif panel_type == 'PROJECT_TASKS':
+            quest = quests_by_id.get(str(panel.get('quest_id')))
+            if quest:
+                job_key = ('quest_dashboard_items', str(quest.id))
+                jobs.setdefault(job_key, lambda quest=quest: get_quest_dashboard_items_data(user_id, quest, tag_uuids))
+        panel_jobs.append((panel, job_key))
+
+    if include_energy_balance:
+        jobs.setdefault(('energy_balance',), lambda: calculate_energy_balance(user_id))
+
+    results, errors = {}, {}
+    max_workers = app.config.get('DASHBOARD_BUNDLE_WORKERS', 4)
+    if len(jobs) <= 1 or max_workers <= 1:
+        for job_key, fn in jobs.items():
+            try: results[job_key] = fn()
+            except Exception as e: errors[job_key] = e
+    else:
+        executor = _get_bundle_executor(max_workers)
+        request_session = db.session()
+        futures = {job_key: executor.submit(_run_in_app_context, app, fn, request_session) for job_key, fn in jobs.items()}
+        for job_key, future in futures.items():
+            try: results[job_key] = future.result()
+            except Exception as e: errors[job_key] = e
+
+    panels_payload = []
+    for panel, job_key in panel_jobs:
+        panel_payload = {
+            "id": panel.get('id'), "panel_type": panel.get('panel_type'),
+            "name": panel.get('name'), "order": panel.get('order')
+        }
+        if panel.get('quest_id'): panel_payload["quest_id"] = panel.get('quest_id')
+        if panel.get('panel_type') not in BUNDLE_PANEL_TYPES:
+            panel_payload["bundled"] = False # Frontend keeps fetching this panel on its own
+        elif job_key is None:
+            panel_payload["bundled"] = True
+            panel_payload["error"] = "Quest not found or access denied"
+        elif job_key in errors:
+            current_app.logger.error(f"Dashboard bundle: panel {panel.get('id')} ({job_key[0]}) failed for user {user_id}: {errors[job_key]}", exc_info=errors[job_key])
+            panel_payload["bundled"] = True
+            panel_payload["error"] = "Failed to fetch panel data"
+        else:
+            panel_payload["bundled"] = True
+            panel_payload["data"] = results[job_key]
+        panels_payload.append(panel_payload)
+
+    energy_balance = results.get(('energy_balance',)) if include_energy_balance else None
+    return panels_payload, energy_balance
@@ -0,0 +1,170 @@
+# backend/app/services/export_services.py
+import csv
+import io
+import json
+import uuid
+import zipfile
+from datetime import datetime, date, time
+from sqlalchemy import select, func
+from app.models import (
+    db, User, Quest, Tag, PoolMission, ScheduledMission, HabitTemplate, HabitOccurrence, EnergyLog,
+    pool_mission_tags_association, scheduled_mission_tags_association, habit_template_tags_association
+)
+
+EXPORT_FORMATS = ['ndjson', 'zip']
+DENORMALIZED_TAG_COLUMNS = {'tag_ids', 'tag_snapshot'} # Copias de las asociaciones, que ya se exportan
+EXPORT_BATCH_SIZE = 1000
+
+def _user_owned(model):
+    def build(user_id):
+        columns = [column for column in model.__table__.c if column.name not in DENORMALIZED_TAG_COLUMNS]
+        return select(*columns).where(model.user_id == user_id).order_by(model.created_at, model.id)
+    return build
+
+def _association(association, fk_column_name, model):
+    def build(user_id):
+        fk_column = association.c[fk_column_name]
+        return (
+            select(fk_column, association.c.tag_id)
+            .join(model.__table__, model.id == fk_column)
+            .where(model.user_id == user_id)
+            .order_by(fk_column, association.c.tag_id)
+        )
+    return build
+
+def _user_profile(user_id):
+    columns = [column for column in User.__table__.c if column.name != 'password_hash']
+    return select(*columns).where(User.id == user_id)
+
+# Orden de exportación: entidades padre antes que las hijas y sus asociaciones
+EXPORT_ENTITIES = [
+    ("user", _user_profile),
+    ("quests", _user_owned(Quest)),
+    ("tags", _user_owned(Tag)),
+    ("pool_missions", _user_owned(PoolMission)),
+    ("pool_mission_tags", _association(pool_mission_tags_association, 'pool_mission_id', PoolMission)),
+    ("scheduled_missions", _user_owned(ScheduledMission)),
+    ("scheduled_mission_tags", _association(scheduled_mission_tags_association, 'scheduled_mission_id', ScheduledMission)),
+    ("habit_templates", _user_owned(HabitTemplate)),
+    ("habit_template_tags", _association(habit_template_tags_association, 'habit_template_id', HabitTemplate)),
+    ("habit_occurrences", _user_owned(HabitOccurrence)),
+    ("energy_logs", _user_owned(EnergyLog)),
+]
+
+def _serialize_value(value):
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return [_serialize_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _serialize_value(item) for key, item in value.items()}
+    return value
+
+def _csv_value(value):
+    value = _serialize_value(value)
+    if isinstance(value, list):
+        return ';'.join('' if item is None else str(item) for item in value)
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return '' if value is None else value
+
+def count_export_rows(user_id):
+    """Row count per entity, used as the progress total. One COUNT per entity."""
+    counts = {}
+    for entity_name, build_query in EXPORT_ENTITIES:
+        counts[entity_name] = db.session.execute(
+            select(func.count()).select_from(build_query(user_id).order_by(None).subquery())
+        ).scalar_one()
+    return counts
+
+def iter_entity_batches(user_id, batch_size=EXPORT_BATCH_SIZE, progress=None):
+    """
+    Yields (entity_name, column_names, rows) batches. Every entity is read through a
+    server-side cursor (yield_per), so at most batch_size rows are held in memory.
+    progress(entity_name, rows_done) is called after each batch.
+    """
+    for entity_name, build_query in EXPORT_ENTITIES:
+        result = db.session.execute(build_query(user_id).execution_options(yield_per=batch_size))
+        column_names = list(result.keys())
+        rows_done = 0
+        try:
+            for partition in result.partitions():
+                rows_done += len(partition)
+                yield entity_name, column_names, partition
+                if progress:
+                    progress(entity_name, rows_done)
+        finally:
+            result.close()
+        if rows_done == 0:
+            yield entity_name, column_names, []
+            if progress:
+                progress(entity_name, 0)
+
+def iter_ndjson_export(user_id, counts=None, batch_size=EXPORT_BATCH_SIZE, progress=None):
+    """One JSON object per line: a manifest line first, then {"type": entity, "data": row}."""
+    yield json.dumps({
+        "type": "manifest", "user_id": str(user_id),
+        "exported_at": datetime.utcnow().isoformat() + 'Z', "counts": counts
+    }) + '\n'
+    for entity_name, column_names, rows in iter_entity_batches(user_id, batch_size, progress):
+        if not rows: continue
+        yield ''.join(
+            json.dumps({"type": entity_name, "data": {name: _serialize_value(value) for name, value in zip(column_names, row)}}) + '\n'
+            for row in rows
+        )
+
+class _ZipStreamBuffer:
+    """Write-only, non-seekable sink: zipfile falls back to data descriptors and we drain it after every batch."""
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def iter_zip_csv_export(user_id, counts=None, batch_size=EXPORT_BATCH_SIZE, progress=None):
+    """A ZIP with manifest.json and one CSV per entity, produced incrementally."""
+    buffer = _ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('manifest.json', json.dumps({
+            "user_id": str(user_id), "exported_at": datetime.utcnow().isoformat() + 'Z', "counts": counts
+        }))
+        yield buffer.drain()
+
+        current_entity, entry, text_stream, writer = None, None, None, None
+        for entity_name, column_names, rows in iter_entity_batches(user_id, batch_size, progress):
+            if entity_name != current_entity:
+                if text_stream:
+                    text_stream.close()
+                current_entity = entity_name
+                entry = archive.open(f'{entity_name}.csv', mode='w', force_zip64=True)
+                text_stream = io.TextIOWrapper(entry, encoding='utf-8', newline='')
+                writer = csv.writer(text_stream)
+                writer.writerow(column_names)
+            writer.writerows([_csv_value(value) for value in row] for row in rows)
+            text_stream.flush()
+            yield buffer.drain()
+        if text_stream:
+            text_stream.close()
+    yield buffer.drain()
+
+def iter_account_export(user_id, export_format, batch_size=EXPORT_BATCH_SIZE, progress=None, include_counts=True):
+    counts = count_export_rows(user_id) if include_counts else None
+    if export_format == 'zip':
+        return iter_zip_csv_export(user_id, counts, batch_size, progress)
+    return iter_ndjson_export(user_id, counts, batch_size, progress)
@@ -3,6 +3,7 @@ from datetime import datetime, timedelta, timezone
 from app.models import db, User, EnergyLog # No es necesario Quest aquí
 from sqlalchemy import func, and_ # and_ importado
 from math import floor
+from app.services.coalescing_services import read_coalescer
 
 # ... (funciones get_xp_for_level, calculate_user_level, get_next_level_xp_requirement, get_current_level_xp_start sin cambios) ...
 def get_xp_for_level(level: int) -> int:
@@ -36,7 +37,15 @@ def calculate_energy_balance(user_id: str):
     """
     Calculates the 7-Day Rolling Energy Balance for a user.
     Only considers active EnergyLog entries.
+    Identical concurrent calls for the same user share one computation. The key carries the
+    user's write sequence, so a call started after a commit never joins an older one.
     """
+    from app.services.cache_services import dashboard_cache
+    # Sin versión del namespace: no se cachea, y leerla costaría un GET a Redis por llamada
+    coalescing_key = dashboard_cache.coalescing_key(f"{dashboard_cache.key_prefix}:energy_balance:{user_id}", user_id)
+    return read_coalescer.do(coalescing_key, lambda: _compute_energy_balance(user_id))
+
+def _compute_energy_balance(user_id: str):
     seven_days_ago = datetime.now(timezone.utc) - timedelta(days=7)
 
     # Sum of absolute energy values (Total Energy Moved - TEM)
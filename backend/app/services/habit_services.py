@@ -1,7 +1,12 @@
 # backend/app/services/habit_services.py
 from flask import current_app
 from datetime import datetime, timedelta, date, time, timezone
+from sqlalchemy import select, update
+from sqlalchemy.orm.attributes import set_committed_value
 from app.models import db, HabitTemplate, HabitOccurrence, Quest 
+from app.services.lookup_services import get_default_quest_ref
+from app.services.tag_index_services import sorted_tag_ids, tag_snapshot
+from app.services.counter_services import remove_counted_rows
 
 WEEKDAY_MAP = {'MO': 0, 'TU': 1, 'WE': 2, 'TH': 3, 'FR': 4, 'SA': 5, 'SU': 6}
 DAY_MAP_TO_STR = {v: k for k, v in WEEKDAY_MAP.items()}
@@ -9,11 +14,13 @@ DAY_MAP_TO_STR = {v: k for k, v in WEEKDAY_MAP.items()}
 def generate_occurrences_for_template(template: HabitTemplate, start_date_override: date = None, generation_days_limit: int = 30, force_regenerate_future: bool = False):
     if not template.is_active:
         # If deactivated, delete future PENDING occurrences
-        HabitOccurrence.query.filter(
+        future_pending = (
             HabitOccurrence.habit_template_id == template.id,
             HabitOccurrence.status == 'PENDING',
             HabitOccurrence.scheduled_start_datetime >= datetime.now(timezone.utc)
-        ).delete(synchronize_session=False)
+        )
+        remove_counted_rows(db.session, HabitOccurrence, *future_pending) # El delete masivo no pasa por los hooks
+        HabitOccurrence.query.filter(*future_pending).delete(synchronize_session=False)
         current_app.logger.info(f"Deactivated habit {template.id}. Future pending occurrences (if any) marked for deletion.")
         # The calling function should handle the commit.
         return []
@@ -31,11 +38,13 @@ def generate_occurrences_for_template(template: HabitTemplate, start_date_overri
         
         datetime_threshold_for_deletion = datetime.combine(date_threshold_for_deletion, time.min, tzinfo=timezone.utc)
 
-        deleted_count = HabitOccurrence.query.filter(
+        future_pending = (
             HabitOccurrence.habit_template_id == template.id,
             HabitOccurrence.status == 'PENDING',
             HabitOccurrence.scheduled_start_datetime >= datetime_threshold_for_deletion
-        ).delete(synchronize_session=False)
+        )
+        remove_counted_rows(db.session, HabitOccurrence, *future_pending)
+        deleted_count = HabitOccurrence.query.filter(*future_pending).delete(synchronize_session=False)
         current_app.logger.info(f"Force regenerate: Deleted {deleted_count} pending occurrences from {datetime_threshold_for_deletion.isoformat()} onwards for template {template.id}.")
 
     start_generation_from_date = start_date_override if start_date_override else template.rec_pattern_start_date
@@ -79,14 +88,26 @@ def generate_occurrences_for_template(template: HabitTemplate, start_date_overri
     energy_value = template.default_energy_value
     points_value = template.default_points_value
     quest_id = template.quest_id
+    # Las ocurrencias llevan copia de los tags y la duración de la plantilla (se leen sin cargarla)
+    template_tag_ids = sorted_tag_ids(template.tags)
+    template_tag_snapshot = tag_snapshot(template.tags)
     if not quest_id and template.user_id: 
-        user_default_quest = Quest.query.filter_by(user_id=template.user_id, is_default_quest=True).first()
+        user_default_quest = get_default_quest_ref(template.user_id)
         if user_default_quest: quest_id = user_default_quest.id
         else: 
             current_app.logger.error(f"Default quest not found for user {template.user_id} for template {template.id}")
             return [] # Cannot proceed without a quest
 
     is_all_day_habit = template.rec_start_time is None
+
+    # Inicios ya generados en la ventana, en una sola consulta (un día de margen por horas con zona)
+    existing_starts = set(db.session.scalars(
+        select(HabitOccurrence.scheduled_start_datetime).where(
+            HabitOccurrence.habit_template_id == template.id,
+            HabitOccurrence.scheduled_start_datetime >= datetime.combine(start_generation_from_date - timedelta(days=1), time.min, tzinfo=timezone.utc),
+            HabitOccurrence.scheduled_start_datetime < datetime.combine(effective_generation_end_date + timedelta(days=2), time.min, tzinfo=timezone.utc)
+        )
+    ))
     
     current_iter_date = start_generation_from_date
     while current_iter_date <= effective_generation_end_date:
@@ -123,20 +144,16 @@ def generate_occurrences_for_template(template: HabitTemplate, start_date_overri
                 
                 scheduled_end_dt_utc = scheduled_start_dt_utc + timedelta(minutes=duration_minutes)
 
-            # Check for existing occurrence for this exact start time (handles no-change updates)
-            existing_occ = HabitOccurrence.query.filter_by(
-                habit_template_id=template.id,
-                scheduled_start_datetime=scheduled_start_dt_utc 
-            ).first()
-
-            if not existing_occ:
+            # Skip start times that already have an occurrence (handles no-change updates)
+            if scheduled_start_dt_utc not in existing_starts:
                 occurrence = HabitOccurrence(
                     habit_template_id=template.id, user_id=template.user_id, quest_id=quest_id,
                     title=title, description=description, energy_value=energy_value, points_value=points_value,
                     scheduled_start_datetime=scheduled_start_dt_utc, 
                     scheduled_end_datetime=scheduled_end_dt_utc,
                     is_all_day=is_all_day_habit, # Set the new field
-                    status='PENDING'
+                    status='PENDING', tag_ids=template_tag_ids, tag_snapshot=template_tag_snapshot,
+                    rec_duration_minutes=template.rec_duration_minutes
                 )
                 db.session.add(occurrence)
                 newly_generated_occurrences.append(occurrence)
@@ -154,4 +171,15 @@ def generate_occurrences_for_template(template: HabitTemplate, start_date_overri
         current_app.logger.error(f"Error committing generated/deleted occurrences for template {template.id}: {e}", exc_info=True)
         return [] 
         
-    return newly_generated_occurrences
\ No newline at end of file
+    return newly_generated_occurrences
+
+def sync_occurrence_duration(template: HabitTemplate):
+    """Copies the template's rec_duration_minutes onto all its occurrences (updated_at untouched). The caller commits."""
+    occurrences = HabitOccurrence.__table__
+    db.session.execute(
+        update(occurrences).where(occurrences.c.habit_template_id == template.id)
+        .values(rec_duration_minutes=template.rec_duration_minutes, updated_at=occurrences.c.updated_at)
+    )
+    for obj in list(db.session.identity_map.values()):
+        if isinstance(obj, HabitOccurrence) and obj.habit_template_id == template.id:
+            set_committed_value(obj, 'rec_duration_minutes', template.rec_duration_minutes)
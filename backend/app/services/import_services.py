@@ -0,0 +1,258 @@
+# backend/app/services/import_services.py
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timezone, time, timedelta
+from sqlalchemy import insert
+from app.models import (
+    db, Quest, Tag, PoolMission, ScheduledMission,
+    pool_mission_tags_association, scheduled_mission_tags_association
+)
+from app.api.pool_mission_routes import validate_pool_mission_data
+from app.api.scheduled_mission_routes import validate_scheduled_mission_data
+from app.services.cache_services import dashboard_cache
+from app.services.counter_services import add_counted_rows
+from app.services.lookup_services import get_default_quest_ref
+
+IMPORT_FORMATS = ['ndjson', 'csv', 'json']
+INT_FIELDS = ['energy_value', 'points_value']
+BOOL_FIELDS = ['is_all_day']
+LIST_FIELDS = ['tags', 'tag_ids'] # En CSV van separados por ';' o '|'
+
+def detect_import_format(explicit_format=None, mimetype=None, filename=None):
+    if explicit_format:
+        return explicit_format.lower() if explicit_format.lower() in IMPORT_FORMATS else None
+    if mimetype:
+        if 'csv' in mimetype: return 'csv'
+        if 'ndjson' in mimetype or 'jsonl' in mimetype or 'json-seq' in mimetype: return 'ndjson'
+        if mimetype == 'application/json': return 'json'
+    if filename:
+        extension = filename.rsplit('.', 1)[-1].lower()
+        if extension in ('ndjson', 'jsonl'): return 'ndjson'
+        if extension in ('csv', 'json'): return extension
+    return None
+
+def _coerce_csv_row(row):
+    """CSV values are always strings; convert them to the types the validators expect."""
+    coerced = {}
+    for key, value in row.items():
+        if key is None: continue
+        key = key.strip()
+        value = value.strip() if isinstance(value, str) else value
+        if value == '' or value is None:
+            continue
+        if key in INT_FIELDS:
+            try: value = int(value)
+            except ValueError: pass # The validator reports it
+        elif key in BOOL_FIELDS:
+            value = value.lower() in ('true', '1', 'yes', 'y')
+        elif key in LIST_FIELDS:
+            value = [part.strip() for part in value.replace('|', ';').split(';') if part.strip()]
+        coerced[key] = value
+    return coerced
+
+def iter_import_rows(text, import_format):
+    """Yields (row_number, row_dict_or_None, parse_error). Row numbers are 1-based."""
+    if import_format == 'csv':
+        for index, row in enumerate(csv.DictReader(io.StringIO(text)), start=1):
+            yield index, _coerce_csv_row(row), None
+    elif import_format == 'json':
+        try:
+            rows = json.loads(text)
+        except ValueError as e:
+            yield 0, None, f"Invalid JSON: {e}"
+            return
+        if not isinstance(rows, list):
+            yield 0, None, "JSON payload must be an array of objects."
+            return
+        for index, row in enumerate(rows, start=1):
+            yield index, row, None if isinstance(row, dict) else "Row must be an object."
+    else:
+        row_number = 0
+        for line in text.splitlines():
+            if not line.strip(): continue
+            row_number += 1
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield row_number, None, f"Invalid JSON line: {e}"
+                continue
+            yield row_number, row, None if isinstance(row, dict) else "Row must be an object."
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _resolve_references(user_id, rows, create_missing_tags):
+    """
+    One query each for quest ids, quest names, tag ids and tag names referenced by any row.
+    With create_missing_tags, unknown tag names get an id up front (tags_to_create); they are
+    only inserted if the import is written.
+    """
+    quest_ids, quest_names, tag_ids, tag_names = set(), set(), set(), set()
+    for row in rows:
+        if row.get('quest_id'): quest_ids.add(uuid.UUID(str(row['quest_id'])))
+        if isinstance(row.get('quest_name'), str) and row['quest_name'].strip(): quest_names.add(row['quest_name'].strip())
+        for tag_id in row.get('tag_ids') or []: tag_ids.add(uuid.UUID(str(tag_id)))
+        for tag_name in row.get('tags') or []:
+            if isinstance(tag_name, str) and tag_name.strip(): tag_names.add(tag_name.strip())
+
+    quests_by_id, quests_by_name = {}, {}
+    if quest_ids:
+        quests_by_id = {q.id: q.id for q in db.session.query(Quest.id).filter(Quest.user_id == user_id, Quest.id.in_(quest_ids))}
+    if quest_names:
+        quests_by_name = {q.name: q.id for q in db.session.query(Quest.id, Quest.name).filter(Quest.user_id == user_id, Quest.name.in_(quest_names))}
+    default_quest = get_default_quest_ref(user_id)
+
+    owned_tag_ids = set()
+    if tag_ids:
+        owned_tag_ids = {t.id for t in db.session.query(Tag.id).filter(Tag.user_id == user_id, Tag.id.in_(tag_ids))}
+    tags_by_name, tags_to_create = {}, {}
+    if tag_names:
+        tags_by_name = {t.name: t.id for t in db.session.query(Tag.id, Tag.name).filter(Tag.user_id == user_id, Tag.name.in_(tag_names))}
+        if create_missing_tags:
+            tags_to_create = {name: uuid.uuid4() for name in sorted(tag_names) if name not in tags_by_name and len(name) <= 50}
+            tags_by_name.update(tags_to_create)
+
+    return {
+        "quests_by_id": quests_by_id, "quests_by_name": quests_by_name,
+        "default_quest_id": default_quest.id if default_quest else None,
+        "owned_tag_ids": owned_tag_ids, "tags_by_name": tags_by_name, "tags_to_create": tags_to_create
+    }
+
+def _row_quest_and_tags(row, refs):
+    """Returns (quest_id, tag_uuid_list, errors) for one validated row."""
+    errors = {}
+    quest_id = None
+    if row.get('quest_id'):
+        quest_id = refs["quests_by_id"].get(uuid.UUID(str(row['quest_id'])))
+        if not quest_id: errors['quest_id'] = "Specified Quest not found or access denied."
+    elif isinstance(row.get('quest_name'), str) and row['quest_name'].strip():
+        quest_id = refs["quests_by_name"].get(row['quest_name'].strip())
+        if not quest_id: errors['quest_name'] = f"Quest '{row['quest_name'].strip()}' not found."
+    else:
+        quest_id = refs["default_quest_id"]
+        if not quest_id: errors['quest_id'] = "Default quest not found. Cannot create mission."
+
+    # Same as the single create routes: tag ids not owned by the user are silently ignored
+    tag_uuids = {uuid.UUID(str(tid)) for tid in row.get('tag_ids') or [] if uuid.UUID(str(tid)) in refs["owned_tag_ids"]}
+    for tag_name in row.get('tags') or []:
+        if not isinstance(tag_name, str) or not tag_name.strip(): continue
+        tag_id = refs["tags_by_name"].get(tag_name.strip())
+        if tag_id: tag_uuids.add(tag_id)
+        else: errors['tags'] = f"Tag '{tag_name.strip()}' not found."
+    return quest_id, list(tag_uuids), errors
+
+def _validate_tag_names(row):
+    if 'tags' in row and (not isinstance(row['tags'], list) or not all(isinstance(t, str) for t in row['tags'])):
+        return {"tags": "tags must be a list of tag names."}
+    if 'quest_name' in row and row['quest_name'] is not None and not isinstance(row['quest_name'], str):
+        return {"quest_name": "quest_name must be a string."}
+    return {}
+
+def _build_pool_mission_row(user_id, row):
+    errors = validate_pool_mission_data(row, is_update=False)
+    errors.update(_validate_tag_names(row))
+    if errors: return None, errors
+    return {
+        "user_id": user_id,
+        "title": row['title'].strip(),
+        "description": row.get('description', '').strip() if row.get('description') else None,
+        "energy_value": row['energy_value'], "points_value": row['points_value'],
+        "status": row.get('status', 'PENDING'), "focus_status": row.get('focus_status', 'ACTIVE')
+    }, None
+
+def _build_scheduled_mission_row(user_id, row):
+    errors, start_dt, end_dt = validate_scheduled_mission_data(row, is_update=False)
+    errors.update(_validate_tag_names(row))
+    if errors: return None, errors
+    is_all_day = row.get('is_all_day', False)
+    if is_all_day:
+        date_part = start_dt.date()
+        start_dt = datetime.combine(date_part, time.min, tzinfo=timezone.utc)
+        end_dt = datetime.combine(date_part + timedelta(days=1), time.min, tzinfo=timezone.utc)
+    return {
+        "user_id": user_id,
+        "title": row['title'].strip(),
+        "description": row.get('description', '').strip() if row.get('description') else None,
+        "energy_value": row['energy_value'], "points_value": row['points_value'],
+        "start_datetime": start_dt, "end_datetime": end_dt, "is_all_day": is_all_day,
+        "status": row.get('status', 'PENDING')
+    }, None
+
+IMPORT_KINDS = {
+    'pool-missions': {
+        "table": PoolMission.__table__, "association": pool_mission_tags_association,
+        "fk_column": "pool_mission_id", "build_row": _build_pool_mission_row
+    },
+    'scheduled-missions': {
+        "table": ScheduledMission.__table__, "association": scheduled_mission_tags_association,
+        "fk_column": "scheduled_mission_id", "build_row": _build_scheduled_mission_row
+    },
+}
+
+def import_missions(user_id, kind, text, import_format, create_missing_tags=False, dry_run=False, partial=False, chunk_size=500, max_rows=10000):
+    """
+    Validates every row with the same rules as the single create endpoints, resolves all
+    quest/tag references with one query per reference type and writes the valid rows with
+    multi-row INSERTs (missions + association table) in chunks.
+    All or nothing: any row error is reported and nothing is written, unless partial is set,
+    in which case invalid rows are skipped. The caller commits.
+    """
+    config = IMPORT_KINDS[kind]
+    errors, parsed_rows = [], []
+    for row_number, row, parse_error in iter_import_rows(text, import_format):
+        if parse_error:
+            errors.append({"row": row_number, "errors": {"_row": parse_error}})
+        else:
+            parsed_rows.append((row_number, row))
+        if len(parsed_rows) > max_rows:
+            return {"error": f"Too many rows (max {max_rows})."}
+
+    candidates = []
+    for row_number, row in parsed_rows:
+        mission_row, row_errors = config["build_row"](user_id, row)
+        if row_errors:
+            errors.append({"row": row_number, "errors": row_errors})
+        else:
+            candidates.append((row_number, row, mission_row))
+
+    refs = _resolve_references(user_id, [row for _, row, _ in candidates], create_missing_tags)
+
+    mission_rows, association_rows = [], []
+    for row_number, row, mission_row in candidates:
+        quest_id, tag_uuids, ref_errors = _row_quest_and_tags(row, refs)
+        if ref_errors:
+            errors.append({"row": row_number, "errors": ref_errors})
+            continue
+        mission_row["id"] = uuid.uuid4()
+        mission_row["quest_id"] = quest_id
+        mission_row["tag_ids"] = sorted(tag_uuids) # Copia desnormalizada (tag_index_services)
+        mission_rows.append(mission_row)
+        association_rows.extend({config["fk_column"]: mission_row["id"], "tag_id": tag_id} for tag_id in tag_uuids)
+
+    if errors and not partial:
+        mission_rows, association_rows = [], []
+    used_tag_ids = {row["tag_id"] for row in association_rows}
+    new_tags = [{"id": tag_id, "user_id": user_id, "name": name} for name, tag_id in refs["tags_to_create"].items() if tag_id in used_tag_ids]
+
+    if not dry_run and mission_rows:
+        if new_tags:
+            db.session.execute(insert(Tag.__table__), new_tags)
+        for chunk in _chunks(mission_rows, chunk_size):
+            db.session.execute(insert(config["table"]), chunk)
+        for chunk in _chunks(association_rows, chunk_size):
+            db.session.execute(insert(config["association"]), chunk)
+        add_counted_rows(db.session, mission_rows) # Core INSERT: los hooks de counter_services no lo ven
+        dashboard_cache.mark_user_dirty(user_id)
+
+    errors.sort(key=lambda e: e["row"])
+    return {
+        "dry_run": dry_run,
+        "total_rows": len(parsed_rows) + sum(1 for e in errors if "_row" in e["errors"]),
+        "imported": len(mission_rows), "failed": len(errors),
+        "created_ids": [str(r["id"]) for r in mission_rows] if not dry_run else [],
+        "created_tags": [tag["name"] for tag in new_tags], # En dry_run, las que se crearían
+        "errors": errors
+    }
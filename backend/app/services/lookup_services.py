@@ -0,0 +1,156 @@
+# backend/app/services/lookup_services.py
+import threading
+import time
+import uuid
+from collections import namedtuple
+from flask import g, has_app_context, current_app
+from app.models import db, User, Quest, Tag
+
+# Plain values only: safe to share across requests, sessions and threads
+QuestRef = namedtuple('QuestRef', ['id', 'name', 'color'])
+
+_G_MEMO_ATTR = '_lookup_memo'
+
+
+class _TTLStore:
+    """Tiny per-process {key: (expires_at, value)} store for short-lived reference lookups."""
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._data[key]
+                return None
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def discard_user(self, user_id):
+        user_key = str(user_id)
+        with self._lock:
+            for key in [k for k in self._data if k[1] == user_key]:
+                del self._data[key]
+
+
+_user_refs = _TTLStore()
+
+
+def _request_memo():
+    """Dict stored on g: lives for one app context (one request, or a whole /api/batch)."""
+    if not has_app_context():
+        return None
+    memo = getattr(g, _G_MEMO_ATTR, None)
+    if memo is None:
+        memo = {}
+        setattr(g, _G_MEMO_ATTR, memo)
+    return memo
+
+
+def _ttl_seconds():
+    """
+    Lifetime of per-process entries, 0 to skip them. With several workers an edit is only seen by
+    the other processes through a shared (redis) cache backend, so without one nothing is kept.
+    """
+    if not has_app_context():
+        return 0
+    from app.services.cache_services import dashboard_cache
+    if (current_app.config.get('WEB_CONCURRENCY') or 1) > 1 and dashboard_cache.backend.name != 'redis':
+        return 0
+    return current_app.config.get('LOOKUP_CACHE_TTL_SECONDS', 60)
+
+
+def _lookups_version(user_id):
+    """Version of the user's 'lookups' namespace in the dashboard cache backend (shared with redis)."""
+    from app.services.cache_services import dashboard_cache
+    return dashboard_cache.backend.get_version(dashboard_cache._version_key('lookups', user_id))
+
+
+def get_user(user_id):
+    """
+    The User with that id in the current session, or None. Memoized for the app context, so
+    token_required and anything later in the request (every sub-request of a /api/batch too)
+    share one load.
+    """
+    key = ('user', str(user_id))
+    memo = _request_memo()
+    if memo is not None and key in memo and memo[key] in db.session:
+        return memo[key]
+    user = db.session.get(User, user_id)
+    if memo is not None and user is not None:
+        memo[key] = user
+    return user
+
+
+def get_default_quest_ref(user_id):
+    """
+    The user's default quest as a QuestRef, or None. Memoized per request and, for
+    LOOKUP_CACHE_TTL_SECONDS, per user in this process (the default quest cannot be deleted).
+    Process entries carry the user's 'lookups' version, so a name/color change anywhere
+    (invalidate_user_lookups) is seen by every worker on its next lookup.
+    """
+    key = ('default_quest', str(user_id))
+    memo = _request_memo()
+    if memo is not None and key in memo:
+        return memo[key]
+
+    ttl = _ttl_seconds()
+    quest_ref = None
+    if ttl > 0:
+        version = _lookups_version(user_id) # Antes de la consulta: una escritura posterior sube la versión
+        entry = _user_refs.get(key)
+        if entry is not None and entry[0] == version:
+            quest_ref = entry[1]
+    if quest_ref is None:
+        row = db.session.query(Quest.id, Quest.name, Quest.color).filter_by(user_id=user_id, is_default_quest=True).first()
+        quest_ref = QuestRef(row.id, row.name, row.color) if row else None
+        if quest_ref is not None and ttl > 0:
+            _user_refs.set(key, (version, quest_ref), ttl)
+
+    if memo is not None:
+        memo[key] = quest_ref
+    return quest_ref
+
+
+def get_owned_tags(user_id, tag_ids):
+    """
+    Tag instances owned by the user for the given ids (uuid or str; invalid/foreign ids are skipped),
+    in the order requested. Only ids not already seen in this request are queried, with one IN query.
+    """
+    requested = []
+    for tag_id in tag_ids or []:
+        if not tag_id: continue
+        try:
+            tag_uuid = tag_id if isinstance(tag_id, uuid.UUID) else uuid.UUID(str(tag_id))
+        except ValueError:
+            continue
+        if tag_uuid not in requested:
+            requested.append(tag_uuid)
+    if not requested:
+        return []
+
+    memo = _request_memo()
+    tags_by_id = memo.setdefault(('tags', str(user_id)), {}) if memo is not None else {}
+    missing = [tag_id for tag_id in requested if tag_id not in tags_by_id]
+    if missing:
+        found = {tag.id: tag for tag in Tag.query.filter(Tag.id.in_(missing), Tag.user_id == user_id).all()}
+        for tag_id in missing:
+            tags_by_id[tag_id] = found.get(tag_id) # None marca "no existe / no es del usuario"
+    return [tags_by_id[tag_id] for tag_id in requested if tags_by_id[tag_id] is not None]
+
+
+def invalidate_user_lookups(user_id):
+    """Drops memoized references for the user (quest or tag edits/deletes), in every worker. Call after the commit."""
+    from app.services.cache_services import dashboard_cache
+    dashboard_cache.invalidate_user(user_id, namespace='lookups')
+    _user_refs.discard_user(user_id)
+    memo = _request_memo()
+    if memo is not None:
+        for key in [k for k in memo if k[1] == str(user_id)]:
+            del memo[key]
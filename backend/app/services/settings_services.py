@@ -0,0 +1,144 @@
+# backend/app/services/settings_services.py
+import uuid
+from sqlalchemy import update, select, func, case, cast, bindparam
+from sqlalchemy.dialects.postgresql import JSONB, ARRAY, TEXT, array
+from sqlalchemy.orm.attributes import set_committed_value
+from app.models import db, User, Tag, Quest
+
+VALID_PANEL_TYPES = [
+    "UPCOMING_MISSIONS", "PROJECT_TASKS", "TODAY_AGENDA",
+    "MISSION_POOL", "TODAY_HABITS", "RECENT_ACTIVITY", "RESCUE_MISSIONS",
+    "TODAY_LOGBOOK_ENTRIES", "HABIT_STATISTICS", "ENERGY_STATISTICS"
+]
+SETTINGS_LIST_KEYS = ['sidebar_pinned_tag_ids', 'dashboard_panels']
+
+def normalize_settings(raw_settings):
+    """Returns a new dict with every known list key present (the stored document may predate them)."""
+    user_settings = dict(raw_settings) if isinstance(raw_settings, dict) else {}
+    for key in SETTINGS_LIST_KEYS:
+        if not isinstance(user_settings.get(key), list):
+            user_settings[key] = []
+    return user_settings
+
+def get_user_settings(user):
+    """Normalized settings for login, /me and the dashboard bundle, from the already loaded User (no query)."""
+    return normalize_settings(user.settings)
+
+def _settings_error(field, message):
+    return {field: message}
+
+def validate_settings_payload(user_id, settings_payload):
+    """
+    Validates the keys present in the payload. All referenced tag ids and quest ids are checked
+    with one IN query each. Returns (updates, errors): updates maps top-level keys to validated values.
+    """
+    updates = {}
+    pinned_tag_ids = settings_payload.get('sidebar_pinned_tag_ids')
+    panels_payload = settings_payload.get('dashboard_panels')
+
+    pinned_tag_uuids = []
+    if pinned_tag_ids is not None:
+        if not isinstance(pinned_tag_ids, list):
+            return None, _settings_error('sidebar_pinned_tag_ids', "sidebar_pinned_tag_ids must be a list.")
+        for tag_id_str in pinned_tag_ids:
+            try:
+                pinned_tag_uuids.append(uuid.UUID(str(tag_id_str)))
+            except ValueError:
+                return None, _settings_error('sidebar_pinned_tag_ids', f"Invalid UUID format for tag_id: {tag_id_str}")
+
+    validated_panels = []
+    panel_quest_uuids = []
+    if panels_payload is not None:
+        if not isinstance(panels_payload, list):
+            return None, _settings_error('dashboard_panels', "dashboard_panels must be a list.")
+        panel_ids_seen = set()
+        for panel_data in panels_payload:
+            if not isinstance(panel_data, dict):
+                return None, _settings_error('dashboard_panels', "Each panel item must be an object.")
+
+            panel_id = panel_data.get('id')
+            panel_type = panel_data.get('panel_type')
+            panel_name = panel_data.get('name', '')
+            panel_order = panel_data.get('order')
+            panel_is_active = panel_data.get('is_active')
+            panel_quest_id_str = panel_data.get('quest_id')
+
+            if not panel_id: return None, _settings_error('dashboard_panels', "Panel 'id' is required.")
+            try: panel_uuid = uuid.UUID(str(panel_id))
+            except ValueError: return None, _settings_error('dashboard_panels', f"Panel 'id' ({panel_id}) is not a valid UUID.")
+            if panel_uuid in panel_ids_seen: return None, _settings_error('dashboard_panels', f"Duplicate panel id found: {panel_id}")
+            panel_ids_seen.add(panel_uuid)
+
+            if not panel_type or panel_type not in VALID_PANEL_TYPES:
+                return None, _settings_error('dashboard_panels', f"Panel {panel_id} has invalid or missing 'panel_type'.")
+            if not isinstance(panel_name, str): return None, _settings_error('dashboard_panels', f"Panel {panel_id} 'name' must be a string.")
+            if panel_order is None or not isinstance(panel_order, int): return None, _settings_error('dashboard_panels', f"Panel {panel_id} 'order' must be an integer.")
+            if panel_is_active is None or not isinstance(panel_is_active, bool): return None, _settings_error('dashboard_panels', f"Panel {panel_id} 'is_active' must be a boolean.")
+            # Panel is active by definition if it's in the saved list from the frontend's activePanels
+            if not panel_is_active:
+                return None, _settings_error('dashboard_panels', f"Panel {panel_id} sent for saving should be active.")
+
+            validated_panel = {
+                "id": str(panel_uuid), "panel_type": panel_type, "name": panel_name.strip(),
+                "order": panel_order, "is_active": panel_is_active
+            }
+            if panel_type == "PROJECT_TASKS":
+                if not panel_quest_id_str: return None, _settings_error('dashboard_panels', f"Panel {panel_id} of type PROJECT_TASKS requires a 'quest_id'.")
+                try: panel_quest_uuid = uuid.UUID(str(panel_quest_id_str))
+                except ValueError: return None, _settings_error('dashboard_panels', f"Panel {panel_id}: Invalid UUID for quest_id: {panel_quest_id_str}")
+                validated_panel["quest_id"] = str(panel_quest_uuid)
+                panel_quest_uuids.append((panel_id, panel_quest_id_str, panel_quest_uuid))
+            elif panel_quest_id_str is not None: # quest_id should ONLY be present for PROJECT_TASKS
+                return None, _settings_error('dashboard_panels', f"Panel {panel_id} ('{panel_type}'): 'quest_id' should only be provided for PROJECT_TASKS.")
+            validated_panels.append(validated_panel)
+
+    # Existence checks, one query per referenced entity type
+    if pinned_tag_uuids:
+        owned_tag_ids = set(db.session.scalars(select(Tag.id).where(Tag.user_id == user_id, Tag.id.in_(set(pinned_tag_uuids)))))
+        for tag_id_str, tag_uuid in zip(pinned_tag_ids, pinned_tag_uuids):
+            if tag_uuid not in owned_tag_ids:
+                return None, _settings_error('sidebar_pinned_tag_ids', f"Invalid or non-existent tag_id: {tag_id_str}")
+    if panel_quest_uuids:
+        owned_quest_ids = set(db.session.scalars(
+            select(Quest.id).where(Quest.user_id == user_id, Quest.id.in_({q[2] for q in panel_quest_uuids}))
+        ))
+        for panel_id, quest_id_str, quest_uuid in panel_quest_uuids:
+            if quest_uuid not in owned_quest_ids:
+                return None, _settings_error('dashboard_panels', f"Panel {panel_id}: Quest ID '{quest_id_str}' not found.")
+
+    if pinned_tag_ids is not None:
+        updates['sidebar_pinned_tag_ids'] = [str(tag_uuid) for tag_uuid in pinned_tag_uuids]
+    if panels_payload is not None:
+        updates['dashboard_panels'] = validated_panels
+    return updates, None
+
+def apply_settings_update(user, updates):
+    """
+    Writes only the changed top-level keys with nested jsonb_set calls (one UPDATE ... RETURNING)
+    instead of rewriting the whole document, then syncs the loaded User without marking it dirty.
+    The caller commits.
+    """
+    if not updates:
+        return normalize_settings(user.settings)
+
+    if db.session.get_bind().dialect.name == 'postgresql':
+        empty_document = bindparam('settings_empty_document', {}, type_=JSONB)
+        settings_expr = case((func.jsonb_typeof(User.settings) == 'object', User.settings), else_=empty_document)
+        for key, value in updates.items():
+            settings_expr = func.jsonb_set(
+                settings_expr, cast(array([key]), ARRAY(TEXT)),
+                bindparam(f'settings_{key}', value, type_=JSONB), True
+            )
+    else:
+        # Sin jsonb_set (SQLite en tests/benchmarks): se reescribe el documento fusionado
+        current_settings = user.settings if isinstance(user.settings, dict) else {}
+        settings_expr = {**current_settings, **updates}
+
+    row = db.session.execute(
+        update(User).where(User.id == user.id).values(settings=settings_expr)
+        .returning(User.settings, User.updated_at)
+        .execution_options(synchronize_session=False)
+    ).one()
+    set_committed_value(user, 'settings', row.settings)
+    set_committed_value(user, 'updated_at', row.updated_at)
+    return normalize_settings(row.settings)
@@ -0,0 +1,259 @@
+# backend/app/services/tag_index_services.py
+"""
+Denormalized tag_ids arrays on PoolMission, ScheduledMission, HabitTemplate and HabitOccurrence.
+
+The association tables stay the source of truth; tag_ids is a sorted copy used for filtering.
+On Postgres "has all of these tags" is a single `tag_ids @> ARRAY[...]` answered by the GIN
+index; other dialects (SQLite in tests/benchmarks) keep the EXISTS-per-tag filters.
+Occurrences carry their template's tags, plus tag_snapshot ([{"id", "name"}] as the API
+returns them) so occurrence reads need neither the template nor its tags.
+
+Kept in sync by:
+- session hooks (init_tag_index): ORM changes to a `tags` collection, new entities, renamed
+  and deleted tags. Running the sync as a Core UPDATE leaves updated_at alone, as before;
+- refresh_tag_ids(): Core paths that write association rows directly (bulk tagging);
+- the rows written by import and occurrence generation, which already know their tags;
+- `flask tag-ids-backfill`: rebuilds every array after `flask db upgrade` adds the columns.
+Every rewrite also moves the TAG counters of counter_services.
+"""
+import uuid
+from sqlalchemy import Boolean, and_, or_, bindparam, cast, event, inspect, literal, select, type_coerce, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql.expression import ColumnElement
+from sqlalchemy.sql.visitors import InternalTraversal
+from app.models import (
+    db, Tag, PoolMission, ScheduledMission, HabitTemplate, HabitOccurrence, AgendaItem,
+    pool_mission_tags_association, scheduled_mission_tags_association, habit_template_tags_association
+)
+from app.services.counter_services import tag_ids_change_deltas
+
+# model -> (association table, FK column)
+TAG_ASSOCIATIONS = {
+    PoolMission: (pool_mission_tags_association, 'pool_mission_id'),
+    ScheduledMission: (scheduled_mission_tags_association, 'scheduled_mission_id'),
+    HabitTemplate: (habit_template_tags_association, 'habit_template_id'),
+}
+PG_TAG_IDS_TYPE = postgresql.ARRAY(postgresql.UUID(as_uuid=True))
+SESSION_INFO_KEY = 'tag_index_pending'
+
+
+def sorted_tag_ids(tags):
+    return sorted(tag.id for tag in tags)
+
+
+def tag_snapshot(tags):
+    return [{"id": str(tag.id), "name": tag.name} for tag in sorted(tags, key=lambda tag: tag.id)]
+
+
+# --- Filtering ---
+class TagsContainAll(ColumnElement):
+    """Compiles to the array containment on Postgres and to the association EXISTS elsewhere."""
+    type = Boolean()
+    inherit_cache = True
+    _traverse_internals = [
+        ("array_clause", InternalTraversal.dp_clauseelement),
+        ("fallback_clause", InternalTraversal.dp_clauseelement),
+    ]
+
+    def __init__(self, array_clause, fallback_clause):
+        self.array_clause = array_clause
+        self.fallback_clause = fallback_clause
+
+
+@compiles(TagsContainAll)
+def _compile_tags_contain_all(element, compiler, **kw):
+    return compiler.process(element.fallback_clause, **kw)
+
+
+@compiles(TagsContainAll, 'postgresql')
+def _compile_tags_contain_all_postgresql(element, compiler, **kw):
+    return compiler.process(element.array_clause, **kw)
+
+
+def _agenda_item_has_tag(tag_uuid):
+    """EXISTS on the association table of whichever entity the AgendaItem row comes from."""
+    branches = []
+    for item_type, model in (('SCHEDULED_MISSION', ScheduledMission), ('POOL_MISSION', PoolMission)):
+        association, fk_column_name = TAG_ASSOCIATIONS[model]
+        branches.append(and_(AgendaItem.item_type == item_type, select(association.c.tag_id).where(
+            association.c[fk_column_name] == AgendaItem.id, association.c.tag_id == tag_uuid
+        ).exists()))
+    association = habit_template_tags_association
+    branches.append(and_(AgendaItem.item_type == 'HABIT_OCCURRENCE', select(association.c.tag_id).join(
+        HabitOccurrence.__table__, HabitOccurrence.habit_template_id == association.c.habit_template_id
+    ).where(HabitOccurrence.id == AgendaItem.id, association.c.tag_id == tag_uuid).exists()))
+    return or_(*branches)
+
+
+def tags_contain_all(model, tag_uuids):
+    """WHERE clause: the entity has every tag in tag_uuids (occurrences: their template has them). Also for AgendaItem."""
+    tag_uuids = sorted(set(tag_uuids))
+    array_clause = type_coerce(model.tag_ids, PG_TAG_IDS_TYPE).contains(cast(literal(tag_uuids, PG_TAG_IDS_TYPE), PG_TAG_IDS_TYPE))
+    if model is AgendaItem:
+        fallback = [_agenda_item_has_tag(tag_uuid) for tag_uuid in tag_uuids]
+    elif model is HabitOccurrence:
+        fallback = [HabitOccurrence.template.has(HabitTemplate.tags.any(Tag.id == tag_uuid)) for tag_uuid in tag_uuids]
+    else:
+        fallback = [model.tags.any(Tag.id == tag_uuid) for tag_uuid in tag_uuids]
+    return TagsContainAll(array_clause, and_(*fallback))
+
+
+# --- Sync ---
+def _write_tag_ids(session, connection, model, tags_by_id):
+    """
+    Core UPDATE of tag_ids (updated_at untouched) plus the copies already loaded in the session.
+    tags_by_id: {entity_id: [Tag-like objects with id and name]}.
+    """
+    if not tags_by_id:
+        return
+    table = model.__table__
+    tag_ids_by_id = {entity_id: sorted_tag_ids(tags) for entity_id, tags in tags_by_id.items()}
+    counter_deltas = tag_ids_change_deltas(connection, model, tag_ids_by_id) # Antes del UPDATE: necesita los tag_ids viejos
+    connection.execute(
+        update(table).where(table.c.id == bindparam('b_id'))
+        .values(tag_ids=bindparam('b_tag_ids'), updated_at=table.c.updated_at),
+        [{"b_id": entity_id, "b_tag_ids": tag_ids} for entity_id, tag_ids in tag_ids_by_id.items()]
+    )
+    for entity_id, tag_ids in tag_ids_by_id.items():
+        obj = session.identity_map.get(session.identity_key(model, entity_id)) if session is not None else None
+        if obj is not None:
+            set_committed_value(obj, 'tag_ids', list(tag_ids))
+    if model is not HabitTemplate:
+        counter_deltas.apply(connection)
+        return
+
+    snapshots_by_id = {entity_id: tag_snapshot(tags) for entity_id, tags in tags_by_id.items()}
+    occurrences = HabitOccurrence.__table__
+    connection.execute(
+        update(occurrences).where(occurrences.c.habit_template_id == bindparam('b_id'))
+        .values(tag_ids=bindparam('b_tag_ids'), tag_snapshot=bindparam('b_tag_snapshot'), updated_at=occurrences.c.updated_at),
+        [{"b_id": entity_id, "b_tag_ids": tag_ids_by_id[entity_id], "b_tag_snapshot": snapshots_by_id[entity_id]} for entity_id in tags_by_id]
+    )
+    counter_deltas.apply(connection)
+    if session is not None:
+        for obj in list(session.identity_map.values()):
+            if isinstance(obj, HabitOccurrence) and obj.habit_template_id in tags_by_id:
+                set_committed_value(obj, 'tag_ids', list(tag_ids_by_id[obj.habit_template_id]))
+                set_committed_value(obj, 'tag_snapshot', list(snapshots_by_id[obj.habit_template_id]))
+
+
+def refresh_tag_ids(model, entity_ids, session=None, connection=None):
+    """Rebuilds tag_ids of the given entities from their association rows (templates also update their occurrences)."""
+    entity_ids = list(entity_ids)
+    if not entity_ids:
+        return
+    session = session if session is not None else (db.session if connection is None else None)
+    connection = connection if connection is not None else session.connection()
+    association, fk_column_name = TAG_ASSOCIATIONS[model]
+    fk_column = association.c[fk_column_name]
+    tags_by_id = {entity_id: [] for entity_id in entity_ids}
+    rows = connection.execute(
+        select(fk_column, Tag.id, Tag.name).join(Tag.__table__, Tag.id == association.c.tag_id)
+        .where(fk_column.in_(entity_ids)).order_by(fk_column, Tag.id)
+    )
+    for row in rows:
+        tags_by_id[row[0]].append(row)
+    _write_tag_ids(session, connection, model, tags_by_id)
+
+
+def _before_flush(session, flush_context, instances):
+    pending = session.info.setdefault(SESSION_INFO_KEY, {"collections": {}, "affected": {}})
+    for obj in list(session.new) + list(session.dirty):
+        model = type(obj)
+        if model not in TAG_ASSOCIATIONS:
+            continue
+        state = inspect(obj)
+        if 'tags' not in state.dict and not state.attrs.tags.history.has_changes():
+            continue
+        for tag in obj.tags:
+            if tag.id is None:
+                tag.id = uuid.uuid4() # Tag nuevo en el mismo flush: el id se necesita ya
+        if state.attrs.tags.history.has_changes() or obj in session.new:
+            if obj in session.new:
+                obj.tag_ids = sorted_tag_ids(obj.tags) # Va en el propio INSERT
+            else:
+                pending["collections"].setdefault(model, {})[obj.id] = list(obj.tags)
+    for obj in list(session.new):
+        if isinstance(obj, HabitOccurrence) and not obj.tag_ids:
+            template = obj.template if 'template' in inspect(obj).dict else session.identity_map.get(
+                session.identity_key(HabitTemplate, obj.habit_template_id)
+            )
+            if template is not None:
+                obj.tag_ids = sorted_tag_ids(template.tags)
+                obj.tag_snapshot = tag_snapshot(template.tags)
+
+    deleted_tag_ids = [obj.id for obj in session.deleted if isinstance(obj, Tag)]
+    if deleted_tag_ids:
+        # Quién llevaba esos tags: después del flush ya no queda rastro en las tablas de asociación
+        connection = session.connection()
+        for model, (association, fk_column_name) in TAG_ASSOCIATIONS.items():
+            affected = connection.execute(
+                select(association.c[fk_column_name]).where(association.c.tag_id.in_(deleted_tag_ids)).distinct()
+            ).scalars().all()
+            pending["affected"].setdefault(model, set()).update(affected)
+    renamed_tag_ids = [
+        obj.id for obj in session.dirty if isinstance(obj, Tag) and inspect(obj).attrs.name.history.has_changes()
+    ]
+    if renamed_tag_ids:
+        # Solo las ocurrencias guardan nombres: basta con rehacer las plantillas que llevan el tag
+        association = habit_template_tags_association
+        affected = session.connection().execute(
+            select(association.c.habit_template_id).where(association.c.tag_id.in_(renamed_tag_ids)).distinct()
+        ).scalars().all()
+        pending["affected"].setdefault(HabitTemplate, set()).update(affected)
+
+
+def _after_flush(session, flush_context):
+    pending = session.info.pop(SESSION_INFO_KEY, None)
+    if not pending:
+        return
+    connection = session.connection()
+    for model, tags_by_id in pending["collections"].items():
+        _write_tag_ids(session, connection, model, tags_by_id)
+    for model, entity_ids in pending["affected"].items():
+        remaining = [entity_id for entity_id in entity_ids if entity_id not in pending["collections"].get(model, {})]
+        refresh_tag_ids(model, remaining, session=session, connection=connection)
+
+
+def _discard_pending(session, *args):
+    session.info.pop(SESSION_INFO_KEY, None)
+
+
+def init_tag_index(app, db):
+    if not event.contains(db.session, 'before_flush', _before_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
+        event.listen(db.session, 'after_flush', _after_flush)
+        event.listen(db.session, 'after_rollback', _discard_pending)
+
+
+# --- Backfill (flask tag-ids-backfill; the columns come from the migrations) ---
+def backfill_tag_ids(db, chunk_size=1000, progress=None):
+    """
+    Rebuilds tag_ids for every tagged entity on every shard; templates also rewrite their
+    occurrences' tag_ids, tag_snapshot and rec_duration_minutes. Returns {table: rows}.
+    """
+    from app.db_shards import shard_count, use_shard
+    occurrences = HabitOccurrence.__table__
+    template_duration = select(HabitTemplate.rec_duration_minutes).where(
+        HabitTemplate.id == occurrences.c.habit_template_id
+    ).scalar_subquery()
+    counts = {model.__tablename__: 0 for model in TAG_ASSOCIATIONS}
+    for shard in range(shard_count()):
+        use_shard(db.session, shard)
+        for model in TAG_ASSOCIATIONS:
+            entity_ids = db.session.execute(select(model.id).order_by(model.id)).scalars().all()
+            for start in range(0, len(entity_ids), chunk_size):
+                chunk = entity_ids[start:start + chunk_size]
+                refresh_tag_ids(model, chunk, session=db.session)
+                if model is HabitTemplate:
+                    db.session.execute(
+                        update(occurrences).where(occurrences.c.habit_template_id.in_(chunk))
+                        .values(rec_duration_minutes=template_duration, updated_at=occurrences.c.updated_at)
+                    )
+                db.session.commit()
+                counts[model.__tablename__] += len(chunk)
+                if progress: progress(model.__tablename__, counts[model.__tablename__])
+    use_shard(db.session, 0)
+    return counts
@@ -0,0 +1,82 @@
+# backend/app/services/tag_services.py
+import uuid
+from sqlalchemy import select, delete
+from app.models import (
+    db, Tag, PoolMission, ScheduledMission, HabitTemplate,
+    pool_mission_tags_association, scheduled_mission_tags_association, habit_template_tags_association
+)
+from app.services.cache_services import dashboard_cache
+from app.db_types import insert_ignore
+from app.services.tag_index_services import refresh_tag_ids
+
+# entity_type (as used in the /api/tags/<entity_type>/... URLs) -> (model, association table, FK column)
+TAGGABLE_ENTITIES = {
+    "pool-missions": (PoolMission, pool_mission_tags_association, 'pool_mission_id'),
+    "scheduled-missions": (ScheduledMission, scheduled_mission_tags_association, 'scheduled_mission_id'),
+    "habit-templates": (HabitTemplate, habit_template_tags_association, 'habit_template_id'),
+}
+
+def parse_uuid_list(values, field_name):
+    """Returns (unique uuid list, error)."""
+    if values is None:
+        return [], None
+    if not isinstance(values, list):
+        return None, f"{field_name} must be a list."
+    parsed = []
+    for value in values:
+        try:
+            value_uuid = uuid.UUID(str(value))
+        except ValueError:
+            return None, f"Invalid UUID format in {field_name}: {value}."
+        if value_uuid not in parsed:
+            parsed.append(value_uuid)
+    return parsed, None
+
+def bulk_update_entity_tags(user_id, entity_type, entity_ids, add_tag_ids, remove_tag_ids):
+    """
+    Adds and/or removes many tags on many entities with one INSERT ... SELECT ... ON CONFLICT DO NOTHING
+    and one DELETE on the association table. Ownership of entities and tags is checked with one
+    query each. The caller commits. Returns the summary dict for the response.
+    """
+    model, association, fk_column_name = TAGGABLE_ENTITIES[entity_type]
+    fk_column = association.c[fk_column_name]
+
+    owned_entity_ids = set(db.session.scalars(
+        select(model.id).where(model.user_id == user_id, model.id.in_(entity_ids))
+    ))
+    requested_tag_ids = set(add_tag_ids) | set(remove_tag_ids)
+    owned_tag_ids = set(db.session.scalars(
+        select(Tag.id).where(Tag.user_id == user_id, Tag.id.in_(requested_tag_ids))
+    )) if requested_tag_ids else set()
+
+    valid_add_ids = [tag_id for tag_id in add_tag_ids if tag_id in owned_tag_ids]
+    valid_remove_ids = [tag_id for tag_id in remove_tag_ids if tag_id in owned_tag_ids]
+
+    added_count, removed_count = 0, 0
+    if owned_entity_ids and valid_add_ids:
+        # Cross join of owned entities x owned tags; pairs that already exist are skipped by the PK
+        insert_stmt = insert_ignore(association, db.session.get_bind().dialect.name).from_select(
+            [fk_column_name, 'tag_id'],
+            select(model.id, Tag.id).where(
+                model.id.in_(owned_entity_ids), model.user_id == user_id,
+                Tag.id.in_(valid_add_ids), Tag.user_id == user_id
+            )
+        )
+        added_count = db.session.execute(insert_stmt).rowcount
+    if owned_entity_ids and valid_remove_ids:
+        removed_count = db.session.execute(
+            delete(association).where(fk_column.in_(owned_entity_ids), association.c.tag_id.in_(valid_remove_ids))
+        ).rowcount
+
+    if added_count or removed_count:
+        refresh_tag_ids(model, owned_entity_ids) # Las filas de asociación se escribieron por Core
+        dashboard_cache.mark_user_dirty(user_id)
+
+    return {
+        "entity_type": entity_type,
+        "entities_updated": len(owned_entity_ids),
+        "associations_added": added_count,
+        "associations_removed": removed_count,
+        "entities_not_found": [str(entity_id) for entity_id in entity_ids if entity_id not in owned_entity_ids],
+        "tags_not_found": [str(tag_id) for tag_id in dict.fromkeys(add_tag_ids + remove_tag_ids) if tag_id not in owned_tag_ids]
+    }
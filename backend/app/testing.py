@@ -0,0 +1,124 @@
+# backend/app/testing.py
+"""
+In-memory SQLite app for tests and benchmark iteration (no Postgres needed).
+
+    from app.testing import create_test_app, auth_headers
+    app = create_test_app()
+    client = app.test_client()
+    with app.app_context():
+        user = make_user('a@example.com')
+        headers = auth_headers(user)
+
+Flask-SQLAlchemy already uses a StaticPool for 'sqlite://', so every session shares the same
+in-memory database for the life of the app. create_replicated_test_app() adds a file-based
+primary/replica pair for the read-replica routing and create_sharded_test_app() several
+in-memory shards.
+"""
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import date
+from app import create_app, db
+
+
+class TestingConfig:
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SECRET_KEY = 'testing-secret-key-not-for-production'
+    JWT_SECRET_KEY = 'testing-jwt-secret-key-not-for-production'
+    DASHBOARD_CACHE_BACKEND = 'null'
+    DASHBOARD_BUNDLE_WORKERS = 1 # Una sola conexión en memoria: nada de hilos
+    PROFILING_ENABLED = False
+    LOOKUP_CACHE_TTL_SECONDS = 0
+
+
+def create_test_app(**config_overrides):
+    """App on a fresh in-memory database with all tables created."""
+    config = {key: getattr(TestingConfig, key) for key in dir(TestingConfig) if key.isupper()}
+    config.update(config_overrides)
+    app = create_app(config)
+    with app.app_context():
+        # Solo las binds de esta app: init_app deja en db.metadatas las de apps anteriores (shards)
+        db.create_all(bind_key=[None, *(app.config.get('SQLALCHEMY_BINDS') or {})])
+    return app
+
+
+@contextmanager
+def sqlite_app_context(**config_overrides):
+    """Yields an app with an active app context and drops the schema afterwards."""
+    app = create_test_app(**config_overrides)
+    with app.app_context():
+        try:
+            yield app
+        finally:
+            db.session.remove()
+            db.drop_all()
+
+
+def create_replicated_test_app(directory, **config_overrides):
+    """
+    Primary and one read replica as two SQLite files in `directory`. Nothing replicates on its
+    own: call sync_replica(app) to copy the primary over, which makes replication lag explicit.
+    """
+    primary_path = os.path.join(directory, 'primary.db')
+    replica_path = os.path.join(directory, 'replica.db')
+    config_overrides.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{primary_path}")
+    config_overrides.setdefault('SQLALCHEMY_BINDS', {"replica_0": f"sqlite:///{replica_path}"})
+    app = create_test_app(**config_overrides)
+    app.config['TEST_REPLICA_PATHS'] = (primary_path, replica_path)
+    sync_replica(app)
+    return app
+
+
+def sync_replica(app):
+    """Replication stand-in: copies the primary SQLite file onto the replica (online backup API)."""
+    primary_path, replica_path = app.config['TEST_REPLICA_PATHS']
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose() # Las conexiones abiertas verían la copia anterior
+    source, target = sqlite3.connect(primary_path), sqlite3.connect(replica_path)
+    try:
+        source.backup(target)
+    finally:
+        source.close(); target.close()
+
+
+def create_sharded_test_app(shards=2, **config_overrides):
+    """Default database plus shards-1 extra shards, all in memory, with the schema on every shard."""
+    from app.db_shards import create_all_shards
+    binds = {f"shard_{index}": 'sqlite://' for index in range(1, shards)}
+    config_overrides.setdefault('SQLALCHEMY_BINDS', binds)
+    app = create_test_app(**config_overrides)
+    with app.app_context():
+        create_all_shards(db)
+    return app
+
+
+def create_asgi_test_app(directory, **config_overrides):
+    """
+    ASGI app (app.asgi) on a SQLite file in `directory`: the aiosqlite engines of the native routes
+    and the Flask app behind it see the same database. The Flask app is `.flask_app`.
+    """
+    from app.asgi import create_asgi_app
+    config_overrides.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(directory, 'asgi.db')}")
+    return create_asgi_app(flask_app=create_test_app(**config_overrides))
+
+
+def make_user(email, password='password123', name='Test User'):
+    """Creates a user with its default quest, like /api/auth/register does. Commits."""
+    from app.models import User, Quest
+    user = User(email=email, name=name, settings={"sidebar_pinned_tag_ids": [], "dashboard_panels": []},
+                current_streak=1, last_login_date=date.today())
+    user.set_password(password)
+    from app.db_shards import prepare_new_user_shard
+    prepare_new_user_shard(db.session, user)
+    db.session.add(user); db.session.flush()
+    db.session.add(Quest(user_id=user.id, name="General", color="#808080", is_default_quest=True))
+    db.session.commit()
+    return user
+
+
+def auth_headers(user):
+    from app.auth_utils import generate_jwt
+    return {"Authorization": f"Bearer {generate_jwt(user.id, user.email)}"}
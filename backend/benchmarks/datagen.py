@@ -0,0 +1,238 @@
+# backend/benchmarks/datagen.py
+"""
+Synthetic account generator for the benchmark suite.
+
+Writes directly with multi-row Core INSERTs (no per-row ORM objects), so large datasets
+load quickly. Everything is derived from `seed`, so two runs with the same DatasetSpec
+produce the same data shape.
+"""
+import random
+import uuid
+from dataclasses import dataclass, asdict
+from datetime import datetime, date, time, timedelta, timezone
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+from app.models import (
+    db, User, Quest, Tag, PoolMission, ScheduledMission, HabitTemplate, HabitOccurrence, EnergyLog,
+    pool_mission_tags_association, scheduled_mission_tags_association, habit_template_tags_association
+)
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+BENCHMARK_EMAIL_DOMAIN = 'bench.iterpolaris.local'
+WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU'] # Mismos códigos que habit_services.WEEKDAY_MAP
+CHUNK_SIZE = 1000
+
+
+@dataclass
+class DatasetSpec:
+    users: int = 1
+    quests: int = 8
+    tags: int = 20
+    pool_missions: int = 300
+    scheduled_missions: int = 500
+    habit_templates: int = 12
+    days_back: int = 90
+    days_forward: int = 30
+    max_tags_per_item: int = 3
+    completion_rate: float = 0.6
+    seed: int = 42
+
+    def as_dict(self):
+        return asdict(self)
+
+
+@dataclass
+class BenchmarkUser:
+    id: uuid.UUID
+    email: str
+    quest_ids: list
+    tag_ids: list
+
+
+def _insert_chunked(table, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(insert(table), rows[start:start + CHUNK_SIZE])
+
+
+def _pick_tags(rng, tag_ids, max_tags):
+    return rng.sample(tag_ids, rng.randint(0, min(max_tags, len(tag_ids))))
+
+
+def _dashboard_panels(quest_ids):
+    """One panel of every type, like a user who enabled them all, plus a second project panel."""
+    from app.services.settings_services import VALID_PANEL_TYPES
+    project_quest_ids = quest_ids[1:3] or quest_ids[:1] # Quests del usuario distintas de General si las hay
+    panels = []
+    for panel_type in VALID_PANEL_TYPES:
+        for quest_id in (project_quest_ids if panel_type == 'PROJECT_TASKS' else [None]):
+            panel = {"id": str(uuid.uuid4()), "panel_type": panel_type, "name": panel_type.replace('_', ' ').title(),
+                     "order": len(panels), "is_active": True}
+            if quest_id: panel["quest_id"] = str(quest_id)
+            panels.append(panel)
+    return panels
+
+
+def _generate_user(rng, spec, index, password_hash, today, run_tag):
+    user_id = uuid.uuid4()
+    email = f"bench-{run_tag}-{index}@{BENCHMARK_EMAIL_DOMAIN}"
+    now = datetime.now(timezone.utc)
+    quest_ids = [uuid.uuid4() for _ in range(max(spec.quests, 1))]
+    tag_ids = [uuid.uuid4() for _ in range(spec.tags)]
+
+    db.session.execute(insert(User.__table__), [{
+        "id": user_id, "email": email, "password_hash": password_hash, "name": f"Bench User {index}",
+        "total_points": 0, "level": 1, "current_streak": 1, "last_login_date": today,
+        "settings": {"sidebar_pinned_tag_ids": [str(t) for t in tag_ids[:3]], "dashboard_panels": _dashboard_panels(quest_ids)}
+    }])
+    _insert_chunked(Quest.__table__, [
+        {"id": quest_id, "user_id": user_id, "name": "General" if i == 0 else f"Quest {i}",
+         "color": f"#{rng.randint(0, 0xFFFFFF):06X}", "is_default_quest": i == 0}
+        for i, quest_id in enumerate(quest_ids)
+    ])
+    _insert_chunked(Tag.__table__, [{"id": tag_id, "user_id": user_id, "name": f"Tag {i}"} for i, tag_id in enumerate(tag_ids)])
+
+    energy_logs, total_points = [], 0
+
+    def completed_log(entity_type, entity_id, title, energy_value, completed_at):
+        energy_logs.append({
+            "user_id": user_id, "source_entity_type": entity_type, "source_entity_id": entity_id,
+            "energy_value": energy_value, "reason_text": f"Completed: {title}", "is_active": True,
+            "created_at": completed_at
+        })
+
+    # Pool missions
+    pool_rows, pool_tag_rows = [], []
+    for i in range(spec.pool_missions):
+        mission_id = uuid.uuid4()
+        completed = rng.random() < spec.completion_rate * 0.5
+        points = rng.randint(1, 20); energy = rng.randint(-10, 10)
+        created_at = now - timedelta(days=rng.randint(0, spec.days_back), minutes=rng.randint(0, 1440))
+        pool_rows.append({
+            "id": mission_id, "user_id": user_id, "quest_id": rng.choice(quest_ids), "title": f"Pool mission {i}",
+            "description": None if rng.random() < 0.5 else f"Synthetic pool mission {i}",
+            "energy_value": energy, "points_value": points,
+            "status": 'COMPLETED' if completed else 'PENDING',
+            "focus_status": 'ACTIVE' if rng.random() < 0.7 else 'DEFERRED',
+            "created_at": created_at, "updated_at": created_at
+        })
+        pool_tag_rows.extend({"pool_mission_id": mission_id, "tag_id": t} for t in _pick_tags(rng, tag_ids, spec.max_tags_per_item))
+        if completed:
+            total_points += points
+            completed_log('POOL_MISSION', mission_id, f"Pool mission {i}", energy, created_at)
+
+    # Scheduled missions spread over [today - days_back, today + days_forward]
+    scheduled_rows, scheduled_tag_rows = [], []
+    span_days = spec.days_back + spec.days_forward + 1
+    for i in range(spec.scheduled_missions):
+        mission_id = uuid.uuid4()
+        mission_day = today - timedelta(days=spec.days_back) + timedelta(days=rng.randrange(span_days))
+        is_all_day = rng.random() < 0.2
+        if is_all_day:
+            start_dt = datetime.combine(mission_day, time.min, tzinfo=timezone.utc)
+            end_dt = start_dt + timedelta(days=1)
+        else:
+            start_dt = datetime.combine(mission_day, time(rng.randint(6, 21), rng.choice([0, 15, 30, 45])), tzinfo=timezone.utc)
+            end_dt = start_dt + timedelta(minutes=rng.choice([15, 30, 60, 90, 120]))
+        in_past = mission_day < today
+        status = 'PENDING'
+        if in_past:
+            roll = rng.random()
+            status = 'COMPLETED' if roll < spec.completion_rate else ('SKIPPED' if roll < spec.completion_rate + 0.1 else 'PENDING')
+        points = rng.randint(1, 30); energy = rng.randint(-15, 15)
+        scheduled_rows.append({
+            "id": mission_id, "user_id": user_id, "quest_id": rng.choice(quest_ids), "title": f"Scheduled mission {i}",
+            "description": None, "energy_value": energy, "points_value": points,
+            "start_datetime": start_dt, "end_datetime": end_dt, "is_all_day": is_all_day, "status": status
+        })
+        scheduled_tag_rows.extend({"scheduled_mission_id": mission_id, "tag_id": t} for t in _pick_tags(rng, tag_ids, spec.max_tags_per_item))
+        if status == 'COMPLETED':
+            total_points += points
+            completed_log('SCHEDULED_MISSION', mission_id, f"Scheduled mission {i}", energy, end_dt)
+
+    # Habit templates with occurrences for every matching day in the window
+    template_rows, template_tag_rows, occurrence_rows = [], [], []
+    pattern_start = today - timedelta(days=spec.days_back)
+    for i in range(spec.habit_templates):
+        template_id = uuid.uuid4()
+        quest_id = rng.choice(quest_ids)
+        rec_by_day = ['DAILY'] if rng.random() < 0.4 else sorted(rng.sample(WEEKDAYS, rng.randint(1, 5)), key=WEEKDAYS.index)
+        start_time = None if rng.random() < 0.3 else time(rng.randint(6, 21), rng.choice([0, 30]))
+        duration = rng.choice([15, 30, 45, 60])
+        points = rng.randint(1, 10); energy = rng.randint(-5, 10)
+        template_rows.append({
+            "id": template_id, "user_id": user_id, "quest_id": quest_id, "title": f"Habit {i}", "description": None,
+            "default_energy_value": energy, "default_points_value": points, "rec_by_day": rec_by_day,
+            "rec_start_time": start_time, "rec_duration_minutes": duration if start_time else None,
+            "rec_pattern_start_date": pattern_start, "rec_ends_on_date": None, "is_active": True
+        })
+        template_tag_rows.extend({"habit_template_id": template_id, "tag_id": t} for t in _pick_tags(rng, tag_ids, spec.max_tags_per_item))
+
+        for offset in range(span_days):
+            day = pattern_start + timedelta(days=offset)
+            if 'DAILY' not in rec_by_day and WEEKDAYS[day.weekday()] not in rec_by_day:
+                continue
+            if start_time is None:
+                start_dt = datetime.combine(day, time.min, tzinfo=timezone.utc)
+                end_dt = datetime.combine(day, time.max, tzinfo=timezone.utc)
+            else:
+                start_dt = datetime.combine(day, start_time, tzinfo=timezone.utc)
+                end_dt = start_dt + timedelta(minutes=duration)
+            status, completed_at = 'PENDING', None
+            if day < today:
+                roll = rng.random()
+                if roll < spec.completion_rate:
+                    status, completed_at = 'COMPLETED', end_dt
+                elif roll < spec.completion_rate + 0.15:
+                    status = 'SKIPPED'
+            occurrence_id = uuid.uuid4()
+            occurrence_rows.append({
+                "id": occurrence_id, "habit_template_id": template_id, "user_id": user_id, "quest_id": quest_id,
+                "title": f"Habit {i}", "description": None, "energy_value": energy, "points_value": points,
+                "scheduled_start_datetime": start_dt, "scheduled_end_datetime": end_dt,
+                "is_all_day": start_time is None, "status": status, "actual_completion_datetime": completed_at
+            })
+            if status == 'COMPLETED':
+                total_points += points
+                completed_log('HABIT_OCCURRENCE', occurrence_id, f"Habit {i}", energy, completed_at)
+
+    _insert_chunked(PoolMission.__table__, pool_rows)
+    _insert_chunked(pool_mission_tags_association, pool_tag_rows)
+    _insert_chunked(ScheduledMission.__table__, scheduled_rows)
+    _insert_chunked(scheduled_mission_tags_association, scheduled_tag_rows)
+    _insert_chunked(HabitTemplate.__table__, template_rows)
+    _insert_chunked(habit_template_tags_association, template_tag_rows)
+    _insert_chunked(HabitOccurrence.__table__, occurrence_rows)
+    _insert_chunked(EnergyLog.__table__, energy_logs)
+    db.session.execute(User.__table__.update().where(User.id == user_id).values(total_points=total_points))
+
+    return BenchmarkUser(id=user_id, email=email, quest_ids=quest_ids, tag_ids=tag_ids), {
+        "pool_missions": len(pool_rows), "scheduled_missions": len(scheduled_rows),
+        "habit_templates": len(template_rows), "habit_occurrences": len(occurrence_rows),
+        "energy_logs": len(energy_logs), "tag_links": len(pool_tag_rows) + len(scheduled_tag_rows) + len(template_tag_rows)
+    }
+
+
+def generate_dataset(spec: DatasetSpec, today=None):
+    """Creates spec.users synthetic accounts and commits. Returns (users, row_counts)."""
+    rng = random.Random(spec.seed)
+    today = today or date.today()
+    password_hash = generate_password_hash(BENCHMARK_PASSWORD) # Un solo hash para todas las cuentas
+    run_tag = uuid.uuid4().hex[:8]
+    users, totals = [], {}
+    for index in range(spec.users):
+        user, counts = _generate_user(rng, spec, index, password_hash, today, run_tag)
+        users.append(user)
+        for key, value in counts.items():
+            totals[key] = totals.get(key, 0) + value
+        db.session.commit()
+    return users, totals
+
+
+def delete_benchmark_users(emails=None):
+    """Removes generated accounts (all of them, or the given emails); FK cascades clean the rest."""
+    query = User.query.filter(User.email.like(f"%@{BENCHMARK_EMAIL_DOMAIN}"))
+    if emails:
+        query = query.filter(User.email.in_(emails))
+    deleted = query.delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
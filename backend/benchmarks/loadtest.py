@@ -0,0 +1,363 @@
+# backend/benchmarks/loadtest.py
+"""
+Load generator that replays realistic user sessions against a running app over HTTP.
+
+    cd backend
+    python -m benchmarks.loadtest --base-url http://127.0.0.1:5000 --users 20 --concurrency 8 --duration 60
+    python -m benchmarks.loadtest --serve --sweep 1,2,4,8,16,32 --duration 30 --output sweep.json
+
+Each virtual user registers its own account, creates a daily habit and then loops over a
+weighted mix of actions (login, dashboard load, occurrence status toggles, pool mission CRUD,
+energy-balance polling) with a think time between actions. Reports throughput, latency
+percentiles and error rates per action; --sweep repeats the run at increasing concurrency and
+marks the level where throughput stops growing or p95 crosses --slo-ms.
+
+Only the standard library is used on the client side. --serve starts the app in-process
+(threaded werkzeug server, DATABASE_URL from the environment) so nothing else has to be running;
+with SQLite use a file database (sqlite:///loadtest.db), not 'sqlite://', since the server is threaded.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from urllib.parse import urlparse, urlencode
+
+LOCAL_HOSTS = {'localhost', '127.0.0.1', '::1'}
+# Mismo dominio que benchmarks.datagen (sin importarlo: el cliente no necesita Flask/SQLAlchemy)
+BENCHMARK_EMAIL_DOMAIN = 'bench.iterpolaris.local'
+BENCHMARK_PASSWORD = 'benchmark-password'
+DEFAULT_MIX = {"login": 2, "dashboard": 25, "toggle_occurrence": 20, "pool_crud": 13, "energy_poll": 40}
+
+
+class LoadTestError(Exception):
+    pass
+
+
+class ApiClient:
+    """Tiny JSON client over urllib with one bearer token."""
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.token = None
+
+    def request(self, method, path, body=None, query=None):
+        url = self.base_url + path + (f"?{urlencode(query)}" if query else '')
+        headers = {"Accept": "application/json"}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode('utf-8')
+            headers["Content-Type"] = "application/json"
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        req = urllib.request.Request(url, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                payload = response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            payload = e.read()
+            status = e.code
+        try:
+            parsed = json.loads(payload) if payload else None
+        except ValueError:
+            parsed = None
+        return status, parsed
+
+
+class Stats:
+    """Thread-safe latency/error recorder per action."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.error_samples = {}
+
+    def record(self, action, seconds, ok, detail=None):
+        with self._lock:
+            self.latencies.setdefault(action, []).append(seconds * 1000)
+            if not ok:
+                self.errors[action] = self.errors.get(action, 0) + 1
+                samples = self.error_samples.setdefault(action, [])
+                if detail and len(samples) < 5:
+                    samples.append(detail)
+
+    def summary(self, elapsed):
+        def pct(values, fraction):
+            index = max(0, min(len(values) - 1, int(round(fraction * len(values) + 0.5)) - 1))
+            return round(values[index], 2)
+
+        actions, all_latencies, total_errors = {}, [], 0
+        with self._lock:
+            for action, values in self.latencies.items():
+                values = sorted(values)
+                errors = self.errors.get(action, 0)
+                total_errors += errors
+                all_latencies.extend(values)
+                actions[action] = {
+                    "requests": len(values), "errors": errors, "error_rate": round(errors / len(values), 4),
+                    "rps": round(len(values) / elapsed, 2), "mean_ms": round(statistics.fmean(values), 2),
+                    "p50_ms": pct(values, 0.50), "p95_ms": pct(values, 0.95), "p99_ms": pct(values, 0.99),
+                    "max_ms": round(values[-1], 2), "error_samples": self.error_samples.get(action, [])
+                }
+        all_latencies.sort()
+        total = len(all_latencies)
+        return {
+            "elapsed_s": round(elapsed, 2), "requests": total, "errors": total_errors,
+            "error_rate": round(total_errors / total, 4) if total else 0.0,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": pct(all_latencies, 0.50) if total else None,
+            "p95_ms": pct(all_latencies, 0.95) if total else None,
+            "p99_ms": pct(all_latencies, 0.99) if total else None,
+            "actions": actions
+        }
+
+
+class VirtualUser:
+    """One account and its session state; actions run under `lock` so workers never share it concurrently."""
+    def __init__(self, base_url, index, run_tag, timeout):
+        self.client = ApiClient(base_url, timeout=timeout)
+        self.email = f"load-{run_tag}-{index}@{BENCHMARK_EMAIL_DOMAIN}"
+        self.occurrence_ids = []
+        self.occurrence_state = {}
+        self.lock = threading.Lock() # Un usuario virtual puede ser usado por varios hilos
+
+    def setup(self, today):
+        status, payload = self.client.request('POST', '/api/auth/register', {
+            "email": self.email, "password": BENCHMARK_PASSWORD, "name": "Load Test User"
+        })
+        if status != 201 or not payload or not payload.get('token'):
+            raise LoadTestError(f"Register failed for {self.email}: {status} {payload}")
+        self.client.token = payload['token']
+
+        status, payload = self.client.request('POST', '/api/habit-templates', {
+            "title": "Load test habit", "default_energy_value": 3, "default_points_value": 5,
+            "rec_by_day": ["DAILY"], "rec_pattern_start_date": (today - timedelta(days=3)).isoformat()
+        })
+        if status != 201:
+            raise LoadTestError(f"Habit template creation failed for {self.email}: {status} {payload}")
+
+        status, payload = self.client.request('GET', '/api/habit-occurrences', query={
+            "start_date": (today - timedelta(days=3)).isoformat(), "end_date": (today + timedelta(days=3)).isoformat()
+        })
+        if status == 200 and isinstance(payload, list):
+            self.occurrence_ids = [item["id"] for item in payload]
+            self.occurrence_state = {item["id"]: item.get("status", 'PENDING') for item in payload}
+        for _ in range(3):
+            self.client.request('POST', '/api/pool-missions', {"title": "Seed mission", "energy_value": 1, "points_value": 1})
+
+
+def _check(status, expected=(200,)):
+    return status in expected, (None if status in expected else f"HTTP {status}")
+
+
+def action_login(user, today):
+    status, payload = user.client.request('POST', '/api/auth/login', {"email": user.email, "password": BENCHMARK_PASSWORD})
+    if status == 200 and payload and payload.get('token'):
+        user.client.token = payload['token']
+    return _check(status)
+
+
+def action_dashboard(user, today):
+    # La carga real del dashboard: bundle + lista de misiones del pool en foco
+    status, _ = user.client.request('GET', '/api/dashboard/bundle')
+    if status != 200:
+        return _check(status)
+    status, _ = user.client.request('GET', '/api/pool-missions', query={"focus_status": 'ACTIVE'})
+    return _check(status)
+
+
+def action_toggle_occurrence(user, today):
+    if not user.occurrence_ids:
+        return True, None
+    occurrence_id = random.choice(user.occurrence_ids)
+    new_status = 'PENDING' if user.occurrence_state.get(occurrence_id) == 'COMPLETED' else 'COMPLETED'
+    status, _ = user.client.request('PATCH', f'/api/habit-occurrences/{occurrence_id}/status', {"status": new_status})
+    if status == 200:
+        user.occurrence_state[occurrence_id] = new_status
+    return _check(status)
+
+
+def action_pool_crud(user, today):
+    status, payload = user.client.request('POST', '/api/pool-missions', {
+        "title": f"Load mission {uuid.uuid4().hex[:6]}", "energy_value": random.randint(-5, 5), "points_value": random.randint(1, 10)
+    })
+    if status != 201 or not payload:
+        return _check(status, (201,))
+    mission_id = payload["id"]
+    status, _ = user.client.request('PUT', f'/api/pool-missions/{mission_id}', {"title": f"{payload['title']} (edited)", "points_value": 7})
+    if status != 200:
+        return _check(status)
+    status, _ = user.client.request('DELETE', f'/api/pool-missions/{mission_id}')
+    return _check(status)
+
+
+def action_energy_poll(user, today):
+    status, _ = user.client.request('GET', '/api/gamification/energy-balance')
+    return _check(status)
+
+
+ACTIONS = {
+    "login": action_login,
+    "dashboard": action_dashboard,
+    "toggle_occurrence": action_toggle_occurrence,
+    "pool_crud": action_pool_crud,
+    "energy_poll": action_energy_poll,
+}
+
+
+def parse_mix(text):
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ACTIONS:
+            raise LoadTestError(f"Unknown action '{name}'. Available: {', '.join(ACTIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def run_load(users, concurrency, duration, mix, think_ms, today, seed=None):
+    """Runs `concurrency` worker threads for `duration` seconds; each picks a user and a weighted action."""
+    stats = Stats()
+    stop_at = time.perf_counter() + duration
+    names, weights = list(mix), list(mix.values())
+
+    def worker(worker_index):
+        rng = random.Random(None if seed is None else seed + worker_index)
+        while time.perf_counter() < stop_at:
+            user = users[(worker_index + rng.randrange(len(users))) % len(users)]
+            action = rng.choices(names, weights)[0]
+            with user.lock:
+                start = time.perf_counter()
+                try:
+                    ok, detail = ACTIONS[action](user, today)
+                except Exception as e: # Timeouts, conexiones rechazadas...
+                    ok, detail = False, f"{type(e).__name__}: {e}"
+                stats.record(action, time.perf_counter() - start, ok, detail)
+            if think_ms:
+                time.sleep(rng.uniform(0.5, 1.5) * think_ms / 1000)
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    return stats.summary(time.perf_counter() - started)
+
+
+def find_saturation(levels, slo_ms, min_gain=0.05):
+    """First concurrency level whose throughput gain is below min_gain or whose p95 exceeds the SLO."""
+    previous = None
+    for level in levels:
+        if slo_ms and level["p95_ms"] is not None and level["p95_ms"] > slo_ms:
+            return {"concurrency": level["concurrency"], "reason": f"p95 {level['p95_ms']} ms > SLO {slo_ms} ms"}
+        if level["error_rate"] > 0.01:
+            return {"concurrency": level["concurrency"], "reason": f"error rate {level['error_rate']:.1%}"}
+        if previous and previous["throughput_rps"] and level["throughput_rps"] < previous["throughput_rps"] * (1 + min_gain):
+            return {"concurrency": previous["concurrency"], "reason": f"throughput flat beyond {previous['concurrency']} workers"}
+        previous = level
+    return None
+
+
+def serve_in_process(host, port):
+    """Starts the app on a threaded werkzeug server in a daemon thread; returns the base URL."""
+    from werkzeug.serving import make_server
+    from app import create_app, db
+    app = create_app()
+    with app.app_context():
+        db.create_all() # Solo crea lo que falta (p. ej. DATABASE_URL=sqlite:///loadtest.db)
+    server = make_server(host, port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='iterpolaris-loadtest-server', daemon=True).start()
+    return f"http://{host}:{server.server_port}", server
+
+
+def print_summary(title, summary):
+    print(f"\n== {title}: {summary['requests']} requests in {summary['elapsed_s']}s, "
+          f"{summary['throughput_rps']} req/s, p50 {summary['p50_ms']} ms, p95 {summary['p95_ms']} ms, "
+          f"errors {summary['error_rate']:.2%}")
+    for action, result in sorted(summary["actions"].items()):
+        print(f"   {action:20} n={result['requests']:<6} rps={result['rps']:<8} p50={result['p50_ms']:<8} "
+              f"p95={result['p95_ms']:<8} p99={result['p99_ms']:<8} err={result['error_rate']:.2%}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="IterPolaris load test")
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--allow-remote', action='store_true', help='Allow a non-local target.')
+    parser.add_argument('--serve', action='store_true', help='Start the app in-process (uses DATABASE_URL).')
+    parser.add_argument('--serve-port', type=int, default=0, help='Port for --serve (0 = any free port).')
+    parser.add_argument('--users', type=int, default=10, help='Virtual users (accounts) to create.')
+    parser.add_argument('--concurrency', type=int, default=4, help='Worker threads for a single run.')
+    parser.add_argument('--sweep', default=None, help='Comma-separated concurrency levels, e.g. 1,2,4,8,16.')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds per run (per level when sweeping).')
+    parser.add_argument('--mix', default=None, help=f"Weighted actions, e.g. {','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())}")
+    parser.add_argument('--think-ms', type=float, default=0, help='Mean think time between actions per worker.')
+    parser.add_argument('--slo-ms', type=float, default=None, help='p95 target used to mark saturation in sweeps.')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', default=None, help='Write the JSON report here.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    mix = parse_mix(args.mix)
+    server = None
+    base_url = args.base_url
+    if args.serve:
+        base_url, server = serve_in_process('127.0.0.1', args.serve_port)
+    elif urlparse(base_url).hostname not in LOCAL_HOSTS and not args.allow_remote:
+        sys.exit("Refusing to load-test a non-local target (use --allow-remote).")
+
+    today = date.today()
+    run_tag = uuid.uuid4().hex[:8]
+    print(f"Target {base_url}; creating {args.users} virtual user(s)...")
+    users = []
+    for index in range(args.users):
+        user = VirtualUser(base_url, index, run_tag, args.timeout)
+        user.setup(today)
+        users.append(user)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(), "base_url": base_url, "users": args.users,
+            "duration_s": args.duration, "mix": mix, "think_ms": args.think_ms, "run_tag": run_tag
+        }
+    }
+    try:
+        if args.sweep:
+            levels = []
+            for concurrency in [int(level) for level in args.sweep.split(',') if level.strip()]:
+                summary = run_load(users, concurrency, args.duration, mix, args.think_ms, today, args.seed)
+                summary["concurrency"] = concurrency
+                levels.append(summary)
+                print_summary(f"concurrency {concurrency}", summary)
+            report["sweep"] = levels
+            report["saturation"] = find_saturation(levels, args.slo_ms)
+            print(f"\nSaturation: {report['saturation'] or 'not reached in the tested range'}")
+        else:
+            summary = run_load(users, args.concurrency, args.duration, mix, args.think_ms, today, args.seed)
+            summary["concurrency"] = args.concurrency
+            report["run"] = summary
+            print_summary(f"concurrency {args.concurrency}", summary)
+    finally:
+        if server:
+            server.shutdown()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"Report written to {args.output}")
+    print(f"Accounts created: load-{run_tag}-*@{BENCHMARK_EMAIL_DOMAIN} (remove with benchmarks.datagen.delete_benchmark_users)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+# backend/benchmarks/run.py
+"""
+Endpoint benchmark runner.
+
+    cd backend
+    python -m benchmarks.run --database-url postgresql://localhost/iterpolaris_bench \
+        --users 1 --scheduled-missions 2000 --iterations 30 --output bench.json
+    python -m benchmarks.run --database-url ... --compare bench.json
+
+Generates synthetic accounts (benchmarks.datagen), runs every scenario (benchmarks.scenarios)
+through the Flask test client and records latency percentiles, SQL statement counts and peak
+Python memory per scenario. Results are written as JSON so runs can be compared.
+Use a dedicated local database: the runner creates tables and writes data. For quick iteration
+without Postgres, --database-url sqlite:// runs everything on an in-memory SQLite database.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, date, timezone
+from urllib.parse import urlparse
+
+LOCAL_HOSTS = {'localhost', '127.0.0.1', '::1', '', None}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile over an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def parse_args(argv=None):
+    from benchmarks.datagen import DatasetSpec
+    defaults = DatasetSpec()
+    parser = argparse.ArgumentParser(description="IterPolaris endpoint benchmarks")
+    parser.add_argument('--database-url', default=os.environ.get('BENCHMARK_DATABASE_URL'), help='Defaults to $BENCHMARK_DATABASE_URL.')
+    parser.add_argument('--allow-remote', action='store_true', help='Allow a non-local database host.')
+    for name in ('users', 'quests', 'tags', 'pool_missions', 'scheduled_missions', 'habit_templates', 'days_back', 'days_forward', 'seed'):
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=getattr(defaults, name))
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--scenario', action='append', dest='scenarios', help='Run only these scenario names (repeatable).')
+    parser.add_argument('--tag', action='append', dest='scenario_tags', help='Run only scenarios with these tags (repeatable).')
+    parser.add_argument('--no-mutating', action='store_true', help='Skip scenarios that write data.')
+    parser.add_argument('--cache', choices=['memory', 'null'], default='null', help='Dashboard cache backend during the run.')
+    parser.add_argument('--output', default=None, help='Results file (default: benchmark-<timestamp>.json).')
+    parser.add_argument('--compare', default=None, help='Previous results file to compare against.')
+    parser.add_argument('--keep-data', action='store_true', help='Do not delete the generated accounts at the end.')
+    return parser.parse_args(argv)
+
+
+def build_app(args):
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ['DASHBOARD_CACHE_BACKEND'] = args.cache
+    os.environ['PROFILING_ENABLED'] = 'false'
+    # Los tokens se generan y validan en este mismo proceso: cualquier clave vale si no hay una en el entorno
+    os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key-not-for-production')
+    os.environ.setdefault('JWT_SECRET_KEY', 'benchmark-jwt-secret-key-not-for-production')
+    if args.database_url.startswith('sqlite'):
+        os.environ['DASHBOARD_BUNDLE_WORKERS'] = '1' # Una sola conexión compartida
+    from app import create_app
+    return create_app()
+
+
+def run_scenario(app, client, scenario, user, headers, today, iterations, warmup):
+    from app.observability.sql_metrics import count_queries
+
+    path = scenario.path(user, today)
+    query = scenario.query(user, today) if scenario.query else None
+    body = scenario.body(user, today) if scenario.body else None
+
+    def send():
+        response = client.open(path, method=scenario.method, headers=headers, query_string=query, json=body)
+        size = len(response.get_data()) # Consume el stream (export) dentro de la medición
+        return response.status_code, size
+
+    for _ in range(warmup):
+        send()
+
+    durations, query_counts, db_times, statuses, sizes = [], [], [], {}, []
+    for _ in range(iterations):
+        with count_queries(scenario.name) as collector:
+            start = time.perf_counter()
+            status, size = send()
+            durations.append((time.perf_counter() - start) * 1000)
+        query_counts.append(collector.count)
+        db_times.append(collector.total_time * 1000)
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+        sizes.append(size)
+
+    # Memoria en una pasada aparte: tracemalloc distorsiona los tiempos
+    tracemalloc.start()
+    send()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    durations.sort()
+    return {
+        "method": scenario.method, "path": path, "iterations": iterations,
+        "p50_ms": round(percentile(durations, 0.50), 3), "p95_ms": round(percentile(durations, 0.95), 3),
+        "mean_ms": round(statistics.fmean(durations), 3), "min_ms": round(durations[0], 3), "max_ms": round(durations[-1], 3),
+        "queries_median": statistics.median(query_counts), "queries_max": max(query_counts),
+        "db_time_p50_ms": round(statistics.median(db_times), 3),
+        "response_bytes_median": statistics.median(sizes),
+        "peak_python_memory_kb": round(peak_bytes / 1024, 1),
+        "statuses": statuses
+    }
+
+
+def compare_results(current, baseline):
+    lines = [f"{'scenario':34} {'p50 ms':>18} {'p95 ms':>18} {'queries':>12}"]
+    for name, result in current["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            lines.append(f"{name:34} {result['p50_ms']:>18} {result['p95_ms']:>18} {result['queries_median']:>12}  (new)")
+            continue
+
+        def delta(key):
+            before, after = previous[key], result[key]
+            change = ((after - before) / before * 100) if before else 0.0
+            return f"{after} ({change:+.0f}%)"
+        lines.append(f"{name:34} {delta('p50_ms'):>18} {delta('p95_ms'):>18} {delta('queries_median'):>12}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.database_url:
+        sys.exit("A database URL is required (--database-url or $BENCHMARK_DATABASE_URL).")
+    if urlparse(args.database_url).hostname not in LOCAL_HOSTS and not args.allow_remote:
+        sys.exit("Refusing to write benchmark data to a non-local database (use --allow-remote).")
+
+    app = build_app(args)
+    from app.models import db
+    from app.auth_utils import generate_jwt
+    from benchmarks.datagen import DatasetSpec, generate_dataset, delete_benchmark_users
+    from benchmarks.scenarios import select_scenarios
+
+    spec = DatasetSpec(**{name: getattr(args, name) for name in (
+        'users', 'quests', 'tags', 'pool_missions', 'scheduled_missions', 'habit_templates', 'days_back', 'days_forward', 'seed'
+    )})
+    scenarios = select_scenarios(args.scenarios, args.scenario_tags, include_mutating=not args.no_mutating)
+    today = date.today()
+
+    with app.app_context():
+        db.create_all()
+        generation_start = time.perf_counter()
+        users, row_counts = generate_dataset(spec, today=today)
+        generation_seconds = time.perf_counter() - generation_start
+        print(f"Generated {spec.users} account(s) in {generation_seconds:.1f}s: {row_counts}")
+        tokens = {user.email: generate_jwt(user.id, user.email) for user in users}
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(), "git_commit": git_commit(),
+            "python": sys.version.split()[0], "platform": platform.platform(),
+            "database_dialect": urlparse(args.database_url).scheme,
+            "dataset": spec.as_dict(), "row_counts": row_counts, "generation_seconds": round(generation_seconds, 2),
+            "iterations": args.iterations, "warmup": args.warmup, "cache_backend": args.cache
+        },
+        "scenarios": {}
+    }
+
+    client = app.test_client()
+    user = users[0] # Todas las cuentas tienen la misma forma; las demás dan volumen a las tablas
+    headers = {"Authorization": f"Bearer {tokens[user.email]}"}
+    try:
+        for scenario in scenarios:
+            result = run_scenario(app, client, scenario, user, headers, today, args.iterations, args.warmup)
+            results["scenarios"][scenario.name] = result
+            print(f"{scenario.name:34} p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+                  f"queries {result['queries_median']:>5}  peak {result['peak_python_memory_kb']:>9.1f} KB  {result['statuses']}")
+    finally:
+        if not args.keep_data:
+            with app.app_context():
+                delete_benchmark_users([u.email for u in users])
+
+    output_path = args.output or f"benchmark-{datetime.now().strftime('%Y%m%dT%H%M%S')}.json"
+    with open(output_path, 'w', encoding='utf-8') as output_file:
+        json.dump(results, output_file, indent=2)
+    print(f"Results written to {output_path}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            print(compare_results(results, json.load(baseline_file)))
+
+
+if __name__ == '__main__':
+    main()
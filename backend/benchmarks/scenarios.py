@@ -0,0 +1,63 @@
+# backend/benchmarks/scenarios.py
+"""
+Timed scenarios, at least one per blueprint. Each scenario builds its request from the
+generated BenchmarkUser so that ids (quests, tags) always exist.
+"""
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Callable, Optional
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: Callable  # (user, today) -> path
+    query: Optional[Callable] = None  # (user, today) -> dict
+    body: Optional[Callable] = None   # (user, today) -> json body
+    mutates: bool = False
+    tags: list = field(default_factory=list)
+
+
+def _window(today, days_back=7, days_forward=7):
+    return (today - timedelta(days=days_back)).isoformat(), (today + timedelta(days=days_forward)).isoformat()
+
+
+SCENARIOS = [
+    Scenario('auth.me', 'GET', lambda u, d: '/api/auth/me', tags=['auth']),
+    Scenario('quests.list', 'GET', lambda u, d: '/api/quests', tags=['quests']),
+    Scenario('quests.dashboard_items', 'GET', lambda u, d: f'/api/quests/{u.quest_ids[1 if len(u.quest_ids) > 1 else 0]}/dashboard-items', tags=['quests', 'dashboard']),
+    Scenario('tags.list', 'GET', lambda u, d: '/api/tags', tags=['tags']),
+    Scenario('pool_missions.list', 'GET', lambda u, d: '/api/pool-missions', tags=['missions']),
+    Scenario('pool_missions.list_by_tag', 'GET', lambda u, d: '/api/pool-missions', query=lambda u, d: {"tags": str(u.tag_ids[0])}, tags=['missions']),
+    Scenario('scheduled_missions.week', 'GET', lambda u, d: '/api/scheduled-missions',
+             query=lambda u, d: dict(zip(('filter_start_date', 'filter_end_date'), _window(d))), tags=['missions']),
+    Scenario('scheduled_missions.all', 'GET', lambda u, d: '/api/scheduled-missions', tags=['missions']),
+    Scenario('habit_templates.list', 'GET', lambda u, d: '/api/habit-templates', tags=['habits']),
+    Scenario('habit_occurrences.week', 'GET', lambda u, d: '/api/habit-occurrences',
+             query=lambda u, d: dict(zip(('start_date', 'end_date'), _window(d))), tags=['habits']),
+    Scenario('energy_log.page', 'GET', lambda u, d: '/api/energy-log', query=lambda u, d: {"per_page": 50}, tags=['energy']),
+    Scenario('gamification.energy_balance', 'GET', lambda u, d: '/api/gamification/energy-balance', tags=['energy', 'dashboard']),
+    Scenario('dashboard.today_agenda', 'GET', lambda u, d: '/api/dashboard/today-agenda', tags=['dashboard']),
+    Scenario('dashboard.recent_activity', 'GET', lambda u, d: '/api/dashboard/recent-activity', tags=['dashboard']),
+    Scenario('dashboard.rescue_missions', 'GET', lambda u, d: '/api/dashboard/rescue-missions', tags=['dashboard']),
+    Scenario('dashboard.bundle', 'GET', lambda u, d: '/api/dashboard/bundle', tags=['dashboard']),
+    Scenario('batch.dashboard', 'POST', lambda u, d: '/api/batch', body=lambda u, d: {"requests": [
+        {"id": "agenda", "method": "GET", "path": "/api/dashboard/today-agenda"},
+        {"id": "recent", "method": "GET", "path": "/api/dashboard/recent-activity"},
+        {"id": "balance", "method": "GET", "path": "/api/gamification/energy-balance"},
+    ]}, tags=['batch', 'dashboard']),
+    Scenario('settings.update_pins', 'PUT', lambda u, d: '/api/auth/me/settings',
+             body=lambda u, d: {"settings": {"sidebar_pinned_tag_ids": [str(t) for t in u.tag_ids[:5]]}}, mutates=True, tags=['auth']),
+    Scenario('export.ndjson', 'GET', lambda u, d: '/api/export', query=lambda u, d: {"format": "ndjson"}, tags=['export']),
+]
+
+
+def select_scenarios(names=None, tags=None, include_mutating=True):
+    selected = []
+    for scenario in SCENARIOS:
+        if names and scenario.name not in names: continue
+        if tags and not set(tags) & set(scenario.tags): continue
+        if scenario.mutates and not include_mutating: continue
+        selected.append(scenario)
+    return selected
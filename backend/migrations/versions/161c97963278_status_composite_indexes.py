@@ -0,0 +1,32 @@
+"""(user_id, status, time) composite indexes for the dashboard and agenda reads
+
+Revision ID: 161c97963278
+Revises: c2da4b031a27
+Create Date: 2026-10-19 21:10:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '161c97963278'
+down_revision = 'c2da4b031a27'
+branch_labels = None
+depends_on = None
+
+STATUS_INDEXES = (
+    ('ix_pool_missions_user_status_updated', 'pool_missions', ['user_id', 'status', 'updated_at']),
+    ('ix_scheduled_missions_user_status_start', 'scheduled_missions', ['user_id', 'status', 'start_datetime']),
+    ('ix_habit_occurrences_user_status_start', 'habit_occurrences', ['user_id', 'status', 'scheduled_start_datetime']),
+)
+
+
+def upgrade():
+    # En cada shard. En tablas grandes de Postgres bloquea las escrituras mientras se construye: lanzar en horas valle
+    for index_name, table_name, columns in STATUS_INDEXES:
+        op.create_index(index_name, table_name, columns)
+
+
+def downgrade():
+    for index_name, table_name, _ in STATUS_INDEXES:
+        op.drop_index(index_name, table_name=table_name)
@@ -0,0 +1,46 @@
+"""user_directory: global email -> user/shard map
+
+Revision ID: 403cb5b81b04
+Revises: 7156ff9abf7a
+Create Date: 2026-10-19 20:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.db_types import UUID, TIMESTAMP
+
+
+# revision identifiers, used by Alembic.
+revision = '403cb5b81b04'
+down_revision = '7156ff9abf7a'
+branch_labels = None
+depends_on = None
+
+
+def _on_default_database():
+    # env.py pasa el shard; el directorio solo existe en la base por defecto (app.db_shards)
+    return op.get_context().opts.get('shard', 0) == 0
+
+
+def upgrade():
+    if not _on_default_database():
+        return
+    op.create_table(
+        'user_directory',
+        sa.Column('email', sa.Text(), nullable=False),
+        sa.Column('user_id', UUID(as_uuid=True), nullable=False),
+        sa.Column('shard', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('status', sa.Text(), nullable=False, server_default=sa.text("'ACTIVE'")),
+        sa.Column('created_at', TIMESTAMP(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column('updated_at', TIMESTAMP(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.CheckConstraint("status IN ('ACTIVE', 'MOVING')", name='ck_user_directory_status'),
+        sa.PrimaryKeyConstraint('email'),
+        sa.UniqueConstraint('user_id', name='uq_user_directory_user_id')
+    )
+    # Las cuentas existentes se registran con `flask shard-directory-backfill`
+
+
+def downgrade():
+    if not _on_default_database():
+        return
+    op.drop_table('user_directory')
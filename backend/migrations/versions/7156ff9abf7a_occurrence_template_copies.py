@@ -0,0 +1,28 @@
+"""tag_snapshot and rec_duration_minutes copied onto habit occurrences
+
+Revision ID: 7156ff9abf7a
+Revises: 7bd2a6910890
+Create Date: 2026-10-19 19:55:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.db_types import JSONB
+
+
+# revision identifiers, used by Alembic.
+revision = '7156ff9abf7a'
+down_revision = '7bd2a6910890'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Se rellenan desde la plantilla con `flask tag-ids-backfill`
+    op.add_column('habit_occurrences', sa.Column('tag_snapshot', JSONB(), nullable=False, server_default=sa.text("'[]'")))
+    op.add_column('habit_occurrences', sa.Column('rec_duration_minutes', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('habit_occurrences', 'rec_duration_minutes')
+    op.drop_column('habit_occurrences', 'tag_snapshot')
@@ -0,0 +1,37 @@
+"""tag_ids arrays on missions, habit templates and occurrences
+
+Revision ID: 7bd2a6910890
+Revises: 
+Create Date: 2026-10-19 19:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.db_types import ARRAY, UUID
+
+
+# revision identifiers, used by Alembic.
+revision = '7bd2a6910890'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+TAGGED_TABLES = ('pool_missions', 'scheduled_missions', 'habit_templates', 'habit_occurrences')
+
+
+def upgrade():
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    # Default constante: en Postgres 11+ el ADD COLUMN no reescribe la tabla. `flask tag-ids-backfill` rellena los arrays
+    empty_array = sa.text("'{}'") if is_postgres else sa.text("'[]'")
+    for table_name in TAGGED_TABLES:
+        op.add_column(table_name, sa.Column('tag_ids', ARRAY(UUID(as_uuid=True)), nullable=False, server_default=empty_array))
+        if is_postgres:
+            op.create_index(f'ix_{table_name}_tag_ids', table_name, ['tag_ids'], postgresql_using='gin')
+
+
+def downgrade():
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    for table_name in TAGGED_TABLES:
+        if is_postgres:
+            op.drop_index(f'ix_{table_name}_tag_ids', table_name=table_name)
+        op.drop_column(table_name, 'tag_ids')
@@ -0,0 +1,37 @@
+"""stat_counters: per-quest and per-tag sidebar counters
+
+Revision ID: c2da4b031a27
+Revises: 403cb5b81b04
+Create Date: 2026-10-19 20:25:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.db_types import UUID
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2da4b031a27'
+down_revision = '403cb5b81b04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # En cada shard. Se llena con `flask counters-rebuild` y después lo mantienen las escrituras
+    op.create_table(
+        'stat_counters',
+        sa.Column('user_id', UUID(as_uuid=True), nullable=False),
+        sa.Column('scope', sa.Text(), nullable=False),
+        sa.Column('scope_id', UUID(as_uuid=True), nullable=False),
+        sa.Column('status', sa.Text(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('points_sum', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.CheckConstraint("scope IN ('QUEST', 'TAG')", name='ck_stat_counter_scope'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'scope', 'scope_id', 'status')
+    )
+
+
+def downgrade():
+    op.drop_table('stat_counters')
@@ -0,0 +1,106 @@
+# backend/tests/conftest.py
+"""
+Fixtures on the in-memory SQLite app of app.testing: every test gets a fresh database.
+
+    def test_something(app, api):
+        tag = api.create_tag('work')
+        mission = api.create_pool_mission('Write report', tag_ids=[tag["id"]])
+        with app.app_context():
+            ...direct checks through db.session...
+"""
+from datetime import date, datetime, time, timedelta, timezone
+import pytest
+from app import db
+from app.testing import create_test_app, make_user, auth_headers
+
+
+class SharedRedisStandIn:
+    """The three redis-py calls RedisCacheBackend makes, on a dict shared by the simulated workers."""
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key): return self.data.get(key)
+    def set(self, key, value, ex=None): self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+
+class ApiClient:
+    """Test client bound to one user's token, with shortcuts that create entities through the API."""
+
+    def __init__(self, client, user_id, headers):
+        self.client = client
+        self.user_id = user_id
+        self.headers = headers
+
+    def call(self, method, path, json=None, query=None, expected=200):
+        response = self.client.open(path, method=method, headers=self.headers, json=json, query_string=query)
+        if expected is not None:
+            assert response.status_code == expected, f"{method} {path}: {response.status_code} {response.get_data(as_text=True)}"
+        return response.get_json(silent=True)
+
+    def get(self, path, query=None, expected=200): return self.call('GET', path, query=query, expected=expected)
+    def post(self, path, json=None, expected=200): return self.call('POST', path, json=json, expected=expected)
+    def put(self, path, json=None, expected=200): return self.call('PUT', path, json=json, expected=expected)
+    def patch(self, path, json=None, expected=200): return self.call('PATCH', path, json=json, expected=expected)
+    def delete(self, path, expected=200): return self.call('DELETE', path, expected=expected)
+
+    def create_tag(self, name):
+        return self.post('/api/tags', {"name": name}, expected=201)
+
+    def create_quest(self, name, color='#336699'):
+        return self.post('/api/quests', {"name": name, "color": color}, expected=201)
+
+    def create_pool_mission(self, title, tag_ids=(), points_value=10, energy_value=5, **fields):
+        payload = {"title": title, "points_value": points_value, "energy_value": energy_value, "tag_ids": list(tag_ids), **fields}
+        return self.post('/api/pool-missions', payload, expected=201)
+
+    def create_scheduled_mission(self, title, day=None, tag_ids=(), points_value=10, energy_value=5, **fields):
+        start = datetime.combine(day or date.today(), time(9), tzinfo=timezone.utc)
+        payload = {
+            "title": title, "points_value": points_value, "energy_value": energy_value, "tag_ids": list(tag_ids),
+            "start_datetime": start.isoformat(), "end_datetime": (start + timedelta(hours=1)).isoformat(), **fields
+        }
+        return self.post('/api/scheduled-missions', payload, expected=201)
+
+    def create_habit_template(self, title, tag_ids=(), points_value=3, energy_value=2, **fields):
+        payload = {
+            "title": title, "default_points_value": points_value, "default_energy_value": energy_value,
+            "rec_by_day": ['DAILY'], "rec_pattern_start_date": date.today().isoformat(), "tag_ids": list(tag_ids), **fields
+        }
+        return self.post('/api/habit-templates', payload, expected=201)
+
+
+@pytest.fixture
+def app():
+    app = create_test_app()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _make_api(app, client, email):
+    with app.app_context():
+        user = make_user(email)
+        user_id, headers = user.id, auth_headers(user)
+        db.session.remove()
+    return ApiClient(client, user_id, headers)
+
+
+@pytest.fixture
+def api(app, client):
+    return _make_api(app, client, 'user@example.com')
+
+
+@pytest.fixture
+def other_api(app, client):
+    """A second account, for ownership checks."""
+    return _make_api(app, client, 'other@example.com')
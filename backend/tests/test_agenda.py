@@ -0,0 +1,28 @@
+# backend/tests/test_agenda.py
+"""GET /api/agenda/items sorting (user-049): items without a date always go last, whatever the dialect."""
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from app.models import AgendaItem
+from app.services.agenda_services import AGENDA_SORTS
+
+
+def test_start_sort_puts_pool_missions_last(api):
+    api.create_pool_mission('Undated')
+    api.create_scheduled_mission('Meeting')
+    items = api.get('/api/agenda/items', query={"sort": 'start', "type": 'SCHEDULED_MISSION,POOL_MISSION'})["items"]
+    assert [item["title"] for item in items] == ['Meeting', 'Undated']
+
+
+def test_completed_sort_puts_pending_items_last(api):
+    pending = api.create_scheduled_mission('Pending')
+    done = api.create_scheduled_mission('Done')
+    api.patch(f"/api/scheduled-missions/{done['id']}/status", {"status": "COMPLETED"})
+    items = api.get('/api/agenda/items', query={"sort": 'completed', "type": 'SCHEDULED_MISSION'})["items"]
+    assert [item["id"] for item in items] == [done["id"], pending["id"]]
+
+
+def test_sorts_compile_with_nulls_last_on_postgres():
+    # Postgres ordena los NULL primero en DESC y últimos en ASC; SQLite al revés
+    for sort in ('start', 'completed'):
+        sql = str(select(AgendaItem.id).order_by(*AGENDA_SORTS[sort]).compile(dialect=postgresql.dialect()))
+        assert 'NULLS LAST' in sql
@@ -0,0 +1,117 @@
+# backend/tests/test_asgi.py
+"""ASGI app (user-045): natively served reads answer like the Flask views; the rest falls back to Flask."""
+import asyncio
+import json
+import uuid
+from urllib.parse import urlencode
+import pytest
+from app import db
+from app.db_async import async_database_url, async_read_engines
+from app.testing import create_asgi_test_app
+
+pytest.importorskip('aiosqlite')
+
+
+@pytest.fixture
+def loop():
+    # Un solo bucle por test: las conexiones del pool de aiosqlite quedan ligadas a él
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def asgi_app(tmp_path, loop):
+    asgi_app = create_asgi_test_app(str(tmp_path))
+    yield asgi_app
+    loop.run_until_complete(async_read_engines.dispose())
+    with asgi_app.flask_app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def app(asgi_app):
+    return asgi_app.flask_app
+
+
+@pytest.fixture
+def data_api(api):
+    tag = api.create_tag('work')
+    api.quest = api.create_quest('Side project')
+    api.tag = tag
+    api.create_pool_mission('Pool with tag', tag_ids=[tag["id"]], quest_id=api.quest["id"])
+    api.create_pool_mission('Pool without tag')
+    done = api.create_scheduled_mission('Done today', tag_ids=[tag["id"]], quest_id=api.quest["id"])
+    api.patch(f"/api/scheduled-missions/{done['id']}/status", {"status": 'COMPLETED'})
+    api.create_scheduled_mission('Today', quest_id=api.quest["id"])
+    api.create_habit_template('Daily habit', quest_id=api.quest["id"])
+    return api
+
+
+def asgi_get(loop, asgi_app, path, headers=None, query=None):
+    """One GET through the ASGI app: (status, headers, body)."""
+    scope = {
+        "type": 'http', "asgi": {"version": '3.0'}, "http_version": '1.1', "method": 'GET', "scheme": 'http',
+        "path": path, "raw_path": path.encode(), "root_path": '', "query_string": urlencode(query or {}, doseq=True).encode(),
+        "headers": [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in (headers or {}).items()],
+        "server": ('testserver', 80), "client": ('127.0.0.1', 50000),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": 'http.request', "body": b'', "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    loop.run_until_complete(asgi_app(scope, receive, send))
+    start = next(message for message in messages if message["type"] == 'http.response.start')
+    body = b''.join(message.get("body", b'') for message in messages if message["type"] == 'http.response.body')
+    return start["status"], {name.decode('latin-1'): value.decode('latin-1') for name, value in start["headers"]}, body
+
+
+def _assert_parity(loop, asgi_app, api, path, query=None, headers=None, native=True):
+    headers = api.headers if headers is None else headers
+    status, response_headers, body = asgi_get(loop, asgi_app, path, headers, query)
+    wsgi = api.client.get(path, headers=headers, query_string=query)
+    assert (status, json.loads(body)) == (wsgi.status_code, wsgi.get_json()), path
+    # Server-Timing solo lo añade el lado Flask: su ausencia confirma que respondió la ruta asyncio
+    assert ('server-timing' not in response_headers) is native, path
+    return json.loads(body)
+
+
+def test_async_engine_urls():
+    assert async_database_url('sqlite:///data/app.db').drivername == 'sqlite+aiosqlite'
+    assert async_database_url('postgresql://u@h/db').drivername == 'postgresql+asyncpg'
+    assert async_database_url('sqlite://') is None # Cada engine tendría su propia base en memoria
+
+
+def test_native_routes_match_wsgi(loop, asgi_app, data_api):
+    assert async_read_engines.available
+    agenda = _assert_parity(loop, asgi_app, data_api, '/api/dashboard/today-agenda')
+    assert agenda and _assert_parity(loop, asgi_app, data_api, '/api/dashboard/today-agenda', {"tags": data_api.tag["id"]})
+
+    activity = _assert_parity(loop, asgi_app, data_api, '/api/dashboard/recent-activity', {"limit": 5})
+    assert [item["title"] for item in activity] == ['Done today']
+
+    items = _assert_parity(loop, asgi_app, data_api, f"/api/quests/{data_api.quest['id']}/dashboard-items")
+    assert items
+    _assert_parity(loop, asgi_app, data_api, f"/api/quests/{uuid.uuid4()}/dashboard-items") # 404
+
+
+def test_native_routes_auth_errors_match_wsgi(loop, asgi_app, api, other_api):
+    path = '/api/dashboard/today-agenda'
+    _assert_parity(loop, asgi_app, api, path, headers={})
+    _assert_parity(loop, asgi_app, api, path, headers={"Authorization": 'Bearer not-a-jwt'})
+    _assert_parity(loop, asgi_app, api, path, headers={"Authorization": 'Basic abc'})
+    # Quest de otro usuario: mismo 404 que en Flask
+    other_quest = other_api.create_quest('Theirs')
+    _assert_parity(loop, asgi_app, api, f"/api/quests/{other_quest['id']}/dashboard-items")
+
+
+def test_other_routes_fall_back_to_flask(loop, asgi_app, data_api):
+    quests = _assert_parity(loop, asgi_app, data_api, '/api/quests', native=False)
+    assert 'Side project' in [quest["name"] for quest in quests]
+    # El profiling bajo demanda solo existe en Flask
+    _assert_parity(loop, asgi_app, data_api, '/api/dashboard/today-agenda', {"__profile": 'cprofile'}, native=False)
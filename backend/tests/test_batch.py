@@ -0,0 +1,55 @@
+# backend/tests/test_batch.py
+"""POST /api/batch (user-029): atomic batches commit everything or nothing."""
+
+
+def _focus_request(mission_id, focus_status):
+    return {"method": "PATCH", "path": f"/api/pool-missions/{mission_id}/focus", "body": {"focus_status": focus_status}}
+
+
+def test_atomic_batch_rolls_back_on_failure(api):
+    first, second = api.create_pool_mission('First'), api.create_pool_mission('Second')
+    result = api.post('/api/batch', {"atomic": True, "requests": [
+        _focus_request(first["id"], 'DEFERRED'),
+        _focus_request(second["id"], 'NOT-A-STATUS'),
+        _focus_request(second["id"], 'DEFERRED'),
+    ]})
+    assert result["committed"] is False
+    assert result["failed_index"] == 1
+    assert [response["status"] for response in result["responses"]] == [200, 400]
+    assert api.get(f"/api/pool-missions/{first['id']}")["focus_status"] == 'ACTIVE'
+    assert api.get(f"/api/pool-missions/{second['id']}")["focus_status"] == 'ACTIVE'
+
+
+def test_atomic_batch_commits_when_all_succeed(api):
+    first, second = api.create_pool_mission('First'), api.create_pool_mission('Second')
+    result = api.post('/api/batch', {"atomic": True, "requests": [
+        _focus_request(first["id"], 'DEFERRED'),
+        _focus_request(second["id"], 'DEFERRED'),
+        {"method": "GET", "path": f"/api/pool-missions/{first['id']}"},
+    ]})
+    assert result["committed"] is True
+    assert result["responses"][2]["body"]["focus_status"] == 'DEFERRED'
+    assert api.get(f"/api/pool-missions/{second['id']}")["focus_status"] == 'DEFERRED'
+
+
+def test_non_atomic_batch_keeps_partial_changes(api):
+    mission = api.create_pool_mission('Only')
+    result = api.post('/api/batch', {"requests": [
+        _focus_request(mission["id"], 'DEFERRED'),
+        _focus_request(mission["id"], 'NOT-A-STATUS'),
+    ]})
+    assert "committed" not in result
+    assert [response["status"] for response in result["responses"]] == [200, 400]
+    assert api.get(f"/api/pool-missions/{mission['id']}")["focus_status"] == 'DEFERRED'
+
+
+def test_sub_requests_inherit_the_batch_request_origin(app, client, api):
+    from flask import request
+    seen = []
+    app.before_request(lambda: seen.append((request.host_url, request.remote_addr, request.path)) and None)
+    mission = api.create_pool_mission('Only')
+    response = client.post('/api/batch', headers=api.headers, base_url='https://api.example.com',
+                           environ_base={'REMOTE_ADDR': '203.0.113.7'},
+                           json={"requests": [{"method": "GET", "path": f"/api/pool-missions/{mission['id']}"}]})
+    assert response.status_code == 200 and response.get_json()["responses"][0]["status"] == 200
+    assert seen[-1] == ('https://api.example.com/', '203.0.113.7', f"/api/pool-missions/{mission['id']}")
@@ -0,0 +1,52 @@
+# backend/tests/test_bulk_status.py
+"""Bulk status PATCH (user-030): per-item outcomes, points and EnergyLog bookkeeping like the single-item routes."""
+import uuid
+from app import db
+from app.models import User, EnergyLog, ScheduledMission
+
+
+def _energy_logs(app, user_id):
+    with app.app_context():
+        logs = {(log.source_entity_id, log.is_active): log.energy_value for log in EnergyLog.query.filter_by(user_id=user_id)}
+        db.session.remove()
+    return logs
+
+
+def test_bulk_completion_awards_points_and_energy(app, api):
+    first = api.create_scheduled_mission('First', points_value=10, energy_value=5)
+    second = api.create_scheduled_mission('Second', points_value=15, energy_value=-3)
+    result = api.patch('/api/scheduled-missions/status', {"ids": [first["id"], second["id"]], "status": "COMPLETED"})
+    assert result["updated_count"] == 2
+    assert result["user_total_points"] == 25
+    assert _energy_logs(app, api.user_id) == {(uuid.UUID(first["id"]), True): 5, (uuid.UUID(second["id"]), True): -3}
+    with app.app_context():
+        assert db.session.get(User, api.user_id).total_points == 25
+        assert {mission.status for mission in ScheduledMission.query.filter_by(user_id=api.user_id)} == {'COMPLETED'}
+        db.session.remove()
+
+    result = api.patch('/api/scheduled-missions/status', {"items": [{"id": first["id"], "status": "PENDING"}]})
+    assert result["user_total_points"] == 15
+    assert _energy_logs(app, api.user_id) == {(uuid.UUID(first["id"]), False): 5, (uuid.UUID(second["id"]), True): -3}
+
+
+def test_bulk_outcomes_per_item(api, other_api):
+    mission = api.create_scheduled_mission('Mine')
+    already_skipped = api.create_scheduled_mission('Skipped')
+    api.patch(f"/api/scheduled-missions/{already_skipped['id']}/status", {"status": "SKIPPED"})
+    foreign = other_api.create_scheduled_mission('Not mine')
+    result = api.patch('/api/scheduled-missions/status', {"items": [
+        {"id": mission["id"], "status": "COMPLETED"},
+        {"id": already_skipped["id"], "status": "SKIPPED"},
+        {"id": foreign["id"], "status": "COMPLETED"},
+        {"id": 'not-a-uuid', "status": "COMPLETED"},
+        {"id": mission["id"], "status": "SKIPPED"},
+    ]})
+    assert [item["outcome"] for item in result["results"]] == ['updated', 'unchanged', 'not_found', 'invalid', 'invalid']
+    assert result["updated_count"] == 1
+    assert other_api.get(f"/api/scheduled-missions/{foreign['id']}")["status"] == 'PENDING'
+
+
+def test_bulk_payload_errors(api):
+    api.patch('/api/pool-missions/status', {}, expected=400)
+    api.patch('/api/pool-missions/status', {"ids": [], "status": "COMPLETED"}, expected=400)
+    api.patch('/api/pool-missions/status', {"items": 'nope'}, expected=400)
@@ -0,0 +1,85 @@
+# backend/tests/test_bulk_tags.py
+"""POST /api/tags/bulk (user-033): many entities x many tags in one request."""
+from app.models import PoolMission, HabitTemplate
+
+
+def _bulk(api, entity_type, entity_ids, add=(), remove=(), expected=200):
+    return api.post('/api/tags/bulk', {
+        "entity_type": entity_type, "entity_ids": list(entity_ids),
+        "add_tag_ids": list(add), "remove_tag_ids": list(remove)
+    }, expected=expected)
+
+
+def _tag_names(app, model, entity_ids):
+    with app.app_context():
+        return {
+            str(entity.id): sorted(tag.name for tag in entity.tags)
+            for entity in model.query.filter(model.id.in_(entity_ids))
+        }, {
+            str(entity.id): sorted(str(tag_id) for tag_id in entity.tag_ids or [])
+            for entity in model.query.filter(model.id.in_(entity_ids))
+        }
+
+
+def test_add_many_tags_to_many_entities(app, api):
+    tags = [api.create_tag(name) for name in ('a', 'b', 'c')]
+    missions = [api.create_pool_mission(f"Mission {index}") for index in range(4)]
+    mission_ids = [mission["id"] for mission in missions]
+
+    result = _bulk(api, 'pool-missions', mission_ids, add=[tag["id"] for tag in tags])
+    assert (result["entities_updated"], result["associations_added"], result["associations_removed"]) == (4, 12, 0)
+    names, tag_ids = _tag_names(app, PoolMission, mission_ids)
+    assert names == {mission_id: ['a', 'b', 'c'] for mission_id in mission_ids}
+    assert tag_ids == {mission_id: sorted(tag["id"] for tag in tags) for mission_id in mission_ids} # Copia desnormalizada al día
+
+
+def test_re_adding_existing_tags_is_idempotent(app, api):
+    first, second = api.create_tag('first'), api.create_tag('second')
+    tagged = api.create_pool_mission('Tagged', tag_ids=[first["id"]])
+    untagged = api.create_pool_mission('Untagged')
+
+    result = _bulk(api, 'pool-missions', [tagged["id"], untagged["id"]], add=[first["id"], second["id"]])
+    assert result["associations_added"] == 3 # El par existente lo salta el ON CONFLICT
+    assert _bulk(api, 'pool-missions', [tagged["id"], untagged["id"]], add=[first["id"], second["id"]])["associations_added"] == 0
+    names, _ = _tag_names(app, PoolMission, [tagged["id"], untagged["id"]])
+    assert names == {tagged["id"]: ['first', 'second'], untagged["id"]: ['first', 'second']}
+
+
+def test_remove_tags(app, api):
+    keep, drop = api.create_tag('keep'), api.create_tag('drop')
+    templates = [api.create_habit_template(f"Habit {index}", tag_ids=[keep["id"], drop["id"]]) for index in range(2)]
+    template_ids = [template["id"] for template in templates]
+
+    result = _bulk(api, 'habit-templates', template_ids, remove=[drop["id"]])
+    assert (result["associations_added"], result["associations_removed"]) == (0, 2)
+    names, tag_ids = _tag_names(app, HabitTemplate, template_ids)
+    assert names == {template_id: ['keep'] for template_id in template_ids}
+    assert tag_ids == {template_id: [keep["id"]] for template_id in template_ids}
+
+
+def test_foreign_entities_and_tags_are_ignored_and_reported(app, api, other_api):
+    mine, theirs_tag = api.create_tag('mine'), other_api.create_tag('theirs')
+    my_mission = api.create_pool_mission('Mine')
+    their_mission = other_api.create_pool_mission('Theirs', tag_ids=[theirs_tag["id"]])
+
+    result = _bulk(api, 'pool-missions', [my_mission["id"], their_mission["id"]], add=[mine["id"], theirs_tag["id"]])
+    assert result["entities_updated"] == 1 and result["associations_added"] == 1
+    assert result["entities_not_found"] == [their_mission["id"]]
+    assert result["tags_not_found"] == [theirs_tag["id"]]
+    names, _ = _tag_names(app, PoolMission, [my_mission["id"], their_mission["id"]])
+    assert names == {my_mission["id"]: ['mine'], their_mission["id"]: ['theirs']}
+
+    # Quitar un tag ajeno de una misión ajena tampoco toca nada
+    result = _bulk(api, 'pool-missions', [their_mission["id"]], remove=[theirs_tag["id"]])
+    assert result["associations_removed"] == 0
+    assert _tag_names(app, PoolMission, [their_mission["id"]])[0] == {their_mission["id"]: ['theirs']}
+
+
+def test_invalid_payloads(api):
+    tag = api.create_tag('tag')
+    mission = api.create_pool_mission('Mission')
+    assert "entity type" in _bulk(api, 'quests', [mission["id"]], add=[tag["id"]], expected=400)["error"]
+    assert "non-empty" in _bulk(api, 'pool-missions', [], add=[tag["id"]], expected=400)["error"]
+    assert "required" in _bulk(api, 'pool-missions', [mission["id"]], expected=400)["error"]
+    assert "same request" in _bulk(api, 'pool-missions', [mission["id"]], add=[tag["id"]], remove=[tag["id"]], expected=400)["error"]
+    assert "Invalid UUID" in _bulk(api, 'pool-missions', ['nope'], add=[tag["id"]], expected=400)["error"]
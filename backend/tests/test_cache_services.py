@@ -0,0 +1,79 @@
+# backend/tests/test_cache_services.py
+from app.testing import create_test_app
+from app.services.cache_services import dashboard_cache
+
+
+def test_cache_disabled_by_default():
+    create_test_app(DASHBOARD_CACHE_BACKEND=None)
+    assert dashboard_cache.backend.name == 'null'
+
+
+def test_memory_backend_refused_with_several_workers():
+    create_test_app(DASHBOARD_CACHE_BACKEND='memory', WEB_CONCURRENCY=1)
+    assert dashboard_cache.backend.name == 'memory'
+    create_test_app(DASHBOARD_CACHE_BACKEND='memory', WEB_CONCURRENCY=4)
+    assert dashboard_cache.backend.name == 'null'
+
+
+def test_cache_stats_only_for_admins():
+    from app import db
+    from app.testing import make_user, auth_headers
+    app = create_test_app(PROFILING_ADMIN_EMAILS=['admin@example.com'])
+    with app.app_context():
+        user_headers = auth_headers(make_user('user@example.com'))
+        admin_headers = auth_headers(make_user('admin@example.com'))
+        db.session.remove()
+    client = app.test_client()
+    assert client.get('/api/dashboard/cache-stats', headers=user_headers).status_code == 403
+    response = client.get('/api/dashboard/cache-stats', headers=admin_headers)
+    assert response.status_code == 200 and response.get_json()["backend"] == 'null'
+
+
+def test_read_after_commit_does_not_join_older_computation():
+    import threading
+    from app import db
+    from app.models import Tag
+    from app.testing import make_user
+    app = create_test_app()
+    with app.app_context():
+        user = make_user('writer@example.com')
+        started, release, results = threading.Event(), threading.Event(), []
+
+        def slow_compute():
+            started.set()
+            release.wait(5)
+            return 'before write'
+
+        leader = threading.Thread(target=lambda: results.append(dashboard_cache.get_or_compute(user.id, 'today_agenda', slow_compute)))
+        leader.start()
+        assert started.wait(5)
+        try:
+            db.session.add(Tag(user_id=user.id, name='new tag')); db.session.commit()
+            assert dashboard_cache.get_or_compute(user.id, 'today_agenda', lambda: 'after write') == 'after write'
+        finally:
+            release.set(); leader.join()
+        assert results == ['before write']
+
+
+def test_energy_balance_coalescing_skips_the_backend(monkeypatch):
+    from app.services.gamification_services import calculate_energy_balance
+    from app.testing import make_user
+    app = create_test_app()
+    with app.app_context():
+        user = make_user('energy@example.com')
+        version_reads = []
+        monkeypatch.setattr(dashboard_cache.backend, 'get_version', lambda key: version_reads.append(key) or 0)
+        assert "balance_percentage" in calculate_energy_balance(user.id)
+        assert version_reads == []
+
+
+def test_write_sequences_are_bounded_and_never_reused(monkeypatch):
+    monkeypatch.setattr(dashboard_cache, 'max_tracked_writers', 3)
+    monkeypatch.setattr(dashboard_cache, '_write_sequences', type(dashboard_cache._write_sequences)())
+    dashboard_cache._bump_write_sequences(['old'])
+    key_after_write = dashboard_cache.coalescing_key('k', 'old')
+    dashboard_cache._bump_write_sequences(['a', 'b', 'c', 'd'])
+    assert len(dashboard_cache._write_sequences) == 3 and 'old' not in dashboard_cache._write_sequences
+    # Olvidado por el LRU: nunca vuelve a una secuencia anterior a su última escritura
+    assert dashboard_cache.coalescing_key('k', 'old') != 'k:w0'
+    assert int(dashboard_cache.coalescing_key('k', 'old').rsplit(':w', 1)[1]) >= int(key_after_write.rsplit(':w', 1)[1])
@@ -0,0 +1,80 @@
+# backend/tests/test_counters.py
+"""Incremental stat_counters (user-050) must always equal what rebuild_counters computes from the source tables."""
+import uuid
+from sqlalchemy import select
+from app import db
+from app.models import StatCounter
+from app.services.counter_services import rebuild_counters
+
+
+def _counter_rows(user_id):
+    # Core select: las entidades StatCounter del identity map podrían estar desfasadas
+    table = StatCounter.__table__
+    rows = db.session.execute(
+        select(table.c.scope, table.c.scope_id, table.c.status, table.c['count'], table.c.points_sum)
+        .where(table.c.user_id == user_id)
+    )
+    return {(scope, scope_id, status): (count, points_sum) for scope, scope_id, status, count, points_sum in rows}
+
+
+def assert_counters_match_rebuild(app, user_id):
+    with app.app_context():
+        incremental = _counter_rows(user_id)
+        rebuild_counters(db.session, [user_id])
+        rebuilt = _counter_rows(user_id)
+        db.session.rollback()
+    assert incremental == rebuilt
+    return incremental
+
+
+def test_counters_follow_creates_and_status_changes(app, api):
+    work, home = api.create_tag('work'), api.create_tag('home')
+    quest = api.create_quest('Side project')
+    pool = api.create_pool_mission('Pool', tag_ids=[work["id"]], quest_id=quest["id"], points_value=7)
+    scheduled = api.create_scheduled_mission('Meeting', tag_ids=[work["id"], home["id"]], points_value=4)
+    other_scheduled = api.create_scheduled_mission('Dentist', points_value=2)
+    api.create_habit_template('Read', tag_ids=[home["id"]], points_value=3)
+    counters = assert_counters_match_rebuild(app, api.user_id)
+    assert counters[('TAG', uuid.UUID(work["id"]), 'PENDING')] == (2, 11)
+
+    api.patch(f"/api/scheduled-missions/{scheduled['id']}/status", {"status": "COMPLETED"})
+    api.patch('/api/scheduled-missions/status', {"ids": [other_scheduled["id"]], "status": "SKIPPED"})
+    api.patch('/api/pool-missions/status', {"ids": [pool["id"]], "status": "COMPLETED"})
+    occurrences = api.get('/api/habit-occurrences')
+    api.patch(f"/api/habit-occurrences/{occurrences[0]['id']}/status", {"status": "COMPLETED"})
+    api.patch('/api/habit-occurrences/status', {"ids": [occ["id"] for occ in occurrences[1:3]], "status": "SKIPPED"})
+    counters = assert_counters_match_rebuild(app, api.user_id)
+    assert counters[('QUEST', uuid.UUID(quest["id"]), 'COMPLETED')] == (1, 7)
+
+    api.patch(f"/api/scheduled-missions/{scheduled['id']}/status", {"status": "PENDING"})
+    assert_counters_match_rebuild(app, api.user_id)
+
+
+def test_counters_follow_tag_and_quest_changes(app, api):
+    work, home = api.create_tag('work'), api.create_tag('home')
+    quest = api.create_quest('Side project')
+    pool = api.create_pool_mission('Pool', tag_ids=[work["id"]], quest_id=quest["id"])
+    scheduled = api.create_scheduled_mission('Meeting', tag_ids=[work["id"]], quest_id=quest["id"])
+    template = api.create_habit_template('Read', tag_ids=[work["id"]])
+
+    api.post(f"/api/tags/pool-missions/{pool['id']}/tags", {"tag_id": home["id"]})
+    api.post(f"/api/tags/habit-templates/{template['id']}/tags", {"tag_id": home["id"]})
+    api.delete(f"/api/tags/scheduled-missions/{scheduled['id']}/tags/{work['id']}")
+    assert_counters_match_rebuild(app, api.user_id)
+
+    api.delete(f"/api/tags/{work['id']}")
+    counters = assert_counters_match_rebuild(app, api.user_id)
+    assert not any(key[1] == uuid.UUID(work["id"]) for key in counters)
+
+    api.delete(f"/api/quests/{quest['id']}")
+    api.delete(f"/api/pool-missions/{pool['id']}")
+    counters = assert_counters_match_rebuild(app, api.user_id)
+    assert not any(key[1] == uuid.UUID(quest["id"]) for key in counters)
+
+
+def test_counters_endpoint_shape(api):
+    tag = api.create_tag('work')
+    api.create_pool_mission('Pool', tag_ids=[tag["id"]], points_value=5)
+    counters = api.get('/api/stats/counters')
+    assert counters["tags"] == {tag["id"]: {"PENDING": {"count": 1, "points_sum": 5}}}
+    assert sum(group["PENDING"]["count"] for group in counters["quests"].values()) == 1
@@ -0,0 +1,86 @@
+# backend/tests/test_dashboard_bundle.py
+"""GET /api/dashboard/bundle (user-028) returns what the individual panel endpoints return."""
+import uuid
+import pytest
+from app import db
+from app.testing import create_test_app
+
+PANEL_ENDPOINTS = {
+    'TODAY_AGENDA': '/api/dashboard/today-agenda',
+    'RECENT_ACTIVITY': '/api/dashboard/recent-activity',
+    'RESCUE_MISSIONS': '/api/dashboard/rescue-missions',
+    'ENERGY_STATISTICS': '/api/gamification/energy-balance',
+}
+
+
+@pytest.fixture(params=['inline', 'thread-pool'])
+def app(request, tmp_path):
+    # El pool de hilos necesita una base en fichero: cada hilo abre su propia conexión
+    if request.param == 'thread-pool':
+        app = create_test_app(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'bundle.db'}", DASHBOARD_BUNDLE_WORKERS=4)
+    else:
+        app = create_test_app()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def bundle_api(api):
+    tag = api.create_tag('work')
+    api.quest = api.create_quest('Side project')
+    api.create_pool_mission('Pool with tag', tag_ids=[tag["id"]], quest_id=api.quest["id"])
+    api.create_pool_mission('Pool without tag')
+    api.create_scheduled_mission('Today', tag_ids=[tag["id"]], quest_id=api.quest["id"])
+    api.create_habit_template('Daily habit', quest_id=api.quest["id"])
+    panels = [
+        {"id": str(uuid.uuid4()), "panel_type": panel_type, "name": panel_type, "order": order, "is_active": True}
+        for order, panel_type in enumerate(PANEL_ENDPOINTS)
+    ]
+    panels.append({"id": str(uuid.uuid4()), "panel_type": 'PROJECT_TASKS', "name": 'Project', "order": 8,
+                   "is_active": True, "quest_id": api.quest["id"]})
+    panels.append({"id": str(uuid.uuid4()), "panel_type": 'MISSION_POOL', "name": 'Pool', "order": 9, "is_active": True})
+    api.put('/api/auth/me/settings', {"settings": {"dashboard_panels": panels}})
+    return api
+
+
+def test_bundle_matches_individual_endpoints(bundle_api):
+    bundle = bundle_api.get('/api/dashboard/bundle')
+    panels = {panel["panel_type"]: panel for panel in bundle["panels"]}
+    assert [panel["order"] for panel in bundle["panels"]] == sorted(panel["order"] for panel in bundle["panels"])
+
+    for panel_type, path in PANEL_ENDPOINTS.items():
+        assert panels[panel_type]["bundled"] is True
+        assert panels[panel_type]["data"] == bundle_api.get(path), panel_type
+    project_items = bundle_api.get(f"/api/quests/{bundle_api.quest['id']}/dashboard-items")
+    assert panels['PROJECT_TASKS']["data"] == project_items
+    assert panels['MISSION_POOL'] == {**panels['MISSION_POOL'], "bundled": False} and "data" not in panels['MISSION_POOL']
+    assert bundle["energy_balance"] == bundle_api.get('/api/gamification/energy-balance')
+
+
+def test_failing_panel_is_isolated(bundle_api, monkeypatch):
+    from app.services import dashboard_services
+
+    def broken_rescue_missions(*args, **kwargs):
+        raise RuntimeError("rescue missions exploded")
+
+    monkeypatch.setattr(dashboard_services, 'get_rescue_missions_data', broken_rescue_missions)
+    bundle = bundle_api.get('/api/dashboard/bundle')
+    panels = {panel["panel_type"]: panel for panel in bundle["panels"]}
+    assert panels['RESCUE_MISSIONS']["error"] == "Failed to fetch panel data" and "data" not in panels['RESCUE_MISSIONS']
+    for panel_type in ('TODAY_AGENDA', 'RECENT_ACTIVITY', 'ENERGY_STATISTICS', 'PROJECT_TASKS'):
+        assert "error" not in panels[panel_type] and "data" in panels[panel_type], panel_type
+    assert bundle["energy_balance"] is not None
+
+
+def test_project_panel_for_missing_quest(bundle_api):
+    settings = bundle_api.get('/api/auth/me')["settings"]
+    other_quest = bundle_api.create_quest('Deleted soon')
+    settings["dashboard_panels"].append({"id": str(uuid.uuid4()), "panel_type": 'PROJECT_TASKS', "name": 'Gone',
+                                         "order": 10, "is_active": True, "quest_id": other_quest["id"]})
+    bundle_api.put('/api/auth/me/settings', {"settings": {"dashboard_panels": settings["dashboard_panels"]}})
+    bundle_api.delete(f"/api/quests/{other_quest['id']}")
+    gone = [panel for panel in bundle_api.get('/api/dashboard/bundle')["panels"] if panel["name"] == 'Gone']
+    assert gone == [{**gone[0], "bundled": True, "error": "Quest not found or access denied"}]
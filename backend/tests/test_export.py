@@ -0,0 +1,76 @@
+# backend/tests/test_export.py
+"""GET /api/export (user-032): the streamed NDJSON and ZIP/CSV match the manifest counts."""
+import csv
+import io
+import json
+import zipfile
+from collections import Counter
+import pytest
+
+EXPECTED_COUNTS = {
+    "user": 1, "quests": 2, "tags": 2, "pool_missions": 3, "pool_mission_tags": 3,
+    "scheduled_missions": 1, "scheduled_mission_tags": 1, "habit_templates": 1, "habit_template_tags": 1,
+}
+
+
+@pytest.fixture
+def export_api(app, api, other_api):
+    app.config['EXPORT_BATCH_SIZE'] = 2 # Varios lotes por entidad
+    work, home = api.create_tag('work'), api.create_tag('home')
+    api.create_quest('Side project')
+    api.create_pool_mission('Both tags', tag_ids=[work["id"], home["id"]])
+    api.create_pool_mission('One tag', tag_ids=[work["id"]])
+    api.create_pool_mission('No tags')
+    api.create_scheduled_mission('Meeting', tag_ids=[home["id"]])
+    api.create_habit_template('Daily', tag_ids=[work["id"]])
+    other_api.create_pool_mission('Not exported', tag_ids=[other_api.create_tag('other')["id"]])
+    return api
+
+
+def _export(api, export_format):
+    response = api.client.get('/api/export', headers=api.headers, query_string={"format": export_format})
+    assert response.status_code == 200
+    assert response.is_streamed and 'attachment' in response.headers['Content-Disposition']
+    return response.get_data()
+
+
+def test_ndjson_export(export_api, other_api):
+    lines = [json.loads(line) for line in _export(export_api, 'ndjson').decode('utf-8').splitlines()]
+    manifest, records = lines[0], lines[1:]
+    assert manifest["type"] == 'manifest' and manifest["user_id"] == str(export_api.user_id)
+
+    assert Counter(record["type"] for record in records) == {name: count for name, count in manifest["counts"].items() if count}
+    assert {name: manifest["counts"][name] for name in EXPECTED_COUNTS} == EXPECTED_COUNTS
+    assert manifest["counts"]["habit_occurrences"] >= 1
+
+    user_record = next(record["data"] for record in records if record["type"] == 'user')
+    assert user_record["id"] == str(export_api.user_id) and "password_hash" not in user_record
+    pool_missions = [record["data"] for record in records if record["type"] == 'pool_missions']
+    assert sorted(mission["title"] for mission in pool_missions) == ['Both tags', 'No tags', 'One tag']
+    assert all(mission["user_id"] == str(export_api.user_id) and "tag_ids" not in mission for mission in pool_missions)
+    assert str(other_api.user_id) not in json.dumps(records)
+
+
+def test_zip_csv_export(export_api, other_api):
+    archive = zipfile.ZipFile(io.BytesIO(_export(export_api, 'zip')))
+    assert archive.testzip() is None
+    manifest = json.loads(archive.read('manifest.json'))
+    assert sorted(archive.namelist()) == sorted(['manifest.json', *(f"{name}.csv" for name in manifest["counts"])])
+
+    rows_by_entity = {}
+    for entity_name in manifest["counts"]:
+        reader = csv.DictReader(io.StringIO(archive.read(f"{entity_name}.csv").decode('utf-8')))
+        rows_by_entity[entity_name] = list(reader)
+        assert reader.fieldnames, entity_name # Cabecera también en las entidades vacías
+    assert {name: len(rows) for name, rows in rows_by_entity.items()} == manifest["counts"]
+    assert {name: manifest["counts"][name] for name in EXPECTED_COUNTS} == EXPECTED_COUNTS
+
+    assert "password_hash" not in rows_by_entity["user"][0]
+    mission_ids = {mission["id"] for mission in rows_by_entity["pool_missions"]}
+    assert {link["pool_mission_id"] for link in rows_by_entity["pool_mission_tags"]} <= mission_ids
+    assert all(row["user_id"] == str(export_api.user_id) for row in rows_by_entity["pool_missions"])
+    assert str(other_api.user_id) not in json.dumps(rows_by_entity)
+
+
+def test_unknown_export_format(api):
+    assert api.get('/api/export', query={"format": 'xml'}, expected=400)["error"].startswith("Invalid format")
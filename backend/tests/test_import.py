@@ -0,0 +1,103 @@
+# backend/tests/test_import.py
+"""POST /api/import/<kind> (user-031): reference resolution, dry runs and all-or-nothing imports."""
+import json
+from app import db
+from app.models import PoolMission, ScheduledMission, Tag
+
+
+def _ndjson(rows):
+    return '\n'.join(json.dumps(row) for row in rows)
+
+
+def _import(api, kind, text, expected, content_type='application/x-ndjson', **params):
+    query = '&'.join(f"{key}={str(value).lower()}" for key, value in params.items())
+    response = api.client.post(f"/api/import/{kind}?{query}", data=text, headers={**api.headers, "Content-Type": content_type})
+    assert response.status_code == expected, response.get_data(as_text=True)
+    return response.get_json()
+
+
+def _titles(app, model, user_id):
+    with app.app_context():
+        return sorted(mission.title for mission in model.query.filter_by(user_id=user_id))
+
+
+def test_import_resolves_quests_and_tags(app, api, other_api):
+    quest = api.create_quest('Side project')
+    work = api.create_tag('work')
+    foreign = other_api.create_tag('not mine')
+    rows = [
+        {"title": "By quest id", "energy_value": 5, "points_value": 3, "quest_id": quest["id"], "tag_ids": [work["id"], foreign["id"]]},
+        {"title": "By quest name", "energy_value": 5, "points_value": 3, "quest_name": "Side project", "tags": ["work", "new tag"]},
+        {"title": "Default quest", "energy_value": 5, "points_value": 3},
+    ]
+    result = _import(api, 'pool-missions', _ndjson(rows), 201, create_missing_tags=True)
+    assert (result["imported"], result["failed"], result["created_tags"]) == (3, 0, ["new tag"])
+
+    missions = {mission["title"]: mission for mission in api.get('/api/pool-missions')}
+    assert missions["By quest id"]["quest_id"] == quest["id"]
+    assert [tag["id"] for tag in missions["By quest id"]["tags"]] == [work["id"]] # El tag ajeno se ignora
+    assert missions["By quest name"]["quest_id"] == quest["id"]
+    assert sorted(tag["name"] for tag in missions["By quest name"]["tags"]) == ["new tag", "work"]
+    assert missions["Default quest"]["quest_id"] != quest["id"]
+    with app.app_context():
+        assert Tag.query.filter_by(user_id=api.user_id, name='new tag').count() == 1
+        assert sorted(missions[title]["id"] for title in missions) == sorted(result["created_ids"])
+
+
+def test_dry_run_writes_nothing(app, api):
+    rows = [{"title": "Dry", "energy_value": 5, "points_value": 3, "tags": ["to create"]}]
+    result = _import(api, 'pool-missions', _ndjson(rows), 200, dry_run=True, create_missing_tags=True)
+    assert (result["dry_run"], result["imported"], result["created_ids"], result["created_tags"]) == (True, 1, [], ["to create"])
+    assert _titles(app, PoolMission, api.user_id) == []
+    with app.app_context():
+        assert Tag.query.filter_by(user_id=api.user_id).count() == 0
+
+
+def test_invalid_row_rejects_the_whole_file(app, api):
+    rows = [
+        {"title": "Valid", "energy_value": 5, "points_value": 3, "tags": ["would be created"]},
+        {"title": "", "energy_value": 5, "points_value": 3},
+        {"title": "Unknown quest", "energy_value": 5, "points_value": 3, "quest_name": "Nope"},
+        {"title": "Unknown tag", "energy_value": 5, "points_value": 3, "tags": ["missing"]},
+    ]
+    text = _ndjson(rows) + '\n{not json'
+    result = _import(api, 'pool-missions', text, 400)
+    assert (result["imported"], result["created_ids"], result["created_tags"]) == (0, [], [])
+    errors = {error["row"]: error["errors"] for error in result["errors"]}
+    assert sorted(errors) == [1, 2, 3, 4, 5]
+    assert "tags" in errors[1] and "title" in errors[2] and "quest_name" in errors[3] and "_row" in errors[5]
+    assert _titles(app, PoolMission, api.user_id) == []
+
+    # Con las etiquetas creadas bajo demanda las filas 1 y 4 valen, pero no se escribe nada, tampoco las etiquetas
+    result = _import(api, 'pool-missions', text, 400, create_missing_tags=True)
+    assert [error["row"] for error in result["errors"]] == [2, 3, 5]
+    assert (result["imported"], result["created_tags"]) == (0, [])
+    with app.app_context():
+        assert Tag.query.filter_by(user_id=api.user_id).count() == 0
+    assert _titles(app, PoolMission, api.user_id) == []
+
+
+def test_partial_import_keeps_valid_rows(app, api):
+    rows = [
+        {"title": "Valid", "energy_value": 5, "points_value": 3},
+        {"title": "Missing points", "energy_value": 5},
+    ]
+    result = _import(api, 'pool-missions', _ndjson(rows), 201, partial=True)
+    assert (result["imported"], result["failed"]) == (1, 1)
+    assert _titles(app, PoolMission, api.user_id) == ["Valid"]
+
+
+def test_csv_scheduled_missions(app, api):
+    api.create_tag('work')
+    text = (
+        "title,energy_value,points_value,start_datetime,end_datetime,is_all_day,tags\n"
+        "Meeting,5,3,2030-01-02T09:00:00+00:00,2030-01-02T10:00:00+00:00,false,work\n"
+        "Holiday,1,1,2030-01-03T00:00:00+00:00,2030-01-03T00:00:00+00:00,yes,\n"
+    )
+    result = _import(api, 'scheduled-missions', text, 201, content_type='text/csv')
+    assert (result["imported"], result["failed"]) == (2, 0)
+    with app.app_context():
+        missions = {mission.title: mission for mission in ScheduledMission.query.filter_by(user_id=api.user_id)}
+        assert [tag.name for tag in missions["Meeting"].tags] == ['work']
+        assert missions["Holiday"].is_all_day and missions["Holiday"].start_datetime.hour == 0
+        db.session.remove()
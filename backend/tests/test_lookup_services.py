@@ -0,0 +1,86 @@
+# backend/tests/test_lookup_services.py
+"""Per-request and per-process lookup memo (user-035)."""
+import pytest
+from app import db
+from app.models import Quest
+from app.observability.sql_metrics import count_queries
+from app.services import lookup_services
+from app.services.cache_services import dashboard_cache, RedisCacheBackend
+from app.testing import create_test_app, make_user
+from conftest import SharedRedisStandIn
+
+
+def _user_selects(collector):
+    return [statement for statement, _, _ in collector.statements if 'FROM users' in statement]
+
+
+def test_user_loaded_once_per_request_and_batch(client, api):
+    mission = api.create_pool_mission('Mission')
+    with count_queries(keep_statements=True) as single:
+        api.get(f"/api/pool-missions/{mission['id']}")
+    assert len(_user_selects(single)) == 1
+
+    with count_queries(keep_statements=True) as batch:
+        api.post('/api/batch', {"requests": [{"method": "GET", "path": f"/api/pool-missions/{mission['id']}"}] * 3})
+    assert len(_user_selects(batch)) == 1
+
+
+def test_get_user_memo_follows_the_session(app):
+    with app.app_context():
+        user_id = make_user('memo@example.com').id
+        db.session.remove()
+        with count_queries() as queries:
+            first = lookup_services.get_user(user_id)
+            assert lookup_services.get_user(user_id) is first
+        assert queries.count == 1
+        db.session.remove() # Instancia de otra sesión: se vuelve a cargar
+        assert lookup_services.get_user(user_id) is not first and lookup_services.get_user(user_id) in db.session
+
+
+@pytest.fixture
+def worker_app(monkeypatch):
+    """App configured like one of several gunicorn workers, sharing a redis stand-in."""
+    app = create_test_app(LOOKUP_CACHE_TTL_SECONDS=60, WEB_CONCURRENCY=2)
+    monkeypatch.setattr(dashboard_cache, 'backend', RedisCacheBackend(SharedRedisStandIn()))
+    monkeypatch.setattr(lookup_services, '_user_refs', lookup_services._TTLStore())
+    with app.app_context():
+        user_id = make_user('worker@example.com').id
+        db.session.remove()
+    return app, user_id
+
+
+def _default_quest_name(app, user_id):
+    with app.app_context():
+        return lookup_services.get_default_quest_ref(user_id).name
+
+
+def test_default_quest_edit_in_another_worker_is_seen(worker_app):
+    app, user_id = worker_app
+    assert _default_quest_name(app, user_id) == 'General'
+    with app.app_context(), count_queries() as cached:
+        lookup_services.get_default_quest_ref(user_id)
+    assert cached.count == 0
+
+    # Otro worker renombra la quest: su invalidación solo llega aquí a través del backend compartido
+    with app.app_context():
+        Quest.query.filter_by(user_id=user_id, is_default_quest=True).update({"name": 'Renamed'})
+        db.session.commit()
+        dashboard_cache.invalidate_user(user_id, namespace='lookups')
+    assert _default_quest_name(app, user_id) == 'Renamed'
+
+
+def test_no_process_cache_with_several_workers_without_shared_backend(worker_app, monkeypatch):
+    from app.services.cache_services import NullCacheBackend
+    app, user_id = worker_app
+    monkeypatch.setattr(dashboard_cache, 'backend', NullCacheBackend())
+    assert _default_quest_name(app, user_id) == 'General'
+    with app.app_context(), count_queries() as uncached:
+        lookup_services.get_default_quest_ref(user_id)
+    assert uncached.count == 1
+
+
+def test_quest_route_invalidates_the_default_quest(api):
+    default_quest = next(quest for quest in api.get('/api/quests') if quest["is_default_quest"])
+    api.put(f"/api/quests/{default_quest['id']}", {"name": 'Inbox'})
+    created = api.create_habit_template('Habit')
+    assert created["quest_name"] == 'Inbox'
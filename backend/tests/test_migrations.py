@@ -0,0 +1,140 @@
+# backend/tests/test_migrations.py
+"""The Alembic revisions take a pre-migration database to the schema of the models, and back."""
+import os
+from datetime import datetime, timezone
+import pytest
+import sqlalchemy as sa
+from alembic.script import ScriptDirectory
+from flask_migrate import upgrade, downgrade
+from app import db
+from app.db_shards import create_all_shards, shard_engine
+from app.models import PoolMission, Quest, HabitTemplate, HabitOccurrence
+from app.testing import create_test_app, make_user
+
+MIGRATIONS_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+# Lo que añaden las revisiones sobre el esquema previo a las migraciones
+MIGRATED_COLUMNS = {
+    'pool_missions': ['tag_ids'],
+    'scheduled_missions': ['tag_ids'],
+    'habit_templates': ['tag_ids'],
+    'habit_occurrences': ['tag_ids', 'tag_snapshot', 'rec_duration_minutes'],
+}
+MIGRATED_TABLES = ['user_directory', 'stat_counters']
+MIGRATED_INDEXES = {
+    'pool_missions': ['ix_pool_missions_user_status_updated'],
+    'scheduled_missions': ['ix_scheduled_missions_user_status_start'],
+    'habit_occurrences': ['ix_habit_occurrences_user_status_start'],
+}
+
+
+def _strip_to_legacy_schema(engine):
+    """Drops what the revisions add, leaving the schema as it was before the first one."""
+    existing_tables = set(sa.inspect(engine).get_table_names())
+    with engine.begin() as connection:
+        for table_name in MIGRATED_TABLES:
+            if table_name in existing_tables:
+                connection.execute(sa.text(f"DROP TABLE {table_name}"))
+        for index_names in MIGRATED_INDEXES.values():
+            for index_name in index_names:
+                connection.execute(sa.text(f"DROP INDEX {index_name}"))
+        for table_name, column_names in MIGRATED_COLUMNS.items():
+            for column_name in column_names:
+                connection.execute(sa.text(f"ALTER TABLE {table_name} DROP COLUMN {column_name}"))
+
+
+def _columns(table_name):
+    return {column['name'] for column in sa.inspect(db.engine).get_columns(table_name)}
+
+
+def _indexes(table_name):
+    return {index['name']: tuple(index['column_names']) for index in sa.inspect(db.engine).get_indexes(table_name)}
+
+
+def _model_indexes(table_name):
+    """Indexes the models declare for this table on the current dialect (the GIN ones are Postgres only)."""
+    dialect_name = db.engine.dialect.name
+    return {
+        index.name: tuple(column.name for column in index.columns) for index in db.metadata.tables[table_name].indexes
+        if index._ddl_if is None or index._ddl_if.dialect in (None, dialect_name)
+    }
+
+
+@pytest.fixture
+def legacy_app(tmp_path):
+    """File-based database as it was before the first revision, with one existing mission and habit occurrence."""
+    app = create_test_app(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'legacy.db'}")
+    with app.app_context():
+        user = make_user('legacy@example.com')
+        quest_id = Quest.query.filter_by(user_id=user.id).one().id
+        db.session.add(PoolMission(user_id=user.id, quest_id=quest_id, title='Old', energy_value=1, points_value=1))
+        template = HabitTemplate(user_id=user.id, quest_id=quest_id, title='Read', default_energy_value=1, default_points_value=1,
+                                 rec_pattern_start_date=datetime.now(timezone.utc).date(), is_active=False)
+        db.session.add(template); db.session.flush()
+        now = datetime.now(timezone.utc)
+        db.session.add(HabitOccurrence(habit_template_id=template.id, user_id=user.id, quest_id=quest_id, title='Read',
+                                       energy_value=1, points_value=1, scheduled_start_datetime=now, scheduled_end_datetime=now))
+        db.session.commit()
+        db.session.remove()
+        _strip_to_legacy_schema(db.engine)
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_upgrade_adds_model_columns_with_defaults(legacy_app):
+    with legacy_app.app_context():
+        upgrade(directory=MIGRATIONS_DIRECTORY)
+        for table_name in [*MIGRATED_COLUMNS, *MIGRATED_TABLES]:
+            assert _columns(table_name) == {column.name for column in db.metadata.tables[table_name].columns}
+        for table_name in db.metadata.tables:
+            assert _indexes(table_name) == _model_indexes(table_name), table_name
+        with db.engine.connect() as connection:
+            assert connection.execute(sa.text("SELECT tag_ids FROM pool_missions")).scalar_one() == '[]'
+            assert connection.execute(sa.text("SELECT tag_snapshot, rec_duration_minutes FROM habit_occurrences")).one() == ('[]', None)
+
+
+def test_downgrade_to_base_removes_them(legacy_app):
+    with legacy_app.app_context():
+        upgrade(directory=MIGRATIONS_DIRECTORY)
+        downgrade(directory=MIGRATIONS_DIRECTORY, revision='base')
+        for table_name, column_names in MIGRATED_COLUMNS.items():
+            assert not set(column_names) & _columns(table_name)
+        assert not set(MIGRATED_TABLES) & set(sa.inspect(db.engine).get_table_names())
+        for table_name, index_names in MIGRATED_INDEXES.items():
+            assert not set(index_names) & set(_indexes(table_name))
+
+
+def test_directory_only_on_default_database(tmp_path):
+    app = create_test_app(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'shard_0.db'}",
+        SQLALCHEMY_BINDS={"shard_1": f"sqlite:///{tmp_path / 'shard_1.db'}"}
+    )
+    with app.app_context():
+        create_all_shards(db)
+        for shard in (0, 1):
+            _strip_to_legacy_schema(shard_engine(db, shard))
+        upgrade(directory=MIGRATIONS_DIRECTORY)
+        assert 'user_directory' in sa.inspect(shard_engine(db, 0)).get_table_names()
+        assert 'user_directory' not in sa.inspect(shard_engine(db, 1)).get_table_names()
+        assert 'stat_counters' in sa.inspect(shard_engine(db, 1)).get_table_names()
+        for shard in (0, 1):
+            with shard_engine(db, shard).connect() as connection:
+                assert connection.execute(sa.text("SELECT version_num FROM alembic_version")).scalar_one() is not None
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_shard_init_stamps_new_shards(tmp_path):
+    app = create_test_app(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'shard_0.db'}",
+        SQLALCHEMY_BINDS={"shard_1": f"sqlite:///{tmp_path / 'shard_1.db'}"}
+    )
+    result = app.test_cli_runner().invoke(args=['shard-init'])
+    assert result.exit_code == 0, result.output
+    with app.app_context():
+        with shard_engine(db, 1).connect() as connection:
+            stamped = connection.execute(sa.text("SELECT version_num FROM alembic_version")).scalar_one()
+        head = ScriptDirectory.from_config(app.extensions['migrate'].migrate.get_config(MIGRATIONS_DIRECTORY)).get_current_head()
+        assert stamped == head
+        for engine in db.engines.values():
+            engine.dispose()
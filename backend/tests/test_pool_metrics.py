@@ -0,0 +1,95 @@
+# backend/tests/test_pool_metrics.py
+"""Engine pool profiles, pool gauges and statement timeouts (user-042)."""
+import pytest
+from flask import g
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.pool import NullPool
+from app import create_app, db
+from app.db_engine import build_engine_options, _select_statement_timeout
+from app.observability.pool_metrics import InstrumentedQueuePool, pool_stats
+from app.testing import TestingConfig, create_test_app
+
+POSTGRES_URI = 'postgresql://iterpolaris@127.0.0.1/iterpolaris'
+POOL_CONFIG = {
+    "DB_POOL_SIZE": 7, "DB_MAX_OVERFLOW": 3, "DB_POOL_TIMEOUT": 11, "DB_POOL_RECYCLE": 600, "DB_POOL_PRE_PING": True,
+    "DB_STATEMENT_TIMEOUT_MS": 15000, "DB_APPLICATION_NAME": 'iterpolaris-test',
+}
+
+
+def test_direct_mode_engine_options():
+    options = build_engine_options(POOL_CONFIG, POSTGRES_URI)
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert (options["pool_size"], options["max_overflow"], options["pool_timeout"], options["pool_recycle"]) == (7, 3, 11, 600)
+    assert options["pool_pre_ping"] and options["pool_use_lifo"]
+    assert options["connect_args"] == {"application_name": 'iterpolaris-test', "options": "-c statement_timeout=15000"}
+
+
+def test_pgbouncer_mode_engine_options():
+    options = build_engine_options({**POOL_CONFIG, "DB_PGBOUNCER_MODE": True}, POSTGRES_URI)
+    # pgbouncer ya agrupa conexiones y no reenvía las opciones de arranque: el timeout va por SET LOCAL
+    assert options == {"poolclass": NullPool, "connect_args": {"application_name": 'iterpolaris-test'}}
+    assert build_engine_options(POOL_CONFIG, 'sqlite://') == {}
+
+
+@pytest.mark.parametrize('pgbouncer_mode, method, path, expected', [
+    (False, 'GET', '/api/pool-missions', None),         # Ya va en la conexión
+    (True, 'GET', '/api/pool-missions', 15000),
+    (False, 'GET', '/api/export', 0),                   # @statement_timeout(0)
+    (True, 'POST', '/api/import/pool-missions', 120000),
+    (False, 'GET', '/api/dashboard/bundle', 5000),      # DB_STATEMENT_TIMEOUTS
+])
+def test_statement_timeout_per_endpoint(pgbouncer_mode, method, path, expected):
+    app = create_test_app(DB_PGBOUNCER_MODE=pgbouncer_mode, DB_STATEMENT_TIMEOUT_MS=15000,
+                          DB_STATEMENT_TIMEOUTS={"dashboard_bp.get_dashboard_bundle": 5000})
+    with app.test_request_context(path, method=method):
+        _select_statement_timeout()
+        assert g.statement_timeout_ms == expected
+
+
+@pytest.fixture
+def pooled_app(tmp_path):
+    app = create_test_app(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'pool.db'}",
+        SQLALCHEMY_ENGINE_OPTIONS={"poolclass": InstrumentedQueuePool, "pool_size": 2, "max_overflow": 1, "pool_timeout": 0.1}
+    )
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_pool_gauges_wired_up(pooled_app):
+    with pooled_app.app_context():
+        engine = db.engine
+    assert pool_stats.pool is engine.pool
+    before = pool_stats.snapshot()
+    assert pooled_app.test_client().get('/api/auth/me').status_code == 401
+    pooled_app.test_client().post('/api/auth/login', json={"email": 'nobody@example.com', "password": 'x'})
+    assert pool_stats.snapshot()["checkouts"] > before["checkouts"]
+
+    held = [engine.connect() for _ in range(3)] # pool_size + max_overflow
+    try:
+        assert pool_stats.gauges() == {"checked_out": 3, "size": 2, "overflow": 1, "saturation": 1.0}
+        with pytest.raises(sa_exc.TimeoutError):
+            engine.connect()
+        assert pool_stats.snapshot()["checkout_timeouts"] == before["checkout_timeouts"] + 1
+    finally:
+        for connection in held:
+            connection.close()
+    assert pool_stats.gauges()["checked_out"] == 0
+
+    metrics = pooled_app.test_client().get('/metrics').get_data(as_text=True)
+    assert 'iterpolaris_db_pool_size 2' in metrics and 'iterpolaris_db_pool_saturation 0.0' in metrics
+    assert f"iterpolaris_db_pool_checkout_timeouts_total {before['checkout_timeouts'] + 1}" in metrics
+    assert 'iterpolaris_db_pool_checkout_wait_seconds_bucket{le="+Inf"}' in metrics
+
+
+def test_postgres_app_uses_the_configured_pool():
+    pytest.importorskip('psycopg2') # create_engine importa el driver aunque no llegue a conectar
+    config = {key: getattr(TestingConfig, key) for key in dir(TestingConfig) if key.isupper()}
+    for pgbouncer_mode, poolclass in ((False, InstrumentedQueuePool), (True, NullPool)):
+        app = create_app({**config, **POOL_CONFIG, "SQLALCHEMY_DATABASE_URI": POSTGRES_URI, "DB_PGBOUNCER_MODE": pgbouncer_mode})
+        with app.app_context():
+            assert isinstance(db.engine.pool, poolclass)
+            assert pool_stats.pool is db.engine.pool
+        assert pool_stats.gauges() == ({} if pgbouncer_mode else {"checked_out": 0, "size": 7, "overflow": 0, "saturation": 0.0})
@@ -0,0 +1,92 @@
+# backend/tests/test_profiling.py
+"""On-demand request profiling (user-038): admin gate, switch and stored artifacts."""
+import pstats
+import re
+import pytest
+from app.testing import create_test_app
+
+
+@pytest.fixture
+def app(tmp_path):
+    return create_test_app(PROFILING_ENABLED=True, PROFILING_ADMIN_EMAILS=['admin@example.com'],
+                           PROFILING_OUTPUT_DIR=str(tmp_path), PROFILING_SAMPLE_INTERVAL_MS=1)
+
+
+@pytest.fixture
+def admin_api(app, client):
+    from conftest import _make_api
+    return _make_api(app, client, 'admin@example.com')
+
+
+def _profiled_get(api, path, mode='cprofile', **headers):
+    response = api.client.get(path, headers={**api.headers, "X-Profile": mode, **headers})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response
+
+
+def test_non_admins_are_not_profiled(api):
+    api.create_pool_mission('Mission')
+    response = _profiled_get(api, '/api/pool-missions')
+    assert 'X-Profile-Id' not in response.headers
+    assert api.get('/api/admin/profiles', expected=403) == {"error": "Forbidden"}
+
+
+def test_disabled_profiling_ignores_admins(tmp_path):
+    from conftest import _make_api
+    app = create_test_app(PROFILING_ENABLED=False, PROFILING_ADMIN_EMAILS=['admin@example.com'], PROFILING_OUTPUT_DIR=str(tmp_path))
+    admin_api = _make_api(app, app.test_client(), 'admin@example.com')
+    assert 'X-Profile-Id' not in _profiled_get(admin_api, '/api/pool-missions').headers
+    admin_api.get('/api/admin/profiles', expected=403)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cprofile_run_and_artifacts(admin_api):
+    admin_api.create_pool_mission('Mission')
+    plain = admin_api.get('/api/pool-missions')
+    response = _profiled_get(admin_api, '/api/pool-missions')
+    assert response.get_json() == plain # El profiling no cambia la respuesta
+    profile_id = response.headers['X-Profile-Id']
+
+    listing = admin_api.get('/api/admin/profiles')
+    assert [profile["id"] for profile in listing] == [profile_id]
+    meta = admin_api.get(f"/api/admin/profiles/{profile_id}")
+    assert (meta["mode"], meta["method"], meta["endpoint"]) == ('cprofile', 'GET', 'pool_mission_bp.get_pool_missions')
+    assert meta["profiled_user_id"] == str(admin_api.user_id)
+    assert meta["sql"]["query_count"] == len(meta["sql"]["statements"]) > 0
+    assert 'cumulative' in meta["pstats_summary"]
+
+    pstats_response = admin_api.client.get(f"/api/admin/profiles/{profile_id}/pstats", headers=admin_api.headers)
+    assert pstats_response.status_code == 200 and 'attachment' in pstats_response.headers['Content-Disposition']
+    pstats_path = admin_api.client.application.config['PROFILING_OUTPUT_DIR'] + f"/{profile_id}.pstats"
+    assert pstats.Stats(pstats_path).total_calls > 0
+
+    collapsed = admin_api.client.get(f"/api/admin/profiles/{profile_id}/collapsed", headers=admin_api.headers)
+    assert collapsed.status_code == 200 and collapsed.mimetype == 'text/plain'
+    assert all(re.match(r'^.+ \d+$', line) for line in collapsed.get_data(as_text=True).splitlines())
+
+
+def test_sample_mode_has_no_pstats(admin_api):
+    profile_id = _profiled_get(admin_api, '/api/pool-missions', mode='sample').headers['X-Profile-Id']
+    assert admin_api.get(f"/api/admin/profiles/{profile_id}")["pstats_summary"] is None
+    admin_api.get(f"/api/admin/profiles/{profile_id}/pstats", expected=404)
+    assert admin_api.client.get(f"/api/admin/profiles/{profile_id}/collapsed", headers=admin_api.headers).status_code == 200
+
+
+def test_profile_as_another_user(admin_api, api):
+    api.create_pool_mission('Their mission')
+    response = _profiled_get(admin_api, '/api/pool-missions', **{"X-Profile-As-User": str(api.user_id)})
+    assert [mission["title"] for mission in response.get_json()] == ['Their mission']
+    assert admin_api.get(f"/api/admin/profiles/{response.headers['X-Profile-Id']}")["profiled_user_id"] == str(api.user_id)
+
+    missing = admin_api.client.get('/api/pool-missions', headers={**admin_api.headers, "X-Profile": 'cprofile',
+                                                                  "X-Profile-As-User": '00000000-0000-0000-0000-000000000000'})
+    assert missing.status_code == 404
+    write = admin_api.client.post('/api/tags', json={"name": 'x'}, headers={**admin_api.headers, "X-Profile": 'cprofile',
+                                                                          "X-Profile-As-User": str(api.user_id)})
+    assert write.status_code == 400
+
+
+def test_unknown_or_malformed_profile_ids(admin_api):
+    admin_api.get('/api/admin/profiles/' + 'a' * 32, expected=404)
+    admin_api.get('/api/admin/profiles/..%2F..%2Fetc', expected=404)
+    admin_api.get('/api/admin/profiles/' + 'a' * 32 + '/exe', expected=404)
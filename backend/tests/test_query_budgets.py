@@ -0,0 +1,52 @@
+# backend/tests/test_query_budgets.py
+"""List endpoints (user-036) issue a fixed number of statements whatever the number of rows."""
+import uuid
+import pytest
+from app.observability.sql_metrics import count_queries, query_budget
+
+# path -> (max statements, repeats allowed for one SELECT shape). El bundle lee los tags del
+# usuario una vez por panel (cada panel se cachea por separado): crece con los paneles, no con las filas
+BUDGETS = {
+    '/api/pool-missions': (3, 1),
+    '/api/dashboard/today-agenda': (3, 1),
+    '/api/dashboard/bundle': (14, 4),
+    '/api/agenda/items': (4, 1),
+}
+
+
+def _seed(api, quest, tags, count, prefix):
+    for index in range(count):
+        tag_ids = [tag["id"] for tag in tags[:index % 3 + 1]]
+        api.create_pool_mission(f"{prefix} pool {index}", tag_ids=tag_ids, quest_id=quest["id"] if index % 2 else None)
+        api.create_scheduled_mission(f"{prefix} scheduled {index}", tag_ids=tag_ids, quest_id=quest["id"] if index % 2 else None)
+    api.create_habit_template(f"{prefix} habit", tag_ids=[tags[0]["id"]], quest_id=quest["id"])
+
+
+@pytest.fixture
+def dashboard_api(api):
+    api.quest = api.create_quest('Side project')
+    api.tags = [api.create_tag(name) for name in ('work', 'home', 'errands')]
+    panels = [
+        {"id": str(uuid.uuid4()), "panel_type": panel_type, "name": panel_type, "order": order, "is_active": True}
+        for order, panel_type in enumerate(('TODAY_AGENDA', 'RECENT_ACTIVITY', 'RESCUE_MISSIONS', 'ENERGY_STATISTICS'))
+    ]
+    panels.append({"id": str(uuid.uuid4()), "panel_type": 'PROJECT_TASKS', "name": 'Project', "order": 9,
+                   "is_active": True, "quest_id": api.quest["id"]})
+    api.put('/api/auth/me/settings', {"settings": {"dashboard_panels": panels}})
+    return api
+
+
+@pytest.mark.parametrize('path', list(BUDGETS))
+def test_list_endpoint_query_budget(client, dashboard_api, path):
+    max_queries, max_repeats = BUDGETS[path]
+    _seed(dashboard_api, dashboard_api.quest, dashboard_api.tags, 2, 'small')
+    with count_queries() as small:
+        client.get(path, headers=dashboard_api.headers)
+
+    _seed(dashboard_api, dashboard_api.quest, dashboard_api.tags, 8, 'large')
+    with query_budget(max_queries, label=f"GET {path}", n_plus_one_threshold=max_repeats + 1) as large:
+        response = client.get(path, headers=dashboard_api.headers)
+    assert response.status_code == 200
+    if path == '/api/dashboard/bundle':
+        assert not [panel for panel in response.get_json()["panels"] if "error" in panel]
+    assert large.count == small.count
@@ -0,0 +1,47 @@
+# backend/tests/test_read_replicas.py
+"""Read-replica routing and read-your-writes stickiness (user-043)."""
+import pytest
+from app.db_replicas import read_stickiness, replica_bind_keys
+from app.services.cache_services import MemoryCacheBackend, RedisCacheBackend
+from app.testing import create_replicated_test_app, sync_replica
+from conftest import SharedRedisStandIn
+
+
+@pytest.fixture
+def app(tmp_path):
+    return create_replicated_test_app(str(tmp_path))
+
+
+def _titles(api):
+    return [mission["title"] for mission in api.get('/api/pool-missions')]
+
+
+def _stickiness_expires(monkeypatch):
+    monkeypatch.setattr(read_stickiness, 'backend', MemoryCacheBackend(max_entries=100))
+
+
+def test_get_after_write_reads_the_primary(app, api, monkeypatch):
+    assert replica_bind_keys(app) == ['replica_0']
+    sync_replica(app)
+    _stickiness_expires(monkeypatch)
+    api.create_pool_mission('Fresh') # La réplica aún no la tiene
+    assert _titles(api) == ['Fresh']
+
+
+def test_reads_go_to_the_replica_otherwise(app, api, monkeypatch):
+    sync_replica(app)
+    api.create_pool_mission('Lagging')
+    _stickiness_expires(monkeypatch)
+    assert _titles(api) == [] # Réplica sin sincronizar: la lectura no ha ido al primario
+    sync_replica(app)
+    assert _titles(api) == ['Lagging']
+
+
+def test_several_workers_need_a_shared_backend(tmp_path, monkeypatch):
+    (tmp_path / 'null').mkdir(); (tmp_path / 'redis').mkdir()
+    app = create_replicated_test_app(str(tmp_path / 'null'), WEB_CONCURRENCY=2)
+    assert replica_bind_keys(app) == [] and read_stickiness.backend is None
+
+    monkeypatch.setattr(RedisCacheBackend, 'from_url', classmethod(lambda cls, url, **kwargs: cls(SharedRedisStandIn(), **kwargs)))
+    app = create_replicated_test_app(str(tmp_path / 'redis'), WEB_CONCURRENCY=2, DASHBOARD_CACHE_BACKEND='redis')
+    assert replica_bind_keys(app) == ['replica_0'] and read_stickiness.backend.name == 'redis'
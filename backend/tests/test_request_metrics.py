@@ -0,0 +1,34 @@
+# backend/tests/test_request_metrics.py
+from app.testing import create_test_app
+from app.observability.request_metrics import TimedJSONProvider
+
+
+def test_json_body_through_test_client():
+    # El test client serializa el body con app.json antes de abrir el contexto de la petición
+    app = create_test_app()
+    response = app.test_client().post('/api/auth/login', json={"email": "nobody@example.com", "password": "x"})
+    assert response.status_code == 401
+    assert 'serialize;dur=' in response.headers['Server-Timing']
+
+
+def test_dumps_outside_app_context():
+    app = create_test_app()
+    assert isinstance(app.json, TimedJSONProvider)
+    assert app.json.dumps({"a": 1}) == '{"a": 1}'
+
+
+def test_metrics_requires_the_token():
+    app = create_test_app(METRICS_TOKEN='scrape-token')
+    client = app.test_client()
+    assert client.get('/api/auth/me').status_code == 401 # Alguna petición observada
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get('/metrics', headers={"Authorization": "Bearer scrape-token"})
+    assert response.status_code == 200 and response.mimetype == 'text/plain'
+    assert 'endpoint="auth_bp.get_current_user_profile"' in response.get_data(as_text=True)
+
+
+def test_metrics_not_registered_without_token_outside_testing():
+    app = create_test_app(TESTING=False, METRICS_TOKEN=None)
+    assert 'metrics' not in app.view_functions
+    assert 'Server-Timing' in app.test_client().get('/').headers
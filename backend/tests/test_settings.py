@@ -0,0 +1,77 @@
+# backend/tests/test_settings.py
+"""PUT /api/auth/me/settings (user-034): set-based validation and partial updates."""
+import uuid
+import pytest
+from app.observability.sql_metrics import count_queries
+from app.testing import create_test_app
+
+
+def _panel(panel_type, order, **fields):
+    return {"id": str(uuid.uuid4()), "panel_type": panel_type, "name": panel_type, "order": order, "is_active": True, **fields}
+
+
+def _tag_selects(collector):
+    return [statement for statement in collector.statements if statement[0].lstrip().upper().startswith('SELECT') and 'FROM tags' in statement[0]]
+
+
+def test_pinned_tags_validated_with_one_query(client, api, other_api):
+    tags = [api.create_tag(f"tag {index}") for index in range(5)]
+    foreign = other_api.create_tag('foreign')
+
+    with count_queries(keep_statements=True) as queries:
+        result = api.put('/api/auth/me/settings', {"settings": {"sidebar_pinned_tag_ids": [tag["id"] for tag in tags]}})
+    assert result["settings"]["sidebar_pinned_tag_ids"] == [tag["id"] for tag in tags]
+    assert len(_tag_selects(queries)) == 1
+
+    for bad_id in (foreign["id"], str(uuid.uuid4())):
+        with count_queries(keep_statements=True) as queries:
+            errors = api.put('/api/auth/me/settings', {"settings": {"sidebar_pinned_tag_ids": [tags[0]["id"], bad_id]}}, expected=400)["errors"]
+        assert errors == {"sidebar_pinned_tag_ids": f"Invalid or non-existent tag_id: {bad_id}"}
+        assert len(_tag_selects(queries)) == 1
+    assert api.get('/api/auth/me')["settings"]["sidebar_pinned_tag_ids"] == [tag["id"] for tag in tags]
+
+
+def test_panel_validation(api, other_api):
+    foreign_quest = other_api.create_quest('Foreign')
+    cases = [
+        ([_panel('NOT_A_PANEL', 0)], "invalid or missing 'panel_type'"),
+        ([_panel('PROJECT_TASKS', 0)], "requires a 'quest_id'"),
+        ([_panel('PROJECT_TASKS', 0, quest_id=foreign_quest["id"])], "not found"),
+        ([_panel('TODAY_AGENDA', 0, quest_id=foreign_quest["id"])], "should only be provided for PROJECT_TASKS"),
+        ([_panel('TODAY_AGENDA', 0, is_active=False)], "should be active"),
+    ]
+    for panels, message in cases:
+        errors = api.put('/api/auth/me/settings', {"settings": {"dashboard_panels": panels}}, expected=400)["errors"]
+        assert message in errors["dashboard_panels"], errors
+    assert api.get('/api/auth/me')["settings"]["dashboard_panels"] == []
+
+
+def test_partial_update_keeps_other_keys(api):
+    tag = api.create_tag('pinned')
+    quest = api.create_quest('Project')
+    panels = [_panel('TODAY_AGENDA', 0), _panel('PROJECT_TASKS', 1, quest_id=quest["id"])]
+    api.put('/api/auth/me/settings', {"settings": {"dashboard_panels": panels}})
+
+    result = api.put('/api/auth/me/settings', {"settings": {"sidebar_pinned_tag_ids": [tag["id"]]}})
+    assert [panel["id"] for panel in result["settings"]["dashboard_panels"]] == [panel["id"] for panel in panels]
+    assert result["settings"]["sidebar_pinned_tag_ids"] == [tag["id"]]
+
+    result = api.put('/api/auth/me/settings', {"settings": {"dashboard_panels": panels[:1]}})
+    assert result["settings"]["sidebar_pinned_tag_ids"] == [tag["id"]]
+    assert api.get('/api/auth/me')["settings"] == result["settings"]
+
+
+@pytest.mark.parametrize('cache_backend', ['null', 'memory'])
+def test_reads_see_the_update_immediately(cache_backend):
+    from conftest import _make_api
+    app = create_test_app(DASHBOARD_CACHE_BACKEND=cache_backend)
+    api = _make_api(app, app.test_client(), 'cached@example.com')
+    assert api.get('/api/dashboard/bundle')["panels"] == []
+
+    panels = [_panel('TODAY_AGENDA', 0), _panel('RECENT_ACTIVITY', 1)]
+    api.put('/api/auth/me/settings', {"settings": {"dashboard_panels": panels}})
+    assert [panel["id"] for panel in api.get('/api/dashboard/bundle')["panels"]] == [panel["id"] for panel in panels]
+    assert api.get('/api/auth/me')["settings"]["dashboard_panels"][0]["id"] == panels[0]["id"]
+
+    api.put('/api/auth/me/settings', {"settings": {"dashboard_panels": panels[1:]}})
+    assert [panel["id"] for panel in api.get('/api/dashboard/bundle')["panels"]] == [panels[1]["id"]]
@@ -0,0 +1,101 @@
+# backend/tests/test_sharding.py
+"""User sharding: directory routing, cross-shard lookups and shard moves (user-044)."""
+import uuid
+import pytest
+from sqlalchemy import select, func
+from app import db
+from app.db_shards import directory_cache, find_user_by_email, move_user_to_shard, shard_engine, shard_for_new_user
+from app.models import User, UserDirectory, PoolMission, pool_mission_tags_association
+from app.testing import create_sharded_test_app
+
+
+@pytest.fixture
+def app():
+    return create_sharded_test_app(shards=2)
+
+
+def _register(client, email):
+    response = client.post('/api/auth/register', json={"email": email, "password": 'password123', "name": 'Sharded'})
+    assert response.status_code == 201, response.get_data(as_text=True)
+    return response.get_json()
+
+
+def _rows_on_shard(shard, table, **where):
+    with shard_engine(db, shard).connect() as connection:
+        query = select(func.count()).select_from(table)
+        for column, value in where.items():
+            query = query.where(table.c[column] == value)
+        return connection.execute(query).scalar()
+
+
+def _shard_of(email):
+    return db.session.get(UserDirectory, email).shard
+
+
+def _register_on_both_shards(app, client):
+    """Registers users until both shards have one (placement is uuid4 % 2)."""
+    registered = {}
+    for index in range(64):
+        email = f"user{index}@example.com"
+        registered[email] = _register(client, email)
+        with app.app_context():
+            if len({_shard_of(email) for email in registered}) == 2:
+                return registered
+    raise AssertionError('every user landed on the same shard')
+
+
+def test_register_and_login_use_the_assigned_shard(app, client):
+    registered = _register_on_both_shards(app, client)
+    with app.app_context():
+        shards = {email: _shard_of(email) for email in registered}
+        for email, body in registered.items():
+            user_id = uuid.UUID(body["user"]["id"])
+            assert shards[email] == shard_for_new_user(user_id)
+            assert _rows_on_shard(shards[email], User.__table__, id=user_id) == 1
+            assert _rows_on_shard(1 - shards[email], User.__table__, id=user_id) == 0
+
+    for email in registered:
+        login = client.post('/api/auth/login', json={"email": email, "password": 'password123'})
+        assert login.status_code == 200 and login.get_json()["user"]["email"] == email
+        headers = {"Authorization": f"Bearer {login.get_json()['token']}"}
+        quests = client.get('/api/quests', headers=headers).get_json()
+        assert [quest["name"] for quest in quests] == ['General'] # Solo ve las filas de su shard
+    assert client.post('/api/auth/register', json={"email": 'user0@example.com', "password": 'password123', "name": 'x'}).status_code == 409
+
+
+def test_find_user_by_email_across_shards(app, client):
+    registered = _register_on_both_shards(app, client)
+    with app.app_context():
+        for email, body in registered.items():
+            assert str(find_user_by_email(email).id) == body["user"]["id"]
+        assert find_user_by_email('missing@example.com') is None
+
+
+def test_move_user_to_shard(app, client):
+    body = _register(client, 'mover@example.com')
+    user_id, headers = uuid.UUID(body["user"]["id"]), {"Authorization": f"Bearer {body['token']}"}
+    tag_id = client.get('/api/tags', headers=headers).get_json()[0]["id"]
+    payload = {"title": 'Travels', "points_value": 10, "energy_value": 5, "tag_ids": [tag_id]}
+    assert client.post('/api/pool-missions', json=payload, headers=headers).status_code == 201
+
+    with app.app_context():
+        source = _shard_of('mover@example.com')
+        copied = move_user_to_shard(db, 'mover@example.com', 1 - source, chunk_size=2, grace_seconds=0)
+        assert copied["users"] == 1 and copied["pool_missions"] == 1 and copied["pool_mission_tags"] == 1
+        assert copied["tags"] == 8
+        assert (_shard_of('mover@example.com'), db.session.get(UserDirectory, 'mover@example.com').status) == (1 - source, 'ACTIVE')
+        assert _rows_on_shard(source, User.__table__, id=user_id) == 0
+        assert _rows_on_shard(source, PoolMission.__table__, user_id=user_id) == 0
+        assert _rows_on_shard(source, pool_mission_tags_association) == 0
+        assert _rows_on_shard(1 - source, PoolMission.__table__, user_id=user_id) == 1
+
+    # El mismo token sigue sirviendo: la siguiente petición consulta el directorio actualizado
+    missions = client.get('/api/pool-missions', headers=headers).get_json()
+    assert [(mission["title"], [tag["id"] for tag in mission["tags"]]) for mission in missions] == [('Travels', [tag_id])]
+
+
+def test_directory_cache_needs_a_shared_backend_with_several_workers():
+    create_sharded_test_app(shards=2, WEB_CONCURRENCY=2)
+    assert directory_cache.backend is None and directory_cache.ttl == 0
+    create_sharded_test_app(shards=2)
+    assert directory_cache.backend.name == 'memory'
@@ -0,0 +1,77 @@
+# backend/tests/test_tag_index.py
+"""tag_ids (user-047) and the occurrences' tag_snapshot / rec_duration_minutes copies (user-048) follow the association tables."""
+import uuid
+from app import db
+from app.models import PoolMission, ScheduledMission, HabitOccurrence
+
+
+def _expected(*tags):
+    tags = sorted(tags, key=lambda tag: tag["id"])
+    return [uuid.UUID(tag["id"]) for tag in tags], sorted(({"id": tag["id"], "name": tag["name"]} for tag in tags), key=lambda tag: tag["name"])
+
+
+def assert_occurrences_tagged(app, template_id, *tags):
+    expected_ids, expected_snapshot = _expected(*tags)
+    with app.app_context():
+        occurrences = HabitOccurrence.query.filter_by(habit_template_id=uuid.UUID(template_id)).all()
+        assert occurrences
+        for occurrence in occurrences:
+            assert sorted(occurrence.tag_ids) == expected_ids
+            assert sorted(occurrence.tag_snapshot, key=lambda tag: tag["name"]) == expected_snapshot
+        db.session.remove()
+
+
+def assert_entity_tagged(app, model, entity_id, *tags):
+    with app.app_context():
+        entity = db.session.get(model, uuid.UUID(entity_id))
+        assert sorted(entity.tag_ids) == _expected(*tags)[0]
+        assert sorted(entity.tag_ids) == sorted(tag.id for tag in entity.tags)
+        db.session.remove()
+
+
+def test_occurrence_tags_follow_template_tags(app, api):
+    work, home = api.create_tag('work'), api.create_tag('home')
+    template = api.create_habit_template('Read', tag_ids=[work["id"]])
+    assert_occurrences_tagged(app, template["id"], work)
+
+    api.post(f"/api/tags/habit-templates/{template['id']}/tags", {"tag_id": home["id"]})
+    assert_occurrences_tagged(app, template["id"], work, home)
+
+    api.put(f"/api/tags/{home['id']}", {"name": 'house'})
+    assert_occurrences_tagged(app, template["id"], work, {"id": home["id"], "name": 'house'})
+
+    api.delete(f"/api/tags/habit-templates/{template['id']}/tags/{work['id']}")
+    assert_occurrences_tagged(app, template["id"], {"id": home["id"], "name": 'house'})
+
+    api.delete(f"/api/tags/{home['id']}")
+    assert_occurrences_tagged(app, template["id"])
+
+
+def test_mission_tag_ids_follow_associations(app, api):
+    work, home = api.create_tag('work'), api.create_tag('home')
+    pool = api.create_pool_mission('Pool', tag_ids=[work["id"]])
+    scheduled = api.create_scheduled_mission('Meeting', tag_ids=[work["id"], home["id"]])
+    api.create_pool_mission('Untagged')
+    assert_entity_tagged(app, PoolMission, pool["id"], work)
+    assert_entity_tagged(app, ScheduledMission, scheduled["id"], work, home)
+
+    api.post(f"/api/tags/pool-missions/{pool['id']}/tags", {"tag_id": home["id"]})
+    api.delete(f"/api/tags/scheduled-missions/{scheduled['id']}/tags/{home['id']}")
+    assert_entity_tagged(app, PoolMission, pool["id"], work, home)
+    assert_entity_tagged(app, ScheduledMission, scheduled["id"], work)
+
+    api.delete(f"/api/tags/{work['id']}")
+    assert_entity_tagged(app, PoolMission, pool["id"], home)
+    assert_entity_tagged(app, ScheduledMission, scheduled["id"])
+
+    filtered = api.get('/api/pool-missions', query={"tags": home["id"]})
+    assert [mission["id"] for mission in filtered] == [pool["id"]]
+
+
+def test_occurrence_duration_follows_template(app, api):
+    template = api.create_habit_template('Run', rec_start_time='07:00', rec_duration_minutes=30)
+    api.put(f"/api/habit-templates/{template['id']}", {"rec_duration_minutes": 45})
+    with app.app_context():
+        durations = {occ.rec_duration_minutes for occ in HabitOccurrence.query.filter_by(habit_template_id=uuid.UUID(template["id"]))}
+        db.session.remove()
+    assert durations == {45}
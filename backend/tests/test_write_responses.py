@@ -0,0 +1,97 @@
+# backend/tests/test_write_responses.py
+"""Write routes (user-046) build their response from the state already in the session: no SQL after the commit."""
+import uuid
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy import event
+from app import db
+from app.models import HabitOccurrence
+from app.observability.sql_metrics import query_budget
+
+COMMIT = object()
+
+
+@pytest.fixture
+def sql_log(app):
+    """Statements run on the default engine, with COMMIT markers."""
+    log = []
+    with app.app_context():
+        engine = db.engine
+    listeners = (
+        ('before_cursor_execute', lambda conn, cursor, statement, *args: log.append(statement)),
+        ('commit', lambda conn: log.append(COMMIT)),
+    )
+    for name, listener in listeners:
+        event.listen(engine, name, listener)
+    yield log
+    for name, listener in listeners:
+        event.remove(engine, name, listener)
+
+
+def _statements_after_last_commit(log):
+    assert COMMIT in log, "the route did not commit"
+    last_commit = len(log) - 1 - log[::-1].index(COMMIT)
+    return log[last_commit + 1:]
+
+
+def test_write_routes_issue_no_sql_after_commit(api, sql_log):
+    work, home = api.create_tag('work'), api.create_tag('home')
+    quest = api.create_quest('Side project')
+    pool = api.create_pool_mission('Pool', tag_ids=[work["id"]])
+    scheduled = api.create_scheduled_mission('Meeting', tag_ids=[work["id"]])
+    template = api.create_habit_template('Read', tag_ids=[work["id"]])
+    occurrence = api.get('/api/habit-occurrences')[0]
+    writes = [
+        ('PUT', f"/api/pool-missions/{pool['id']}", {"title": 'Pool 2', "tag_ids": [home["id"]], "quest_id": quest["id"]}),
+        ('PATCH', f"/api/pool-missions/{pool['id']}/focus", {"focus_status": 'DEFERRED'}),
+        ('PUT', f"/api/pool-missions/{pool['id']}", {"status": 'COMPLETED'}),
+        ('PATCH', f"/api/pool-missions/{pool['id']}/undo-completion", None),
+        ('PUT', f"/api/scheduled-missions/{scheduled['id']}", {"title": 'Meeting 2', "tag_ids": [home["id"]]}),
+        ('PATCH', f"/api/scheduled-missions/{scheduled['id']}/status", {"status": 'COMPLETED'}),
+        ('PATCH', f"/api/scheduled-missions/{scheduled['id']}/undo-completion", None),
+        ('PATCH', f"/api/habit-occurrences/{occurrence['id']}/status", {"status": 'COMPLETED'}),
+        ('PATCH', f"/api/habit-occurrences/{occurrence['id']}/undo-completion", None),
+        ('PUT', f"/api/habit-templates/{template['id']}", {"title": 'Read more', "tag_ids": [home["id"]]}),
+        ('PUT', f"/api/habit-templates/{template['id']}", {"is_active": False}),
+        ('PUT', f"/api/quests/{quest['id']}", {"name": 'Renamed'}),
+        ('PUT', f"/api/tags/{work['id']}", {"name": 'job'}),
+    ]
+    for method, path, payload in writes:
+        sql_log.clear()
+        api.call(method, path, json=payload)
+        assert _statements_after_last_commit(sql_log) == [], f"{method} {path}"
+
+
+def test_deactivating_template_removes_future_pending_occurrences(app, api):
+    template = api.create_habit_template('Read')
+
+    def future_pending():
+        with app.app_context():
+            now = datetime.now(timezone.utc)
+            occurrences = HabitOccurrence.query.filter_by(habit_template_id=uuid.UUID(template["id"]), status='PENDING').all()
+            db.session.remove()
+        return [occurrence for occurrence in occurrences if occurrence.scheduled_start_datetime >= now]
+
+    assert future_pending()
+    api.put(f"/api/habit-templates/{template['id']}", {"is_active": False})
+    assert future_pending() == []
+
+
+def test_occurrence_generation_reads_existing_occurrences_once(api):
+    with query_budget(20, label='POST /api/habit-templates', n_plus_one_threshold=3):
+        template = api.create_habit_template('Read')
+    with query_budget(25, label='PUT /api/habit-templates', n_plus_one_threshold=3):
+        api.put(f"/api/habit-templates/{template['id']}", {"title": 'Read more'})
+
+
+def test_updated_at_in_response_is_the_stored_value(app, api, sql_log):
+    # onupdate=datetime.utcnow se calcula en Python: el UPDATE lo envía como parámetro y el flush lo deja en la instancia
+    from app.models import PoolMission
+    pool = api.create_pool_mission('Pool')
+    sql_log.clear()
+    updated = api.put(f"/api/pool-missions/{pool['id']}", {"title": 'Pool 2'})
+    assert not any('RETURNING' in statement for statement in sql_log if statement is not COMMIT)
+    with app.app_context():
+        stored = db.session.get(PoolMission, uuid.UUID(pool["id"])).updated_at
+    assert updated["updated_at"] > pool["updated_at"]
+    assert datetime.fromisoformat(updated["updated_at"]).replace(tzinfo=None) == stored.replace(tzinfo=None)